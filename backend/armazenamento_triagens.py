@@ -0,0 +1,148 @@
+"""
+Formato compacto dos documentos de triagem no Firestore
+Os padrões encontrados são gravados como referência (tipo + padrao_id) e a
+versão da base de conhecimento vai no documento, em vez do `config` inteiro do
+padrão; o config só é mantido quando difere do da base. Os configs de cada
+versão ficam gravados uma vez no próprio armazenamento (empacotar_configs), e a
+leitura recoloca nos padrões os configs da versão registrada no documento,
+não os da base carregada no momento. Textos longos (chamado,
+diagnóstico, soluções, código) viram blobs zlib. Campos usados em filtros e
+agregações nunca são comprimidos, e a leitura descomprime qualquer blob de
+forma transparente, então documentos antigos e novos convivem na coleção.
+"""
+
+import json
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from matcher_padroes import GRUPOS_PADROES
+
+FORMATO_COMPACTO = 2
+LIMIAR_COMPRESSAO = 256  # bytes UTF-8 a partir dos quais um texto é comprimido
+NIVEL_COMPRESSAO = 6
+
+# Campos de documento que recebem compressão (os demais ficam como estão)
+CAMPOS_COMPRIMIDOS = ('chamado_texto', 'analise_ia', 'solucoes_sugeridas', 'padroes_encontrados', 'features')
+# Chaves que aparecem em filtros/agregações (analise_ia.tipo_problema etc.) e precisam continuar texto
+CHAVES_NUNCA_COMPRIMIDAS = {'tipo_problema', 'prioridade', 'categoria_detalhada', 'origem', 'tipo', 'padrao_id'}
+
+
+def configs_padroes(base_conhecimento: Dict[str, Any]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Config de cada padrão da base, por (tipo, padrao_id)"""
+    configs = {}
+    for caminho, tipo in GRUPOS_PADROES:
+        grupo = base_conhecimento
+        for chave in caminho:
+            grupo = grupo.get(chave, {})
+        for padrao_id, config in grupo.items():
+            configs[(tipo, padrao_id)] = config
+    return configs
+
+
+def referenciar_padroes(padroes: List[Dict[str, Any]], configs: Dict[Tuple[str, str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove o config dos padrões iguais aos da base (recuperável pela versão gravada no documento)"""
+    referencias = []
+    for padrao in padroes or []:
+        if 'config' in padrao and padrao['config'] == configs.get((padrao.get('tipo'), padrao.get('padrao_id'))):
+            padrao = {chave: valor for chave, valor in padrao.items() if chave != 'config'}
+        referencias.append(padrao)
+    return referencias
+
+
+def expandir_padroes(padroes: List[Dict[str, Any]], configs: Dict[Tuple[str, str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Recoloca o config da base nos padrões gravados como referência"""
+    return [
+        padrao if 'config' in padrao else {**padrao, 'config': configs.get((padrao.get('tipo'), padrao.get('padrao_id')), {})}
+        for padrao in padroes or []
+    ]
+
+
+def empacotar_configs(configs: Dict[Tuple[str, str], Dict[str, Any]]) -> bytes:
+    """Configs dos padrões de uma versão da base como JSON comprimido (cópia gravada no armazenamento)"""
+    lista = [{'tipo': tipo, 'padrao_id': padrao_id, 'config': config} for (tipo, padrao_id), config in sorted(configs.items())]
+    texto = json.dumps(lista, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return zlib.compress(texto.encode('utf-8'), NIVEL_COMPRESSAO)
+
+
+def desempacotar_configs(dados: bytes) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Inverso de empacotar_configs"""
+    lista = json.loads(zlib.decompress(dados).decode('utf-8'))
+    return {(item['tipo'], item['padrao_id']): item['config'] for item in lista}
+
+
+def comprimir(valor: Any, chave: Optional[str] = None) -> Any:
+    """Comprime (zlib) os textos longos de um valor, percorrendo dicts e listas"""
+    if isinstance(valor, dict):
+        return {k: comprimir(v, k) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [comprimir(v) for v in valor]
+    if isinstance(valor, str) and chave not in CHAVES_NUNCA_COMPRIMIDAS:
+        dados = valor.encode('utf-8')
+        if len(dados) >= LIMIAR_COMPRESSAO:
+            comprimido = zlib.compress(dados, NIVEL_COMPRESSAO)
+            if len(comprimido) < len(dados):
+                return comprimido
+    return valor
+
+
+def descomprimir(valor: Any) -> Any:
+    """Inverso de comprimir: todo valor bytes do documento é um texto comprimido"""
+    if isinstance(valor, dict):
+        return {k: descomprimir(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [descomprimir(v) for v in valor]
+    if isinstance(valor, (bytes, bytearray)):
+        return zlib.decompress(valor).decode('utf-8')
+    return valor
+
+
+def compactar_documento(
+    data: Dict[str, Any],
+    configs: Dict[Tuple[str, str], Dict[str, Any]],
+    versao_base: Optional[str]
+) -> Dict[str, Any]:
+    """Documento de triagem no formato compacto (padrões por referência + textos comprimidos)"""
+    compacto = dict(data)
+    compacto['padroes_encontrados'] = referenciar_padroes(data.get('padroes_encontrados', []), configs)
+    for campo in CAMPOS_COMPRIMIDOS:
+        if campo in compacto:
+            compacto[campo] = comprimir(compacto[campo], campo)
+    compacto['formato_armazenamento'] = FORMATO_COMPACTO
+    compacto['versao_base_conhecimento'] = versao_base
+    return compacto
+
+
+def decodificar_documento(
+    data: Dict[str, Any],
+    configs_versao: Optional[Callable[[Optional[str]], Dict[Tuple[str, str], Dict[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """
+    Documento lido do Firestore com os textos descomprimidos (qualquer formato)
+
+    Args:
+        data: Documento como gravado
+        configs_versao: Configs dos padrões de uma versão da base; com ela, os
+            padrões gravados por referência recebem o config da versão
+            registrada no documento (versao_base_conhecimento)
+    """
+    decodificado = {campo: descomprimir(valor) if campo in CAMPOS_COMPRIMIDOS else valor for campo, valor in data.items()}
+    if configs_versao is not None and decodificado.get('padroes_encontrados'):
+        decodificado['padroes_encontrados'] = expandir_padroes(
+            decodificado['padroes_encontrados'], configs_versao(decodificado.get('versao_base_conhecimento'))
+        )
+    return decodificado
+
+
+def tamanho_documento(valor: Any) -> int:
+    """Tamanho aproximado no Firestore (regras de cálculo de armazenamento da documentação)"""
+    if isinstance(valor, dict):
+        return sum(len(k.encode('utf-8')) + 1 + tamanho_documento(v) for k, v in valor.items())
+    if isinstance(valor, list):
+        return sum(tamanho_documento(v) for v in valor)
+    if isinstance(valor, str):
+        return len(valor.encode('utf-8')) + 1
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if valor is None or isinstance(valor, bool):
+        return 1
+    return 8
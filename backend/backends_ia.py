@@ -0,0 +1,254 @@
+"""
+Backends de IA da triagem
+Interface única (síncrona, assíncrona, streaming e lote) com implementações
+para o Gemini, para um servidor HTTP (ex.: o stand-in servidor_ia_local.py) e
+para o modo mock. O prefixo estático do prompt é fixado na criação do backend,
+como system instruction; cada chamada recebe apenas o conteúdo dinâmico.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+import google.generativeai as genai
+import httpx
+
+from prompt_triagem import hash_prompt, ids_do_lote
+
+URL_BACKEND_PADRAO = "http://localhost:8090"
+TIMEOUT_BACKEND_HTTP = 60
+
+ANALISE_MOCK = {
+    "tipo_problema": "codigo",
+    "categoria_detalhada": "Erro de validação em operação CRUD",
+    "diagnostico": "Problema detectado em operação de banco de dados com possível violação de constraint",
+    "solucao_sugerida": "Verificar validações de dados e constraints do banco antes de executar operação",
+    "codigo_exemplo": "Try\n    ' Validação de dados\n    If String.IsNullOrEmpty(campo) Then Throw New ArgumentException(\"Campo obrigatório\")\n    ' Operação de banco\nCatch ex As Exception\n    Throw New Exception($\"Erro na operação: {ex.Message}\")\nEnd Try",
+    "script_sql": "SELECT * FROM tabela WHERE campo = 'valor'",
+    "prioridade": "alta",
+    "tempo_estimado": "1-2 horas",
+    "recursos_necessarios": ["Desenvolvedor VB.NET", "Acesso ao banco de dados"],
+    "observacoes": "Esta é uma análise mockada. Configure a API do Gemini para análises mais precisas."
+}
+
+
+class ErroBackendIA(Exception):
+    """Falha ao chamar o backend de IA (HTTP, cota, timeout)"""
+
+
+class BackendIA(ABC):
+    nome = "base"
+    mock = False
+
+    def __init__(self, instrucao_sistema: str):
+        self.instrucao_sistema = instrucao_sistema
+
+    def montar_conteudo(self, conteudo: str) -> List[str]:
+        """Prefixo como primeira parte, para backends sem system instruction"""
+        return [self.instrucao_sistema, conteudo]
+
+    @abstractmethod
+    def gerar(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Gera a resposta para o conteúdo dinâmico do prompt
+
+        Args:
+            conteudo: Sufixo do prompt (o prefixo é a instrução de sistema)
+            esquema: Esquema JSON da resposta, quando o backend suporta
+
+        Returns:
+            Texto da resposta
+        """
+
+    async def gerar_async(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        return await asyncio.to_thread(self.gerar, conteudo, esquema)
+
+    def gerar_stream(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        yield self.gerar(conteudo, esquema)
+
+    async def gerar_lote(self, conteudos: List[str], esquema: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Várias requisições independentes em paralelo, na ordem da entrada"""
+        return list(await asyncio.gather(*(self.gerar_async(c, esquema) for c in conteudos)))
+
+
+class BackendGemini(BackendIA):
+    nome = "gemini"
+
+    def __init__(self, instrucao_sistema: str, api_key: str, nome_modelo: str = 'models/gemini-2.5-flash'):
+        super().__init__(instrucao_sistema)
+        genai.configure(api_key=api_key)
+        try:
+            self.model = genai.GenerativeModel(nome_modelo, system_instruction=instrucao_sistema)
+            self.prefixo_no_modelo = True
+        except TypeError:
+            # SDK sem suporte a system_instruction: o prefixo vai como primeira parte de cada requisição
+            self.model = genai.GenerativeModel(nome_modelo)
+            self.prefixo_no_modelo = False
+        self._configs: Dict[str, Any] = {}
+
+    def _conteudo(self, conteudo: str):
+        return conteudo if self.prefixo_no_modelo else self.montar_conteudo(conteudo)
+
+    def _argumentos(self, esquema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """generation_config com response_schema, quando o SDK suporta"""
+        if esquema is None:
+            return {}
+        chave = json.dumps(esquema, sort_keys=True)
+        if chave not in self._configs:
+            try:
+                self._configs[chave] = genai.GenerationConfig(
+                    response_mime_type="application/json", response_schema=esquema
+                )
+            except (AttributeError, TypeError):
+                # SDK sem response_schema: o formato é descrito apenas no prompt
+                self._configs[chave] = None
+        config = self._configs[chave]
+        return {"generation_config": config} if config is not None else {}
+
+    def gerar(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        return self.model.generate_content(self._conteudo(conteudo), **self._argumentos(esquema)).text
+
+    async def gerar_async(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        if not hasattr(self.model, "generate_content_async"):
+            return await super().gerar_async(conteudo, esquema)
+        resposta = await self.model.generate_content_async(self._conteudo(conteudo), **self._argumentos(esquema))
+        return resposta.text
+
+    def gerar_stream(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        for pedaco in self.model.generate_content(self._conteudo(conteudo), stream=True, **self._argumentos(esquema)):
+            yield pedaco.text
+
+
+class BackendHTTP(BackendIA):
+    """
+    Cliente do protocolo do servidor local:
+    POST /gerar {"instrucao_sistema", "conteudo", "esquema", "stream"} -> {"texto"}
+    (com stream, uma linha JSON {"texto"} por pedaço)
+    """
+
+    nome = "http"
+
+    def __init__(self, instrucao_sistema: str, url: str = URL_BACKEND_PADRAO, timeout: float = TIMEOUT_BACKEND_HTTP):
+        super().__init__(instrucao_sistema)
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._cliente = httpx.Client(timeout=timeout)
+        self._cliente_async: Optional[httpx.AsyncClient] = None
+        self._loop_cliente_async = None
+
+    def _payload(self, conteudo: str, esquema: Optional[Dict[str, Any]], stream: bool = False) -> Dict[str, Any]:
+        return {
+            "instrucao_sistema": self.instrucao_sistema,
+            "conteudo": conteudo,
+            "esquema": esquema,
+            "stream": stream
+        }
+
+    def _texto(self, resposta: httpx.Response) -> str:
+        if resposta.status_code != 200:
+            raise ErroBackendIA(f"HTTP {resposta.status_code}: {resposta.text[:200]}")
+        return resposta.json()["texto"]
+
+    def gerar(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        try:
+            return self._texto(self._cliente.post(f"{self.url}/gerar", json=self._payload(conteudo, esquema)))
+        except httpx.HTTPError as e:
+            raise ErroBackendIA(str(e)) from e
+
+    async def gerar_async(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        # Um cliente por event loop para reaproveitar conexões sob concorrência
+        loop = asyncio.get_running_loop()
+        if self._cliente_async is None or self._loop_cliente_async is not loop:
+            self._cliente_async = httpx.AsyncClient(timeout=self.timeout)
+            self._loop_cliente_async = loop
+        try:
+            resposta = await self._cliente_async.post(f"{self.url}/gerar", json=self._payload(conteudo, esquema))
+        except httpx.HTTPError as e:
+            raise ErroBackendIA(str(e)) from e
+        return self._texto(resposta)
+
+    def gerar_stream(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        payload = self._payload(conteudo, esquema, stream=True)
+        try:
+            with self._cliente.stream("POST", f"{self.url}/gerar", json=payload) as resposta:
+                if resposta.status_code != 200:
+                    raise ErroBackendIA(f"HTTP {resposta.status_code}: {resposta.read()[:200]!r}")
+                for linha in resposta.iter_lines():
+                    if linha.strip():
+                        yield json.loads(linha)["texto"]
+        except httpx.HTTPError as e:
+            raise ErroBackendIA(str(e)) from e
+
+
+class BackendMock(BackendIA):
+    """Análise fixa para demonstração, inclusive no formato de lote"""
+
+    nome = "mock"
+    mock = True
+
+    def gerar(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        ids = ids_do_lote(conteudo)
+        if ids:
+            return json.dumps([{"ticket_id": i, **ANALISE_MOCK} for i in ids], ensure_ascii=False)
+        return json.dumps(ANALISE_MOCK, ensure_ascii=False)
+
+    async def gerar_async(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        return self.gerar(conteudo, esquema)
+
+
+class GravadorRespostas(BackendIA):
+    """Grava em JSONL as respostas de outro backend, para o servidor local reproduzir"""
+
+    def __init__(self, backend: BackendIA, caminho: str):
+        super().__init__(backend.instrucao_sistema)
+        self.backend = backend
+        self.caminho = caminho
+        self.nome = backend.nome
+        self._lock = threading.Lock()
+
+    def _gravar(self, conteudo: str, texto: str):
+        linha = json.dumps({"chave": hash_prompt(conteudo), "texto": texto}, ensure_ascii=False)
+        with self._lock, open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(linha + "\n")
+
+    def gerar(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        texto = self.backend.gerar(conteudo, esquema)
+        self._gravar(conteudo, texto)
+        return texto
+
+    async def gerar_async(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> str:
+        texto = await self.backend.gerar_async(conteudo, esquema)
+        self._gravar(conteudo, texto)
+        return texto
+
+    def gerar_stream(self, conteudo: str, esquema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        pedacos = []
+        for pedaco in self.backend.gerar_stream(conteudo, esquema):
+            pedacos.append(pedaco)
+            yield pedaco
+        self._gravar(conteudo, "".join(pedacos))
+
+
+def criar_backend_ia(instrucao_sistema: str) -> BackendIA:
+    """
+    Backend escolhido por TRIAGEM_BACKEND_IA (gemini, http ou mock)
+    Sem configuração, usa o Gemini quando GEMINI_API_KEY está definida e o mock caso contrário.
+    """
+    api_key = os.getenv("GEMINI_API_KEY", "")
+    gemini_configurado = bool(api_key and api_key != "sua_chave_aqui")
+    tipo = os.getenv("TRIAGEM_BACKEND_IA", "").lower() or ("gemini" if gemini_configurado else "mock")
+
+    if tipo == "gemini" and gemini_configurado:
+        backend: BackendIA = BackendGemini(instrucao_sistema, api_key)
+    elif tipo == "http":
+        backend = BackendHTTP(instrucao_sistema, os.getenv("TRIAGEM_BACKEND_URL", URL_BACKEND_PADRAO))
+    else:
+        backend = BackendMock(instrucao_sistema)
+
+    caminho_gravacao = os.getenv("TRIAGEM_GRAVAR_RESPOSTAS", "")
+    if caminho_gravacao and not backend.mock:
+        backend = GravadorRespostas(backend, caminho_gravacao)
+    return backend
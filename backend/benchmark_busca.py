@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca textual de triagens (SQLite FTS5)
+Indexa N triagens sintéticas (chamados do benchmark do matcher com nomes de
+escola e códigos de erro variados) e mede a latência de buscas com termos
+raros, intermediários e frequentes (presentes em até 3/4 das triagens), com
+e sem filtro de módulo, contra a meta de p95 abaixo de META_P95_MS.
+
+Uso:
+    python benchmark_busca.py [--linhas 1000000] [--consultas 100] [--banco /tmp/bench_busca.db] [--reusar]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from benchmark_matcher import gerar_chamados
+from busca_triagens import BuscaTriagens
+
+MODULOS = ["CADASTROS", "PEDAGÓGICO", "FINANCEIRO", "RELATÓRIOS"]
+ESCOLAS = [f"Escola{n:05d}" for n in range(20000)]
+LOTE_INDEXACAO = 50000
+META_P95_MS = 10.0
+
+
+def gerar_triagens(total: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    chamados = gerar_chamados(2000, semente)
+    for i in range(total):
+        yield {
+            "triagem_id": f"bench-{i}",
+            "ticket_numero": str(100000 + i),
+            "modulo": MODULOS[i % len(MODULOS)],
+            "chamado_texto": f"{aleatorio.choice(ESCOLAS)} relata erro E{aleatorio.randint(0, 99999)}\n"
+                             f"{aleatorio.choice(chamados)}",
+            "analise_ia": {
+                "diagnostico": aleatorio.choice([
+                    "Violação de chave primária ao inserir aluno",
+                    "Timeout na consulta de mensalidades",
+                    "Deadlock entre transações de boletos",
+                    "Permissão ausente para o perfil da secretaria"
+                ]),
+                "solucao_sugerida": "Revisar validações antes do INSERT",
+                "tipo_problema": "banco",
+                "prioridade": "alta"
+            }
+        }
+
+
+def medir(busca: BuscaTriagens, consultas, modulo=None):
+    tempos = []
+    for q in consultas:
+        inicio = time.perf_counter()
+        busca.buscar(q, modulo=modulo, limite=20)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da busca textual de triagens")
+    parser.add_argument("--linhas", type=int, default=1000000)
+    parser.add_argument("--consultas", type=int, default=100)
+    parser.add_argument("--banco", default="/tmp/bench_busca.db")
+    parser.add_argument("--reusar", action="store_true", help="Mede no banco já indexado por uma execução anterior")
+    args = parser.parse_args()
+
+    if args.reusar and os.path.exists(args.banco):
+        busca = BuscaTriagens(args.banco)
+        print(f"📦 Reusando {args.banco} com {len(busca)} triagens")
+    else:
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(args.banco + sufixo):
+                os.remove(args.banco + sufixo)
+        busca = BuscaTriagens(args.banco)
+
+        inicio = time.perf_counter()
+        lote = []
+        for triagem in gerar_triagens(args.linhas):
+            lote.append(triagem)
+            if len(lote) == LOTE_INDEXACAO:
+                busca.indexar(lote)
+                lote = []
+        busca.indexar(lote)
+        busca.otimizar()
+        tempo = time.perf_counter() - inicio
+        print(f"📦 {args.linhas} triagens indexadas e otimizadas em {tempo:.1f}s ({args.linhas / tempo:.0f}/s, "
+              f"{os.path.getsize(args.banco) / 2 ** 20:.0f} MB)")
+
+    aleatorio = random.Random(7)
+    grupos = {
+        "raros (escola + código)": [
+            f"{aleatorio.choice(ESCOLAS)} E{aleatorio.randint(0, 99999)}" for _ in range(args.consultas)
+        ],
+        "intermediários (escola)": [aleatorio.choice(ESCOLAS) for _ in range(args.consultas)],
+        "frequentes (deadlock boletos)": ["deadlock boletos"] * args.consultas,
+        "frequente com acento (violação chave)": ["violação chave"] * args.consultas
+    }
+    pior_p95 = 0.0
+    for nome, consultas in grupos.items():
+        for modulo in (None, "FINANCEIRO"):
+            mediana, p95 = medir(busca, consultas, modulo)
+            pior_p95 = max(pior_p95, p95)
+            print(f"🔍 {nome}{' + módulo' if modulo else ''}: mediana {mediana:.2f} ms | p95 {p95:.2f} ms")
+
+    if pior_p95 >= META_P95_MS:
+        print(f"❌ Pior p95 {pior_p95:.2f} ms acima da meta de {META_P95_MS:.0f} ms")
+        return 1
+    print(f"✅ Pior p95 {pior_p95:.2f} ms dentro da meta de {META_P95_MS:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark das consultas do Firestore contra o emulador
+Popula as coleções `triagens` e `analises` do emulador com documentos de
+tamanho realista (chamado completo, análise de IA, soluções) e compara cada
+consulta de listagem lendo o documento inteiro e com a projeção usada em
+firebase_db.py: latência mediana por chamada e bytes de payload recebidos
+(JSON dos campos devolvidos).
+
+Requer o emulador rodando (firebase emulators:start --only firestore) e
+FIRESTORE_EMULATOR_HOST apontando para ele; os dados do projeto informado
+são apagados antes da carga.
+
+Uso:
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmark_firestore.py [--triagens 5000] [--repeticoes 30]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from google.cloud import firestore
+from google.cloud.firestore import FieldFilter
+
+from benchmark_matcher import gerar_chamados
+from firebase_db import CAMPOS_RESUMO_ANALISE, CAMPOS_RESUMO_TRIAGEM, FirebaseDatabase
+
+MODULOS = ["CADASTROS", "PEDAGÓGICO", "FINANCEIRO", "RELATÓRIOS"]
+TRIAGENS_POR_TICKET = 5
+LOTE_ESCRITA = 500
+
+
+def limpar_emulador(host: str, projeto: str):
+    """Apaga todos os documentos do projeto no emulador"""
+    httpx.delete(f"http://{host}/emulator/v1/projects/{projeto}/databases/(default)/documents").raise_for_status()
+
+
+def popular(client: firestore.Client, triagens: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    chamados = gerar_chamados(1000, semente)
+    agora = datetime.now(timezone.utc)
+
+    lote, pendentes = client.batch(), 0
+    for i in range(triagens):
+        chamado = aleatorio.choice(chamados)
+        data = agora - timedelta(minutes=i)
+        ticket = str(100000 + i // TRIAGENS_POR_TICKET)
+        lote.set(client.collection('triagens').document(), {
+            'ticket_numero': ticket,
+            'chamado_texto': chamado,
+            'modulo_identificado': MODULOS[i % len(MODULOS)],
+            'padroes_encontrados': [{'tipo': 'erro_sql', 'padrao_id': f'p{n}', 'confianca': 0.8} for n in range(4)],
+            'analise_ia': {
+                'diagnostico': chamado[:400],
+                'solucao_sugerida': chamado[-600:],
+                'tipo_problema': 'banco',
+                'prioridade': 'media'
+            },
+            'solucoes_sugeridas': [{'categoria': 'Banco', 'solucao': chamado[:300], 'confianca': 0.7}] * 3,
+            'resumo': {'total_padroes_detectados': 4, 'prioridade_geral': 'media'},
+            'total_solucoes': 3,
+            'modo_mock': False,
+            'tempo_processamento_ms': aleatorio.uniform(200, 3000),
+            'foi_utilizada': i % 3 == 0,
+            'data_triagem': data
+        })
+        lote.set(client.collection('analises').document(), {
+            'ticket_numero': ticket,
+            'chamado_gerado': chamado,
+            'modulo_identificado': MODULOS[i % len(MODULOS)],
+            'usuario_nome': f'Usuário {i % 50}',
+            'cliente_nome': f'Escola {i % 400}',
+            'tipo_identificado': 'erro',
+            'foi_copiado': False,
+            'data_analise': data
+        })
+        pendentes += 2
+        if pendentes >= LOTE_ESCRITA:
+            lote.commit()
+            lote, pendentes = client.batch(), 0
+    if pendentes:
+        lote.commit()
+
+
+def medir(consulta, repeticoes: int):
+    """Latência mediana (ms) e bytes de payload de uma consulta"""
+    tempos, tamanho = [], 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        docs = list(consulta().stream())
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        tamanho = sum(len(json.dumps(doc.to_dict(), default=str).encode('utf-8')) for doc in docs)
+    return statistics.median(tempos), tamanho
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark das consultas do Firestore (emulador)")
+    parser.add_argument("--triagens", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--limite", type=int, default=10)
+    parser.add_argument("--projeto", default="demo-triagem")
+    args = parser.parse_args()
+
+    host = os.getenv("FIRESTORE_EMULATOR_HOST")
+    if not host:
+        print("❌ Defina FIRESTORE_EMULATOR_HOST (ex.: localhost:8080) com o emulador do Firestore rodando")
+        return 1
+
+    client = firestore.Client(project=args.projeto)
+    limpar_emulador(host, args.projeto)
+    inicio = time.perf_counter()
+    popular(client, args.triagens)
+    print(f"📦 {args.triagens} triagens e análises gravadas em {time.perf_counter() - inicio:.1f}s")
+
+    triagens = client.collection('triagens')
+    analises = client.collection('analises')
+    ticket = str(100000 + args.triagens // TRIAGENS_POR_TICKET // 2)
+    cenarios = [
+        (
+            "get_triagens_recentes",
+            lambda: triagens.order_by('data_triagem', direction='DESCENDING').limit(args.limite),
+            lambda: triagens.select(CAMPOS_RESUMO_TRIAGEM).order_by('data_triagem', direction='DESCENDING').limit(args.limite)
+        ),
+        (
+            "get_triagens_por_ticket",
+            lambda: triagens.where(filter=FieldFilter('ticket_numero', '==', ticket)),
+            lambda: triagens.where(filter=FieldFilter('ticket_numero', '==', ticket)).select(CAMPOS_RESUMO_TRIAGEM)
+        ),
+        (
+            "get_analises_recentes_sistema_principal",
+            lambda: analises.order_by('data_analise', direction='DESCENDING').limit(args.limite),
+            lambda: analises.select(CAMPOS_RESUMO_ANALISE).order_by('data_analise', direction='DESCENDING').limit(args.limite)
+        ),
+        (
+            "get_estatisticas_triagem",
+            lambda: triagens,
+            lambda: triagens.select(['data_triagem', 'foi_utilizada', 'modulo_identificado', 'tempo_processamento_ms'])
+        )
+    ]
+
+    for nome, completa, projetada in cenarios:
+        tempo_completo, bytes_completo = medir(completa, args.repeticoes)
+        tempo_projetado, bytes_projetado = medir(projetada, args.repeticoes)
+        print(f"🔍 {nome}: documento inteiro {tempo_completo:.1f} ms / {bytes_completo / 1024:.1f} KB | "
+              f"projeção {tempo_projetado:.1f} ms / {bytes_projetado / 1024:.1f} KB "
+              f"({bytes_completo / max(bytes_projetado, 1):.0f}x menos bytes)")
+
+    # Sanidade: os métodos de FirebaseDatabase usam as mesmas projeções
+    db = FirebaseDatabase(db=client)
+    recentes = db.get_triagens_recentes(args.limite)
+    completas = db.get_triagens_recentes(args.limite, campos_extras=['chamado_texto'])
+    print(f"✅ get_triagens_recentes: {len(recentes)} triagens; "
+          f"chamado_texto só com opt-in: {'chamado_texto' not in recentes[0] and 'chamado_texto' in completas[0]}")
+
+    limpar_emulador(host, args.projeto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
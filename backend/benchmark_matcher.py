@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark do matcher de padrões
+Mede o tempo por chamado da varredura exata e da busca aproximada
+
+Uso:
+    python benchmark_matcher.py [--chamados 2000] [--limite-ms 3]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from features_chamado import extrair_features
+from matcher_padroes import MatcherPadroes
+
+TRECHOS = [
+    "Cliente relata que ao tentar salvar um novo aluno o sistema apresenta erro",
+    "Constrant violation no BtnSalvar_Click após preencher os campos obrigatórios",
+    "Relatório financeiro demora e retorna timout na consulta de mensalidades",
+    "Transaction dedlock ao gerar boletos em lote para a turma",
+    "Usuário da secretaria recebe acesso negdo ao abrir o cadastro de turmas",
+    "MENU/LOCAL DO SISTEMA EM QUE ACONTECE: Cadastros > Alunos > Novo Aluno",
+    "VERSÃO DO SISTEMA EM QUE O PROBLEMA OCORREU: R = 2024.1.0",
+    "at Sponte.Web.Cadastros.Alunos.BtnSalvar_Click(Object sender, EventArgs e)",
+    "System.Data.SqlClient.SqlException (0x80131904): Violation of PRIMARY KEY constraint",
+]
+
+
+def gerar_chamados(total: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    return [
+        "\n".join(aleatorio.choice(TRECHOS) for _ in range(aleatorio.randint(4, 20)))
+        for _ in range(total)
+    ]
+
+
+def medir(matcher: MatcherPadroes, chamados) -> float:
+    """Retorna o tempo médio por chamado em milissegundos"""
+    inicio = time.perf_counter()
+    for chamado in chamados:
+        matcher.analisar(extrair_features(chamado))
+    return (time.perf_counter() - inicio) * 1000 / len(chamados)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do matcher de padrões")
+    parser.add_argument("--chamados", type=int, default=2000)
+    parser.add_argument("--limite-ms", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with open('base_conhecimento_triagem.json', 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    chamados = gerar_chamados(args.chamados)
+    exato = medir(MatcherPadroes(base, busca_aproximada=False), chamados)
+    aproximado = medir(MatcherPadroes(base, busca_aproximada=True), chamados)
+
+    print(f"📊 {args.chamados} chamados")
+    print(f"   Somente exato:     {exato:.3f} ms/chamado")
+    print(f"   Com aproximação:   {aproximado:.3f} ms/chamado")
+
+    if aproximado > args.limite_ms:
+        print(f"❌ Acima do limite de {args.limite_ms} ms/chamado")
+        return 1
+    print(f"✅ Dentro do limite de {args.limite_ms} ms/chamado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
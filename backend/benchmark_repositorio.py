@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark de vazão dos repositórios de triagens
+Grava N triagens de tamanho realista pelo registrar_triagem do backend
+escolhido e mede escritas por segundo; depois dispara as leituras do serviço
+(por ticket, recentes, páginas do histórico, leitura em lote, contagem e
+estatísticas) de várias threads ao mesmo tempo e mede operações por segundo e
+latência mediana/p95 de cada uma.
+
+Backends:
+    sqlite     SQLiteDatabase num arquivo temporário (ou --banco)
+    firestore  FirebaseDatabase contra o emulador (FIRESTORE_EMULATOR_HOST)
+    replica    ReplicaSQLite: escritas no emulador + SQLite, leituras no SQLite
+
+Os dados do projeto no emulador são apagados antes e depois da carga.
+
+Uso:
+    python benchmark_repositorio.py [--backend sqlite] [--triagens 5000] [--leituras 2000] [--threads 8]
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmark_repositorio.py --backend replica
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from benchmark_matcher import gerar_chamados
+from sqlite_db import ReplicaSQLite, SQLiteDatabase
+
+MODULOS = ["CADASTROS", "PEDAGÓGICO", "FINANCEIRO", "RELATÓRIOS"]
+TIPOS_PROBLEMA = ["bug", "configuracao", "banco", "performance"]
+PRIORIDADES = ["baixa", "media", "alta"]
+TRIAGENS_POR_TICKET = 5
+
+
+def gerar_resultados(total: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    chamados = gerar_chamados(1000, semente)
+    for i in range(total):
+        chamado = aleatorio.choice(chamados)
+        yield {
+            'ticket_numero': str(100000 + i // TRIAGENS_POR_TICKET),
+            'chamado_texto': chamado,
+            'modulo': MODULOS[i % len(MODULOS)],
+            'resultado_triagem': {
+                'padroes_encontrados': [{'tipo': 'erro_sql', 'padrao_id': f'p{n}', 'confianca': 0.8} for n in range(4)],
+                'analise_ia': {
+                    'diagnostico': chamado[:400],
+                    'solucao_sugerida': chamado[-600:],
+                    'tipo_problema': aleatorio.choice(TIPOS_PROBLEMA),
+                    'prioridade': aleatorio.choice(PRIORIDADES),
+                    'categoria_detalhada': 'Banco de dados'
+                },
+                'solucoes_sugeridas': [{'categoria': 'Banco', 'solucao': chamado[:300], 'confianca': 0.7}] * 3,
+                'resumo': {'total_padroes_detectados': 4, 'prioridade_geral': 'media'},
+                'tempo_processamento_ms': aleatorio.uniform(200, 3000)
+            }
+        }
+
+
+def criar(backend: str, banco: str, projeto: str):
+    """Repositório do benchmark e a função de limpeza do emulador (ou None)"""
+    if backend == "sqlite":
+        return SQLiteDatabase(banco), None
+
+    import httpx
+    from google.cloud import firestore
+    from firebase_db import FirebaseDatabase
+
+    host = os.getenv("FIRESTORE_EMULATOR_HOST")
+    if not host:
+        raise SystemExit("❌ Defina FIRESTORE_EMULATOR_HOST (ex.: localhost:8080) com o emulador do Firestore rodando")
+
+    def limpar():
+        httpx.delete(f"http://{host}/emulator/v1/projects/{projeto}/databases/(default)/documents").raise_for_status()
+
+    limpar()
+    firebase_db = FirebaseDatabase(db=firestore.Client(project=projeto))
+    if backend == "firestore":
+        return firebase_db, limpar
+    return ReplicaSQLite(firebase_db, SQLiteDatabase(banco), intervalo_sincronizacao=float("inf")), limpar
+
+
+def medir_leituras(nome: str, operacao, total: int, threads: int):
+    """Executa a operação `total` vezes em `threads` threads; imprime ops/s, mediana e p95"""
+    def cronometrar(i):
+        inicio = time.perf_counter()
+        operacao(i)
+        return (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        tempos = sorted(executor.map(cronometrar, range(total)))
+    duracao = time.perf_counter() - inicio
+    p95 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+    print(f"🔍 {nome}: {total / duracao:.0f} ops/s | mediana {statistics.median(tempos):.2f} ms | p95 {p95:.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de vazão dos repositórios de triagens")
+    parser.add_argument("--backend", choices=["sqlite", "firestore", "replica"], default="sqlite")
+    parser.add_argument("--triagens", type=int, default=5000)
+    parser.add_argument("--leituras", type=int, default=2000, help="Chamadas por tipo de leitura")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--banco", default=None, help="Arquivo SQLite (padrão: temporário)")
+    parser.add_argument("--projeto", default="demo-triagem")
+    args = parser.parse_args()
+
+    diretorio = tempfile.TemporaryDirectory()
+    banco = args.banco or os.path.join(diretorio.name, "benchmark_repositorio.db")
+    repositorio, limpar = criar(args.backend, banco, args.projeto)
+
+    # Escritas: uma triagem por chamada, como no serviço
+    inicio = time.perf_counter()
+    ids = [
+        repositorio.registrar_triagem(r['ticket_numero'], r['chamado_texto'], r['modulo'], r['resultado_triagem'])
+        for r in gerar_resultados(args.triagens)
+    ]
+    duracao = time.perf_counter() - inicio
+    print(f"📦 [{repositorio.nome}] {args.triagens} triagens gravadas: {args.triagens / duracao:.0f} escritas/s "
+          f"({duracao * 1000 / args.triagens:.2f} ms por triagem)")
+    if isinstance(repositorio, SQLiteDatabase):
+        print(f"💾 Arquivo SQLite: {os.path.getsize(banco) / 1024 / 1024:.1f} MB")
+
+    tickets = [str(100000 + i) for i in range(max(args.triagens // TRIAGENS_POR_TICKET, 1))]
+    aleatorio = random.Random(7)
+    semana = datetime.now(timezone.utc) - timedelta(days=7)
+    cursores = {}
+
+    def pagina_historico(i):
+        # Páginas seguidas por thread lógica (i % 4), voltando ao início ao fim do histórico
+        pagina = repositorio.get_historico_paginado(20, cursor=cursores.get(i % 4))
+        cursores[i % 4] = pagina['proximo_cursor']
+
+    leituras = [
+        ("get_triagens_por_ticket", lambda i: repositorio.get_triagens_por_ticket(aleatorio.choice(tickets))),
+        ("get_triagens_recentes", lambda i: repositorio.get_triagens_recentes(10)),
+        ("get_historico_paginado", pagina_historico),
+        ("get_triagens_por_ids (50)", lambda i: repositorio.get_triagens_por_ids(aleatorio.sample(ids, min(50, len(ids))))),
+        ("contar_triagens (módulo, 7 dias)", lambda i: repositorio.contar_triagens(desde=semana, modulo=MODULOS[i % 4])),
+        ("get_estatisticas_triagem", lambda i: repositorio.get_estatisticas_triagem(7))
+    ]
+    for nome, operacao in leituras:
+        medir_leituras(nome, operacao, args.leituras, args.threads)
+
+    if limpar:
+        limpar()
+    diretorio.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
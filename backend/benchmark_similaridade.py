@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca de triagens similares
+Gera um índice sintético com N linhas (vetores de chamados gerados pelo
+benchmark do matcher), mede a carga, a latência do top-k e a vazão de
+inserções incrementais. Os vetores são gravados em blocos direto no arquivo,
+então 1M de linhas ocupa DIMENSAO_SIMILARIDADE * 4 bytes * 1M (2 GB) em disco.
+
+Uso:
+    python benchmark_similaridade.py [--linhas 1000000] [--consultas 50] [--k 5] [--diretorio /tmp/bench_similaridade]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmark_matcher import gerar_chamados
+from features_chamado import extrair_features
+from indice_similaridade import ARQUIVO_METADADOS, ARQUIVO_VETORES, DIMENSAO_SIMILARIDADE, IndiceSimilaridade
+from normalizacao_texto import normalizar
+from vetorizacao_hash import vetorizar_denso
+
+MODULOS = ["CADASTROS", "PEDAGÓGICO", "FINANCEIRO", "RELATÓRIOS"]
+CHAMADOS_BASE = 2000
+LINHAS_POR_ESCRITA = 100000
+
+
+def gerar_indice(diretorio: str, linhas: int, semente: int = 42):
+    """Vetores reais de CHAMADOS_BASE chamados, repetidos com ruído até completar as linhas"""
+    rng = np.random.default_rng(semente)
+    chamados = gerar_chamados(CHAMADOS_BASE, semente)
+    base = np.stack([
+        vetorizar_denso(extrair_features(texto, MODULOS[i % len(MODULOS)]), DIMENSAO_SIMILARIDADE)
+        for i, texto in enumerate(chamados)
+    ])
+
+    with open(os.path.join(diretorio, ARQUIVO_VETORES), 'wb') as vetores, \
+            open(os.path.join(diretorio, ARQUIVO_METADADOS), 'w', encoding='utf-8') as metadados:
+        for inicio in range(0, linhas, LINHAS_POR_ESCRITA):
+            quantidade = min(LINHAS_POR_ESCRITA, linhas - inicio)
+            origem = rng.integers(0, CHAMADOS_BASE, quantidade)
+            bloco = base[origem] + rng.normal(0, 0.01, (quantidade, DIMENSAO_SIMILARIDADE)).astype(np.float32)
+            bloco /= np.linalg.norm(bloco, axis=1, keepdims=True)
+            vetores.write(bloco.astype(np.float32).tobytes())
+            for i, o in enumerate(origem):
+                modulo = MODULOS[o % len(MODULOS)]
+                metadados.write(json.dumps({
+                    "triagem_id": f"bench-{inicio + i}",
+                    "ticket_numero": str(inicio + i),
+                    "modulo": modulo,
+                    "modulo_normalizado": normalizar(modulo),
+                    "tipo_problema": "codigo",
+                    "prioridade": "media",
+                    "categoria": "Benchmark",
+                    "solucao": f"Solução do chamado base {o}"
+                }, ensure_ascii=False) + "\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da busca de triagens similares")
+    parser.add_argument("--linhas", type=int, default=1000000)
+    parser.add_argument("--consultas", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--insercoes", type=int, default=1000)
+    parser.add_argument("--diretorio", default="/tmp/bench_similaridade")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.diretorio, ignore_errors=True)
+    os.makedirs(args.diretorio)
+
+    inicio = time.perf_counter()
+    gerar_indice(args.diretorio, args.linhas)
+    print(f"📦 {args.linhas} linhas geradas em {time.perf_counter() - inicio:.1f}s "
+          f"({args.linhas * DIMENSAO_SIMILARIDADE * 4 / 2 ** 20:.0f} MB de vetores)")
+
+    inicio = time.perf_counter()
+    indice = IndiceSimilaridade(args.diretorio)
+    print(f"📂 Carga do índice: {time.perf_counter() - inicio:.2f}s ({len(indice)} linhas)")
+
+    consultas = [
+        extrair_features(texto, MODULOS[i % len(MODULOS)])
+        for i, texto in enumerate(gerar_chamados(args.consultas, semente=7))
+    ]
+    for filtro in (None, "FINANCEIRO"):
+        tempos = []
+        for features in consultas:
+            inicio = time.perf_counter()
+            resultados = indice.buscar(features, args.k, modulo=filtro)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        p95 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+        print(f"🔍 Top-{args.k} {'(módulo ' + filtro + ')' if filtro else '(todos os módulos)'}: "
+              f"mediana {statistics.median(tempos):.1f} ms | p95 {p95:.1f} ms | "
+              f"melhor similaridade {resultados[0]['similaridade'] if resultados else '-'}")
+
+    inicio = time.perf_counter()
+    for i in range(args.insercoes):
+        indice.adicionar(f"novo-{i}", consultas[i % len(consultas)], {"ticket_numero": None, "solucao": "Nova solução"})
+    tempo = time.perf_counter() - inicio
+    print(f"➕ {args.insercoes} inserções incrementais: {args.insercoes / tempo:.0f}/s")
+
+    shutil.rmtree(args.diretorio, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Busca textual no histórico de triagens (SQLite FTS5)
+O Firestore não tem busca full-text; este índice local guarda o texto do
+chamado, o diagnóstico e as soluções de cada triagem numa tabela FTS5
+(tokenizer unicode61 sem acentos) em modo WAL, para buscas concorrentes com
+gravações. As ocorrências são ordenadas pelo bm25() do próprio FTS5 (com IDF
+e pesos por coluna) dentro da consulta, com o filtro de módulo na tabela base
+e LIMIT/OFFSET no SQL; trechos destacados só são gerados para a página
+devolvida. É alimentado ao salvar cada triagem e pela sincronização com a
+coleção `triagens` (sincronizar_busca_triagens.py).
+
+O bm25() percorre a lista de ocorrências inteira de cada termo para calcular o
+IDF, então um termo presente em boa parte do histórico custa dezenas de ms a
+cada busca. Uma segunda tabela FTS5 guarda só as TAMANHO_RECENTES triagens
+mais recentes, com o módulo como mais uma coluna: termos com pelo menos
+JANELA_RANKING ocorrências nela são ranqueados ali (IDF das triagens
+recentes), e só nas JANELA_RANKING ocorrências mais recentes; os demais usam
+a tabela completa.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from normalizacao_texto import normalizar
+
+# Pesos do bm25() por coluna FTS: chamado_texto, diagnostico, solucoes
+PESOS_BM25 = (1.0, 2.0, 1.5)
+# Ocorrências mais recentes ranqueadas pelo bm25() na busca de um termo frequente
+JANELA_RANKING = 1000
+# Triagens na tabela FTS5 das recentes (limita o custo do IDF dos termos frequentes)
+TAMANHO_RECENTES = 50000
+TOKENS_SNIPPET = 16
+
+# Termos como o tokenizer unicode61 os separa (sublinhado separa tokens)
+_REGEX_TOKEN = re.compile(r"[^\W_]+")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS triagens (
+    id INTEGER PRIMARY KEY,
+    triagem_id TEXT NOT NULL UNIQUE,
+    ticket_numero TEXT,
+    modulo TEXT,
+    modulo_chave TEXT,
+    tipo_problema TEXT,
+    prioridade TEXT,
+    categoria TEXT,
+    data_triagem TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_triagens_ticket ON triagens(ticket_numero);
+CREATE VIRTUAL TABLE IF NOT EXISTS triagens_fts USING fts5(
+    chamado_texto, diagnostico, solucoes,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS triagens_fts_recentes USING fts5(
+    chamado_texto, diagnostico, solucoes, modulo,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+_TABELAS_FTS = ("triagens_fts", "triagens_fts_recentes")
+
+
+def montar_consulta_fts(q: str) -> Optional[str]:
+    """
+    Converte a busca do usuário numa expressão FTS5 segura: cada termo vira
+    uma frase entre aspas e todos precisam ocorrer (operadores e prefixos do
+    FTS5 não são expostos; prefixo curto expande para milhares de termos)
+
+    Returns:
+        Expressão MATCH, ou None se a busca não tem termos
+    """
+    return " ".join(f'"{termo}"' for termo in _termos_busca(q)) or None
+
+
+def _dobrar(texto: str) -> str:
+    return texto.lower() if texto.isascii() else normalizar(texto)
+
+
+def _termos_busca(q: str) -> List[str]:
+    """Termos normalizados da busca, sem repetição"""
+    return list(dict.fromkeys(_dobrar(termo) for termo in _REGEX_TOKEN.findall(q)))
+
+
+def _token_modulo(modulo: Optional[str]) -> str:
+    """
+    Módulo como um único token da coluna modulo da tabela das recentes (peso zero
+    no bm25): o FTS5 cruza o filtro de módulo com os termos sem ler posições
+    """
+    return "modulo" + "".join(_dobrar(termo) for termo in _REGEX_TOKEN.findall(modulo or ""))
+
+
+def _texto_solucoes(solucoes: Iterable[Any]) -> str:
+    partes = []
+    for solucao in solucoes or []:
+        if isinstance(solucao, dict):
+            partes.append(f"{solucao.get('categoria', '')}: {solucao.get('solucao', '')}")
+        elif solucao:
+            partes.append(str(solucao))
+    return "\n".join(partes)
+
+
+class BuscaTriagens:
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._lock_escrita = threading.Lock()
+        conexao = self._conexao()
+        conexao.executescript(_ESQUEMA)
+        conexao.commit()
+        # Bancos criados antes da tabela das recentes
+        if len(self) and conexao.execute("SELECT rowid FROM triagens_fts_recentes LIMIT 1").fetchone() is None:
+            with self._lock_escrita, conexao:
+                linhas = conexao.execute(
+                    "SELECT f.rowid, f.chamado_texto, f.diagnostico, f.solucoes, t.modulo "
+                    "FROM triagens_fts f JOIN triagens t ON t.id = f.rowid WHERE f.rowid > ?",
+                    (self._inicio_recentes(conexao),)
+                ).fetchall()
+                conexao.executemany(
+                    "INSERT INTO triagens_fts_recentes (rowid, chamado_texto, diagnostico, solucoes, modulo) "
+                    "VALUES (?, ?, ?, ?, ?)", [(*linha[:4], _token_modulo(linha[4])) for linha in linhas]
+                )
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread; WAL deixa leitores e o escritor trabalharem em paralelo"""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=10)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.row_factory = sqlite3.Row
+            self._local.conexao = conexao
+        return conexao
+
+    def __len__(self) -> int:
+        return self._conexao().execute("SELECT COUNT(*) FROM triagens").fetchone()[0]
+
+    @staticmethod
+    def _inicio_recentes(conexao: sqlite3.Connection) -> int:
+        """Linhas com id acima deste ficam na tabela das recentes"""
+        return (conexao.execute("SELECT MAX(id) FROM triagens").fetchone()[0] or 0) - TAMANHO_RECENTES
+
+    def indexar(self, triagens: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insere ou substitui triagens (por triagem_id) numa única transação
+
+        Args:
+            triagens: dicts com triagem_id, ticket_numero, modulo, chamado_texto,
+                analise_ia, solucoes_sugeridas e data_triagem
+
+        Returns:
+            Quantidade de triagens indexadas
+        """
+        total = 0
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            for triagem in triagens:
+                analise_ia = triagem.get("analise_ia") or {}
+                solucoes = triagem.get("solucoes_sugeridas") or [analise_ia.get("solucao_sugerida")]
+                campos = (
+                    triagem.get("ticket_numero"),
+                    triagem.get("modulo"),
+                    normalizar(triagem.get("modulo") or ""),
+                    analise_ia.get("tipo_problema"),
+                    analise_ia.get("prioridade"),
+                    analise_ia.get("categoria_detalhada"),
+                    str(triagem["data_triagem"]) if triagem.get("data_triagem") else None
+                )
+                existente = conexao.execute(
+                    "SELECT id FROM triagens WHERE triagem_id = ?", (triagem["triagem_id"],)
+                ).fetchone()
+                if existente:
+                    linha = existente[0]
+                    conexao.execute(
+                        "UPDATE triagens SET ticket_numero = ?, modulo = ?, modulo_chave = ?, tipo_problema = ?, prioridade = ?, "
+                        "categoria = ?, data_triagem = ? WHERE id = ?", (*campos, linha)
+                    )
+                    for tabela in _TABELAS_FTS:
+                        conexao.execute(f"DELETE FROM {tabela} WHERE rowid = ?", (linha,))
+                else:
+                    linha = conexao.execute(
+                        "INSERT INTO triagens (triagem_id, ticket_numero, modulo, modulo_chave, tipo_problema, "
+                        "prioridade, categoria, data_triagem) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (triagem["triagem_id"], *campos)
+                    ).lastrowid
+                textos = (
+                    triagem.get("chamado_texto") or "",
+                    analise_ia.get("diagnostico") or "",
+                    _texto_solucoes(solucoes)
+                )
+                conexao.execute(
+                    "INSERT INTO triagens_fts (rowid, chamado_texto, diagnostico, solucoes) VALUES (?, ?, ?, ?)",
+                    (linha, *textos)
+                )
+                if linha > self._inicio_recentes(conexao):
+                    conexao.execute(
+                        "INSERT INTO triagens_fts_recentes (rowid, chamado_texto, diagnostico, solucoes, modulo) "
+                        "VALUES (?, ?, ?, ?, ?)", (linha, *textos, _token_modulo(triagem.get("modulo")))
+                    )
+                total += 1
+            conexao.execute("DELETE FROM triagens_fts_recentes WHERE rowid <= ?", (self._inicio_recentes(conexao),))
+        return total
+
+    def otimizar(self):
+        """Funde os segmentos do índice FTS5 (após cargas grandes; as inserções do dia a dia usam o automerge)"""
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            for tabela in _TABELAS_FTS:
+                conexao.execute(f"INSERT INTO {tabela} ({tabela}) VALUES ('optimize')")
+
+    def buscar(self, q: str, modulo: Optional[str] = None, limite: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Triagens que contêm todos os termos, das mais relevantes (bm25) para as menos;
+        empate fica com a mais recente. Para termos frequentes, só as JANELA_RANKING
+        ocorrências mais recentes (ou offset + limite, se maior) entram no ranking
+        """
+        consulta = montar_consulta_fts(q)
+        if consulta is None:
+            return []
+        conexao = self._conexao()
+        janela = max(JANELA_RANKING, offset + limite)
+
+        # O FTS5 percorre as ocorrências em ordem de rowid sem calcular o bm25(): achar a
+        # ocorrência mais antiga da janela custa pouco mesmo para termos frequentes
+        def rowid_corte(tabela: str, expressao: str, filtro: str = "", parametros: List[Any] = ()) -> Optional[int]:
+            linha = conexao.execute(
+                f"""
+                SELECT {tabela}.rowid FROM {tabela} JOIN triagens t ON t.id = {tabela}.rowid
+                WHERE {tabela} MATCH ? {filtro}
+                ORDER BY {tabela}.rowid DESC
+                LIMIT 1 OFFSET ?
+                """,
+                [expressao, *parametros, janela - 1]
+            ).fetchone()
+            return linha[0] if linha else None
+
+        tabela, pesos, expressao = "triagens_fts", PESOS_BM25, consulta
+        filtro, parametros = "", []
+        if modulo:
+            filtro = "AND t.modulo_chave = ?"
+            parametros.append(normalizar(modulo))
+
+        corte = rowid_corte("triagens_fts_recentes", consulta)
+        if corte is not None:
+            # Termo frequente: ranking na tabela das recentes, com o módulo cruzado pelo
+            # próprio FTS5 (o filtro exato continua na tabela base)
+            tabela, pesos = "triagens_fts_recentes", (*PESOS_BM25, 0.0)
+            if modulo:
+                expressao = f'{consulta} "{_token_modulo(modulo)}"'
+                corte = rowid_corte(tabela, expressao, filtro, parametros)
+        if corte is not None:
+            filtro += f" AND {tabela}.rowid >= ?"
+            parametros.append(corte)
+
+        pesos = ", ".join(str(peso) for peso in pesos)
+        # bm25() é negativo: quanto menor, mais relevante
+        pagina = conexao.execute(
+            f"""
+            SELECT t.id, t.triagem_id, t.ticket_numero, t.modulo, t.tipo_problema, t.prioridade,
+                   t.categoria, t.data_triagem, bm25({tabela}, {pesos}) AS rank
+            FROM {tabela} JOIN triagens t ON t.id = {tabela}.rowid
+            WHERE {tabela} MATCH ? {filtro}
+            ORDER BY rank, {tabela}.rowid DESC
+            LIMIT ? OFFSET ?
+            """,
+            [expressao, *parametros, limite, offset]
+        ).fetchall()
+        if not pagina:
+            return []
+
+        # Trechos destacados só das triagens devolvidas. O FTS5 busca cada rowid de um IN
+        # com uma nova leitura das listas de ocorrências: a faixa de rowids limita a
+        # varredura e o "+" deixa o IN como filtro fora da tabela virtual
+        ids = [linha["id"] for linha in pagina]
+        marcadores = ", ".join("?" * len(ids))
+        trechos = {
+            linha["rowid"]: linha for linha in conexao.execute(
+                f"""
+                SELECT rowid,
+                       snippet({tabela}, 0, '[', ']', '…', {TOKENS_SNIPPET}) AS trecho_chamado,
+                       snippet({tabela}, 2, '[', ']', '…', {TOKENS_SNIPPET}) AS trecho_solucao
+                FROM {tabela}
+                WHERE {tabela} MATCH ? AND rowid BETWEEN ? AND ? AND +rowid IN ({marcadores})
+                """,
+                [expressao, min(ids), max(ids), *ids]
+            )
+        }
+
+        resultados = []
+        for linha in pagina:
+            triagem = dict(linha)
+            linha_id = triagem.pop("id")
+            rank = triagem.pop("rank")
+            resultados.append({
+                **triagem,
+                "pontuacao": round(-rank, 4),
+                "trecho_chamado": trechos[linha_id]["trecho_chamado"],
+                "trecho_solucao": trechos[linha_id]["trecho_solucao"]
+            })
+        return resultados
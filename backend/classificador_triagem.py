@@ -0,0 +1,152 @@
+"""
+Classificador local de tipo_problema e prioridade
+Regressão logística multinomial (uma cabeça por campo) sobre o vetor de
+n-gramas com hashing, treinada em NumPy a partir do histórico de triagens.
+O artefato é um .npz compacto (pesos em float16); a inferência soma as linhas
+dos índices presentes no chamado e roda bem abaixo de 1 ms.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features_chamado import FeaturesChamado
+from vetorizacao_hash import DIMENSAO_PADRAO, vetorizar
+
+CAMPOS_CLASSIFICADOS = ("tipo_problema", "prioridade")
+ROTULOS_VALIDOS = {
+    "tipo_problema": ("codigo", "banco", "configuracao", "performance", "outro"),
+    "prioridade": ("alta", "media", "baixa")
+}
+
+EPOCAS_PADRAO = 15
+TAXA_APRENDIZADO = 2.0
+REGULARIZACAO_L2 = 1e-4
+TAMANHO_LOTE_TREINO = 128
+
+VetorEsparso = Tuple[np.ndarray, np.ndarray]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+@dataclass
+class CabecaClassificador:
+    classes: List[str]
+    pesos: np.ndarray  # [dimensao, classes]
+    vies: np.ndarray  # [classes]
+
+    def probabilidades(self, vetor: VetorEsparso) -> np.ndarray:
+        indices, valores = vetor
+        return _softmax(valores @ self.pesos[indices] + self.vies)
+
+
+def _treinar_cabeca(
+    vetores: List[VetorEsparso],
+    rotulos: List[str],
+    dimensao: int,
+    epocas: int,
+    semente: int
+) -> CabecaClassificador:
+    classes = sorted(set(rotulos))
+    alvo = np.array([classes.index(r) for r in rotulos])
+    pesos = np.zeros((dimensao, len(classes)), dtype=np.float32)
+    vies = np.zeros(len(classes), dtype=np.float32)
+    rng = np.random.default_rng(semente)
+
+    for _ in range(epocas):
+        ordem = rng.permutation(len(vetores))
+        for inicio in range(0, len(ordem), TAMANHO_LOTE_TREINO):
+            lote = ordem[inicio:inicio + TAMANHO_LOTE_TREINO]
+            # Lote esparso como (linha, coluna, valor)
+            linhas = np.concatenate([np.full(len(vetores[i][0]), j) for j, i in enumerate(lote)])
+            colunas = np.concatenate([vetores[i][0] for i in lote])
+            valores = np.concatenate([vetores[i][1] for i in lote])
+
+            logits = np.zeros((len(lote), len(classes)), dtype=np.float32)
+            np.add.at(logits, linhas, valores[:, None] * pesos[colunas])
+            erro = _softmax(logits + vies)
+            erro[np.arange(len(lote)), alvo[lote]] -= 1.0
+            erro /= len(lote)
+
+            pesos *= 1.0 - TAXA_APRENDIZADO * REGULARIZACAO_L2
+            np.add.at(pesos, colunas, -TAXA_APRENDIZADO * valores[:, None] * erro[linhas])
+            vies -= TAXA_APRENDIZADO * erro.sum(axis=0)
+
+    return CabecaClassificador(classes=classes, pesos=pesos, vies=vies)
+
+
+class ClassificadorTriagem:
+    def __init__(self, cabecas: Dict[str, CabecaClassificador], dimensao: int, amostras: int):
+        self.cabecas = cabecas
+        self.dimensao = dimensao
+        self.amostras = amostras
+
+    @classmethod
+    def treinar(
+        cls,
+        exemplos: List[Tuple[FeaturesChamado, Dict[str, Any]]],
+        dimensao: int = DIMENSAO_PADRAO,
+        epocas: int = EPOCAS_PADRAO,
+        semente: int = 42
+    ) -> "ClassificadorTriagem":
+        """
+        Treina uma cabeça por campo com os exemplos que têm rótulo válido
+
+        Args:
+            exemplos: lista de (features do chamado, analise_ia da triagem)
+        """
+        vetores = [vetorizar(features, dimensao) for features, _ in exemplos]
+        cabecas = {}
+        for campo in CAMPOS_CLASSIFICADOS:
+            rotulados = [
+                (vetor, analise.get(campo)) for vetor, (_, analise) in zip(vetores, exemplos)
+                if analise.get(campo) in ROTULOS_VALIDOS[campo]
+            ]
+            if len({rotulo for _, rotulo in rotulados}) < 2:
+                print(f"⚠️  Rótulos insuficientes para '{campo}' - cabeça não treinada")
+                continue
+            cabecas[campo] = _treinar_cabeca(
+                [v for v, _ in rotulados], [r for _, r in rotulados], dimensao, epocas, semente
+            )
+        return cls(cabecas, dimensao, len(exemplos))
+
+    def prever(self, features: FeaturesChamado) -> Dict[str, Dict[str, Any]]:
+        """Classe mais provável e confiança de cada campo"""
+        vetor = vetorizar(features, self.dimensao)
+        previsao = {}
+        for campo, cabeca in self.cabecas.items():
+            probabilidades = cabeca.probabilidades(vetor)
+            melhor = int(probabilidades.argmax())
+            previsao[campo] = {"valor": cabeca.classes[melhor], "confianca": round(float(probabilidades[melhor]), 3)}
+        return previsao
+
+    def salvar(self, caminho: str):
+        arrays = {"dimensao": np.array(self.dimensao), "amostras": np.array(self.amostras)}
+        for campo, cabeca in self.cabecas.items():
+            arrays[f"{campo}__classes"] = np.array(cabeca.classes)
+            arrays[f"{campo}__pesos"] = cabeca.pesos.astype(np.float16)
+            arrays[f"{campo}__vies"] = cabeca.vies.astype(np.float32)
+        with open(caminho, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> Optional["ClassificadorTriagem"]:
+        try:
+            with np.load(caminho) as dados:
+                cabecas = {
+                    campo: CabecaClassificador(
+                        classes=[str(c) for c in dados[f"{campo}__classes"]],
+                        pesos=dados[f"{campo}__pesos"].astype(np.float32),
+                        vies=dados[f"{campo}__vies"]
+                    )
+                    for campo in CAMPOS_CLASSIFICADOS if f"{campo}__pesos" in dados.files
+                }
+                return cls(cabecas, int(dados["dimensao"]), int(dados["amostras"]))
+        except Exception as e:
+            print(f"❌ Erro ao carregar classificador {caminho}: {e}")
+            return None
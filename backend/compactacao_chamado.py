@@ -0,0 +1,194 @@
+"""
+Compactação de chamados com logs colados antes de montar o prompt
+Mantém a primeira ocorrência de cada mensagem, colapsa linhas e frames
+repetidos com contagem e trunca para um orçamento de tokens estimado localmente
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+ORCAMENTO_TOKENS_PADRAO = 2000
+FRAMES_FRAMEWORK_MANTIDOS = 3  # frames System./Microsoft. mantidos por bloco de stack trace
+PROPORCAO_INICIO = 0.6  # ao truncar, parte do orçamento reservada ao início do chamado
+MINIMO_TOKENS_CORTE = 8  # sobra mínima do orçamento para manter o pedaço de uma linha cortada
+MARCADOR_FRAMES_OMITIDOS = "   ... ({} frames do framework omitidos)"
+
+_REGEX_TOKENS = re.compile(r"\w+|[^\w\s]")
+_REGEX_FRAME = re.compile(r"^\s*(?:at|em)\s+[\w.`<>\[\]$]+\(")
+_REGEX_FRAME_FRAMEWORK = re.compile(r"^\s*(?:at|em)\s+(?:System|Microsoft)\.")
+# Partes variáveis que não tornam uma linha de log diferente. Números curtos
+# ficam na chave: "Msg 547" e "Msg 2627" são erros diferentes
+_REGEX_VARIAVEIS = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"  # GUID
+    r"|\b0x[0-9a-f]+|\b[0-9a-f]{16,}\b"  # hexadecimal e hashes
+    r"|\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?"  # data ISO
+    r"|\b\d{1,2}/\d{1,2}/\d{2,4}\b"  # data dd/mm/aaaa
+    r"|\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?"  # hora
+    r"|(?<=id[=:#])\s*\d+"  # valor de identificador (id=42, pedido_id: 42)
+    r"|\b\d{7,}\b",  # IDs longos
+    re.IGNORECASE,
+)
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa local de tokens: palavras longas contam um token a cada 4 caracteres"""
+    return sum((len(t) + 3) // 4 for t in _REGEX_TOKENS.findall(texto))
+
+
+def _chave_linha(linha: str) -> str:
+    return " ".join(_REGEX_VARIAVEIS.sub("#", linha).split()).lower()
+
+
+@dataclass
+class ChamadoCompactado:
+    texto: str
+    tokens_originais: int
+    tokens_compactados: int
+    linhas_originais: int
+    linhas_duplicadas: int
+    frames_omitidos: int
+    linhas_truncadas: int
+
+    @property
+    def reducao_percentual(self) -> float:
+        if not self.tokens_originais:
+            return 0.0
+        return round((1 - self.tokens_compactados / self.tokens_originais) * 100, 1)
+
+    def relatorio(self) -> Dict[str, float]:
+        return {
+            "tokens_originais": self.tokens_originais,
+            "tokens_compactados": self.tokens_compactados,
+            "reducao_percentual": self.reducao_percentual,
+            "linhas_duplicadas": self.linhas_duplicadas,
+            "frames_omitidos": self.frames_omitidos,
+            "linhas_truncadas": self.linhas_truncadas
+        }
+
+
+def _cortar_linha(linha: str, orcamento: int, do_fim: bool = False) -> str:
+    """Maior início (ou fim) da linha que cabe no orçamento, sem partir tokens"""
+    tokens = list(_REGEX_TOKENS.finditer(linha))
+    if do_fim:
+        tokens.reverse()
+    usado, ultimo = 0, None
+    for token in tokens:
+        custo = (len(token.group()) + 3) // 4
+        if usado + custo > orcamento:
+            break
+        usado += custo
+        ultimo = token
+    if ultimo is None:
+        return ""
+    return linha[ultimo.start():] if do_fim else linha[:ultimo.end()]
+
+
+def _truncar(linhas: List[str], orcamento: int) -> Tuple[List[str], int]:
+    """
+    Mantém início e fim do chamado dentro do orçamento, omitindo o meio.
+    A sobra do orçamento nas bordas fica com pedaços das linhas cortadas, então
+    uma única linha enorme (um JSON colado, por exemplo) é cortada por dentro
+    """
+    custos = [estimar_tokens(linha) + 1 for linha in linhas]
+    if sum(custos) <= orcamento:
+        return linhas, 0
+
+    limite_inicio = int(orcamento * PROPORCAO_INICIO)
+    inicio, usado = 0, 0
+    while inicio < len(linhas) and usado + custos[inicio] <= limite_inicio:
+        usado += custos[inicio]
+        inicio += 1
+
+    corte_inicio = ""
+    if limite_inicio - usado >= MINIMO_TOKENS_CORTE:
+        corte_inicio = _cortar_linha(linhas[inicio], limite_inicio - usado - 1)
+        usado += estimar_tokens(corte_inicio) + 1
+    primeira_omitida = inicio + 1 if corte_inicio else inicio
+
+    fim = len(linhas)
+    while fim > primeira_omitida and usado + custos[fim - 1] <= orcamento:
+        usado += custos[fim - 1]
+        fim -= 1
+
+    corte_fim = ""
+    if fim > inicio and orcamento - usado >= MINIMO_TOKENS_CORTE:
+        corte_fim = _cortar_linha(linhas[fim - 1], orcamento - usado - 1, do_fim=True)
+    omitidas = max(0, fim - (1 if corte_fim else 0) - primeira_omitida)
+
+    marcador = f"[... {omitidas} linhas omitidas ...]" if omitidas else "[... trecho omitido ...]"
+    resultado = linhas[:inicio] + ([corte_inicio] if corte_inicio else []) + [marcador]
+    resultado += ([corte_fim] if corte_fim else []) + linhas[fim:]
+    return resultado, fim - inicio
+
+
+def compactar_chamado(texto: str, orcamento_tokens: int = ORCAMENTO_TOKENS_PADRAO) -> ChamadoCompactado:
+    """
+    Compacta o texto do chamado para o prompt
+
+    Args:
+        texto: Texto original do chamado
+        orcamento_tokens: Máximo de tokens estimados no texto compactado
+
+    Returns:
+        ChamadoCompactado com o texto e as métricas de redução
+    """
+    linhas = (texto or "").splitlines()
+    contagem: Dict[str, int] = {}
+    mantidas: List[Tuple[str, str]] = []  # (linha, chave); linhas em branco têm chave vazia
+    marcadores: Dict[int, int] = {}  # posição do marcador em mantidas -> frames omitidos no bloco
+    frames_framework_bloco = 0
+    frames_omitidos = 0
+
+    for linha in linhas:
+        if not linha.strip():
+            if mantidas and mantidas[-1][1]:
+                mantidas.append(("", ""))
+            frames_framework_bloco = 0
+            continue
+
+        if _REGEX_FRAME_FRAMEWORK.match(linha):
+            frames_framework_bloco += 1
+            if frames_framework_bloco > FRAMES_FRAMEWORK_MANTIDOS:
+                frames_omitidos += 1
+                if frames_framework_bloco == FRAMES_FRAMEWORK_MANTIDOS + 1:
+                    marcadores[len(mantidas)] = 0
+                    mantidas.append((MARCADOR_FRAMES_OMITIDOS, f"frames#{len(mantidas)}"))
+                marcadores[max(marcadores)] += 1
+                continue
+        elif not _REGEX_FRAME.match(linha):
+            frames_framework_bloco = 0
+
+        chave = _chave_linha(linha)
+        if chave in contagem:
+            contagem[chave] += 1
+            continue
+        contagem[chave] = 1
+        mantidas.append((linha.rstrip(), chave))
+
+    compactadas = []
+    for posicao, (linha, chave) in enumerate(mantidas):
+        if posicao in marcadores:
+            compactadas.append(linha.format(marcadores[posicao]))
+            continue
+        repeticoes = contagem.get(chave, 1)
+        compactadas.append(f"{linha}  [x{repeticoes}]" if repeticoes > 1 else linha)
+
+    compactadas, linhas_truncadas = _truncar(compactadas, orcamento_tokens)
+    texto_compactado = "\n".join(compactadas).strip()
+    tokens_originais = estimar_tokens(texto or "")
+    tokens_compactados = estimar_tokens(texto_compactado)
+
+    # Chamados curtos podem crescer com as anotações de contagem
+    if tokens_compactados >= tokens_originais:
+        texto_compactado, tokens_compactados = (texto or "").strip(), tokens_originais
+
+    return ChamadoCompactado(
+        texto=texto_compactado,
+        tokens_originais=tokens_originais,
+        tokens_compactados=tokens_compactados,
+        linhas_originais=len(linhas),
+        linhas_duplicadas=sum(total - 1 for total in contagem.values()),
+        frames_omitidos=frames_omitidos,
+        linhas_truncadas=linhas_truncadas
+    )
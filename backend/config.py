@@ -4,6 +4,17 @@ from dotenv import load_dotenv
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
+# Arquivos gerados pelo serviço (bancos SQLite, índices locais, modelo do classificador):
+# por padrão ao lado do código do backend, independente do diretório de trabalho
+DIRETORIO_DADOS = os.getenv("TRIAGEM_DIRETORIO_DADOS") or os.path.dirname(os.path.abspath(__file__))
+
+
+def caminho_dados(nome: str) -> str:
+    """Caminho padrão de um arquivo gerado, dentro de TRIAGEM_DIRETORIO_DADOS (criado se faltar)"""
+    os.makedirs(DIRETORIO_DADOS, exist_ok=True)
+    return os.path.join(DIRETORIO_DADOS, nome)
+
+
 class Config:
     """Configurações do sistema de triagem"""
     
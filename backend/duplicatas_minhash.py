@@ -0,0 +1,174 @@
+"""
+Detecção de chamados quase duplicados por MinHash + LSH
+O mesmo erro aberto por escolas diferentes muda só nomes e IDs, então o hash
+exato (fingerprint/assinatura) não pega. Cada chamado vira um conjunto de
+shingles de 3 tokens (números mascarados) resumido numa assinatura MinHash;
+as bandas da assinatura indexam buckets LSH e os candidatos são confirmados
+pela similaridade de Jaccard estimada. O índice é gravado em JSONL (append)
+e reconstruído do histórico do Firestore quando o arquivo não existe.
+"""
+
+import json
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from features_chamado import FeaturesChamado
+
+PERMUTACOES = 128
+BANDAS = 32  # 32 bandas x 4 linhas: Jaccard >= 0.7 vira candidato com probabilidade > 99%
+TAMANHO_SHINGLE = 3
+LIMIAR_JACCARD_PADRAO = 0.7
+
+_PRIMO = (1 << 31) - 1  # a * x < 2^62 cabe em uint64
+_rng = np.random.default_rng(20240601)
+_COEF_A = _rng.integers(1, _PRIMO, PERMUTACOES, dtype=np.uint64)
+_COEF_B = _rng.integers(0, _PRIMO, PERMUTACOES, dtype=np.uint64)
+
+
+def _mascarar(token: str) -> str:
+    """IDs, matrículas e datas variam entre chamados do mesmo problema"""
+    return "#" if any(c.isdigit() for c in token) else token
+
+
+def shingles(features: FeaturesChamado) -> List[str]:
+    tokens = [_mascarar(t) for t in features.tokens]
+    if len(tokens) < TAMANHO_SHINGLE:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + TAMANHO_SHINGLE]) for i in range(len(tokens) - TAMANHO_SHINGLE + 1)]
+
+
+def assinatura_minhash(features: FeaturesChamado) -> Optional[np.ndarray]:
+    """Assinatura uint32 com PERMUTACOES mínimos, ou None para chamado sem texto"""
+    conjunto = {zlib.crc32(s.encode("utf-8")) & _PRIMO for s in shingles(features)}
+    if not conjunto:
+        return None
+    valores = np.fromiter(conjunto, dtype=np.uint64, count=len(conjunto))
+    hashes = (valores[:, None] * _COEF_A + _COEF_B) % _PRIMO
+    return hashes.min(axis=0).astype(np.uint32)
+
+
+@dataclass
+class TriagemDuplicada:
+    triagem_id: str
+    ticket_numero: Optional[str]
+    jaccard: float
+    analise_ia: Dict[str, Any]
+
+
+class IndiceDuplicatas:
+    def __init__(self, caminho: Optional[str] = None, limiar: float = LIMIAR_JACCARD_PADRAO):
+        self.caminho = caminho
+        self.limiar = limiar
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(BANDAS)]
+        self._assinaturas = np.zeros((1024, PERMUTACOES), dtype=np.uint32)  # linhas com folga para inserções
+        self._triagens: List[Tuple[str, Optional[str], Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._triagens)
+
+    def _bandas(self, assinatura: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        linhas = PERMUTACOES // BANDAS
+        for banda in range(BANDAS):
+            yield banda, assinatura[banda * linhas:(banda + 1) * linhas].tobytes()
+
+    def _indexar(self, assinatura: np.ndarray, triagem_id: str, ticket_numero: Optional[str], analise_ia: Dict[str, Any]):
+        posicao = len(self._triagens)
+        if posicao == len(self._assinaturas):
+            self._assinaturas = np.concatenate([self._assinaturas, np.zeros_like(self._assinaturas)])
+        self._assinaturas[posicao] = assinatura
+        self._triagens.append((triagem_id, ticket_numero, analise_ia))
+        for banda, chave in self._bandas(assinatura):
+            self._buckets[banda].setdefault(chave, []).append(posicao)
+
+    def carregar(self) -> bool:
+        """Carrega o índice gravado; False se o arquivo ainda não existe"""
+        if not self.caminho or not os.path.exists(self.caminho):
+            return False
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if not linha.endswith("\n"):
+                    break  # gravação interrompida
+                registro = json.loads(linha)
+                self._indexar(
+                    np.array(registro["assinatura"], dtype=np.uint32),
+                    registro["triagem_id"], registro.get("ticket_numero"), registro["analise_ia"]
+                )
+        return True
+
+    def reconstruir(self, triagens: Iterable[Tuple[FeaturesChamado, str, Optional[str], Dict[str, Any]]]) -> int:
+        """
+        Indexa o histórico e grava o arquivo de uma vez, mesmo sem nenhuma
+        triagem, para que o próximo carregar() não refaça a leitura do histórico.
+        O arquivo só aparece (rename atômico) quando a reconstrução termina.
+
+        Args:
+            triagens: (features, triagem_id, ticket_numero, analise_ia)
+
+        Returns:
+            Triagens indexadas
+        """
+        caminho = self.caminho
+        temporario = f"{caminho}.tmp" if caminho else None
+        self.caminho = temporario
+        try:
+            if temporario:
+                open(temporario, 'w', encoding='utf-8').close()
+            total = sum(self.adicionar(*triagem) for triagem in triagens)
+            if temporario:
+                os.replace(temporario, caminho)
+        finally:
+            self.caminho = caminho
+        return total
+
+    def adicionar(
+        self,
+        features: FeaturesChamado,
+        triagem_id: str,
+        ticket_numero: Optional[str],
+        analise_ia: Dict[str, Any]
+    ) -> bool:
+        """Indexa (e grava) a triagem; False para chamado sem texto"""
+        assinatura = assinatura_minhash(features)
+        if assinatura is None:
+            return False
+        with self._lock:
+            self._indexar(assinatura, triagem_id, ticket_numero, analise_ia)
+            if self.caminho:
+                registro = {
+                    "triagem_id": triagem_id,
+                    "ticket_numero": ticket_numero,
+                    "assinatura": assinatura.tolist(),
+                    "analise_ia": analise_ia
+                }
+                with open(self.caminho, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        return True
+
+    def buscar(self, features: FeaturesChamado) -> Optional[TriagemDuplicada]:
+        """Triagem anterior mais parecida com Jaccard estimado acima do limiar"""
+        assinatura = assinatura_minhash(features)
+        if assinatura is None or not self._triagens:
+            return None
+
+        candidatos = set()
+        for banda, chave in self._bandas(assinatura):
+            candidatos.update(self._buckets[banda].get(chave, ()))
+
+        if not candidatos:
+            return None
+
+        # Jaccard estimado de todos os candidatos de uma vez; em empate, a triagem mais recente vence
+        posicoes = np.sort(np.fromiter(candidatos, dtype=np.int64, count=len(candidatos)))
+        jaccards = (self._assinaturas[posicoes] == assinatura).mean(axis=1)
+        melhor = len(posicoes) - 1 - int(np.argmax(jaccards[::-1]))
+        if jaccards[melhor] < self.limiar:
+            return None
+
+        triagem_id, ticket_numero, analise_ia = self._triagens[posicoes[melhor]]
+        return TriagemDuplicada(triagem_id, ticket_numero, round(float(jaccards[melhor]), 3), analise_ia)
@@ -0,0 +1,99 @@
+"""
+Eventos do dashboard em tempo real (Server-Sent Events)
+O caminho de escrita (triagem salva, feedback registrado) publica cada evento
+uma única vez neste barramento em memória, e o endpoint /eventos repassa o
+evento a todos os dashboards conectados. Os eventos de nova triagem levam o
+delta dos contadores do dia e o item do histórico, então cada dashboard
+atualiza o estado que já carregou sem refazer consultas: a carga de leitura
+no banco não cresce com o número de dashboards abertos.
+
+O barramento é por processo: com vários workers, cada um transmite as
+escritas que ele mesmo fez.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
+
+EVENTOS_POR_CLIENTE = 100  # fila de cada dashboard; quem não acompanha é desconectado
+INTERVALO_PING = 15  # segundos entre comentários de keep-alive (proxies fecham conexões ociosas)
+RECONEXAO_MS = 5000
+
+
+class BarramentoEventos:
+    def __init__(self):
+        self._assinantes: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+        self._sequencia = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._assinantes)
+
+    def assinar(self) -> asyncio.Queue:
+        """Fila de eventos de um novo dashboard (chamado dentro do loop do servidor)"""
+        fila: asyncio.Queue = asyncio.Queue(maxsize=EVENTOS_POR_CLIENTE)
+        with self._lock:
+            self._assinantes[fila] = asyncio.get_running_loop()
+        return fila
+
+    def cancelar(self, fila: asyncio.Queue):
+        with self._lock:
+            self._assinantes.pop(fila, None)
+
+    def publicar(self, tipo: str, dados: Dict[str, Any]):
+        """
+        Entrega o evento a todos os dashboards conectados; pode ser chamado do
+        loop do servidor ou de outras threads e nunca bloqueia a escrita
+        """
+        evento = {"id": next(self._sequencia), "tipo": tipo, "dados": dados}
+        with self._lock:
+            assinantes = list(self._assinantes.items())
+        for fila, loop in assinantes:
+            try:
+                loop.call_soon_threadsafe(self._entregar, fila, evento)
+            except RuntimeError:
+                # Loop já encerrado
+                self.cancelar(fila)
+
+    def _entregar(self, fila: asyncio.Queue, evento: Dict[str, Any]):
+        if fila not in self._assinantes:
+            # Desconectado entre a publicação e a entrega
+            return
+        try:
+            fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Dashboard lento: encerra o fluxo (o EventSource reconecta e recarrega o estado)
+            self.cancelar(fila)
+            while not fila.empty():
+                fila.get_nowait()
+            fila.put_nowait(None)
+
+
+def formatar_evento(evento: Dict[str, Any]) -> str:
+    """Evento no formato text/event-stream"""
+    dados = json.dumps(evento["dados"], ensure_ascii=False, default=str)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {dados}\n\n"
+
+
+async def transmitir_eventos(barramento: "BarramentoEventos") -> AsyncIterator[str]:
+    """Corpo da resposta SSE de um dashboard, até a desconexão do cliente"""
+    fila = barramento.assinar()
+    try:
+        yield f"retry: {RECONEXAO_MS}\n\n"
+        while True:
+            try:
+                evento: Optional[Dict[str, Any]] = await asyncio.wait_for(fila.get(), timeout=INTERVALO_PING)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is None:
+                return
+            yield formatar_evento(evento)
+    finally:
+        barramento.cancelar(fila)
+
+
+# Instância global do barramento
+barramento_dashboard = BarramentoEventos()
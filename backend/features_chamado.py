@@ -0,0 +1,150 @@
+"""
+Extração de features do chamado em uma única passada
+O texto é normalizado e tokenizado uma vez; entidades técnicas (handlers
+VB.NET, erros do SQL Server, exceções, tabelas e frames de stack trace) são
+extraídas por uma única expressão combinada sobre o texto original. Padrões,
+prompts, caches e persistência consomem este objeto em vez do texto bruto.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from normalizacao_texto import normalizar_texto
+from regras_padroes import ContextoRegras, criar_contexto
+
+MAX_FRAMES_RESUMO = 10
+
+_EVENTOS_VB = (
+    "Click|Load|Init|PreRender|Unload|SelectedIndexChanged|TextChanged|CheckedChanged|"
+    "RowCommand|RowDataBound|ItemCommand|ItemDataBound|PageIndexChanging|ServerValidate|Tick"
+)
+
+_REGEX_ENTIDADES = re.compile(
+    # Frame de stack trace .NET: "   at Namespace.Classe.Metodo(" / "   em Namespace.Classe.Metodo("
+    r"(?m:^[ \t]*(?:at|em)[ \t]+(?P<frame>[\w.`<>\[\]$]+)\()"
+    # Handler de evento VB.NET: BtnSalvar_Click, Page_Load
+    rf"|\b(?P<handler>[A-Za-z]\w*_(?:{_EVENTOS_VB}))\b"
+    # Tipo de exceção: System.Data.SqlClient.SqlException, NullReferenceException
+    r"|\b(?P<excecao>(?:[A-Z]\w*\.)*[A-Z]\w*Exception)\b"
+    # Número de erro do SQL Server, só nos formatos das mensagens do SQL Server:
+    # "Msg 547, Level 16, State 0" e "Error Number: 1205" / "Error Number:-2,State:0"
+    r"|\bMsg[ \t]+(?P<erro_sql>\d{1,6})[ \t]*,[ \t]*Level[ \t]+\d+[ \t]*,[ \t]*State[ \t]+\d+"
+    r"|\bError[ \t]*Number[ \t]*:[ \t]*(?P<erro_sql_numero>-?\d{1,6})\b"
+    # Tabela citada em mensagens do SQL Server ou em SQL colado
+    r"""|(?i:\btable[ \t]+["'](?P<tabela_msg>[\w.\[\]]+)["'])"""
+    r"|(?i:\b(?:from|into|update|join|tabela)[ \t]+(?P<tabela_sql>(?:\[?\w+\]?\.)?\[?[A-Za-z_]\w*\]?))",
+)
+
+_REGEX_HANDLER = re.compile(rf"[A-Za-z]\w*_(?:{_EVENTOS_VB})")
+
+# "SqlException ... Number: 1205" / "SqlException.Number = 1205" na mesma linha da exceção
+_REGEX_NUMERO_SQLEXCEPTION = re.compile(r"SqlException\b[^\n]{0,200}?\bNumber[ \t]*[:=][ \t]*(-?\d{1,6})\b")
+
+# Palavras que seguem "from/into/update/join" em texto livre e não são tabelas
+_NAO_TABELAS = {
+    "the", "a", "o", "as", "os", "um", "uma", "de", "do", "da", "em", "no", "na",
+    "select", "where", "set", "values", "sistema", "cliente", "usuario", "tela",
+}
+
+
+def _limpar_tabela(nome: str) -> str:
+    nome = nome.replace("[", "").replace("]", "")
+    return nome.split(".")[-1]
+
+
+def _adicionar_unico(lista: List[Any], valor: Any):
+    if valor not in lista:
+        lista.append(valor)
+
+
+@dataclass
+class FeaturesChamado(ContextoRegras):
+    handlers: List[str] = field(default_factory=list)
+    erros_sql: List[int] = field(default_factory=list)
+    excecoes: List[str] = field(default_factory=list)
+    tabelas: List[str] = field(default_factory=list)
+    frames: List[str] = field(default_factory=list)  # na ordem do stack trace (topo primeiro)
+
+    @property
+    def original(self) -> str:
+        return self.texto.original
+
+    @property
+    def total_tokens(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def assinatura(self) -> str:
+        """Hash estável do texto normalizado + módulo (chave para caches)"""
+        conteudo = f"{self.modulo}\n{self.texto.texto}".encode("utf-8")
+        return hashlib.sha1(conteudo).hexdigest()
+
+    def tem_sinais_tecnicos(self) -> bool:
+        return bool(self.handlers or self.erros_sql or self.excecoes or self.tabelas or self.frames)
+
+    def resumo(self) -> Dict[str, Any]:
+        """Versão serializável e compacta (para prompt, resposta e persistência)"""
+        return {
+            "handlers": self.handlers,
+            "erros_sql": self.erros_sql,
+            "excecoes": self.excecoes,
+            "tabelas": self.tabelas,
+            "frames": self.frames[:MAX_FRAMES_RESUMO],
+            "total_frames": len(self.frames),
+            "total_tokens": self.total_tokens,
+            "assinatura": self.assinatura
+        }
+
+
+def extrair_features(texto: str, modulo: Optional[str] = None) -> FeaturesChamado:
+    """
+    Normaliza, tokeniza e extrai entidades técnicas do chamado
+
+    Args:
+        texto: Texto original do chamado
+        modulo: Módulo identificado (opcional)
+
+    Returns:
+        FeaturesChamado reutilizável por todas as etapas da triagem
+    """
+    contexto = criar_contexto(normalizar_texto(texto), modulo)
+    features = FeaturesChamado(
+        texto=contexto.texto,
+        modulo=contexto.modulo,
+        tokens=contexto.tokens,
+        spans=contexto.spans,
+        posicoes=contexto.posicoes
+    )
+
+    for match in _REGEX_ENTIDADES.finditer(features.texto.original):
+        grupo = match.lastgroup
+        valor = match.group(grupo)
+        if grupo == "frame":
+            features.frames.append(valor)
+            metodo = valor.rsplit(".", 1)[-1]
+            if _REGEX_HANDLER.fullmatch(metodo):
+                _adicionar_unico(features.handlers, metodo)
+        elif grupo == "handler":
+            _adicionar_unico(features.handlers, valor)
+        elif grupo == "excecao":
+            _adicionar_unico(features.excecoes, valor)
+        elif grupo in ("erro_sql", "erro_sql_numero"):
+            _adicionar_unico(features.erros_sql, int(valor))
+        else:
+            tabela = _limpar_tabela(valor)
+            if tabela.lower() not in _NAO_TABELAS:
+                _adicionar_unico(features.tabelas, tabela)
+
+    if any(e.endswith("SqlException") for e in features.excecoes):
+        for match in _REGEX_NUMERO_SQLEXCEPTION.finditer(features.texto.original):
+            _adicionar_unico(features.erros_sql, int(match.group(1)))
+
+    # "SqlException" é redundante quando "System.Data.SqlClient.SqlException" também apareceu
+    qualificadas = [e for e in features.excecoes if "." in e]
+    features.excecoes = [
+        e for e in features.excecoes
+        if "." in e or not any(q.endswith("." + e) for q in qualificadas)
+    ]
+    return features
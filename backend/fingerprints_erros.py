@@ -0,0 +1,149 @@
+"""
+Fingerprints de exceções, stack traces e erros do SQL Server
+Gera chaves estáveis a partir das features do chamado (tipo da exceção + topo
+normalizado do stack trace, ou número do erro SQL) e consulta em O(1) um índice
+de problemas conhecidos construído a partir da base de conhecimento e de
+triagens anteriores.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from features_chamado import FeaturesChamado
+
+TOTAL_FRAMES_FINGERPRINT = 3
+PREFIXOS_FRAMEWORK = ("system.", "microsoft.")
+
+CONFIANCA_BASE_CONHECIMENTO = 0.9
+CONFIANCA_TRIAGEM_ANTERIOR = 0.95
+
+# Tipos de fingerprint, do mais específico para o mais genérico
+TIPO_EXCECAO_FRAMES = "excecao_frames"
+TIPO_SQL_CONTEXTO = "sql_contexto"
+TIPO_SQL = "sql"
+TIPO_EXCECAO = "excecao"
+
+# Somente fingerprints específicos são aprendidos de triagens anteriores
+TIPOS_APRENDIDOS = (TIPO_EXCECAO_FRAMES, TIPO_SQL_CONTEXTO)
+
+_REGEX_RUIDO_FRAME = re.compile(r"`\d+|\[[^\]]*\]|<[^>]*>\w*|\$\w*")
+
+
+def _normalizar_frame(frame: str) -> str:
+    """Remove genéricos, lambdas e métodos gerados pelo compilador"""
+    frame = _REGEX_RUIDO_FRAME.sub("", frame).lower()
+    return re.sub(r"\.{2,}", ".", frame).strip(".")
+
+
+def _nome_curto(excecao: str) -> str:
+    return excecao.rsplit(".", 1)[-1].lower()
+
+
+def _hash(chave: str) -> str:
+    return hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class Fingerprint:
+    tipo: str
+    chave: str  # legível, ex: "sql|547|turmas"
+
+    @property
+    def hash(self) -> str:
+        return _hash(self.chave)
+
+
+def gerar_fingerprints(features: FeaturesChamado) -> List[Fingerprint]:
+    """Fingerprints do chamado, do mais específico para o mais genérico"""
+    fingerprints: List[Fingerprint] = []
+
+    frames = [_normalizar_frame(f) for f in features.frames]
+    frames_aplicacao = [f for f in frames if not f.startswith(PREFIXOS_FRAMEWORK)] or frames
+    topo = frames_aplicacao[:TOTAL_FRAMES_FINGERPRINT]
+
+    excecoes = [_nome_curto(e) for e in features.excecoes]
+    if excecoes and topo:
+        fingerprints.append(Fingerprint(TIPO_EXCECAO_FRAMES, "|".join(["exc", excecoes[0], *topo])))
+
+    contexto = (features.tabelas[:1] or features.handlers[:1])
+    for numero in features.erros_sql:
+        if contexto:
+            fingerprints.append(Fingerprint(TIPO_SQL_CONTEXTO, f"sql|{numero}|{contexto[0].lower()}"))
+    for numero in features.erros_sql:
+        fingerprints.append(Fingerprint(TIPO_SQL, f"sql|{numero}"))
+    for excecao in excecoes:
+        fingerprints.append(Fingerprint(TIPO_EXCECAO, f"exc|{excecao}"))
+
+    return fingerprints
+
+
+@dataclass
+class ProblemaConhecido:
+    origem: str  # "base_conhecimento" ou "triagem"
+    chave: str
+    confianca: float
+    padrao_id: Optional[str] = None
+    tipo_padrao: Optional[str] = None
+    analise_ia: Optional[Dict[str, Any]] = None
+    triagem_id: Optional[str] = None
+
+
+class IndiceFingerprints:
+    def __init__(self):
+        self._indice: Dict[str, ProblemaConhecido] = {}
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def carregar_base_conhecimento(self, padroes: List[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Indexa os campos `erros_sql` e `excecoes` declarados nos padrões
+
+        Args:
+            padroes: lista de (tipo do padrão, padrao_id, config)
+        """
+        for tipo_padrao, padrao_id, config in padroes:
+            chaves = [f"sql|{numero}" for numero in config.get("erros_sql", [])]
+            chaves += [f"exc|{_nome_curto(e)}" for e in config.get("excecoes", [])]
+            for chave in chaves:
+                self._indice[_hash(chave)] = ProblemaConhecido(
+                    origem="base_conhecimento",
+                    chave=chave,
+                    confianca=CONFIANCA_BASE_CONHECIMENTO,
+                    padrao_id=padrao_id,
+                    tipo_padrao=tipo_padrao
+                )
+
+    def registrar_triagem(
+        self,
+        fingerprints: List[Fingerprint],
+        analise_ia: Dict[str, Any],
+        triagem_id: Optional[str] = None
+    ) -> Optional[Fingerprint]:
+        """Aprende o fingerprint mais específico de uma triagem com análise de IA válida"""
+        for fingerprint in fingerprints:
+            if fingerprint.tipo in TIPOS_APRENDIDOS:
+                self.adicionar_triagem(fingerprint.hash, fingerprint.chave, analise_ia, triagem_id)
+                return fingerprint
+        return None
+
+    def adicionar_triagem(
+        self, hash_fingerprint: str, chave: str, analise_ia: Dict[str, Any], triagem_id: Optional[str] = None
+    ):
+        self._indice[hash_fingerprint] = ProblemaConhecido(
+            origem="triagem",
+            chave=chave,
+            confianca=CONFIANCA_TRIAGEM_ANTERIOR,
+            analise_ia=analise_ia,
+            triagem_id=triagem_id
+        )
+
+    def buscar(self, fingerprints: List[Fingerprint]) -> Optional[ProblemaConhecido]:
+        """Retorna o problema conhecido do fingerprint mais específico encontrado"""
+        for fingerprint in fingerprints:
+            conhecido = self._indice.get(fingerprint.hash)
+            if conhecido is not None:
+                return conhecido
+        return None
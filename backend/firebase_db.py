@@ -1,25 +1,176 @@
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, Iterable, Iterator, List, Any
+from google.api_core.exceptions import FailedPrecondition
 from google.cloud.firestore import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
 from firebase_config import firebase_config
+from armazenamento_triagens import (
+    compactar_documento,
+    decodificar_documento,
+    desempacotar_configs,
+    empacotar_configs
+)
+from repositorio_triagens import (
+    CAMPOS_PESADOS_TRIAGEM,
+    CAMPOS_RESUMO_TRIAGEM,
+    RepositorioTriagens,
+    codificar_cursor,
+    decodificar_cursor,
+    em_blocos,
+    periodo_serie_diaria,
+    projecao,
+    serie_diaria
+)
 
-class FirebaseDatabase:
-    def __init__(self):
-        self.db = firebase_config.db
+CAMPOS_RESUMO_ANALISE = [
+    'ticket_numero', 'usuario_nome', 'cliente_nome', 'data_analise',
+    'tipo_identificado', 'modulo_identificado', 'foi_copiado'
+]
+CAMPOS_PESADOS_ANALISE = ('chamado_gerado',)
+
+# Leituras em lote: o operador `in` do Firestore aceita até 30 valores por consulta
+VALORES_POR_CONSULTA_IN = 30
+DOCUMENTOS_POR_GET_ALL = 300
+CONSULTAS_PARALELAS = 8
+
+# Módulos contados um a um (agregação count) no ranking de get_estatisticas_triagem;
+# sem lista, o ranking lê modulo_identificado de todas as triagens do período
+MODULOS_CONHECIDOS = [m.strip() for m in os.getenv("TRIAGEM_MODULOS", "").split(",") if m.strip()]
+
+# Filtros de igualdade das agregações (NOMES_FILTROS_AGREGACAO -> campo do documento)
+FILTROS_AGREGACAO = {
+    'modulo': 'modulo_identificado',
+    'foi_utilizada': 'foi_utilizada',
+    'categoria': 'analise_ia.categoria_detalhada',
+    'tipo_problema': 'analise_ia.tipo_problema',
+    'prioridade': 'analise_ia.prioridade',
+    'total_solucoes': 'total_solucoes'
+}
+
+# Campos lidos pela série diária de estatísticas (nenhum é comprimido no formato compacto)
+CAMPOS_SERIE_DIARIA = [
+    'data_triagem',
+    'analise_ia.tipo_problema',
+    'analise_ia.prioridade',
+    'analise_ia.categoria_detalhada',
+    'total_solucoes',
+    'tempo_processamento_ms'
+]
+
+# Campos lidos pelo histórico paginado (o texto do chamado e a análise completa ficam de fora)
+CAMPOS_HISTORICO = [
+    'data_triagem',
+    'modulo_identificado',
+    'resumo.total_padroes_detectados',
+    'resumo.prioridade_geral',
+    'total_solucoes',
+    'foi_utilizada'
+]
+
+
+def valor_aninhado(dados: Dict[str, Any], caminho: str) -> Any:
+    """Valor de um campo 'a.b.c' do documento (None se ausente)"""
+    for parte in caminho.split('.'):
+        if not isinstance(dados, dict):
+            return None
+        dados = dados.get(parte)
+    return dados
+
+
+class FirebaseDatabase(RepositorioTriagens):
+    nome = "firestore"
+    
+    def __init__(self, db=None, modulos: Optional[List[str]] = None):
+        # db permite usar outro cliente (ex.: o emulador do Firestore no benchmark)
+        self.db = db if db is not None else firebase_config.db
+        self.modulos = list(modulos) if modulos is not None else MODULOS_CONHECIDOS
         
         # Nomes das coleções no Firestore
         self.COLLECTIONS = {
             'triagens': 'triagens',  # Coleção específica para triagens
             'analises': 'analises',  # Coleção do sistema principal (para leitura)
             'feedbacks_triagem': 'feedbacks_triagem',  # Feedbacks específicos de triagem
-            'estatisticas_triagem': 'estatisticas_triagem'  # Estatísticas de triagem
+            'estatisticas_triagem': 'estatisticas_triagem',  # Estatísticas de triagem
+            'fingerprints_triagem': 'fingerprints_triagem',  # Problemas conhecidos por fingerprint
+            'bases_conhecimento': 'bases_conhecimento'  # Configs dos padrões por versão da base
         }
     
     def is_configured(self) -> bool:
         """Verifica se o Firebase está configurado"""
         return self.db is not None
     
+    def _mais_recentes(self, query, campo_data: str, limite: Optional[int] = None) -> List[Any]:
+        """
+        Documentos da consulta do mais recente para o mais antigo, ordenados e
+        limitados no servidor (índices compostos em firestore.indexes.json)
+        
+        Enquanto o índice composto não existe ou ainda está sendo construído, o
+        Firestore recusa a consulta ordenada (FailedPrecondition); nesse caso lê
+        os documentos sem ordenação e ordena localmente.
+        """
+        ordenada = query.order_by(campo_data, direction='DESCENDING')
+        if limite:
+            ordenada = ordenada.limit(limite)
+        try:
+            return list(ordenada.stream())
+        except FailedPrecondition as e:
+            print(f"⚠️  Índice de {campo_data} indisponível, ordenando localmente: {e}")
+            docs = sorted(
+                query.stream(),
+                key=lambda doc: (doc.to_dict().get(campo_data) is not None, doc.to_dict().get(campo_data)),
+                reverse=True
+            )
+            return docs[:limite] if limite else docs
+    
+    def _em_paralelo(self, funcao, blocos: List[List[Any]]) -> List[Any]:
+        """Executa funcao(bloco) para cada bloco em threads e junta as listas retornadas"""
+        if len(blocos) <= 1:
+            return [item for bloco in blocos for item in funcao(bloco)]
+        with ThreadPoolExecutor(max_workers=min(CONSULTAS_PARALELAS, len(blocos))) as executor:
+            return [item for resultado in executor.map(funcao, blocos) for item in resultado]
+    
+    def _selecao(self, campos: List[str]) -> List[str]:
+        """Campos do select(); com os padrões vem a versão da base, para recolocar os configs"""
+        return campos + ['versao_base_conhecimento'] if 'padroes_encontrados' in campos else campos
+    
+    def _resumo_triagem(self, doc, campos: List[str]) -> Dict[str, Any]:
+        """Triagem da projeção CAMPOS_RESUMO_TRIAGEM (+ campos extras pedidos)"""
+        data = decodificar_documento(doc.to_dict(), self.configs_versao)
+        # Converter timestamps
+        if 'data_triagem' in data and hasattr(data['data_triagem'], 'isoformat'):
+            data['data_triagem'] = data['data_triagem'].isoformat()
+        
+        return {
+            'id': doc.id,
+            'ticket_numero': data.get('ticket_numero'),
+            'modulo_identificado': data.get('modulo_identificado'),
+            'data_triagem': data.get('data_triagem'),
+            'foi_utilizada': data.get('foi_utilizada', False),
+            'resumo': data.get('resumo', {}),
+            **{campo: data.get(campo) for campo in campos[len(CAMPOS_RESUMO_TRIAGEM):]}
+        }
+    
+    def _dados_analise(self, doc) -> Dict[str, Any]:
+        """Análise do sistema principal com o chamado gerado"""
+        data = doc.to_dict()
+        
+        # Converter timestamps
+        if 'data_analise' in data and hasattr(data['data_analise'], 'isoformat'):
+            data['data_analise'] = data['data_analise'].isoformat()
+        
+        return {
+            'id': doc.id,
+            'ticket_numero': data.get('ticket_numero'),
+            'chamado_gerado': data.get('chamado_gerado'),
+            'modulo_identificado': data.get('modulo_identificado'),
+            'usuario_nome': data.get('usuario_nome'),
+            'cliente_nome': data.get('cliente_nome'),
+            'data_analise': data.get('data_analise'),
+            'tipo_identificado': data.get('tipo_identificado')
+        }
+    
     # ==================== TRIAGENS ====================
     
     def registrar_triagem(
@@ -29,9 +180,14 @@ class FirebaseDatabase:
         modulo: Optional[str],
         resultado_triagem: Dict[str, Any],
         analise_id_original: Optional[str] = None,
-        usuario: Optional[str] = None
+        usuario: Optional[str] = None,
+        base_conhecimento: Optional[Dict[str, Any]] = None
     ) -> str:
-        """Registra uma triagem completa"""
+        """
+        Registra uma triagem completa no formato compacto (armazenamento_triagens):
+        padrões da base gravados por referência à versão informada (com a cópia
+        dos configs da versão em bases_conhecimento) e textos longos comprimidos
+        """
         if not self.is_configured():
             print("⚠️  Firebase não configurado - triagem não será salva")
             return "mock_id"
@@ -49,13 +205,17 @@ class FirebaseDatabase:
             'analise_ia': resultado_triagem.get('analise_ia', {}),
             'solucoes_sugeridas': resultado_triagem.get('solucoes_sugeridas', []),
             'resumo': resultado_triagem.get('resumo', {}),
+            'features': resultado_triagem.get('features', {}),
             'modo_mock': resultado_triagem.get('modo_mock', False),
             'tempo_processamento_ms': resultado_triagem.get('tempo_processamento_ms', 0),
+            'total_solucoes': len(resultado_triagem.get('solucoes_sugeridas', [])),
             'foi_utilizada': False,
             'data_triagem': now,
             'created_at': now,
             'updated_at': now
         }
+        base_conhecimento = base_conhecimento or {}
+        data = compactar_documento(data, self.configs_referencia(base_conhecimento), base_conhecimento.get('versao'))
         
         doc_ref.set(data)
         print(f"✅ Triagem salva no Firebase: {doc_ref.id}")
@@ -81,7 +241,7 @@ class FirebaseDatabase:
         doc = doc_ref.get()
         
         if doc.exists:
-            data = doc.to_dict()
+            data = decodificar_documento(doc.to_dict(), self.configs_versao)
             # Converter timestamps para string para compatibilidade
             if 'data_triagem' in data and hasattr(data['data_triagem'], 'isoformat'):
                 data['data_triagem'] = data['data_triagem'].isoformat()
@@ -92,35 +252,212 @@ class FirebaseDatabase:
             return data
         return None
     
-    def get_triagens_por_ticket(self, ticket_numero: str) -> List[Dict]:
-        """Busca todas as triagens de um ticket específico"""
+    def get_triagens_por_ticket(
+        self,
+        ticket_numero: str,
+        campos_extras: Iterable[str] = (),
+        limite: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Busca as triagens de um ticket específico, da mais recente para a mais antiga
+        
+        Args:
+            ticket_numero: Número do ticket
+            campos_extras: Campos pesados a incluir (CAMPOS_PESADOS_TRIAGEM)
+            limite: Número máximo de triagens (None para todas)
+        """
         if not self.is_configured():
             return []
         
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
         query = self.db.collection(self.COLLECTIONS['triagens']).where(
             'ticket_numero', '==', ticket_numero
+        ).select(self._selecao(campos))
+        
+        return [self._resumo_triagem(doc, campos) for doc in self._mais_recentes(query, 'data_triagem', limite)]
+    
+    def get_historico_paginado(
+        self,
+        por_pagina: int = 20,
+        modulo: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Página do histórico de triagens, das mais recentes para as mais antigas
+        
+        A paginação é por cursor (start_after em data_triagem + ID do documento),
+        então cada página custa por_pagina + 1 leituras independente da profundidade.
+        Só os campos do item de histórico são transferidos (select).
+        O filtro por módulo usa o índice composto (modulo_identificado, data_triagem)
+        declarado em firestore.indexes.json.
+        
+        Args:
+            por_pagina: Triagens por página
+            modulo: Filtrar pelo módulo identificado
+            cursor: proximo_cursor da página anterior (None para a primeira)
+        
+        Returns:
+            Dict com 'triagens' e 'proximo_cursor' (None na última página)
+        """
+        if not self.is_configured():
+            return {'triagens': [], 'proximo_cursor': None}
+        
+        query = self.db.collection(self.COLLECTIONS['triagens'])
+        if modulo:
+            query = query.where(filter=FieldFilter('modulo_identificado', '==', modulo))
+        query = query.select(CAMPOS_HISTORICO).order_by(
+            'data_triagem', direction='DESCENDING'
+        ).order_by(FieldPath.document_id(), direction='DESCENDING')
+        
+        if cursor:
+            data_triagem, triagem_id = decodificar_cursor(cursor)
+            query = query.start_after({'data_triagem': data_triagem, '__name__': triagem_id})
+        
+        # Um documento a mais indica se existe próxima página
+        docs = list(query.limit(por_pagina + 1).stream())
+        tem_proxima = len(docs) > por_pagina
+        docs = docs[:por_pagina]
+        
+        triagens = []
+        for doc in docs:
+            data = doc.to_dict()
+            resumo = data.get('resumo') or {}
+            triagens.append({
+                'id': doc.id,
+                'data_triagem': data.get('data_triagem'),
+                'modulo': data.get('modulo_identificado'),
+                'total_padroes': resumo.get('total_padroes_detectados', 0),
+                'prioridade_geral': resumo.get('prioridade_geral', 'baixa'),
+                'solucoes_geradas': data.get('total_solucoes', 0),
+                'teve_feedback': data.get('foi_utilizada', False)
+            })
+        
+        proximo_cursor = None
+        if tem_proxima and triagens:
+            ultima = triagens[-1]
+            proximo_cursor = codificar_cursor(ultima['data_triagem'], ultima['id'])
+        
+        return {'triagens': triagens, 'proximo_cursor': proximo_cursor}
+    
+    def get_triagens_historico(self, limite: Optional[int] = None) -> List[Dict]:
+        """Texto, módulo, análise e soluções das triagens reais (sem modo mock), para treinar e indexar modelos locais"""
+        if not self.is_configured():
+            return []
+        
+        query = self.db.collection(self.COLLECTIONS['triagens']).select(
+            ['ticket_numero', 'chamado_texto', 'modulo_identificado', 'analise_ia', 'solucoes_sugeridas', 'modo_mock', 'data_triagem']
         )
+        if limite:
+            query = query.limit(limite)
         
         triagens = []
         for doc in query.stream():
-            data = doc.to_dict()
-            # Converter timestamps
-            if 'data_triagem' in data and hasattr(data['data_triagem'], 'isoformat'):
-                data['data_triagem'] = data['data_triagem'].isoformat()
-            
+            data = decodificar_documento(doc.to_dict(), self.configs_versao)
+            if data.get('modo_mock') or not data.get('chamado_texto'):
+                continue
             triagens.append({
                 'id': doc.id,
                 'ticket_numero': data.get('ticket_numero'),
+                'chamado_texto': data.get('chamado_texto'),
                 'modulo_identificado': data.get('modulo_identificado'),
-                'data_triagem': data.get('data_triagem'),
-                'foi_utilizada': data.get('foi_utilizada', False),
-                'resumo': data.get('resumo', {})
+                'analise_ia': data.get('analise_ia') or {},
+                'solucoes_sugeridas': data.get('solucoes_sugeridas') or [],
+                'data_triagem': data.get('data_triagem')
             })
+        return triagens
+    
+    def exportar_triagens(self, desde: Optional[datetime] = None, por_pagina: int = 300) -> Iterator[Dict[str, Any]]:
+        """
+        Documentos completos (descomprimidos, com 'id') das triagens alteradas
+        depois de `desde`, em ordem de updated_at, lidos em páginas; usado para
+        alimentar a réplica SQLite
+        """
+        if not self.is_configured():
+            return
         
-        # Ordena localmente por data (mais recente primeiro)
-        triagens.sort(key=lambda x: x.get('data_triagem', ''), reverse=True)
+        query = self.db.collection(self.COLLECTIONS['triagens'])
+        if desde:
+            query = query.where(filter=FieldFilter('updated_at', '>', desde))
+        query = query.order_by('updated_at').limit(por_pagina)
+        
+        ultimo = None
+        while True:
+            docs = list((query.start_after(ultimo) if ultimo is not None else query).stream())
+            for doc in docs:
+                yield {'id': doc.id, **decodificar_documento(doc.to_dict(), self.configs_versao)}
+            if len(docs) < por_pagina:
+                return
+            ultimo = docs[-1]
+    
+    # ==================== FINGERPRINTS DE ERROS ====================
+    
+    def registrar_fingerprint(
+        self,
+        hash_fingerprint: str,
+        chave: str,
+        analise_ia: Dict[str, Any],
+        triagem_id: Optional[str] = None
+    ):
+        """Salva (ou substitui) o problema conhecido associado a um fingerprint"""
+        if not self.is_configured():
+            return
         
-        return triagens
+        now = datetime.now(timezone.utc)
+        self.db.collection(self.COLLECTIONS['fingerprints_triagem']).document(hash_fingerprint).set({
+            'chave': chave,
+            'analise_ia': analise_ia,
+            'triagem_id': triagem_id,
+            'created_at': now,
+            'updated_at': now
+        })
+    
+    def get_fingerprints(self) -> List[Dict]:
+        """Retorna todos os fingerprints aprendidos de triagens anteriores"""
+        if not self.is_configured():
+            return []
+        
+        fingerprints = []
+        query = self.db.collection(self.COLLECTIONS['fingerprints_triagem']).select(['chave', 'analise_ia', 'triagem_id'])
+        for doc in query.stream():
+            data = doc.to_dict()
+            fingerprints.append({
+                'hash': doc.id,
+                'chave': data.get('chave', ''),
+                'analise_ia': data.get('analise_ia', {}),
+                'triagem_id': data.get('triagem_id')
+            })
+        return fingerprints
+    
+    def exportar_fingerprints(self, desde: Optional[datetime] = None, por_pagina: int = 300) -> Iterator[Dict[str, Any]]:
+        """
+        Fingerprints alterados depois de `desde` (com 'hash' e 'updated_at'), em
+        ordem de updated_at, lidos em páginas; usado para alimentar a réplica SQLite
+        """
+        if not self.is_configured():
+            return
+        
+        query = self.db.collection(self.COLLECTIONS['fingerprints_triagem']).select(
+            ['chave', 'analise_ia', 'triagem_id', 'updated_at']
+        )
+        if desde:
+            query = query.where(filter=FieldFilter('updated_at', '>', desde))
+        query = query.order_by('updated_at').limit(por_pagina)
+        
+        ultimo = None
+        while True:
+            docs = list((query.start_after(ultimo) if ultimo is not None else query).stream())
+            for doc in docs:
+                data = doc.to_dict()
+                yield {
+                    'hash': doc.id,
+                    'chave': data.get('chave', ''),
+                    'analise_ia': data.get('analise_ia', {}),
+                    'triagem_id': data.get('triagem_id'),
+                    'updated_at': data.get('updated_at')
+                }
+            if len(docs) < por_pagina:
+                return
+            ultimo = docs[-1]
     
     # ==================== INTEGRAÇÃO COM SISTEMA PRINCIPAL ====================
     
@@ -129,41 +466,30 @@ class FirebaseDatabase:
         if not self.is_configured():
             return None
         
-        # Busca na coleção 'analises' do sistema principal (sem ordenação para evitar problemas de índice)
+        # Busca na coleção 'analises' do sistema principal (só a análise mais recente é lida)
         query = self.db.collection(self.COLLECTIONS['analises']).where(
             'ticket_numero', '==', ticket_numero
-        )
+        ).select(CAMPOS_RESUMO_ANALISE + ['chamado_gerado'])
         
-        docs = list(query.stream())
+        docs = self._mais_recentes(query, 'data_analise', limite=1)
         if docs:
-            # Ordena localmente por data (mais recente primeiro)
-            docs.sort(key=lambda doc: doc.to_dict().get('data_analise', ''), reverse=True)
-            doc = docs[0]
-            data = doc.to_dict()
-            
-            # Converter timestamps
-            if 'data_analise' in data and hasattr(data['data_analise'], 'isoformat'):
-                data['data_analise'] = data['data_analise'].isoformat()
-            
-            return {
-                'id': doc.id,
-                'ticket_numero': data.get('ticket_numero'),
-                'chamado_gerado': data.get('chamado_gerado'),
-                'modulo_identificado': data.get('modulo_identificado'),
-                'usuario_nome': data.get('usuario_nome'),
-                'cliente_nome': data.get('cliente_nome'),
-                'data_analise': data.get('data_analise'),
-                'tipo_identificado': data.get('tipo_identificado')
-            }
+            return self._dados_analise(docs[0])
         
         return None
     
-    def get_analises_recentes_sistema_principal(self, limite: int = 10) -> List[Dict]:
-        """Retorna análises recentes do sistema principal"""
+    def get_analises_recentes_sistema_principal(self, limite: int = 10, campos_extras: Iterable[str] = ()) -> List[Dict]:
+        """
+        Retorna análises recentes do sistema principal
+        
+        Args:
+            limite: Número de análises
+            campos_extras: Campos pesados a incluir (CAMPOS_PESADOS_ANALISE, ex.: chamado_gerado)
+        """
         if not self.is_configured():
             return []
         
-        query = self.db.collection(self.COLLECTIONS['analises']).order_by(
+        campos = projecao(CAMPOS_RESUMO_ANALISE, campos_extras, CAMPOS_PESADOS_ANALISE)
+        query = self.db.collection(self.COLLECTIONS['analises']).select(campos).order_by(
             'data_analise', direction='DESCENDING'
         ).limit(limite)
         
@@ -178,15 +504,88 @@ class FirebaseDatabase:
                 'id': doc.id,
                 'ticket_numero': data.get('ticket_numero', ''),
                 'usuario_nome': data.get('usuario_nome'),
+                'cliente_nome': data.get('cliente_nome'),
                 'data_analise': data.get('data_analise', ''),
                 'tipo_identificado': data.get('tipo_identificado'),
                 'modulo_identificado': data.get('modulo_identificado'),
-                'chamado_gerado': data.get('chamado_gerado'),
-                'foi_copiado': data.get('foi_copiado', False)
+                'foi_copiado': data.get('foi_copiado', False),
+                **{campo: data.get(campo) for campo in campos[len(CAMPOS_RESUMO_ANALISE):]}
             })
         
         return analises
     
+    # ==================== LEITURAS EM LOTE ====================
+    
+    def get_triagens_por_ids(self, triagem_ids: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, Dict]:
+        """
+        Várias triagens por ID com get_all (uma requisição por bloco de
+        DOCUMENTOS_POR_GET_ALL, blocos em paralelo)
+        
+        Returns:
+            Dict triagem_id -> triagem (IDs inexistentes ficam de fora)
+        """
+        if not self.is_configured():
+            return {}
+        
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        colecao = self.db.collection(self.COLLECTIONS['triagens'])
+        
+        def ler(bloco):
+            docs = self.db.get_all([colecao.document(triagem_id) for triagem_id in bloco], field_paths=self._selecao(campos))
+            return [self._resumo_triagem(doc, campos) for doc in docs if doc.exists]
+        
+        triagens = self._em_paralelo(ler, em_blocos(triagem_ids, DOCUMENTOS_POR_GET_ALL))
+        return {triagem['id']: triagem for triagem in triagens}
+    
+    def get_triagens_por_tickets(self, tickets: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, List[Dict]]:
+        """
+        Triagens de vários tickets com consultas `in` de até 30 tickets, em paralelo
+        
+        Returns:
+            Dict ticket_numero -> triagens do ticket (mais recente primeiro)
+        """
+        if not self.is_configured():
+            return {}
+        
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        colecao = self.db.collection(self.COLLECTIONS['triagens'])
+        
+        def ler(bloco):
+            query = colecao.where(filter=FieldFilter('ticket_numero', 'in', bloco)).select(self._selecao(campos))
+            return [self._resumo_triagem(doc, campos) for doc in query.stream()]
+        
+        por_ticket: Dict[str, List[Dict]] = {}
+        for triagem in self._em_paralelo(ler, em_blocos(tickets, VALORES_POR_CONSULTA_IN)):
+            por_ticket.setdefault(triagem['ticket_numero'], []).append(triagem)
+        for triagens in por_ticket.values():
+            triagens.sort(key=lambda t: t.get('data_triagem') or '', reverse=True)
+        return por_ticket
+    
+    def buscar_analises_por_tickets(self, tickets: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Análise mais recente de cada ticket, com consultas `in` de até 30 tickets em paralelo
+        
+        Returns:
+            Dict ticket_numero -> análise (tickets sem análise ficam de fora)
+        """
+        if not self.is_configured():
+            return {}
+        
+        colecao = self.db.collection(self.COLLECTIONS['analises'])
+        
+        def ler(bloco):
+            query = colecao.where(filter=FieldFilter('ticket_numero', 'in', bloco)).select(
+                CAMPOS_RESUMO_ANALISE + ['chamado_gerado']
+            )
+            return [self._dados_analise(doc) for doc in query.stream()]
+        
+        analises: Dict[str, Dict] = {}
+        for analise in self._em_paralelo(ler, em_blocos(tickets, VALORES_POR_CONSULTA_IN)):
+            atual = analises.get(analise['ticket_numero'])
+            if atual is None or (analise.get('data_analise') or '') > (atual.get('data_analise') or ''):
+                analises[analise['ticket_numero']] = analise
+        return analises
+    
     # ==================== FEEDBACKS DE TRIAGEM ====================
     
     def registrar_feedback_triagem(
@@ -218,10 +617,152 @@ class FirebaseDatabase:
         doc_ref.set(data)
         return doc_ref.id
     
+    # ==================== VERSÕES DA BASE DE CONHECIMENTO ====================
+    
+    def get_configs_base(self, versao: str) -> Optional[Dict]:
+        """Cópia dos configs dos padrões gravada para a versão da base (None se não existe)"""
+        if not self.is_configured():
+            return None
+        
+        doc = self.db.collection(self.COLLECTIONS['bases_conhecimento']).document(versao).get()
+        if not doc.exists:
+            return None
+        return desempacotar_configs(doc.to_dict()['configs'])
+    
+    def registrar_configs_base(self, versao: str, configs: Dict):
+        """Grava a cópia dos configs dos padrões da versão (referenciados pelas triagens da versão)"""
+        if not self.is_configured():
+            return
+        
+        self.db.collection(self.COLLECTIONS['bases_conhecimento']).document(versao).set({
+            'versao': versao,
+            'configs': empacotar_configs(configs),
+            'created_at': datetime.now(timezone.utc)
+        })
+        print(f"✅ Configs da base de conhecimento {versao} gravados no Firebase")
+    
+    # ==================== AGREGAÇÕES ====================
+    
+    def _consulta_agregacao(self, desde: Optional[datetime], ate: Optional[datetime], filtros: Dict[str, Any]):
+        """Consulta de triagens com o período [desde, ate) e os filtros de igualdade (valores None são ignorados)"""
+        desconhecidos = [nome for nome in filtros if nome not in FILTROS_AGREGACAO]
+        if desconhecidos:
+            raise ValueError(f"Filtros de agregação não suportados: {desconhecidos}")
+        
+        query = self.db.collection(self.COLLECTIONS['triagens'])
+        for nome, valor in filtros.items():
+            if valor is not None:
+                query = query.where(filter=FieldFilter(FILTROS_AGREGACAO[nome], '==', valor))
+        if desde:
+            query = query.where(filter=FieldFilter('data_triagem', '>=', desde))
+        if ate:
+            query = query.where(filter=FieldFilter('data_triagem', '<', ate))
+        return query
+    
+    def _agregar_localmente(
+        self,
+        desde: Optional[datetime],
+        ate: Optional[datetime],
+        filtros: Dict[str, Any],
+        campo: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Mesma agregação lendo só os campos envolvidos, para quando falta o índice
+        composto: o período usa o índice automático de data_triagem e os filtros
+        de igualdade são aplicados aqui
+        """
+        ativos = {FILTROS_AGREGACAO[nome]: valor for nome, valor in filtros.items() if valor is not None}
+        query = self._consulta_agregacao(desde, ate, {}).select(list(ativos) + ([campo] if campo else []) or ['data_triagem'])
+        
+        total, soma = 0, 0
+        for doc in query.stream():
+            data = doc.to_dict()
+            if any(valor_aninhado(data, caminho) != valor for caminho, valor in ativos.items()):
+                continue
+            total += 1
+            valor = valor_aninhado(data, campo) if campo else None
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                soma += valor
+        return {'total': total, 'soma': soma, 'media': soma / total if total else 0}
+    
+    def _executar_agregacao(self, agregacao) -> Dict[str, Any]:
+        valores = {}
+        for resultado in agregacao.get():
+            for item in resultado:
+                valores[item.alias] = item.value
+        return valores
+    
+    def contar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        **filtros: Any
+    ) -> int:
+        """
+        Conta triagens no servidor (consulta de agregação count)
+        
+        Args:
+            desde: Início do período (inclusive)
+            ate: Fim do período (exclusive)
+            **filtros: Filtros de igualdade de FILTROS_AGREGACAO (ex.: modulo, foi_utilizada)
+        """
+        if not self.is_configured():
+            return 0
+        
+        query = self._consulta_agregacao(desde, ate, filtros)
+        try:
+            return int(self._executar_agregacao(query.count(alias='total')).get('total') or 0)
+        except FailedPrecondition as e:
+            print(f"⚠️  Índice da contagem indisponível, contando localmente: {e}")
+            return self._agregar_localmente(desde, ate, filtros, None)['total']
+    
+    def agregar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        campo: str = 'tempo_processamento_ms',
+        **filtros: Any
+    ) -> Dict[str, Any]:
+        """
+        Contagem, soma e média de um campo numérico numa única consulta de agregação
+        
+        Args:
+            desde: Início do período (inclusive)
+            ate: Fim do período (exclusive)
+            campo: Campo somado e com média calculada
+            **filtros: Filtros de igualdade de FILTROS_AGREGACAO
+        
+        Returns:
+            Dict com total, soma e media
+        """
+        if not self.is_configured():
+            return {'total': 0, 'soma': 0, 'media': 0}
+        
+        query = self._consulta_agregacao(desde, ate, filtros)
+        agregacao = query.count(alias='total').sum(campo, alias='soma').avg(campo, alias='media')
+        try:
+            valores = self._executar_agregacao(agregacao)
+        except FailedPrecondition as e:
+            print(f"⚠️  Índice da agregação indisponível, agregando localmente: {e}")
+            return self._agregar_localmente(desde, ate, filtros, campo)
+        return {
+            'total': int(valores.get('total') or 0),
+            'soma': valores.get('soma') or 0,
+            'media': valores.get('media') or 0
+        }
+    
     # ==================== ESTATÍSTICAS DE TRIAGEM ====================
     
     def get_estatisticas_triagem(self, dias: int = 7) -> Dict[str, Any]:
-        """Retorna estatísticas das triagens"""
+        """
+        Retorna estatísticas das triagens
+        
+        Totais e tempo médio vêm de consultas de agregação. O ranking de
+        módulos é uma contagem por módulo conhecido (TRIAGEM_MODULOS), em
+        paralelo; módulos fora da lista não entram no ranking. Sem a lista,
+        as agregações não agrupam, então o ranking lê modulo_identificado de
+        todas as triagens do período (custo proporcional ao período).
+        """
         if not self.is_configured():
             return {
                 'total_triagens': 0,
@@ -232,49 +773,36 @@ class FirebaseDatabase:
                 'periodo_dias': dias
             }
         
-        # Busca todas as triagens (sem filtro de data para evitar problemas de índice)
-        triagens_query = self.db.collection(self.COLLECTIONS['triagens'])
-        all_triagens = list(triagens_query.stream())
-        
-        # Filtra por data localmente
         data_inicio = datetime.now(timezone.utc) - timedelta(days=dias)
-        triagens_recentes = []
-        
-        for doc in all_triagens:
-            data = doc.to_dict()
-            data_triagem = data.get('data_triagem')
-            if data_triagem and data_triagem >= data_inicio:
-                triagens_recentes.append((doc, data))
         
-        total_triagens = len(triagens_recentes)
-        
-        # Conta triagens utilizadas
-        triagens_utilizadas = sum(1 for _, data in triagens_recentes if data.get('foi_utilizada', False))
+        # Total e tempo médio numa agregação; utilizadas numa contagem
+        agregado = self.agregar_triagens(desde=data_inicio)
+        total_triagens = agregado['total']
+        triagens_utilizadas = self.contar_triagens(desde=data_inicio, foi_utilizada=True)
         
         # Taxa de utilização
         taxa_utilizacao = (triagens_utilizadas / total_triagens * 100) if total_triagens > 0 else 0
+        tempo_medio = agregado['media']
         
         # Módulos mais triados
         modulos_count = {}
-        tempo_total = 0
-        count_tempo = 0
-        
-        for _, data in triagens_recentes:
-            modulo = data.get('modulo_identificado')
-            if modulo and modulo.strip():
-                modulos_count[modulo] = modulos_count.get(modulo, 0) + 1
-            
-            tempo = data.get('tempo_processamento_ms', 0)
-            if tempo > 0:
-                tempo_total += tempo
-                count_tempo += 1
+        if self.modulos:
+            with ThreadPoolExecutor(max_workers=min(CONSULTAS_PARALELAS, len(self.modulos))) as executor:
+                totais = executor.map(lambda modulo: self.contar_triagens(desde=data_inicio, modulo=modulo), self.modulos)
+                modulos_count = {modulo: total for modulo, total in zip(self.modulos, totais) if total > 0}
+        else:
+            query = self.db.collection(self.COLLECTIONS['triagens']).where(
+                filter=FieldFilter('data_triagem', '>=', data_inicio)
+            ).select(['modulo_identificado'])
+            for doc in query.stream():
+                modulo = doc.to_dict().get('modulo_identificado')
+                if modulo and modulo.strip():
+                    modulos_count[modulo] = modulos_count.get(modulo, 0) + 1
         
         # Ordena e pega os top 5
         modulos_sorted = sorted(modulos_count.items(), key=lambda x: x[1], reverse=True)[:5]
         modulos = [{'modulo': modulo, 'total': total} for modulo, total in modulos_sorted]
         
-        tempo_medio = tempo_total / count_tempo if count_tempo > 0 else 0
-        
         return {
             'total_triagens': total_triagens,
             'triagens_utilizadas': triagens_utilizadas,
@@ -284,18 +812,71 @@ class FirebaseDatabase:
             'periodo_dias': dias
         }
     
-    def get_triagens_recentes(self, limite: int = 10) -> List[Dict]:
-        """Retorna triagens mais recentes"""
+    def get_serie_diaria(self, dias: int, categoria: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Série diária de uma única consulta do período (data_triagem >= início
+        do dia mais antigo), lendo só CAMPOS_SERIE_DIARIA; os dias, tipos,
+        prioridades e categorias são agrupados numa passada sobre as triagens
+        
+        O filtro de categoria usa o índice (categoria_detalhada, data_triagem);
+        sem ele, a categoria é filtrada localmente.
+        """
+        hoje, desde = periodo_serie_diaria(dias)
+        if not self.is_configured():
+            return serie_diaria([], dias, hoje)
+        
+        query = self.db.collection(self.COLLECTIONS['triagens']).where(
+            filter=FieldFilter('data_triagem', '>=', desde)
+        )
+        
+        def linhas(consulta):
+            for doc in consulta.select(CAMPOS_SERIE_DIARIA).stream():
+                data = doc.to_dict()
+                data_triagem = data.get('data_triagem')
+                if not hasattr(data_triagem, 'astimezone'):
+                    continue
+                analise_ia = data.get('analise_ia') or {}
+                if categoria and analise_ia.get('categoria_detalhada') != categoria:
+                    continue
+                yield (
+                    data_triagem.astimezone(timezone.utc).strftime('%Y-%m-%d'),
+                    analise_ia.get('tipo_problema'),
+                    analise_ia.get('prioridade'),
+                    analise_ia.get('categoria_detalhada'),
+                    1,
+                    int((data.get('total_solucoes') or 0) > 0),
+                    data.get('tempo_processamento_ms') or 0
+                )
+        
+        if not categoria:
+            return serie_diaria(linhas(query), dias, hoje)
+        try:
+            return serie_diaria(list(linhas(query.where(
+                filter=FieldFilter('analise_ia.categoria_detalhada', '==', categoria)
+            ))), dias, hoje)
+        except FailedPrecondition as e:
+            print(f"⚠️  Índice de categoria indisponível, filtrando localmente: {e}")
+            return serie_diaria(linhas(query), dias, hoje)
+    
+    def get_triagens_recentes(self, limite: int = 10, campos_extras: Iterable[str] = ()) -> List[Dict]:
+        """
+        Retorna triagens mais recentes
+        
+        Args:
+            limite: Número de triagens
+            campos_extras: Campos pesados a incluir (CAMPOS_PESADOS_TRIAGEM)
+        """
         if not self.is_configured():
             return []
         
-        query = self.db.collection(self.COLLECTIONS['triagens']).order_by(
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        query = self.db.collection(self.COLLECTIONS['triagens']).select(self._selecao(campos)).order_by(
             'data_triagem', direction='DESCENDING'
         ).limit(limite)
         
         triagens = []
         for doc in query.stream():
-            data = doc.to_dict()
+            data = decodificar_documento(doc.to_dict(), self.configs_versao)
             # Converter timestamps
             if 'data_triagem' in data and hasattr(data['data_triagem'], 'isoformat'):
                 data['data_triagem'] = data['data_triagem'].isoformat()
@@ -306,7 +887,8 @@ class FirebaseDatabase:
                 'modulo_identificado': data.get('modulo_identificado'),
                 'data_triagem': data.get('data_triagem', ''),
                 'foi_utilizada': data.get('foi_utilizada', False),
-                'resumo': data.get('resumo', {})
+                'resumo': data.get('resumo', {}),
+                **{campo: data.get(campo) for campo in campos[len(CAMPOS_RESUMO_TRIAGEM):]}
             })
         
         return triagens
@@ -0,0 +1,84 @@
+"""
+Índice de trigramas para busca aproximada de palavras-chave
+Tolera erros de digitação ("constrant", "timout", "dedlock") com verificação
+por distância de edição limitada
+"""
+
+from typing import Dict, List, Set
+
+TAMANHO_MINIMO_TOKEN = 4  # tokens curtos ("ao", "de", "key") exigem match exato
+DICE_MINIMO = 0.4  # filtro de candidatos por trigramas compartilhados
+
+
+def _trigramas(token: str) -> Set[str]:
+    marcado = f"^{token}$"
+    return {marcado[i:i + 3] for i in range(len(marcado) - 2)}
+
+
+def distancia_limitada(a: str, b: str, limite: int) -> int:
+    """Distância de Levenshtein com parada antecipada (retorna limite + 1 se exceder)"""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i] + [0] * len(b)
+        menor = i
+        for j, cb in enumerate(b, 1):
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb))
+            if atual[j] < menor:
+                menor = atual[j]
+        if menor > limite:
+            return limite + 1
+        anterior = atual
+    return anterior[-1]
+
+
+def limite_edicao(token: str) -> int:
+    """Erros tolerados conforme o tamanho do token"""
+    return 1 if len(token) <= 5 else 2
+
+
+class IndiceTrigramas:
+    def __init__(self):
+        self._postings: Dict[str, List[str]] = {}
+        self._total_trigramas: Dict[str, int] = {}
+
+    def adicionar(self, token: str):
+        """Indexa um token de palavra-chave (ignora tokens curtos)"""
+        if len(token) < TAMANHO_MINIMO_TOKEN or token in self._total_trigramas:
+            return
+        trigramas = _trigramas(token)
+        self._total_trigramas[token] = len(trigramas)
+        for trigrama in trigramas:
+            self._postings.setdefault(trigrama, []).append(token)
+
+    def __len__(self) -> int:
+        return len(self._total_trigramas)
+
+    def buscar(self, token: str) -> Dict[str, float]:
+        """
+        Busca tokens indexados parecidos com o token informado
+
+        Returns:
+            Dicionário token indexado -> similaridade (0.0 a 1.0)
+        """
+        if len(token) < TAMANHO_MINIMO_TOKEN:
+            return {}
+
+        trigramas = _trigramas(token)
+        compartilhados: Dict[str, int] = {}
+        for trigrama in trigramas:
+            for candidato in self._postings.get(trigrama, ()):
+                compartilhados[candidato] = compartilhados.get(candidato, 0) + 1
+
+        resultado = {}
+        for candidato, total in compartilhados.items():
+            dice = 2 * total / (len(trigramas) + self._total_trigramas[candidato])
+            if dice < DICE_MINIMO:
+                continue
+            limite = limite_edicao(candidato)
+            distancia = distancia_limitada(token, candidato, limite)
+            if distancia <= limite:
+                resultado[candidato] = 1 - distancia / max(len(token), len(candidato))
+        return resultado
@@ -0,0 +1,229 @@
+"""
+Busca de triagens anteriores similares
+Cada triagem salva vira um vetor de n-gramas com hashing (dimensão pequena,
+float32) gravado em append no arquivo `vetores.f32`, lido como matriz
+memory-mapped. Os metadados ficam em `metadados.jsonl` e só as linhas do
+top-k são lidas do disco. A consulta é um produto matriz-vetor em blocos
+(vetores com norma L2 unitária: produto interno = cosseno).
+
+A reconstrução (reconstruir_indice_similaridade.py) grava uma geração nova
+num subdiretório e só então troca o nome gravado em ARQUIVO_GERACAO; o índice
+aberto no serviço confere esse arquivo antes de cada leitura ou escrita e
+recarrega ao ver outra geração, em vez de misturar seus offsets em memória
+com os arquivos novos.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from features_chamado import FeaturesChamado
+from normalizacao_texto import normalizar
+from vetorizacao_hash import vetorizar_denso
+
+DIMENSAO_SIMILARIDADE = 512
+LINHAS_POR_BLOCO = 262144  # limita a memória temporária da consulta
+TAMANHO_MAXIMO_SOLUCAO = 500
+
+ARQUIVO_VETORES = "vetores.f32"
+ARQUIVO_METADADOS = "metadados.jsonl"
+ARQUIVO_GERACAO = "geracao"  # subdiretório da geração em uso; sem ele, os arquivos ficam no próprio diretório
+
+
+def geracao_atual(diretorio: str) -> str:
+    """Nome da geração em uso no diretório do índice ("" para o formato sem gerações)"""
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_GERACAO), 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def publicar_geracao(diretorio: str, geracao: str):
+    """Passa a usar a geração (subdiretório já completo); índices abertos recarregam na próxima operação"""
+    temporario = os.path.join(diretorio, ARQUIVO_GERACAO + ".tmp")
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(geracao)
+    os.replace(temporario, os.path.join(diretorio, ARQUIVO_GERACAO))
+
+
+class IndiceSimilaridade:
+    def __init__(self, diretorio: str, dimensao: int = DIMENSAO_SIMILARIDADE):
+        self.diretorio = diretorio
+        self.dimensao = dimensao
+        self._lock = threading.Lock()
+        self._matriz: Optional[np.memmap] = None
+
+        os.makedirs(diretorio, exist_ok=True)
+        self._abrir_geracao(geracao_atual(diretorio))
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _abrir_geracao(self, geracao: str):
+        """Carrega os arquivos da geração (criados vazios se não existem)"""
+        pasta = os.path.join(self.diretorio, geracao) if geracao else self.diretorio
+        self._caminho_vetores = os.path.join(pasta, ARQUIVO_VETORES)
+        self._caminho_metadados = os.path.join(pasta, ARQUIVO_METADADOS)
+        for caminho in (self._caminho_vetores, self._caminho_metadados):
+            open(caminho, 'ab').close()
+        self._geracao = geracao
+        self._carregar()
+
+    def _conferir_geracao(self):
+        """Recarrega se a reconstrução publicou outra geração (chamado com o lock)"""
+        geracao = geracao_atual(self.diretorio)
+        if geracao != self._geracao:
+            print(f"🔄 Índice de similaridade reconstruído, carregando a geração {geracao}")
+            self._abrir_geracao(geracao)
+
+    def _carregar(self):
+        """Offsets dos metadados e módulo de cada linha; descarta linhas incompletas"""
+        offsets, modulos = [], []
+        self._codigos_modulo: Dict[str, int] = {"": 0}
+        if os.path.exists(self._caminho_metadados):
+            with open(self._caminho_metadados, 'rb') as f:
+                offset = 0
+                for linha in f:
+                    if not linha.endswith(b"\n"):
+                        break
+                    modulo = json.loads(linha).get("modulo_normalizado", "")
+                    offsets.append(offset)
+                    modulos.append(self._codigos_modulo.setdefault(modulo, len(self._codigos_modulo)))
+                    offset += len(linha)
+
+        tamanho_linha = self.dimensao * 4
+        linhas_vetores = os.path.getsize(self._caminho_vetores) // tamanho_linha if os.path.exists(self._caminho_vetores) else 0
+        total = min(len(offsets), linhas_vetores)
+
+        # Gravação interrompida entre vetor e metadados: os dois arquivos voltam ao mesmo tamanho
+        if os.path.exists(self._caminho_vetores) and os.path.getsize(self._caminho_vetores) != total * tamanho_linha:
+            with open(self._caminho_vetores, 'r+b') as f:
+                f.truncate(total * tamanho_linha)
+        if len(offsets) > total:
+            with open(self._caminho_metadados, 'r+b') as f:
+                f.truncate(offsets[total])
+
+        self._offsets = offsets[:total]
+        # Código do módulo por linha, com folga para inserções sem realocar a cada triagem
+        self._modulos = np.zeros(max(1024, 2 * total), dtype=np.int32)
+        self._modulos[:total] = modulos[:total]
+        self._matriz = None
+
+    def _matriz_atual(self) -> Optional[np.memmap]:
+        total = len(self._offsets)
+        if total == 0:
+            return None
+        if self._matriz is None or self._matriz.shape[0] != total:
+            self._matriz = np.memmap(self._caminho_vetores, dtype=np.float32, mode='r', shape=(total, self.dimensao))
+        return self._matriz
+
+    def adicionar(self, triagem_id: str, features: FeaturesChamado, dados: Dict[str, Any]):
+        """
+        Acrescenta uma triagem ao índice
+
+        Args:
+            triagem_id: ID da triagem salva
+            features: Features do chamado
+            dados: ticket_numero, modulo, tipo_problema, prioridade, categoria, solucao, data_triagem
+        """
+        vetor = vetorizar_denso(features, self.dimensao)
+        solucao = dados.get("solucao") or ""
+        metadados = {
+            **dados,
+            "triagem_id": triagem_id,
+            "modulo_normalizado": features.modulo,
+            "solucao": solucao[:TAMANHO_MAXIMO_SOLUCAO]
+        }
+        linha = (json.dumps(metadados, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+        with self._lock:
+            self._conferir_geracao()
+            with open(self._caminho_vetores, 'ab') as f:
+                f.write(vetor.tobytes())
+            with open(self._caminho_metadados, 'ab') as f:
+                offset = f.tell()
+                f.write(linha)
+            codigo = self._codigos_modulo.setdefault(features.modulo, len(self._codigos_modulo))
+            total = len(self._offsets)
+            if total == len(self._modulos):
+                self._modulos = np.concatenate([self._modulos, np.zeros(total, dtype=np.int32)])
+            self._modulos[total] = codigo
+            self._offsets.append(offset)
+
+    def adicionar_triagem(
+        self,
+        triagem_id: str,
+        features: FeaturesChamado,
+        ticket_numero: Optional[str],
+        modulo: Optional[str],
+        analise_ia: Dict[str, Any],
+        data_triagem: Any = None
+    ) -> bool:
+        """Indexa uma triagem salva, se a análise trouxe solução; retorna se foi indexada"""
+        if not analise_ia or "erro" in analise_ia or not analise_ia.get("solucao_sugerida"):
+            return False
+        self.adicionar(triagem_id, features, {
+            "ticket_numero": ticket_numero,
+            "modulo": modulo,
+            "tipo_problema": analise_ia.get("tipo_problema", "outro"),
+            "prioridade": analise_ia.get("prioridade", "media"),
+            "categoria": analise_ia.get("categoria_detalhada", ""),
+            "solucao": analise_ia.get("solucao_sugerida"),
+            "data_triagem": data_triagem
+        })
+        return True
+
+    def buscar(
+        self,
+        features: FeaturesChamado,
+        k: int = 5,
+        modulo: Optional[str] = None,
+        similaridade_minima: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """Top-k triagens por similaridade de cosseno, opcionalmente do mesmo módulo"""
+        with self._lock:
+            self._conferir_geracao()
+            matriz = self._matriz_atual()
+            modulos = self._modulos
+            offsets = self._offsets
+            codigos_modulo = self._codigos_modulo
+            caminho_metadados = self._caminho_metadados
+        if matriz is None or k <= 0:
+            return []
+
+        codigo_modulo = None
+        if modulo:
+            codigo_modulo = codigos_modulo.get(normalizar(modulo))
+            if codigo_modulo is None:
+                return []
+
+        consulta = vetorizar_denso(features, self.dimensao)
+        candidatos, pontuacoes = [], []
+        for inicio in range(0, matriz.shape[0], LINHAS_POR_BLOCO):
+            scores = np.asarray(matriz[inicio:inicio + LINHAS_POR_BLOCO] @ consulta)
+            if codigo_modulo is not None:
+                scores = np.where(modulos[inicio:inicio + len(scores)] == codigo_modulo, scores, -np.inf)
+            k_bloco = min(k, len(scores))
+            melhores = np.argpartition(-scores, k_bloco - 1)[:k_bloco]
+            candidatos.append(melhores + inicio)
+            pontuacoes.append(scores[melhores])
+
+        candidatos = np.concatenate(candidatos)
+        pontuacoes = np.concatenate(pontuacoes)
+        ordem = np.argsort(-pontuacoes)[:k]
+
+        resultados = []
+        with open(caminho_metadados, 'rb') as f:
+            for i in ordem:
+                similaridade = float(pontuacoes[i])
+                if not similaridade > similaridade_minima:
+                    continue
+                f.seek(offsets[candidatos[i]])
+                metadados = json.loads(f.readline())
+                metadados.pop("modulo_normalizado", None)
+                resultados.append({**metadados, "similaridade": round(similaridade, 4)})
+        return resultados
@@ -47,17 +47,7 @@ class IntegracaoService:
                 
                 if dados_firebase:
                     self.logger.info(f"✅ Chamado encontrado no Firebase para ticket {ticket_numero}")
-                    return {
-                        'ticket_numero': dados_firebase.get('ticket_numero'),
-                        'chamado_gerado': dados_firebase.get('chamado_gerado'),
-                        'modulo_identificado': dados_firebase.get('modulo_identificado'),
-                        'tipo_identificado': dados_firebase.get('tipo_identificado'),
-                        'data_analise': dados_firebase.get('data_analise'),
-                        'usuario_nome': dados_firebase.get('usuario_nome'),
-                        'cliente_nome': dados_firebase.get('cliente_nome'),
-                        'titulo_ticket': dados_firebase.get('titulo_ticket'),
-                        'analise_id': dados_firebase.get('id')
-                    }
+                    return self._dados_chamado(dados_firebase)
                 else:
                     self.logger.info("⚠️ Chamado não encontrado no Firebase, tentando HTTP...")
             
@@ -75,17 +65,7 @@ class IntegracaoService:
                     for analise in analises:
                         if analise.get('ticket_numero') == str(ticket_numero):
                             self.logger.info(f"✅ Chamado encontrado via HTTP para ticket {ticket_numero}")
-                            return {
-                                'ticket_numero': analise.get('ticket_numero'),
-                                'chamado_gerado': analise.get('chamado_gerado'),
-                                'modulo_identificado': analise.get('modulo_identificado'),
-                                'tipo_identificado': analise.get('tipo_identificado'),
-                                'data_analise': analise.get('data_analise'),
-                                'usuario_nome': analise.get('usuario_nome'),
-                                'cliente_nome': analise.get('cliente_nome'),
-                                'titulo_ticket': analise.get('titulo_ticket'),
-                                'analise_id': analise.get('id')
-                            }
+                            return self._dados_chamado(analise)
                 
                 self.logger.warning(f"⚠️ Chamado não encontrado para ticket: {ticket_numero}")
                 return None
@@ -100,6 +80,62 @@ class IntegracaoService:
             self.logger.error(f"❌ Erro ao buscar chamado: {str(e)}")
             return None
     
+    async def buscar_chamados_por_tickets(self, tickets: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca os chamados de vários tickets de uma vez
+        No Firebase são consultas `in` de até 30 tickets em paralelo; os tickets
+        não encontrados são procurados numa única chamada HTTP ao sistema principal
+        
+        Args:
+            tickets: Números dos tickets
+            
+        Returns:
+            Dict ticket_numero -> dados do chamado (tickets não encontrados ficam de fora)
+        """
+        tickets = [str(ticket) for ticket in dict.fromkeys(tickets)]
+        encontrados: Dict[str, Dict[str, Any]] = {}
+        try:
+            self.logger.info(f"🔍 Buscando chamados de {len(tickets)} tickets...")
+            
+            # 1. Firebase em lote
+            if self.firebase_db.is_configured():
+                for ticket, analise in self.firebase_db.buscar_analises_por_tickets(tickets).items():
+                    encontrados[ticket] = self._dados_chamado(analise)
+                self.logger.info(f"🔥 {len(encontrados)} chamados encontrados no Firebase")
+            
+            # 2. Fallback HTTP para os que faltam (uma chamada para todos)
+            faltantes = set(tickets) - set(encontrados)
+            if faltantes:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.get(f"{self.sistema_principal_url}/api/estatisticas/recentes")
+                    if response.status_code == 200:
+                        for analise in response.json().get('analises', []):
+                            ticket = str(analise.get('ticket_numero'))
+                            if ticket in faltantes and ticket not in encontrados:
+                                encontrados[ticket] = self._dados_chamado(analise)
+                
+        except httpx.HTTPError as e:
+            self.logger.error(f"❌ Erro HTTP ao buscar chamados em lote: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao buscar chamados em lote: {str(e)}")
+        
+        self.logger.info(f"✅ {len(encontrados)} de {len(tickets)} chamados encontrados")
+        return encontrados
+    
+    def _dados_chamado(self, analise: Dict[str, Any]) -> Dict[str, Any]:
+        """Campos do chamado expostos pela integração (Firebase ou HTTP)"""
+        return {
+            'ticket_numero': analise.get('ticket_numero'),
+            'chamado_gerado': analise.get('chamado_gerado'),
+            'modulo_identificado': analise.get('modulo_identificado'),
+            'tipo_identificado': analise.get('tipo_identificado'),
+            'data_analise': analise.get('data_analise'),
+            'usuario_nome': analise.get('usuario_nome'),
+            'cliente_nome': analise.get('cliente_nome'),
+            'titulo_ticket': analise.get('titulo_ticket'),
+            'analise_id': analise.get('id')
+        }
+    
     async def verificar_conexao_sistema_principal(self) -> bool:
         """
         Verifica se o sistema principal está acessível
@@ -114,13 +150,14 @@ class IntegracaoService:
         except:
             return False
     
-    async def obter_analises_recentes(self, limite: int = 10) -> list:
+    async def obter_analises_recentes(self, limite: int = 10, incluir_chamado: bool = False) -> list:
         """
         Obtém análises recentes do sistema principal
         Primeiro tenta Firebase, depois fallback para HTTP
         
         Args:
             limite: Número máximo de análises a retornar
+            incluir_chamado: Se deve trazer o texto completo do chamado gerado
             
         Returns:
             Lista de análises recentes
@@ -131,7 +168,9 @@ class IntegracaoService:
             # 1. Tenta buscar diretamente do Firebase (mais rápido)
             if self.firebase_db.is_configured():
                 self.logger.info("🔥 Buscando análises recentes no Firebase...")
-                analises_firebase = self.firebase_db.get_analises_recentes_sistema_principal(limite)
+                analises_firebase = self.firebase_db.get_analises_recentes_sistema_principal(
+                    limite, campos_extras=['chamado_gerado'] if incluir_chamado else ()
+                )
                 
                 if analises_firebase:
                     self.logger.info(f"✅ {len(analises_firebase)} análises obtidas do Firebase")
@@ -54,6 +54,7 @@ async def root():
             "triagem": "/api/triagem/analisar",
             "feedback": "/api/triagem/feedback",
             "estatisticas": "/api/triagem/estatisticas",
+            "eventos": "/api/triagem/eventos",
             "historico": "/api/triagem/historico",
             "documentacao": "/docs"
         }
@@ -100,7 +101,7 @@ async def triagem_apos_analise(
             "sucesso": True,
             "analise_id": analise_id,
             "ticket_numero": ticket_numero,
-            "triagem": resultado,
+            "triagem": {k: v for k, v in resultado.items() if not k.startswith("_")},
             "integracao": "sucesso"
         }
         
@@ -0,0 +1,322 @@
+"""
+Matcher compilado da base de conhecimento
+As palavras-chave são normalizadas uma vez na compilação e o texto do chamado
+é varrido uma única vez por uma expressão regular com todas as alternativas.
+Todas as ocorrências são contadas e pontuadas (ver pontuacao_padroes) e
+regras booleanas compiladas são avaliadas sobre a mesma tokenização (ver regras_padroes).
+
+Padrões podem declarar `"modulos": [...]`. Além do índice global, é compilado
+um índice por módulo (padrões do módulo + padrões sem módulo), menor e varrido
+quando o módulo do chamado é conhecido. Módulos sem padrões próprios usam o
+índice genérico; sem módulo, vale o índice global.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from normalizacao_texto import TextoNormalizado, normalizar
+from indice_aproximado import IndiceTrigramas
+from pontuacao_padroes import PontuacaoPadroes
+from regras_padroes import ContextoRegras, RegraCompilada, compilar_regra
+
+# (caminho na base de conhecimento, tipo do padrão)
+GRUPOS_PADROES = [
+    (("padroes_codigo", "vb_net"), "codigo_vb"),
+    (("padroes_codigo", "asp_net"), "codigo_asp"),
+    (("padroes_banco",), "banco"),
+    (("padroes_sistema",), "sistema"),
+]
+
+SIMILARIDADE_MINIMA = 0.75  # similaridade média mínima para aceitar um match aproximado
+
+
+@dataclass
+class PadraoCompilado:
+    tipo: str
+    padrao_id: str
+    config: Dict[str, Any]
+    palavras_chave: List[str]  # forma original (como está na base)
+    palavras_normalizadas: List[str]
+    regra: Optional[RegraCompilada] = None
+    modulos: Set[str] = field(default_factory=set)  # normalizados; vazio = todos os módulos
+
+
+class IndicePadroes:
+    """Estruturas de varredura para um subconjunto dos padrões"""
+
+    def __init__(self, padroes: List[PadraoCompilado], indices: List[int]):
+        # palavra-chave normalizada -> [(índice do padrão, índice da palavra no padrão)]
+        self.ocorrencias: Dict[str, List[Tuple[int, int]]] = {}
+        # palavra-chave normalizada -> outras palavras-chave que são prefixo dela
+        self._prefixos: Dict[str, List[str]] = {}
+        self._regex = None
+        # Estruturas da busca aproximada (por token)
+        self._tokens_palavra: Dict[str, Tuple[str, ...]] = {}
+        self._palavras_por_token: Dict[str, List[str]] = {}
+        self._indice_trigramas = IndiceTrigramas()
+        # Regras: token gatilho -> índices de padrões; regras sem gatilho são sempre avaliadas
+        self._regras_por_gatilho: Dict[str, List[int]] = {}
+        self._regras_sem_gatilho: List[int] = []
+        self.padroes_com_restricao: List[int] = []
+        self._compilar(padroes, indices)
+
+    def _compilar(self, padroes: List[PadraoCompilado], indices: List[int]):
+        """Monta a expressão de varredura única, o índice de trigramas e o índice de regras"""
+        for indice_padrao in indices:
+            padrao = padroes[indice_padrao]
+            for indice_palavra, normalizada in enumerate(padrao.palavras_normalizadas):
+                if normalizada:
+                    self.ocorrencias.setdefault(normalizada, []).append((indice_padrao, indice_palavra))
+
+            regra = padrao.regra
+            if regra is not None:
+                if regra.condicao is not None:
+                    if regra.gatilhos:
+                        for gatilho in regra.gatilhos:
+                            self._regras_por_gatilho.setdefault(gatilho, []).append(indice_padrao)
+                    else:
+                        self._regras_sem_gatilho.append(indice_padrao)
+                if regra.restricoes is not None:
+                    self.padroes_com_restricao.append(indice_padrao)
+
+        palavras = sorted(self.ocorrencias, key=len, reverse=True)
+        for palavra in palavras:
+            self._prefixos[palavra] = [
+                outra for outra in palavras
+                if outra != palavra and palavra.startswith(outra)
+            ]
+
+        for palavra in palavras:
+            tokens = tuple(palavra.split(" "))
+            self._tokens_palavra[palavra] = tokens
+            for token in set(tokens):
+                self._palavras_por_token.setdefault(token, []).append(palavra)
+                self._indice_trigramas.adicionar(token)
+
+        if palavras:
+            # Lookahead: uma tentativa por posição, com a alternativa mais longa primeiro
+            alternativas = "|".join(re.escape(p) for p in palavras)
+            self._regex = re.compile(f"(?=({alternativas}))")
+
+    def varrer(self, texto: TextoNormalizado) -> Dict[str, List[int]]:
+        """
+        Varre o texto normalizado uma vez
+
+        Returns:
+            palavra-chave normalizada -> [primeira posição, total de ocorrências]
+        """
+        encontradas: Dict[str, List[int]] = {}
+        if self._regex is None:
+            return encontradas
+
+        for match in self._regex.finditer(texto.texto):
+            palavra = match.group(1)
+            inicio = match.start()
+            for candidata in (palavra, *self._prefixos[palavra]):
+                if candidata in encontradas:
+                    encontradas[candidata][1] += 1
+                else:
+                    encontradas[candidata] = [inicio, 1]
+        return encontradas
+
+    def varrer_aproximado(
+        self, contexto: ContextoRegras, ignorar: Dict[str, List[int]]
+    ) -> Dict[str, Tuple[float, int, int]]:
+        """
+        Busca palavras-chave com erros de digitação, token a token
+
+        Returns:
+            palavra-chave normalizada -> (similaridade, início, fim) no texto normalizado
+        """
+        tokens = [(token, inicio, fim) for token, (inicio, fim) in zip(contexto.tokens, contexto.spans)]
+        cache: Dict[str, Dict[str, float]] = {}
+        por_posicao: List[Dict[str, float]] = []
+        posicoes_token: Dict[str, List[int]] = {}
+        candidatas = set()
+
+        for posicao, (token, _, _) in enumerate(tokens):
+            similares = cache.get(token)
+            if similares is None:
+                if token in self._palavras_por_token:
+                    similares = {token: 1.0}
+                else:
+                    similares = self._indice_trigramas.buscar(token)
+                    for similar in similares:
+                        candidatas.update(self._palavras_por_token[similar])
+                cache[token] = similares
+            por_posicao.append(similares)
+            for similar in similares:
+                posicoes_token.setdefault(similar, []).append(posicao)
+
+        encontradas: Dict[str, Tuple[float, int, int]] = {}
+        for palavra in candidatas:
+            if palavra in ignorar:
+                continue
+            tokens_palavra = self._tokens_palavra[palavra]
+            for inicio in posicoes_token.get(tokens_palavra[0], ()):
+                if inicio + len(tokens_palavra) > len(tokens):
+                    break
+                similaridades = [
+                    por_posicao[inicio + i].get(token_palavra)
+                    for i, token_palavra in enumerate(tokens_palavra)
+                ]
+                if None in similaridades:
+                    continue
+                similaridade = sum(similaridades) / len(similaridades)
+                if similaridade >= SIMILARIDADE_MINIMA and similaridade > encontradas.get(palavra, (0.0,))[0]:
+                    fim = tokens[inicio + len(tokens_palavra) - 1][2]
+                    encontradas[palavra] = (similaridade, tokens[inicio][1], fim)
+        return encontradas
+
+    def regras_candidatas(self, contexto: ContextoRegras) -> Set[int]:
+        """Padrões cuja regra pode ser verdadeira (gatilho presente ou sem gatilho)"""
+        candidatos = set(self._regras_sem_gatilho)
+        for token in contexto.posicoes.keys() & self._regras_por_gatilho.keys():
+            candidatos.update(self._regras_por_gatilho[token])
+        return candidatos
+
+
+class MatcherPadroes:
+    def __init__(self, base_conhecimento: Dict[str, Any], busca_aproximada: bool = True):
+        self.busca_aproximada = busca_aproximada
+        self.padroes: List[PadraoCompilado] = []
+        self._carregar_padroes(base_conhecimento)
+
+        self.indice_global = IndicePadroes(self.padroes, list(range(len(self.padroes))))
+        self.indice_generico = IndicePadroes(
+            self.padroes, [i for i, padrao in enumerate(self.padroes) if not padrao.modulos]
+        )
+        self.indices_modulo: Dict[str, IndicePadroes] = {}
+        modulos = sorted({m for padrao in self.padroes for m in padrao.modulos})
+        for modulo in modulos:
+            indices = [
+                i for i, padrao in enumerate(self.padroes)
+                if not padrao.modulos or modulo in padrao.modulos
+            ]
+            self.indices_modulo[modulo] = IndicePadroes(self.padroes, indices)
+
+        # Pesos calculados sobre a base inteira: scores comparáveis entre índices
+        self.pontuacao = PontuacaoPadroes(self.indice_global.ocorrencias, len(self.padroes))
+
+    def _carregar_padroes(self, base_conhecimento: Dict[str, Any]):
+        """Normaliza as palavras-chave e compila as regras de cada padrão"""
+        for caminho, tipo in GRUPOS_PADROES:
+            grupo = base_conhecimento
+            for chave in caminho:
+                grupo = grupo.get(chave, {})
+
+            for padrao_id, config in grupo.items():
+                regra_config = config.get("regra") or {}
+                palavras_chave = list(config.get("palavras_chave", []))
+                self.padroes.append(PadraoCompilado(
+                    tipo=tipo,
+                    padrao_id=padrao_id,
+                    config=config,
+                    palavras_chave=palavras_chave,
+                    palavras_normalizadas=[normalizar(p) for p in palavras_chave],
+                    regra=compilar_regra(regra_config) if regra_config else None,
+                    modulos={normalizar(m) for m in config.get("modulos") or regra_config.get("modulos") or []}
+                ))
+
+    @property
+    def total_palavras_chave(self) -> int:
+        return len(self.indice_global.ocorrencias)
+
+    def padrao_por_id(self, tipo: Optional[str], padrao_id: Optional[str]) -> Optional[PadraoCompilado]:
+        for padrao in self.padroes:
+            if padrao.padrao_id == padrao_id and (tipo is None or padrao.tipo == tipo):
+                return padrao
+        return None
+
+    def indice_para_modulo(self, modulo: Optional[str]) -> IndicePadroes:
+        """Índice do módulo; genérico se o módulo não tem padrões próprios; global se desconhecido"""
+        modulo_normalizado = normalizar(modulo or "")
+        if not modulo_normalizado:
+            return self.indice_global
+        return self.indices_modulo.get(modulo_normalizado, self.indice_generico)
+
+    def analisar(self, contexto: ContextoRegras) -> List[Dict[str, Any]]:
+        """
+        Retorna os padrões encontrados no chamado, do mais para o menos relevante
+
+        Recebe o chamado já normalizado e tokenizado (ver features_chamado).
+
+        Cada padrão acumula o score de todas as suas palavras-chave encontradas
+        (exatas ou aproximadas, estas ponderadas pela similaridade) e da sua regra,
+        se houver. É reportado pela evidência de maior contribuição. Padrões
+        específicos do módulo do chamado vêm antes dos genéricos.
+        """
+        texto = contexto.texto
+        indice = self.indice_para_modulo(contexto.modulo)
+        encontradas = indice.varrer(texto)
+        aproximadas = indice.varrer_aproximado(contexto, encontradas) if self.busca_aproximada else {}
+        tamanho_chamado = len(contexto.tokens)
+
+        regras = {}
+        for indice_padrao in indice.regras_candidatas(contexto):
+            intervalo = self.padroes[indice_padrao].regra.condicao(contexto)
+            if intervalo is not None:
+                regras[indice_padrao] = intervalo
+
+        # índice do padrão -> [(contribuição, índice da palavra, início, fim, ocorrências, aproximado)]
+        evidencias: Dict[int, List[Tuple[float, int, int, int, int, bool]]] = {}
+        for palavra, (inicio, total) in encontradas.items():
+            contribuicao = self.pontuacao.contribuicao(palavra, total, tamanho_chamado)
+            for indice_padrao, indice_palavra in indice.ocorrencias[palavra]:
+                evidencias.setdefault(indice_padrao, []).append(
+                    (contribuicao, indice_palavra, inicio, inicio + len(palavra), total, False)
+                )
+        for palavra, (similaridade, inicio, fim) in aproximadas.items():
+            contribuicao = similaridade * self.pontuacao.contribuicao(palavra, 1, tamanho_chamado)
+            for indice_padrao, indice_palavra in indice.ocorrencias[palavra]:
+                evidencias.setdefault(indice_padrao, []).append(
+                    (contribuicao, indice_palavra, inicio, fim, 1, True)
+                )
+
+        # Restrições (nenhuma/modulos) vetam o padrão inteiro
+        for indice_padrao in indice.padroes_com_restricao:
+            if indice_padrao in evidencias or indice_padrao in regras:
+                if not self.padroes[indice_padrao].regra.restricoes(contexto):
+                    evidencias.pop(indice_padrao, None)
+                    regras.pop(indice_padrao, None)
+
+        padroes_encontrados = []
+        for indice_padrao in set(evidencias) | set(regras):
+            padrao = self.padroes[indice_padrao]
+            lista = evidencias.get(indice_padrao, [])
+            # Maior contribuição primeiro; empate decidido pela ordem na base
+            lista.sort(key=lambda e: (-e[0], e[1]))
+            score = sum(e[0] for e in lista)
+            descricoes = [padrao.palavras_chave[e[1]] for e in lista]
+
+            if lista:
+                _, indice_palavra, inicio, fim, _, _ = lista[0]
+                palavra_chave = padrao.palavras_chave[indice_palavra]
+                inicio_original, fim_original = texto.posicao_original(inicio, fim)
+            if indice_padrao in regras:
+                score += padrao.regra.peso
+                descricoes.append(padrao.regra.descricao)
+                if not lista or padrao.regra.peso > lista[0][0]:
+                    palavra_chave = padrao.regra.descricao
+                    inicio_original, fim_original = regras[indice_padrao]
+
+            encontrado = {
+                "tipo": padrao.tipo,
+                "padrao_id": padrao.padrao_id,
+                "palavra_chave": palavra_chave,
+                "config": padrao.config,
+                "confianca": self.pontuacao.confianca(score),
+                "score": round(score, 3),
+                "ocorrencias": sum(e[4] for e in lista) + (1 if indice_padrao in regras else 0),
+                "palavras_chave_encontradas": descricoes,
+                "posicao": {"inicio": inicio_original, "fim": fim_original},
+                "especifico_modulo": bool(padrao.modulos)
+            }
+            if lista and indice_padrao not in regras and all(e[5] for e in lista):
+                encontrado["aproximado"] = True
+                encontrado["trecho"] = texto.original[inicio_original:fim_original]
+            padroes_encontrados.append(encontrado)
+
+        padroes_encontrados.sort(key=lambda p: (p["especifico_modulo"], p["confianca"]), reverse=True)
+        return padroes_encontrados
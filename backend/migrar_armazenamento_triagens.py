@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Migra as triagens do Firestore para o formato compacto
+Percorre a coleção `triagens` em páginas (por ID do documento), regrava no
+formato de armazenamento_triagens os documentos ainda no formato antigo
+(padrões da base por referência, textos longos comprimidos) e preenche
+total_solucoes quando falta. O config de um padrão só é removido quando é
+igual ao da base atual; padrões de versões antigas da base ficam completos.
+Os configs da versão atual são gravados uma vez em `bases_conhecimento`, de
+onde a leitura os recoloca nos padrões.
+Com --simular nada é gravado, só o ganho de tamanho é calculado.
+
+Uso:
+    python migrar_armazenamento_triagens.py [--simular] [--limite 1000] [--base base_conhecimento_triagem.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from armazenamento_triagens import (
+    FORMATO_COMPACTO,
+    compactar_documento,
+    configs_padroes,
+    decodificar_documento,
+    tamanho_documento
+)
+from firebase_db import FirebaseDatabase
+
+DOCUMENTOS_POR_PAGINA = 300  # cada página vira um lote de escrita (máximo de 500 operações)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migra as triagens para o formato compacto")
+    parser.add_argument("--simular", action="store_true", help="Só calcula o ganho, sem gravar")
+    parser.add_argument("--limite", type=int, default=None, help="Número máximo de documentos migrados")
+    parser.add_argument("--base", default="base_conhecimento_triagem.json")
+    args = parser.parse_args()
+
+    firebase_db = FirebaseDatabase()
+    if not firebase_db.is_configured():
+        print("❌ Firebase não configurado")
+        return 1
+
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base_conhecimento = json.load(f)
+    # Sem simular, grava (se ainda não existe) a cópia dos configs da versão em bases_conhecimento
+    configs = configs_padroes(base_conhecimento) if args.simular else firebase_db.configs_referencia(base_conhecimento)
+    versao = base_conhecimento.get('versao')
+
+    colecao = firebase_db.db.collection(firebase_db.COLLECTIONS['triagens'])
+    inicio = time.perf_counter()
+    lidos = migrados = bytes_antes = bytes_depois = 0
+    ultimo = None
+    while args.limite is None or migrados < args.limite:
+        query = colecao.order_by(FieldPath.document_id()).limit(DOCUMENTOS_POR_PAGINA)
+        if ultimo is not None:
+            query = query.start_after(ultimo)
+        docs = list(query.stream())
+        if not docs:
+            break
+        ultimo = docs[-1]
+
+        lote = firebase_db.db.batch()
+        pendentes = 0
+        for doc in docs:
+            lidos += 1
+            data = doc.to_dict()
+            if data.get('formato_armazenamento') == FORMATO_COMPACTO:
+                continue
+            if args.limite is not None and migrados >= args.limite:
+                break
+
+            original = decodificar_documento(data)
+            original.setdefault('total_solucoes', len(original.get('solucoes_sugeridas') or []))
+            compacto = compactar_documento(original, configs, versao)
+            bytes_antes += tamanho_documento(data)
+            bytes_depois += tamanho_documento(compacto)
+            migrados += 1
+            if not args.simular:
+                lote.set(doc.reference, compacto)
+                pendentes += 1
+        if pendentes:
+            lote.commit()
+        print(f"📄 {lidos} lidas, {migrados} {'a migrar' if args.simular else 'migradas'}")
+
+    reducao = (1 - bytes_depois / bytes_antes) * 100 if bytes_antes else 0
+    print(f"✅ {migrados} triagens {'simuladas' if args.simular else 'migradas'} em {time.perf_counter() - inicio:.1f}s: "
+          f"{bytes_antes / 1024:.1f} KB -> {bytes_depois / 1024:.1f} KB ({reducao:.0f}% menor)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
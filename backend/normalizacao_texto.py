@@ -0,0 +1,81 @@
+"""
+Normalização de texto para matching de padrões
+Aplica dobra de acentos (NFKD), minúsculas, pontuação como separador e
+colapso de espaços, mantendo o mapa de posições para o texto original
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# Sequências de letras/dígitos (inclui marcas combinantes soltas, ex: "ç")
+_REGEX_TRECHO = re.compile(r"(?:[^\W_]|[\u0300-\u036f])+")
+
+
+@dataclass
+class TextoNormalizado:
+    original: str
+    texto: str
+    offsets: List[int]  # offsets[i] = índice no original do caractere normalizado i
+
+    def posicao_original(self, inicio: int, fim: int) -> Tuple[int, int]:
+        """Converte um intervalo do texto normalizado para o texto original"""
+        if not self.offsets or inicio >= fim:
+            return (0, 0)
+        return (self.offsets[inicio], self.offsets[fim - 1] + 1)
+
+    def trecho_original(self, inicio: int, fim: int) -> str:
+        """Retorna o trecho do texto original correspondente ao intervalo normalizado"""
+        ini, fim_original = self.posicao_original(inicio, fim)
+        return self.original[ini:fim_original]
+
+
+def _normalizar_trecho(trecho: str, inicio: int, partes: List[str], offsets: List[int]):
+    """Normaliza um trecho alfanumérico caractere a caractere"""
+    if trecho.isascii():
+        partes.append(trecho.lower())
+        offsets.extend(range(inicio, inicio + len(trecho)))
+        return
+
+    for i, caractere in enumerate(trecho):
+        for decomposto in unicodedata.normalize('NFKD', caractere):
+            if unicodedata.combining(decomposto):
+                continue
+            for final in decomposto.casefold():
+                if final.isalnum():
+                    partes.append(final)
+                    offsets.append(inicio + i)
+
+
+def normalizar_texto(texto: str) -> TextoNormalizado:
+    """
+    Normaliza o texto uma única vez para o matching
+
+    Args:
+        texto: Texto original (ex: chamado_texto)
+
+    Returns:
+        TextoNormalizado com texto dobrado e mapa de offsets para o original
+    """
+    partes: List[str] = []
+    offsets: List[int] = []
+
+    for match in _REGEX_TRECHO.finditer(texto or ""):
+        tamanho_anterior = len(offsets)
+        if partes:
+            partes.append(" ")
+            offsets.append(match.start())
+        _normalizar_trecho(match.group(), match.start(), partes, offsets)
+
+        # Trecho que virou vazio (só marcas combinantes): descarta o separador
+        if len(offsets) == tamanho_anterior + 1 and tamanho_anterior > 0:
+            partes.pop()
+            offsets.pop()
+
+    return TextoNormalizado(original=texto or "", texto="".join(partes), offsets=offsets)
+
+
+def normalizar(texto: str) -> str:
+    """Normaliza sem mapa de offsets (usado nas palavras-chave da base)"""
+    return normalizar_texto(texto).texto
@@ -0,0 +1,45 @@
+"""
+Pontuação ponderada de padrões (estilo BM25)
+Palavras-chave raras na base pesam mais que palavras-chave genéricas e várias
+ocorrências somam evidência com saturação
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+K1 = 1.2  # saturação da frequência de termos
+B = 0.5  # normalização pelo tamanho do chamado
+TAMANHO_MEDIO_CHAMADO = 150  # tokens, referência para a normalização
+BONUS_POR_TOKEN = 0.25  # frases com mais tokens são mais específicas
+
+# Mapeamento do score para confiança: CONFIANCA_MAXIMA * (1 - e^(-score / ESCALA))
+# Uma palavra-chave única e exclusiva de um padrão (score ~2) fica perto de 0.57;
+# várias ocorrências de palavras-chave específicas se aproximam de 0.95
+ESCALA_CONFIANCA = 2.2
+CONFIANCA_MAXIMA = 0.95
+
+
+class PontuacaoPadroes:
+    def __init__(self, ocorrencias: Dict[str, List[Tuple[int, int]]], total_padroes: int):
+        """
+        Args:
+            ocorrencias: palavra-chave normalizada -> [(índice do padrão, índice da palavra)]
+            total_padroes: número de padrões compilados
+        """
+        self.pesos: Dict[str, float] = {}
+        for palavra, lista in ocorrencias.items():
+            frequencia = len({indice_padrao for indice_padrao, _ in lista})
+            idf = math.log(1 + (total_padroes - frequencia + 0.5) / (frequencia + 0.5))
+            tokens = palavra.count(" ") + 1
+            self.pesos[palavra] = idf * (1 + BONUS_POR_TOKEN * (tokens - 1))
+
+    def contribuicao(self, palavra: str, ocorrencias: int, tamanho_chamado: int) -> float:
+        """Score de uma palavra-chave com `ocorrencias` hits num chamado de `tamanho_chamado` tokens"""
+        normalizacao = 1 - B + B * tamanho_chamado / TAMANHO_MEDIO_CHAMADO
+        saturacao = ocorrencias * (K1 + 1) / (ocorrencias + K1 * normalizacao)
+        return self.pesos.get(palavra, 0.0) * saturacao
+
+    @staticmethod
+    def confianca(score: float) -> float:
+        """Converte o score acumulado do padrão em confiança (0.0 a CONFIANCA_MAXIMA)"""
+        return round(CONFIANCA_MAXIMA * (1 - math.exp(-score / ESCALA_CONFIANCA)), 3)
@@ -0,0 +1,148 @@
+"""
+Prompt de triagem dividido em prefixo estático versionado + sufixo dinâmico
+O prefixo (papel, tarefa, esquema JSON e contexto técnico do SPONTE) é idêntico
+em todas as triagens e é enviado como system instruction / contexto em cache do
+Gemini; apenas o sufixo (template de foco, módulo, texto compactado, padrões
+e sinais) muda.
+Qualquer alteração no prefixo exige nova VERSAO_PREFIXO e novo HASH_PREFIXO.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Tuple
+
+from compactacao_chamado import ChamadoCompactado
+from features_chamado import FeaturesChamado
+from templates_prompt import TemplatePrompt
+
+VERSAO_PREFIXO = "triagem-v2"
+HASH_PREFIXO = "996aa7faaeb7e8b3"  # sha256 (16 primeiros caracteres) do prefixo desta versão
+
+PREFIXO_ESTATICO = """Você é um especialista em suporte técnico do sistema SPONTE (VB.NET + ASP.NET + SQL Server).
+
+=== SUA TAREFA ===
+
+Analise o chamado enviado e forneça uma triagem técnica detalhada. Retorne APENAS um JSON válido:
+
+{
+  "tipo_problema": "codigo|banco|configuracao|performance|outro",
+  "categoria_detalhada": "descrição específica da categoria",
+  "diagnostico": "análise técnica do problema",
+  "solucao_sugerida": "passos para resolução",
+  "codigo_exemplo": "código VB.NET de exemplo (se aplicável)",
+  "script_sql": "script SQL de exemplo (se aplicável)",
+  "prioridade": "alta|media|baixa",
+  "tempo_estimado": "tempo estimado para resolução",
+  "recursos_necessarios": ["lista", "de", "recursos"],
+  "observacoes": "observações adicionais importantes"
+}
+
+=== CONTEXTO TÉCNICO ===
+
+Sistema SPONTE:
+- Backend: VB.NET com ASP.NET Web Forms
+- Frontend: HTML, CSS, Bootstrap, AJAX
+- Banco: SQL Server
+- Arquitetura: Code-behind com eventos (BtnSalvar_Click, BtnExcluir_Click)
+- Servidor: AWS
+
+O chamado pode vir com uma seção FOCO DA TRIAGEM específica do módulo e do tipo
+de problema detectado; use-a para direcionar o diagnóstico.
+
+Linhas repetidas do chamado podem vir anotadas com [xN] (N ocorrências) e trechos
+longos de log podem ter sido omitidos.
+
+IMPORTANTE: Retorne APENAS o JSON, sem texto adicional.
+"""
+
+
+# Esquema da resposta do modo em lote (response_schema do Gemini, quando suportado)
+CAMPOS_TEXTO_ANALISE = [
+    "tipo_problema", "categoria_detalhada", "diagnostico", "solucao_sugerida", "codigo_exemplo",
+    "script_sql", "prioridade", "tempo_estimado", "observacoes"
+]
+ESQUEMA_RESPOSTA_LOTE = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "ticket_id": {"type": "string"},
+            **{campo: {"type": "string"} for campo in CAMPOS_TEXTO_ANALISE},
+            "recursos_necessarios": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["ticket_id", "tipo_problema", "diagnostico", "solucao_sugerida", "prioridade"]
+    }
+}
+
+
+_REGEX_TICKET_LOTE = re.compile(r"^--- CHAMADO ticket_id=(\S+) ---$", re.MULTILINE)
+
+
+def hash_prompt(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def hash_prefixo(prefixo: str = PREFIXO_ESTATICO) -> str:
+    return hash_prompt(prefixo)
+
+
+def ids_do_lote(conteudo: str) -> List[str]:
+    """Ids dos chamados de um sufixo de lote (vazio para um chamado individual)"""
+    return _REGEX_TICKET_LOTE.findall(conteudo)
+
+
+def montar_sufixo(
+    features: FeaturesChamado,
+    compactado: ChamadoCompactado,
+    modulo: str,
+    padroes: List[Dict],
+    template: TemplatePrompt
+) -> str:
+    """Parte dinâmica do prompt: somente o que muda de um chamado para outro"""
+    padroes_str = ""
+    for padrao in padroes:
+        padroes_str += f"- {padrao['tipo']}: {padrao['palavra_chave']}\n"
+
+    sinais_str = ""
+    if features.handlers:
+        sinais_str += f"- Handlers: {', '.join(features.handlers)}\n"
+    if features.erros_sql:
+        sinais_str += f"- Erros SQL Server: {', '.join(str(n) for n in features.erros_sql)}\n"
+    if features.excecoes:
+        sinais_str += f"- Exceções: {', '.join(features.excecoes)}\n"
+    if features.tabelas:
+        sinais_str += f"- Tabelas: {', '.join(features.tabelas)}\n"
+    if features.frames:
+        sinais_str += f"- Topo do stack trace: {' <- '.join(features.frames[:3])}\n"
+
+    return f"""{template.texto}
+=== CHAMADO PARA TRIAGEM ===
+
+MÓDULO: {modulo or 'Não identificado'}
+
+TEXTO DO CHAMADO:
+{compactado.texto}
+
+=== PADRÕES DETECTADOS ===
+{padroes_str or 'Nenhum padrão específico detectado'}
+
+=== SINAIS TÉCNICOS EXTRAÍDOS ===
+{sinais_str or 'Nenhum sinal técnico extraído'}
+"""
+
+
+def montar_sufixo_lote(itens: List[Tuple[str, str]]) -> str:
+    """
+    Sufixo do modo em lote: vários chamados independentes em uma requisição
+
+    Args:
+        itens: lista de (ticket_id, sufixo individual do chamado)
+    """
+    chamados = "\n".join(f"--- CHAMADO ticket_id={ticket_id} ---\n{sufixo}" for ticket_id, sufixo in itens)
+    return f"""=== LOTE DE CHAMADOS ===
+
+Esta requisição contém {len(itens)} chamados independentes. Analise cada um separadamente e
+retorne APENAS um array JSON com um objeto por chamado, no formato descrito acima,
+acrescido do campo "ticket_id" com o identificador do chamado.
+
+{chamados}"""
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Reconstrói o índice de similaridade a partir do histórico de triagens
+Lê as triagens reais do Firestore (ou de um JSONL exportado com ticket_numero,
+chamado_texto, modulo_identificado, analise_ia e data_triagem) e grava uma
+geração nova do índice num subdiretório. Só com a geração completa o arquivo
+`geracao` passa a apontar para ela: o serviço em execução recarrega o índice
+na próxima consulta ou inserção, sem ler um índice pela metade. As gerações
+mais antigas que a anterior são apagadas.
+
+Triagens salvas pelo serviço durante a reconstrução (depois da leitura do
+histórico) ficam só na geração anterior; rode de novo para incluí-las.
+
+Uso:
+    python reconstruir_indice_similaridade.py [--arquivo triagens.jsonl] [--diretorio indice_similaridade]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import uuid
+
+from config import caminho_dados
+from features_chamado import extrair_features
+from indice_similaridade import (
+    ARQUIVO_METADADOS,
+    ARQUIVO_VETORES,
+    IndiceSimilaridade,
+    geracao_atual,
+    publicar_geracao
+)
+from treinar_classificador import carregar_triagens
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconstrói o índice de triagens similares")
+    parser.add_argument("--arquivo", default=None, help="JSONL com o histórico de triagens")
+    parser.add_argument("--diretorio", default=os.getenv("TRIAGEM_DIRETORIO_SIMILARIDADE") or caminho_dados("indice_similaridade"))
+    args = parser.parse_args()
+
+    triagens = carregar_triagens(args.arquivo)
+    if not triagens:
+        print("❌ Nenhuma triagem para indexar")
+        return 1
+
+    os.makedirs(args.diretorio, exist_ok=True)
+    anterior = geracao_atual(args.diretorio)
+    geracao = time.strftime("g%Y%m%d%H%M%S") + f"-{uuid.uuid4().hex[:8]}"
+    indice = IndiceSimilaridade(os.path.join(args.diretorio, geracao))
+
+    inicio = time.perf_counter()
+    indexadas = 0
+    for triagem in triagens:
+        features = extrair_features(triagem['chamado_texto'], triagem.get('modulo_identificado'))
+        indexadas += indice.adicionar_triagem(
+            triagem.get('id', ''), features, triagem.get('ticket_numero'),
+            triagem.get('modulo_identificado'), triagem.get('analise_ia') or {}, triagem.get('data_triagem')
+        )
+
+    publicar_geracao(args.diretorio, geracao)
+
+    # A geração anterior fica para consultas em andamento; as mais antigas saem
+    for nome in os.listdir(args.diretorio):
+        caminho = os.path.join(args.diretorio, nome)
+        if os.path.isdir(caminho) and nome not in (geracao, anterior):
+            shutil.rmtree(caminho, ignore_errors=True)
+    if anterior:
+        # Arquivos do formato sem gerações
+        for arquivo in (ARQUIVO_VETORES, ARQUIVO_METADADOS):
+            if os.path.exists(os.path.join(args.diretorio, arquivo)):
+                os.remove(os.path.join(args.diretorio, arquivo))
+
+    print(f"✅ {indexadas} de {len(triagens)} triagens indexadas em {time.perf_counter() - inicio:.1f}s ({args.diretorio})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
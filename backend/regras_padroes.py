@@ -0,0 +1,241 @@
+"""
+Regras booleanas compiladas para padrões da base de conhecimento
+
+Um padrão pode declarar, além de `palavras_chave`, uma `regra`:
+
+    "regra": {
+        "todas": ["erro", "salvar"],            # todos os termos presentes
+        "alguma": ["gravar", "salvar"],          # ao menos um termo presente
+        "proximidade": [{"termos": ["salvar", "erro"], "distancia": 5}],
+        "regex": ["\\\\bmsg\\\\s*1205\\\\b"],        # sobre o texto original, sem diferenciar caixa
+        "nenhuma": ["ambiente de teste"],        # restrição: nenhum termo presente
+        "modulos": ["CADASTROS"],                # restrição: módulo do chamado
+        "peso": 2.0                              # peso da regra na pontuação
+    }
+
+As cláusulas positivas (todas/alguma/proximidade/regex) formam uma condição
+que, sozinha, já dispara o padrão. As restrições (nenhuma/modulos) valem para o
+padrão todo, inclusive quando ele foi encontrado por palavra-chave.
+
+Cada regra é compilada uma vez em closures sobre um ContextoRegras, que é
+construído com uma única tokenização do chamado.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from normalizacao_texto import TextoNormalizado, normalizar
+
+PESO_PADRAO_REGRA = 2.0
+DISTANCIA_PADRAO = 5
+
+Intervalo = Tuple[int, int]  # início/fim no texto original
+Clausula = Callable[["ContextoRegras"], Optional[Intervalo]]
+
+_REGEX_TOKEN = re.compile(r"\S+")
+
+
+@dataclass
+class ContextoRegras:
+    texto: TextoNormalizado
+    modulo: str  # normalizado ("" quando desconhecido)
+    tokens: List[str]
+    spans: List[Tuple[int, int]]  # início/fim de cada token no texto normalizado
+    posicoes: Dict[str, List[int]] = field(default_factory=dict)
+
+    def intervalo_tokens(self, primeiro: int, ultimo: int) -> Intervalo:
+        """Intervalo no texto original coberto pelos tokens [primeiro, ultimo]"""
+        return self.texto.posicao_original(self.spans[primeiro][0], self.spans[ultimo][1])
+
+
+def criar_contexto(texto: TextoNormalizado, modulo: Optional[str] = None) -> ContextoRegras:
+    """Tokeniza o texto normalizado uma única vez"""
+    tokens: List[str] = []
+    spans: List[Tuple[int, int]] = []
+    posicoes: Dict[str, List[int]] = {}
+    for indice, match in enumerate(_REGEX_TOKEN.finditer(texto.texto)):
+        token = match.group()
+        tokens.append(token)
+        spans.append(match.span())
+        posicoes.setdefault(token, []).append(indice)
+    return ContextoRegras(
+        texto=texto,
+        modulo=normalizar(modulo or ""),
+        tokens=tokens,
+        spans=spans,
+        posicoes=posicoes
+    )
+
+
+@dataclass
+class RegraCompilada:
+    descricao: str
+    peso: float
+    gatilhos: Set[str]  # tokens necessários para a condição poder ser verdadeira (vazio = sempre avaliar)
+    condicao: Optional[Clausula] = None
+    restricoes: Optional[Callable[[ContextoRegras], bool]] = None
+
+
+def _compilar_termo(termo: str) -> Callable[[ContextoRegras], List[int]]:
+    """Retorna função que lista as posições (em tokens) onde o termo começa"""
+    tokens = tuple(normalizar(termo).split())
+    if not tokens:
+        raise ValueError(f"Termo vazio na regra: {termo!r}")
+
+    if len(tokens) == 1:
+        token = tokens[0]
+        return lambda ctx: ctx.posicoes.get(token, [])
+
+    def posicoes_frase(ctx: ContextoRegras) -> List[int]:
+        return [
+            inicio for inicio in ctx.posicoes.get(tokens[0], [])
+            if tuple(ctx.tokens[inicio:inicio + len(tokens)]) == tokens
+        ]
+    return posicoes_frase
+
+
+def _tamanho_termo(termo: str) -> int:
+    return len(normalizar(termo).split())
+
+
+def _primeiro_token(termo: str) -> str:
+    return normalizar(termo).split()[0]
+
+
+def _clausula_todas(termos: List[str]) -> Clausula:
+    funcoes = [(_compilar_termo(t), _tamanho_termo(t)) for t in termos]
+
+    def avaliar(ctx: ContextoRegras) -> Optional[Intervalo]:
+        intervalo = None
+        for posicoes_termo, tamanho in funcoes:
+            posicoes = posicoes_termo(ctx)
+            if not posicoes:
+                return None
+            if intervalo is None:
+                intervalo = ctx.intervalo_tokens(posicoes[0], posicoes[0] + tamanho - 1)
+        return intervalo
+    return avaliar
+
+
+def _clausula_alguma(termos: List[str]) -> Clausula:
+    funcoes = [(_compilar_termo(t), _tamanho_termo(t)) for t in termos]
+
+    def avaliar(ctx: ContextoRegras) -> Optional[Intervalo]:
+        for posicoes_termo, tamanho in funcoes:
+            posicoes = posicoes_termo(ctx)
+            if posicoes:
+                return ctx.intervalo_tokens(posicoes[0], posicoes[0] + tamanho - 1)
+        return None
+    return avaliar
+
+
+def _clausula_proximidade(config: Dict[str, Any]) -> Clausula:
+    termos = config.get("termos", [])
+    if len(termos) != 2:
+        raise ValueError(f"Proximidade exige exatamente dois termos: {termos!r}")
+    distancia = int(config.get("distancia", DISTANCIA_PADRAO))
+    (pos_a, tam_a), (pos_b, tam_b) = [(_compilar_termo(t), _tamanho_termo(t)) for t in termos]
+
+    def avaliar(ctx: ContextoRegras) -> Optional[Intervalo]:
+        lista_a, lista_b = pos_a(ctx), pos_b(ctx)
+        i = j = 0
+        # Duas listas ordenadas: avança sempre o ponteiro da menor posição
+        while i < len(lista_a) and j < len(lista_b):
+            a, b = lista_a[i], lista_b[j]
+            if abs(a - b) <= distancia:
+                inicio = min(a, b)
+                fim = max(a + tam_a, b + tam_b) - 1
+                return ctx.intervalo_tokens(inicio, fim)
+            if a < b:
+                i += 1
+            else:
+                j += 1
+        return None
+    return avaliar
+
+
+def _clausula_regex(expressao: str) -> Clausula:
+    compilada = re.compile(expressao, re.IGNORECASE)
+
+    def avaliar(ctx: ContextoRegras) -> Optional[Intervalo]:
+        match = compilada.search(ctx.texto.original)
+        return match.span() if match else None
+    return avaliar
+
+
+def _descrever(regra: Dict[str, Any]) -> str:
+    partes = []
+    if regra.get("todas"):
+        partes.append(" E ".join(regra["todas"]))
+    if regra.get("alguma"):
+        partes.append("(" + " OU ".join(regra["alguma"]) + ")")
+    for proximidade in regra.get("proximidade", []):
+        termos = proximidade.get("termos", [])
+        partes.append(f" ~{proximidade.get('distancia', DISTANCIA_PADRAO)} ".join(termos))
+    for expressao in regra.get("regex", []):
+        partes.append(f"/{expressao}/")
+    return "regra: " + " E ".join(partes) if partes else "regra"
+
+
+def _compilar_restricoes(regra: Dict[str, Any]) -> Optional[Callable[[ContextoRegras], bool]]:
+    """Função que veta o padrão (nenhuma/modulos), ou None se a regra não tem restrições"""
+    exclusoes = [_compilar_termo(t) for t in regra.get("nenhuma", [])]
+    modulos = {normalizar(m) for m in regra.get("modulos", [])}
+    if not exclusoes and not modulos:
+        return None
+
+    def permitido(ctx: ContextoRegras) -> bool:
+        if modulos and ctx.modulo and ctx.modulo not in modulos:
+            return False
+        return not any(posicoes_termo(ctx) for posicoes_termo in exclusoes)
+    return permitido
+
+
+def compilar_regra(regra: Dict[str, Any]) -> RegraCompilada:
+    """
+    Compila a definição de regra da base de conhecimento
+
+    Raises:
+        ValueError: se a regra estiver mal formada
+    """
+    clausulas: List[Clausula] = []
+    candidatos_gatilho: List[Set[str]] = []
+
+    if regra.get("todas"):
+        clausulas.append(_clausula_todas(regra["todas"]))
+        candidatos_gatilho.append({_primeiro_token(regra["todas"][0])})
+    if regra.get("alguma"):
+        clausulas.append(_clausula_alguma(regra["alguma"]))
+        candidatos_gatilho.append({_primeiro_token(t) for t in regra["alguma"]})
+    for proximidade in regra.get("proximidade", []):
+        clausulas.append(_clausula_proximidade(proximidade))
+        candidatos_gatilho.append({_primeiro_token(proximidade["termos"][0])})
+    for expressao in regra.get("regex", []):
+        clausulas.append(_clausula_regex(expressao))
+
+    condicao = None
+    if clausulas:
+        if len(clausulas) == 1:
+            condicao = clausulas[0]
+        else:
+            def condicao(ctx: ContextoRegras) -> Optional[Intervalo]:
+                intervalo = None
+                for clausula in clausulas:
+                    resultado = clausula(ctx)
+                    if resultado is None:
+                        return None
+                    intervalo = intervalo or resultado
+                return intervalo
+
+    # As cláusulas são combinadas com E: o gatilho de qualquer uma delas é condição
+    # necessária. Regras só com regex não têm gatilho e são sempre avaliadas
+    gatilhos = min(candidatos_gatilho, key=len) if candidatos_gatilho else set()
+
+    return RegraCompilada(
+        descricao=regra.get("descricao") or _descrever(regra),
+        peso=float(regra.get("peso", PESO_PADRAO_REGRA)),
+        gatilhos=gatilhos,
+        condicao=condicao,
+        restricoes=_compilar_restricoes(regra)
+    )
@@ -0,0 +1,323 @@
+"""
+Repositório de triagens: interface comum ao Firestore e ao SQLite local
+FirebaseDatabase (firebase_db.py) e SQLiteDatabase (sqlite_db.py) implementam
+os mesmos métodos com os mesmos formatos de retorno, e ReplicaSQLite usa o
+SQLite como réplica de leitura na frente do Firestore. O backend é escolhido
+por TRIAGEM_ARMAZENAMENTO em criar_repositorio().
+"""
+
+import base64
+from abc import ABC, abstractmethod
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from armazenamento_triagens import configs_padroes
+from config import caminho_dados
+
+# Projeções das consultas de listagem: só os campos de resumo são transferidos.
+# Os campos pesados (textos completos, análise, soluções) vêm apenas quando
+# pedidos explicitamente em campos_extras.
+CAMPOS_RESUMO_TRIAGEM = ['ticket_numero', 'modulo_identificado', 'data_triagem', 'foi_utilizada', 'resumo']
+CAMPOS_PESADOS_TRIAGEM = ('chamado_texto', 'padroes_encontrados', 'analise_ia', 'solucoes_sugeridas', 'features')
+
+# Filtros de igualdade aceitos em contar_triagens/agregar_triagens
+NOMES_FILTROS_AGREGACAO = ('modulo', 'foi_utilizada', 'categoria', 'tipo_problema', 'prioridade', 'total_solucoes')
+
+CAMINHO_SQLITE_PADRAO = caminho_dados("triagem.db")
+
+# Categorias listadas por dia na série diária
+CATEGORIAS_POR_DIA = 5
+
+
+def codificar_cursor(data_triagem: datetime, triagem_id: str) -> str:
+    """Cursor opaco da última triagem de uma página (data + ID para desempatar)"""
+    conteudo = json.dumps({'d': data_triagem.isoformat(), 'id': triagem_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(conteudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(data_triagem, triagem_id) de um cursor; ValueError se o cursor for inválido"""
+    try:
+        conteudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        dados = json.loads(conteudo)
+        return datetime.fromisoformat(dados['d']), str(dados['id'])
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+def projecao(campos: List[str], campos_extras: Iterable[str], permitidos: Iterable[str]) -> List[str]:
+    """Campos do select(): os de resumo mais os pesados pedidos; ValueError para campo desconhecido"""
+    extras = list(dict.fromkeys(campos_extras or ()))
+    desconhecidos = [campo for campo in extras if campo not in permitidos]
+    if desconhecidos:
+        raise ValueError(f"Campos extras não permitidos: {desconhecidos} (permitidos: {list(permitidos)})")
+    return campos + [campo for campo in extras if campo not in campos]
+
+
+def em_blocos(valores: Iterable[Any], tamanho: int) -> List[List[Any]]:
+    """Valores distintos (na ordem) divididos em blocos de até `tamanho`"""
+    distintos = list(dict.fromkeys(valores))
+    return [distintos[i:i + tamanho] for i in range(0, len(distintos), tamanho)]
+
+
+def periodo_serie_diaria(dias: int) -> Tuple[datetime, datetime]:
+    """(início do dia UTC atual, início do dia mais antigo da série)"""
+    hoje = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return hoje, hoje - timedelta(days=dias - 1)
+
+
+def serie_diaria(
+    linhas: Iterable[Tuple[str, Optional[str], Optional[str], Optional[str], int, int, float]],
+    dias: int,
+    hoje: datetime
+) -> List[Dict[str, Any]]:
+    """
+    Série diária (do dia atual para trás) montada numa única passada
+
+    Args:
+        linhas: (dia 'AAAA-MM-DD', tipo_problema, prioridade, categoria, total,
+            total com solução, soma do tempo de processamento); podem ser
+            triagens individuais (total 1) ou grupos já somados no banco
+        dias: Quantidade de dias
+        hoje: Início do dia UTC atual
+    """
+    acumulados = {
+        (hoje - timedelta(days=i)).strftime("%Y-%m-%d"): {
+            "total": 0, "com_solucao": 0, "tempo": 0.0, "tipos": {}, "prioridades": {}, "categorias": {}
+        }
+        for i in range(dias)
+    }
+    for dia, tipo_problema, prioridade, categoria, total, com_solucao, tempo in linhas:
+        acumulado = acumulados.get(dia)
+        if acumulado is None:
+            continue
+        acumulado["total"] += total
+        acumulado["com_solucao"] += com_solucao
+        acumulado["tempo"] += tempo or 0
+        for chave, valor in (("tipos", tipo_problema), ("prioridades", prioridade), ("categorias", categoria)):
+            if valor:
+                acumulado[chave][valor] = acumulado[chave].get(valor, 0) + total
+
+    return [
+        {
+            "data": dia,
+            "total_triagens": acumulado["total"],
+            "triagens_com_solucao": acumulado["com_solucao"],
+            "tipos_problema": acumulado["tipos"],
+            "prioridades": acumulado["prioridades"],
+            "categorias_mais_comuns": [
+                {"categoria": categoria, "count": total}
+                for categoria, total in sorted(acumulado["categorias"].items(), key=lambda x: (-x[1], x[0]))[:CATEGORIAS_POR_DIA]
+            ],
+            "tempo_medio_processamento": round(acumulado["tempo"] / acumulado["total"], 2) if acumulado["total"] else 0
+        }
+        for dia, acumulado in acumulados.items()
+    ]
+
+
+class RepositorioTriagens(ABC):
+    """
+    Operações de armazenamento usadas pelo serviço de triagem
+
+    Datas de entrada são datetimes com fuso; nas listagens, data_triagem volta
+    em ISO 8601, exceto no histórico paginado e em get_triagens_historico
+    (datetime).
+    """
+    nome = "base"
+
+    @abstractmethod
+    def is_configured(self) -> bool:
+        """Se o armazenamento está disponível (sem ele, escritas retornam IDs mock)"""
+
+    # ==================== TRIAGENS ====================
+
+    @abstractmethod
+    def registrar_triagem(
+        self,
+        ticket_numero: str,
+        chamado_texto: str,
+        modulo: Optional[str],
+        resultado_triagem: Dict[str, Any],
+        analise_id_original: Optional[str] = None,
+        usuario: Optional[str] = None,
+        base_conhecimento: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Registra uma triagem completa e retorna o ID gerado"""
+
+    @abstractmethod
+    def marcar_triagem_como_utilizada(self, triagem_id: str):
+        """Marca que a triagem foi utilizada pelo suporte"""
+
+    @abstractmethod
+    def get_triagem_por_id(self, triagem_id: str) -> Optional[Dict]:
+        """Documento completo da triagem (None se não existe)"""
+
+    @abstractmethod
+    def get_triagens_por_ticket(
+        self,
+        ticket_numero: str,
+        campos_extras: Iterable[str] = (),
+        limite: Optional[int] = None
+    ) -> List[Dict]:
+        """Triagens de um ticket, da mais recente para a mais antiga"""
+
+    @abstractmethod
+    def get_historico_paginado(
+        self,
+        por_pagina: int = 20,
+        modulo: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Página do histórico ('triagens' e 'proximo_cursor'); ValueError para cursor inválido"""
+
+    @abstractmethod
+    def get_triagens_historico(self, limite: Optional[int] = None) -> List[Dict]:
+        """Texto, módulo, análise e soluções das triagens reais (sem modo mock)"""
+
+    @abstractmethod
+    def get_triagens_recentes(self, limite: int = 10, campos_extras: Iterable[str] = ()) -> List[Dict]:
+        """Triagens mais recentes"""
+
+    @abstractmethod
+    def get_triagens_por_ids(self, triagem_ids: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, Dict]:
+        """Dict triagem_id -> triagem (IDs inexistentes ficam de fora)"""
+
+    @abstractmethod
+    def get_triagens_por_tickets(self, tickets: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, List[Dict]]:
+        """Dict ticket_numero -> triagens do ticket (mais recente primeiro)"""
+
+    # ==================== FINGERPRINTS E FEEDBACKS ====================
+
+    @abstractmethod
+    def registrar_fingerprint(
+        self,
+        hash_fingerprint: str,
+        chave: str,
+        analise_ia: Dict[str, Any],
+        triagem_id: Optional[str] = None
+    ):
+        """Salva (ou substitui) o problema conhecido associado a um fingerprint"""
+
+    @abstractmethod
+    def get_fingerprints(self) -> List[Dict]:
+        """Todos os fingerprints aprendidos de triagens anteriores"""
+
+    @abstractmethod
+    def registrar_feedback_triagem(
+        self,
+        triagem_id: str,
+        foi_util: bool,
+        nota: Optional[int] = None,
+        comentario: Optional[str] = None,
+        solucao_utilizada: Optional[str] = None
+    ) -> str:
+        """Registra feedback específico de triagem"""
+
+    # ==================== AGREGAÇÕES ====================
+
+    @abstractmethod
+    def contar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        **filtros: Any
+    ) -> int:
+        """Triagens no período [desde, ate) com os filtros de NOMES_FILTROS_AGREGACAO"""
+
+    @abstractmethod
+    def agregar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        campo: str = 'tempo_processamento_ms',
+        **filtros: Any
+    ) -> Dict[str, Any]:
+        """Dict com total, soma e media de um campo numérico"""
+
+    @abstractmethod
+    def get_estatisticas_triagem(self, dias: int = 7) -> Dict[str, Any]:
+        """Totais, taxa de utilização, módulos mais triados e tempo médio do período"""
+
+    @abstractmethod
+    def get_serie_diaria(self, dias: int, categoria: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Estatísticas por dia UTC (do dia atual para trás) de uma única consulta
+        do período: total, com solução, tipos de problema, prioridades,
+        categorias mais comuns e tempo médio (formato de serie_diaria)
+
+        Args:
+            dias: Quantidade de dias
+            categoria: Filtrar pela categoria detalhada da análise
+        """
+
+    # ==================== VERSÕES DA BASE DE CONHECIMENTO ====================
+
+    @abstractmethod
+    def get_configs_base(self, versao: str) -> Optional[Dict[Tuple[str, str], Dict[str, Any]]]:
+        """Cópia gravada dos configs dos padrões de uma versão da base (None se não existe)"""
+
+    @abstractmethod
+    def registrar_configs_base(self, versao: str, configs: Dict[Tuple[str, str], Dict[str, Any]]):
+        """Grava a cópia dos configs dos padrões de uma versão da base"""
+
+    def configs_versao(self, versao: Optional[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Configs com que os padrões das triagens da versão foram referenciados (vazio se a versão não tem cópia)"""
+        cache = self.__dict__.setdefault('_configs_por_versao', {})
+        if versao not in cache:
+            configs = self.get_configs_base(versao) if versao else None
+            if configs is None:
+                return {}
+            cache[versao] = configs
+        return cache[versao]
+
+    def configs_referencia(self, base_conhecimento: Optional[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Configs contra os quais os padrões de uma triagem nova são gravados por
+        referência: os da base, se forem iguais à cópia gravada da versão (a
+        cópia é criada quando a versão ainda não tem uma). Se a base mudou sem
+        mudar a versão, retorna vazio e os configs ficam inteiros no documento.
+        """
+        base_conhecimento = base_conhecimento or {}
+        versao = base_conhecimento.get('versao')
+        configs = configs_padroes(base_conhecimento)
+        if not versao or not configs:
+            return {}
+        gravados = self.configs_versao(versao)
+        if not gravados:
+            self.registrar_configs_base(versao, configs)
+            self._configs_por_versao[versao] = gravados = configs
+        return configs if gravados == configs else {}
+
+
+def criar_repositorio() -> RepositorioTriagens:
+    """
+    Repositório escolhido por TRIAGEM_ARMAZENAMENTO (firestore, sqlite ou replica)
+    Sem configuração, usa o Firestore quando está configurado e o SQLite em
+    DATABASE_PATH caso contrário (em vez de descartar as triagens). Na réplica,
+    o SQLite é sincronizado com o Firestore na criação e depois, em segundo
+    plano, a cada TRIAGEM_REPLICA_INTERVALO segundos.
+    """
+    from firebase_db import FirebaseDatabase
+    from sqlite_db import ReplicaSQLite, SQLiteDatabase
+
+    tipo = os.getenv("TRIAGEM_ARMAZENAMENTO", "").lower()
+    caminho = os.getenv("DATABASE_PATH", CAMINHO_SQLITE_PADRAO)
+    if tipo == "sqlite":
+        return SQLiteDatabase(caminho)
+
+    firebase_db = FirebaseDatabase()
+    if tipo == "firestore":
+        return firebase_db
+    if not firebase_db.is_configured():
+        if tipo == "replica":
+            print("⚠️  Firebase não configurado - réplica desativada, usando só o SQLite")
+        return SQLiteDatabase(caminho)
+    if tipo == "replica":
+        intervalo = float(os.getenv("TRIAGEM_REPLICA_INTERVALO", "60"))
+        replica = ReplicaSQLite(firebase_db, SQLiteDatabase(caminho), intervalo)
+        replica.sincronizar()
+        replica.iniciar_sincronizacao()
+        return replica
+    return firebase_db
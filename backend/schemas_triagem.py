@@ -12,6 +12,24 @@ class TriagemRequest(BaseModel):
     modulo: Optional[str] = Field(None, description="Módulo identificado no chamado")
     analise_id: Optional[int] = Field(None, description="ID da análise original (opcional)")
 
+class ChamadoLote(BaseModel):
+    """Chamado dentro de uma triagem em lote"""
+    id: str = Field(..., description="Identificador único do chamado no lote (ex: número do ticket)")
+    chamado_texto: str = Field(..., description="Texto completo do chamado gerado")
+    modulo: Optional[str] = Field(None, description="Módulo identificado no chamado")
+
+class TriagemLoteRequest(BaseModel):
+    """Request para triagem de vários chamados"""
+    chamados: List[ChamadoLote] = Field(..., min_items=1, max_items=200, description="Chamados a triar")
+
+class TicketsLoteRequest(BaseModel):
+    """Request para consultar vários tickets de uma vez"""
+    tickets: List[str] = Field(..., min_items=1, max_items=500, description="Números dos tickets")
+
+class TriagensLoteRequest(BaseModel):
+    """Request para consultar várias triagens por ID"""
+    triagem_ids: List[str] = Field(..., min_items=1, max_items=500, description="IDs das triagens")
+
 class SolucaoSugerida(BaseModel):
     """Modelo para solução sugerida"""
     tipo: str = Field(..., description="Tipo da solução: codigo, sql, configuracao, debug")
@@ -29,6 +47,10 @@ class PadraoDetectado(BaseModel):
     padrao_id: str = Field(..., description="ID do padrão na base de conhecimento")
     palavra_chave: str = Field(..., description="Palavra-chave que foi encontrada")
     confianca: float = Field(0.0, description="Nível de confiança do match")
+    posicao: Optional[Dict[str, int]] = Field(None, description="Posição do match no texto original (inicio/fim)")
+    aproximado: bool = Field(False, description="Se o match veio da busca aproximada (tolerante a erros de digitação)")
+    ocorrencias: int = Field(1, description="Total de ocorrências das palavras-chave do padrão")
+    especifico_modulo: bool = Field(False, description="Se o padrão é específico do módulo do chamado")
 
 class AnaliseIA(BaseModel):
     """Modelo para análise da IA"""
@@ -43,6 +65,7 @@ class AnaliseIA(BaseModel):
     recursos_necessarios: Optional[List[str]] = Field(None, description="Recursos necessários")
     observacoes: Optional[str] = Field(None, description="Observações adicionais")
     erro: Optional[str] = Field(None, description="Mensagem de erro se houver")
+    origem: Optional[str] = Field(None, description="Origem quando a IA não foi consultada: triagem_anterior, base_conhecimento")
 
 class ResumoTriagem(BaseModel):
     """Modelo para resumo da triagem"""
@@ -61,6 +84,12 @@ class TriagemResponse(BaseModel):
     solucoes_sugeridas: List[SolucaoSugerida] = Field(..., description="Soluções sugeridas")
     resumo: ResumoTriagem = Field(..., description="Resumo da triagem")
     modo_mock: bool = Field(..., description="Se está em modo mock")
+    features: Optional[Dict[str, Any]] = Field(None, description="Sinais técnicos extraídos do chamado (handlers, erros SQL, exceções, tabelas, frames)")
+    problema_conhecido: Optional[Dict[str, Any]] = Field(None, description="Problema conhecido identificado por fingerprint")
+    classificacao: Optional[Dict[str, Any]] = Field(None, description="Previsão do classificador local (tipo_problema/prioridade com confiança)")
+    compactacao: Optional[Dict[str, Any]] = Field(None, description="Redução do texto do chamado enviado à IA (tokens estimados)")
+    triagens_similares: Optional[List[Dict[str, Any]]] = Field(None, description="Triagens anteriores similares (similaridade de cosseno)")
+    duplicata: Optional[Dict[str, Any]] = Field(None, description="Triagem anterior quase idêntica (MinHash) e se a análise foi reutilizada")
     tempo_processamento_ms: Optional[int] = Field(None, description="Tempo de processamento")
     mensagem: str = Field(..., description="Mensagem de status")
 
@@ -70,7 +99,7 @@ class TriagemResponse(BaseModel):
 
 class FeedbackTriagemRequest(BaseModel):
     """Request para feedback da triagem"""
-    triagem_id: int = Field(..., description="ID da triagem")
+    triagem_id: str = Field(..., description="ID da triagem")
     solucao_util: bool = Field(..., description="Se a solução foi útil")
     solucao_usada: Optional[str] = Field(None, description="Qual solução foi utilizada")
     tempo_resolucao: Optional[str] = Field(None, description="Tempo real de resolução")
@@ -80,7 +109,7 @@ class FeedbackTriagemRequest(BaseModel):
 class FeedbackTriagemResponse(BaseModel):
     """Response do feedback"""
     sucesso: bool = Field(..., description="Se o feedback foi registrado")
-    feedback_id: int = Field(..., description="ID do feedback registrado")
+    feedback_id: str = Field(..., description="ID do feedback registrado")
     mensagem: str = Field(..., description="Mensagem de confirmação")
 
 # ============================================
@@ -110,7 +139,7 @@ class EstatisticasTriagemResponse(BaseModel):
 
 class TriagemHistorico(BaseModel):
     """Item do histórico de triagem"""
-    id: int = Field(..., description="ID da triagem")
+    id: str = Field(..., description="ID da triagem")
     data_triagem: datetime = Field(..., description="Data da triagem")
     modulo: Optional[str] = Field(None, description="Módulo analisado")
     total_padroes: int = Field(..., description="Total de padrões detectados")
@@ -122,9 +151,9 @@ class HistoricoTriagemResponse(BaseModel):
     """Response do histórico"""
     sucesso: bool = Field(..., description="Se a consulta foi bem-sucedida")
     triagens: List[TriagemHistorico] = Field(..., description="Lista de triagens")
-    total: int = Field(..., description="Total de registros")
-    pagina: int = Field(..., description="Página atual")
+    total: int = Field(..., description="Total de registros da página")
     por_pagina: int = Field(..., description="Registros por página")
+    proximo_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None na última)")
 
 # ============================================
 # SCHEMAS PARA CONFIGURAÇÃO DE BASE DE CONHECIMENTO
@@ -140,6 +169,10 @@ class ConfiguracaoPadrao(BaseModel):
     codigo_sugerido: Optional[str] = Field(None, description="Código sugerido")
     script_sql_sugerido: Optional[str] = Field(None, description="Script SQL sugerido")
     scripts_sugeridos: Optional[List[str]] = Field(None, description="Scripts SQL sugeridos")
+    regra: Optional[Dict[str, Any]] = Field(None, description="Regra booleana (todas, alguma, proximidade, regex, nenhuma, modulos, peso)")
+    modulos: Optional[List[str]] = Field(None, description="Módulos em que o padrão se aplica (vazio = todos)")
+    erros_sql: Optional[List[int]] = Field(None, description="Números de erro do SQL Server que identificam o padrão")
+    excecoes: Optional[List[str]] = Field(None, description="Tipos de exceção .NET que identificam o padrão")
 
 class AtualizarBaseConhecimentoRequest(BaseModel):
     """Request para atualizar base de conhecimento"""
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que substitui o provedor de IA em testes de carga
+Reproduz respostas gravadas (TRIAGEM_GRAVAR_RESPOSTAS) com distribuição de
+latência, taxa de erro, taxa de respostas malformadas e vazão de tokens
+configuráveis. Cada decisão é tirada de um gerador semeado pelo conteúdo da
+requisição, então a mesma sequência de requisições produz os mesmos tempos
+e falhas. Fala o protocolo do BackendHTTP:
+
+    POST /gerar         {"instrucao_sistema", "conteudo", "esquema", "stream"} -> {"texto"}
+                        (com stream, uma linha JSON {"texto"} por pedaço)
+    GET  /estatisticas  requisições, erros e prefixos distintos recebidos
+
+Uso:
+    python servidor_ia_local.py [--porta 8090] [--gravacoes respostas.jsonl]
+        [--latencia lognormal:800,0.5] [--taxa-erro 0.02] [--status-erro 503]
+        [--taxa-malformada 0.01] [--tokens-por-segundo 150] [--semente 42]
+
+    Com o servidor no ar: TRIAGEM_BACKEND_IA=http TRIAGEM_BACKEND_URL=http://localhost:8090
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from backends_ia import ANALISE_MOCK
+from compactacao_chamado import estimar_tokens
+from prompt_triagem import hash_prompt, ids_do_lote
+
+PEDACOS_STREAM = 20
+
+
+def criar_latencia(especificacao: str) -> Callable[[random.Random], float]:
+    """
+    Distribuição de latência (segundos) a partir de "fixa:ms",
+    "uniforme:min_ms,max_ms" ou "lognormal:mediana_ms,sigma"
+    """
+    tipo, _, valores = especificacao.partition(":")
+    numeros = [float(v) for v in valores.split(",") if v]
+    if tipo == "fixa" and len(numeros) == 1:
+        return lambda rng: numeros[0] / 1000
+    if tipo == "uniforme" and len(numeros) == 2:
+        return lambda rng: rng.uniform(numeros[0], numeros[1]) / 1000
+    if tipo == "lognormal" and len(numeros) == 2:
+        return lambda rng: rng.lognormvariate(math.log(numeros[0]), numeros[1]) / 1000
+    raise ValueError(f"Latência inválida: {especificacao}")
+
+
+class RespostasGravadas:
+    def __init__(self, caminho: Optional[str]):
+        self.por_chave: Dict[str, str] = {}
+        self.textos: List[str] = []
+        if caminho:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    if linha.strip():
+                        gravacao = json.loads(linha)
+                        self.por_chave[gravacao["chave"]] = gravacao["texto"]
+                        self.textos.append(gravacao["texto"])
+        # Análises individuais, usadas para montar respostas de lote não gravadas
+        self.analises = [a for a in map(self._como_analise, self.textos) if a] or [ANALISE_MOCK]
+
+    @staticmethod
+    def _como_analise(texto: str) -> Optional[dict]:
+        try:
+            dados = json.loads(texto)
+        except ValueError:
+            return None
+        return dados if isinstance(dados, dict) else None
+
+    def resposta(self, conteudo: str, chave: str) -> str:
+        if chave in self.por_chave:
+            return self.por_chave[chave]
+        ids = ids_do_lote(conteudo)
+        if ids:
+            return json.dumps([
+                {"ticket_id": i, **self.analises[int(hash_prompt(i), 16) % len(self.analises)]} for i in ids
+            ], ensure_ascii=False)
+        if self.textos:
+            return self.textos[int(chave, 16) % len(self.textos)]
+        return json.dumps(ANALISE_MOCK, ensure_ascii=False)
+
+
+class EstadoServidor:
+    def __init__(self, args):
+        self.gravadas = RespostasGravadas(args.gravacoes)
+        self.latencia = criar_latencia(args.latencia)
+        self.taxa_erro = args.taxa_erro
+        self.status_erro = args.status_erro
+        self.taxa_malformada = args.taxa_malformada
+        self.tokens_por_segundo = args.tokens_por_segundo
+        self.semente = args.semente
+
+        self._lock = threading.Lock()
+        self._vistas: Dict[str, int] = {}
+        self.estatisticas = {"requisicoes": 0, "erros": 0, "malformadas": 0, "gravadas": 0, "tokens": 0}
+        self.prefixos = set()
+
+    def gerador(self, chave: str, prefixo: str) -> random.Random:
+        """Gerador determinístico pela semente, conteúdo e repetição do conteúdo"""
+        with self._lock:
+            repeticao = self._vistas.get(chave, 0)
+            self._vistas[chave] = repeticao + 1
+            self.estatisticas["requisicoes"] += 1
+            self.prefixos.add(hash_prompt(prefixo))
+        return random.Random(f"{self.semente}:{chave}:{repeticao}")
+
+    def contar(self, campo: str, quantidade: int = 1):
+        with self._lock:
+            self.estatisticas[campo] += quantidade
+
+
+class ManipuladorIA(BaseHTTPRequestHandler):
+    estado: EstadoServidor = None
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _json(self, status: int, dados: dict):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path != "/estatisticas":
+            return self._json(404, {"erro": "rota não encontrada"})
+        estado = self.estado
+        self._json(200, {**estado.estatisticas, "prefixos_distintos": len(estado.prefixos)})
+
+    def do_POST(self):
+        if self.path != "/gerar":
+            return self._json(404, {"erro": "rota não encontrada"})
+        estado = self.estado
+        pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        conteudo = pedido.get("conteudo", "")
+        chave = hash_prompt(conteudo)
+        rng = estado.gerador(chave, pedido.get("instrucao_sistema", ""))
+
+        time.sleep(estado.latencia(rng))
+        if rng.random() < estado.taxa_erro:
+            estado.contar("erros")
+            return self._json(estado.status_erro, {"erro": "erro simulado pelo servidor local"})
+
+        texto = estado.gravadas.resposta(conteudo, chave)
+        if chave in estado.gravadas.por_chave:
+            estado.contar("gravadas")
+        if rng.random() < estado.taxa_malformada:
+            estado.contar("malformadas")
+            texto = texto[:len(texto) // 2]
+
+        tokens = estimar_tokens(texto)
+        estado.contar("tokens", tokens)
+        duracao = tokens / estado.tokens_por_segundo if estado.tokens_por_segundo else 0.0
+
+        if not pedido.get("stream"):
+            time.sleep(duracao)
+            return self._json(200, {"texto": texto})
+
+        # Streaming: pedaços do texto no ritmo da vazão de tokens
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        tamanho = max(1, math.ceil(len(texto) / PEDACOS_STREAM))
+        pedacos = [texto[i:i + tamanho] for i in range(0, len(texto), tamanho)]
+        for pedaco in pedacos:
+            time.sleep(duracao / len(pedacos))
+            self.wfile.write((json.dumps({"texto": pedaco}, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Servidor local que substitui o provedor de IA")
+    parser.add_argument("--porta", type=int, default=8090)
+    parser.add_argument("--gravacoes", default=None, help="JSONL gravado com TRIAGEM_GRAVAR_RESPOSTAS")
+    parser.add_argument("--latencia", default="lognormal:800,0.5", help="fixa:ms | uniforme:min,max | lognormal:mediana,sigma")
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--status-erro", type=int, default=503)
+    parser.add_argument("--taxa-malformada", type=float, default=0.0)
+    parser.add_argument("--tokens-por-segundo", type=float, default=150.0, help="0 = resposta instantânea")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    ManipuladorIA.estado = EstadoServidor(args)
+    servidor = ThreadingHTTPServer(("127.0.0.1", args.porta), ManipuladorIA)
+    print(f"🚀 Servidor de IA local em http://127.0.0.1:{args.porta} "
+          f"({len(ManipuladorIA.estado.gravadas.textos)} respostas gravadas)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Sincroniza a busca textual (SQLite FTS5) com a coleção `triagens`
+Lê as triagens reais do Firestore (ou de um JSONL exportado com triagem_id/id,
+ticket_numero, chamado_texto, modulo_identificado, analise_ia,
+solucoes_sugeridas e data_triagem) e insere ou substitui cada uma no índice,
+em transações de LOTE_SINCRONIZACAO triagens, e funde os segmentos do índice
+ao final. Pode ser rodado a qualquer
+momento: triagens já indexadas são apenas atualizadas.
+
+Uso:
+    python sincronizar_busca_triagens.py [--arquivo triagens.jsonl] [--banco busca_triagens.db]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from busca_triagens import BuscaTriagens
+from config import caminho_dados
+from treinar_classificador import carregar_triagens
+
+LOTE_SINCRONIZACAO = 500
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sincroniza a busca textual com o histórico de triagens")
+    parser.add_argument("--arquivo", default=None, help="JSONL com o histórico de triagens")
+    parser.add_argument("--banco", default=os.getenv("TRIAGEM_BANCO_BUSCA") or caminho_dados("busca_triagens.db"))
+    args = parser.parse_args()
+
+    triagens = carregar_triagens(args.arquivo)
+    if not triagens:
+        print("❌ Nenhuma triagem para sincronizar")
+        return 1
+
+    busca = BuscaTriagens(args.banco)
+    inicio = time.perf_counter()
+    registros = [
+        {
+            **triagem,
+            "triagem_id": triagem.get("triagem_id") or triagem["id"],
+            "modulo": triagem.get("modulo_identificado")
+        }
+        for triagem in triagens
+    ]
+    total = 0
+    for posicao in range(0, len(registros), LOTE_SINCRONIZACAO):
+        total += busca.indexar(registros[posicao:posicao + LOTE_SINCRONIZACAO])
+    busca.otimizar()
+
+    print(f"✅ {total} triagens sincronizadas em {time.perf_counter() - inicio:.1f}s "
+          f"({len(busca)} no índice, {args.banco})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Sincroniza o SQLite local (DATABASE_PATH) com as triagens do Firestore
+Importa as triagens alteradas desde a última sincronização (updated_at) e os
+fingerprints, em transações de --lote triagens. Serve para preparar a réplica
+antes de subir o serviço com TRIAGEM_ARMAZENAMENTO=replica ou para manter uma
+cópia local do histórico; com --completa todas as triagens são reimportadas.
+
+Uso:
+    python sincronizar_sqlite.py [--banco triagem.db] [--lote 500] [--completa]
+"""
+
+import argparse
+import os
+import sys
+
+from firebase_db import FirebaseDatabase
+from repositorio_triagens import CAMINHO_SQLITE_PADRAO
+from sqlite_db import ReplicaSQLite, SQLiteDatabase
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sincroniza o SQLite local com as triagens do Firestore")
+    parser.add_argument("--banco", default=os.getenv("DATABASE_PATH", CAMINHO_SQLITE_PADRAO))
+    parser.add_argument("--lote", type=int, default=500, help="Triagens por transação")
+    parser.add_argument("--completa", action="store_true", help="Reimporta todas as triagens")
+    args = parser.parse_args()
+
+    firebase_db = FirebaseDatabase()
+    if not firebase_db.is_configured():
+        print("❌ Firebase não configurado")
+        return 1
+
+    replica = ReplicaSQLite(firebase_db, SQLiteDatabase(args.banco))
+    replica.sincronizar(args.lote, completa=args.completa)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
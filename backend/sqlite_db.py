@@ -0,0 +1,864 @@
+"""
+Armazenamento local das triagens em SQLite
+SQLiteDatabase implementa o RepositorioTriagens com os mesmos formatos de
+retorno do FirebaseDatabase: funciona sozinho (sem credenciais do Firebase as
+triagens continuam sendo gravadas em DATABASE_PATH) ou como réplica de leitura
+do Firestore em ReplicaSQLite. O banco fica em modo WAL (leitores não esperam
+o escritor), cada thread tem sua conexão e todas as consultas são
+parametrizadas com SQL fixo, então o cache de statements do sqlite3 reaproveita
+os statements preparados; listas de IDs/tickets vão num único parâmetro JSON
+(json_each) em vez de um IN com quantidade variável de marcadores.
+
+Os campos de filtro e agregação (módulo, tipo de problema, prioridade,
+categoria, total de soluções, tempo) são colunas próprias, com índices em
+ticket_numero e data_triagem; os campos pesados são JSON, comprimidos com zlib
+a partir de LIMIAR_COMPRESSAO bytes, e os padrões da base são gravados por
+referência como no formato compacto do Firestore (armazenamento_triagens.py),
+com a cópia dos configs de cada versão da base em bases_conhecimento.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from armazenamento_triagens import (
+    LIMIAR_COMPRESSAO,
+    NIVEL_COMPRESSAO,
+    desempacotar_configs,
+    empacotar_configs,
+    expandir_padroes,
+    referenciar_padroes
+)
+from repositorio_triagens import (
+    CAMPOS_PESADOS_TRIAGEM,
+    CAMPOS_RESUMO_TRIAGEM,
+    NOMES_FILTROS_AGREGACAO,
+    RepositorioTriagens,
+    codificar_cursor,
+    decodificar_cursor,
+    periodo_serie_diaria,
+    projecao,
+    serie_diaria
+)
+
+# Filtros de igualdade das agregações (NOMES_FILTROS_AGREGACAO -> coluna)
+COLUNAS_FILTROS = {
+    'modulo': 'modulo_identificado',
+    'foi_utilizada': 'foi_utilizada',
+    'categoria': 'categoria',
+    'tipo_problema': 'tipo_problema',
+    'prioridade': 'prioridade',
+    'total_solucoes': 'total_solucoes'
+}
+CAMPOS_NUMERICOS = ('tempo_processamento_ms', 'total_solucoes')
+
+# Statements distintos por conexão (projeções e filtros variam); o padrão do sqlite3 é 128
+STATEMENTS_EM_CACHE = 256
+
+# Sincronização da réplica relê o que mudou neste intervalo antes da última marca
+# (tolerância à diferença de relógio entre as instâncias que gravam no Firestore)
+JANELA_SOBREPOSICAO_SINCRONIZACAO = timedelta(minutes=2)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS triagens (
+    id TEXT PRIMARY KEY,
+    ticket_numero TEXT,
+    analise_id_original TEXT,
+    usuario_nome TEXT,
+    modulo_identificado TEXT,
+    tipo_problema TEXT,
+    prioridade TEXT,
+    categoria TEXT,
+    total_solucoes INTEGER NOT NULL DEFAULT 0,
+    tempo_processamento_ms REAL NOT NULL DEFAULT 0,
+    modo_mock INTEGER NOT NULL DEFAULT 0,
+    foi_utilizada INTEGER NOT NULL DEFAULT 0,
+    resumo TEXT,
+    versao_base_conhecimento TEXT,
+    chamado_texto BLOB,
+    padroes_encontrados BLOB,
+    analise_ia BLOB,
+    solucoes_sugeridas BLOB,
+    features BLOB,
+    data_triagem TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_triagens_ticket_data ON triagens(ticket_numero, data_triagem, id);
+CREATE INDEX IF NOT EXISTS idx_triagens_data ON triagens(data_triagem, id);
+CREATE INDEX IF NOT EXISTS idx_triagens_modulo_data ON triagens(modulo_identificado, data_triagem, id);
+CREATE INDEX IF NOT EXISTS idx_triagens_categoria_data ON triagens(categoria, data_triagem);
+CREATE TABLE IF NOT EXISTS fingerprints_triagem (
+    hash TEXT PRIMARY KEY,
+    chave TEXT NOT NULL,
+    analise_ia TEXT,
+    triagem_id TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS feedbacks_triagem (
+    id TEXT PRIMARY KEY,
+    triagem_id TEXT NOT NULL,
+    foi_util INTEGER NOT NULL,
+    nota INTEGER,
+    comentario TEXT,
+    solucao_utilizada TEXT,
+    data_feedback TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_triagem ON feedbacks_triagem(triagem_id);
+CREATE TABLE IF NOT EXISTS bases_conhecimento (
+    versao TEXT PRIMARY KEY,
+    configs BLOB NOT NULL,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sincronizacao (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+_COLUNAS_TRIAGEM = (
+    'id', 'ticket_numero', 'analise_id_original', 'usuario_nome', 'modulo_identificado',
+    'tipo_problema', 'prioridade', 'categoria', 'total_solucoes', 'tempo_processamento_ms',
+    'modo_mock', 'foi_utilizada', 'resumo', 'versao_base_conhecimento',
+    *CAMPOS_PESADOS_TRIAGEM, 'data_triagem', 'created_at', 'updated_at'
+)
+_INSERIR_TRIAGEM = (
+    f"INSERT OR REPLACE INTO triagens ({', '.join(_COLUNAS_TRIAGEM)}) "
+    f"VALUES ({', '.join('?' * len(_COLUNAS_TRIAGEM))})"
+)
+
+
+def data_iso(valor: Any) -> Optional[str]:
+    """
+    Data em ISO 8601 UTC de largura fixa (microssegundos sempre presentes),
+    para que a ordem do texto seja a ordem cronológica
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor)
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return valor.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+
+def empacotar(valor: Any) -> Any:
+    """JSON do valor; acima do limiar vira um blob zlib (bytes), se ficar menor"""
+    if valor is None:
+        return None
+    texto = json.dumps(valor, ensure_ascii=False, separators=(',', ':'), default=str)
+    dados = texto.encode('utf-8')
+    if len(dados) >= LIMIAR_COMPRESSAO:
+        comprimido = zlib.compress(dados, NIVEL_COMPRESSAO)
+        if len(comprimido) < len(dados):
+            return comprimido
+    return texto
+
+
+def desempacotar(valor: Any) -> Any:
+    """Inverso de empacotar: blobs são JSON comprimido, textos são JSON"""
+    if valor is None:
+        return None
+    if isinstance(valor, (bytes, bytearray)):
+        valor = zlib.decompress(valor).decode('utf-8')
+    return json.loads(valor)
+
+
+class SQLiteDatabase(RepositorioTriagens):
+    nome = "sqlite"
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._lock_escrita = threading.Lock()
+        conexao = self._conexao()
+        conexao.executescript(_ESQUEMA)
+        conexao.commit()
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread; WAL deixa leitores e o escritor trabalharem em paralelo"""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=10, cached_statements=STATEMENTS_EM_CACHE)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.row_factory = sqlite3.Row
+            self._local.conexao = conexao
+        return conexao
+
+    def __len__(self) -> int:
+        return self._conexao().execute("SELECT COUNT(*) FROM triagens").fetchone()[0]
+
+    def is_configured(self) -> bool:
+        return True
+
+    def _resumo_triagem(self, linha: sqlite3.Row, campos: List[str]) -> Dict[str, Any]:
+        """Triagem da projeção CAMPOS_RESUMO_TRIAGEM (+ campos extras pedidos), como no FirebaseDatabase"""
+        triagem = {
+            'id': linha['id'],
+            'ticket_numero': linha['ticket_numero'],
+            'modulo_identificado': linha['modulo_identificado'],
+            'data_triagem': linha['data_triagem'],
+            'foi_utilizada': bool(linha['foi_utilizada']),
+            'resumo': desempacotar(linha['resumo']) or {},
+            **{campo: desempacotar(linha[campo]) for campo in campos[len(CAMPOS_RESUMO_TRIAGEM):]}
+        }
+        if triagem.get('padroes_encontrados'):
+            triagem['padroes_encontrados'] = self._expandir(triagem['padroes_encontrados'], linha['versao_base_conhecimento'])
+        return triagem
+
+    def _expandir(self, padroes: List[Dict[str, Any]], versao: Optional[str]) -> List[Dict[str, Any]]:
+        """Padrões com os configs da versão da base em que a triagem foi gravada"""
+        return expandir_padroes(padroes, self.configs_versao(versao))
+
+    def _colunas(self, campos: List[str]) -> str:
+        # Campos já validados por projecao(), então podem ir no SQL; com os
+        # padrões vem a versão da base, para recolocar os configs
+        versao = ['versao_base_conhecimento'] if 'padroes_encontrados' in campos else []
+        return ', '.join(['id'] + campos + versao)
+
+    # ==================== TRIAGENS ====================
+
+    def importar(self, documentos: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insere ou substitui triagens (por 'id') numa única transação
+
+        Args:
+            documentos: documentos no formato da coleção `triagens` (já
+                descomprimidos), com o ID em 'id'; datas como datetime ou ISO
+
+        Returns:
+            Quantidade de triagens gravadas
+        """
+        linhas = []
+        for documento in documentos:
+            analise_ia = documento.get('analise_ia') or {}
+            solucoes = documento.get('solucoes_sugeridas') or []
+            data_triagem = data_iso(documento.get('data_triagem') or documento.get('created_at'))
+            linhas.append((
+                documento['id'],
+                documento.get('ticket_numero'),
+                documento.get('analise_id_original'),
+                documento.get('usuario_nome'),
+                documento.get('modulo_identificado'),
+                analise_ia.get('tipo_problema'),
+                analise_ia.get('prioridade'),
+                analise_ia.get('categoria_detalhada'),
+                documento.get('total_solucoes', len(solucoes)),
+                documento.get('tempo_processamento_ms') or 0,
+                int(bool(documento.get('modo_mock'))),
+                int(bool(documento.get('foi_utilizada'))),
+                empacotar(documento.get('resumo') or {}),
+                documento.get('versao_base_conhecimento'),
+                *(empacotar(documento.get(campo)) for campo in CAMPOS_PESADOS_TRIAGEM),
+                data_triagem,
+                data_iso(documento.get('created_at')) or data_triagem,
+                data_iso(documento.get('updated_at')) or data_triagem
+            ))
+
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            conexao.executemany(_INSERIR_TRIAGEM, linhas)
+        return len(linhas)
+
+    def registrar_triagem(
+        self,
+        ticket_numero: str,
+        chamado_texto: str,
+        modulo: Optional[str],
+        resultado_triagem: Dict[str, Any],
+        analise_id_original: Optional[str] = None,
+        usuario: Optional[str] = None,
+        base_conhecimento: Optional[Dict[str, Any]] = None,
+        triagem_id: Optional[str] = None
+    ) -> str:
+        """
+        Registra uma triagem completa
+
+        Args:
+            triagem_id: ID a usar (a réplica grava com o ID gerado pelo Firestore);
+                None gera um novo
+        """
+        base_conhecimento = base_conhecimento or {}
+        triagem_id = triagem_id or uuid.uuid4().hex
+        now = datetime.now(timezone.utc)
+        self.importar([{
+            'id': triagem_id,
+            'ticket_numero': ticket_numero,
+            'analise_id_original': analise_id_original,
+            'chamado_texto': chamado_texto,
+            'modulo_identificado': modulo,
+            'usuario_nome': usuario,
+            'padroes_encontrados': referenciar_padroes(
+                resultado_triagem.get('padroes_encontrados', []), self.configs_referencia(base_conhecimento)
+            ),
+            'analise_ia': resultado_triagem.get('analise_ia', {}),
+            'solucoes_sugeridas': resultado_triagem.get('solucoes_sugeridas', []),
+            'resumo': resultado_triagem.get('resumo', {}),
+            'features': resultado_triagem.get('features', {}),
+            'modo_mock': resultado_triagem.get('modo_mock', False),
+            'tempo_processamento_ms': resultado_triagem.get('tempo_processamento_ms', 0),
+            'foi_utilizada': False,
+            'versao_base_conhecimento': base_conhecimento.get('versao'),
+            'data_triagem': now,
+            'created_at': now,
+            'updated_at': now
+        }])
+        return triagem_id
+
+    def marcar_triagem_como_utilizada(self, triagem_id: str):
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            conexao.execute(
+                "UPDATE triagens SET foi_utilizada = 1, updated_at = ? WHERE id = ?",
+                (data_iso(datetime.now(timezone.utc)), triagem_id)
+            )
+
+    def get_triagem_por_id(self, triagem_id: str) -> Optional[Dict]:
+        linha = self._conexao().execute("SELECT * FROM triagens WHERE id = ?", (triagem_id,)).fetchone()
+        if linha is None:
+            return None
+        return {
+            'ticket_numero': linha['ticket_numero'],
+            'analise_id_original': linha['analise_id_original'],
+            'chamado_texto': desempacotar(linha['chamado_texto']),
+            'modulo_identificado': linha['modulo_identificado'],
+            'usuario_nome': linha['usuario_nome'],
+            'padroes_encontrados': self._expandir(
+                desempacotar(linha['padroes_encontrados']) or [], linha['versao_base_conhecimento']
+            ),
+            'analise_ia': desempacotar(linha['analise_ia']) or {},
+            'solucoes_sugeridas': desempacotar(linha['solucoes_sugeridas']) or [],
+            'resumo': desempacotar(linha['resumo']) or {},
+            'features': desempacotar(linha['features']) or {},
+            'modo_mock': bool(linha['modo_mock']),
+            'tempo_processamento_ms': linha['tempo_processamento_ms'],
+            'total_solucoes': linha['total_solucoes'],
+            'foi_utilizada': bool(linha['foi_utilizada']),
+            'versao_base_conhecimento': linha['versao_base_conhecimento'],
+            'data_triagem': linha['data_triagem'],
+            'created_at': linha['created_at'],
+            'updated_at': linha['updated_at']
+        }
+
+    def get_triagens_por_ticket(
+        self,
+        ticket_numero: str,
+        campos_extras: Iterable[str] = (),
+        limite: Optional[int] = None
+    ) -> List[Dict]:
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        linhas = self._conexao().execute(
+            f"SELECT {self._colunas(campos)} FROM triagens WHERE ticket_numero = ? "
+            "ORDER BY data_triagem DESC, id DESC LIMIT ?",
+            (ticket_numero, limite or -1)
+        )
+        return [self._resumo_triagem(linha, campos) for linha in linhas]
+
+    def get_historico_paginado(
+        self,
+        por_pagina: int = 20,
+        modulo: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Página do histórico, das mais recentes para as mais antigas, por cursor
+        ((data_triagem, id) menor que o da última triagem da página anterior),
+        percorrendo o índice de data (ou de módulo + data) sem OFFSET
+        """
+        condicoes, parametros = [], []
+        if modulo:
+            condicoes.append("modulo_identificado = ?")
+            parametros.append(modulo)
+        if cursor:
+            data_triagem, triagem_id = decodificar_cursor(cursor)
+            condicoes.append("(data_triagem, id) < (?, ?)")
+            parametros += [data_iso(data_triagem), triagem_id]
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+        # Uma linha a mais indica se existe próxima página
+        linhas = self._conexao().execute(
+            f"SELECT id, data_triagem, modulo_identificado, resumo, total_solucoes, foi_utilizada FROM triagens {where} "
+            "ORDER BY data_triagem DESC, id DESC LIMIT ?",
+            (*parametros, por_pagina + 1)
+        ).fetchall()
+        tem_proxima = len(linhas) > por_pagina
+
+        triagens = []
+        for linha in linhas[:por_pagina]:
+            resumo = desempacotar(linha['resumo']) or {}
+            triagens.append({
+                'id': linha['id'],
+                'data_triagem': datetime.fromisoformat(linha['data_triagem']),
+                'modulo': linha['modulo_identificado'],
+                'total_padroes': resumo.get('total_padroes_detectados', 0),
+                'prioridade_geral': resumo.get('prioridade_geral', 'baixa'),
+                'solucoes_geradas': linha['total_solucoes'],
+                'teve_feedback': bool(linha['foi_utilizada'])
+            })
+
+        proximo_cursor = None
+        if tem_proxima and triagens:
+            ultima = triagens[-1]
+            proximo_cursor = codificar_cursor(ultima['data_triagem'], ultima['id'])
+
+        return {'triagens': triagens, 'proximo_cursor': proximo_cursor}
+
+    def get_triagens_historico(self, limite: Optional[int] = None) -> List[Dict]:
+        linhas = self._conexao().execute(
+            "SELECT id, ticket_numero, chamado_texto, modulo_identificado, analise_ia, solucoes_sugeridas, data_triagem "
+            "FROM triagens WHERE modo_mock = 0 AND chamado_texto IS NOT NULL LIMIT ?",
+            (limite or -1,)
+        )
+        triagens = []
+        for linha in linhas:
+            chamado_texto = desempacotar(linha['chamado_texto'])
+            if not chamado_texto:
+                continue
+            triagens.append({
+                'id': linha['id'],
+                'ticket_numero': linha['ticket_numero'],
+                'chamado_texto': chamado_texto,
+                'modulo_identificado': linha['modulo_identificado'],
+                'analise_ia': desempacotar(linha['analise_ia']) or {},
+                'solucoes_sugeridas': desempacotar(linha['solucoes_sugeridas']) or [],
+                'data_triagem': datetime.fromisoformat(linha['data_triagem'])
+            })
+        return triagens
+
+    def get_triagens_recentes(self, limite: int = 10, campos_extras: Iterable[str] = ()) -> List[Dict]:
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        linhas = self._conexao().execute(
+            f"SELECT {self._colunas(campos)} FROM triagens ORDER BY data_triagem DESC, id DESC LIMIT ?",
+            (limite,)
+        )
+        return [self._resumo_triagem(linha, campos) for linha in linhas]
+
+    def get_triagens_por_ids(self, triagem_ids: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, Dict]:
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        linhas = self._conexao().execute(
+            f"SELECT {self._colunas(campos)} FROM triagens WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(dict.fromkeys(triagem_ids))),)
+        )
+        return {linha['id']: self._resumo_triagem(linha, campos) for linha in linhas}
+
+    def get_triagens_por_tickets(self, tickets: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, List[Dict]]:
+        campos = projecao(CAMPOS_RESUMO_TRIAGEM, campos_extras, CAMPOS_PESADOS_TRIAGEM)
+        linhas = self._conexao().execute(
+            f"SELECT {self._colunas(campos)} FROM triagens WHERE ticket_numero IN (SELECT value FROM json_each(?)) "
+            "ORDER BY ticket_numero, data_triagem DESC, id DESC",
+            (json.dumps(list(dict.fromkeys(tickets))),)
+        )
+        por_ticket: Dict[str, List[Dict]] = {}
+        for linha in linhas:
+            por_ticket.setdefault(linha['ticket_numero'], []).append(self._resumo_triagem(linha, campos))
+        return por_ticket
+
+    # ==================== FINGERPRINTS DE ERROS ====================
+
+    def registrar_fingerprint(
+        self,
+        hash_fingerprint: str,
+        chave: str,
+        analise_ia: Dict[str, Any],
+        triagem_id: Optional[str] = None
+    ):
+        now = data_iso(datetime.now(timezone.utc))
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO fingerprints_triagem (hash, chave, analise_ia, triagem_id, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (hash_fingerprint, chave, json.dumps(analise_ia, ensure_ascii=False, default=str), triagem_id, now, now)
+            )
+
+    def get_fingerprints(self) -> List[Dict]:
+        return [
+            {
+                'hash': linha['hash'],
+                'chave': linha['chave'] or '',
+                'analise_ia': json.loads(linha['analise_ia'] or '{}'),
+                'triagem_id': linha['triagem_id']
+            }
+            for linha in self._conexao().execute("SELECT hash, chave, analise_ia, triagem_id FROM fingerprints_triagem")
+        ]
+
+    # ==================== FEEDBACKS DE TRIAGEM ====================
+
+    def registrar_feedback_triagem(
+        self,
+        triagem_id: str,
+        foi_util: bool,
+        nota: Optional[int] = None,
+        comentario: Optional[str] = None,
+        solucao_utilizada: Optional[str] = None,
+        feedback_id: Optional[str] = None
+    ) -> str:
+        feedback_id = feedback_id or uuid.uuid4().hex
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO feedbacks_triagem "
+                "(id, triagem_id, foi_util, nota, comentario, solucao_utilizada, data_feedback) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (feedback_id, triagem_id, int(foi_util), nota, comentario, solucao_utilizada,
+                 data_iso(datetime.now(timezone.utc)))
+            )
+        return feedback_id
+
+    # ==================== AGREGAÇÕES ====================
+
+    def _filtros_sql(self, desde: Optional[datetime], ate: Optional[datetime], filtros: Dict[str, Any]):
+        """WHERE do período [desde, ate) e dos filtros de igualdade (valores None são ignorados)"""
+        desconhecidos = [nome for nome in filtros if nome not in NOMES_FILTROS_AGREGACAO]
+        if desconhecidos:
+            raise ValueError(f"Filtros de agregação não suportados: {desconhecidos}")
+
+        condicoes, parametros = [], []
+        for nome, valor in filtros.items():
+            if valor is not None:
+                condicoes.append(f"{COLUNAS_FILTROS[nome]} = ?")
+                parametros.append(int(valor) if isinstance(valor, bool) else valor)
+        if desde:
+            condicoes.append("data_triagem >= ?")
+            parametros.append(data_iso(desde))
+        if ate:
+            condicoes.append("data_triagem < ?")
+            parametros.append(data_iso(ate))
+        return (f"WHERE {' AND '.join(condicoes)}" if condicoes else ""), parametros
+
+    def contar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        **filtros: Any
+    ) -> int:
+        where, parametros = self._filtros_sql(desde, ate, filtros)
+        return self._conexao().execute(f"SELECT COUNT(*) FROM triagens {where}", parametros).fetchone()[0]
+
+    def agregar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        campo: str = 'tempo_processamento_ms',
+        **filtros: Any
+    ) -> Dict[str, Any]:
+        if campo not in CAMPOS_NUMERICOS:
+            raise ValueError(f"Campo de agregação não suportado: {campo} (suportados: {list(CAMPOS_NUMERICOS)})")
+        where, parametros = self._filtros_sql(desde, ate, filtros)
+        total, soma, media = self._conexao().execute(
+            f"SELECT COUNT(*), TOTAL({campo}), AVG({campo}) FROM triagens {where}", parametros
+        ).fetchone()
+        return {'total': total, 'soma': soma, 'media': media or 0}
+
+    def get_estatisticas_triagem(self, dias: int = 7) -> Dict[str, Any]:
+        desde = data_iso(datetime.now(timezone.utc) - timedelta(days=dias))
+        conexao = self._conexao()
+        total_triagens, triagens_utilizadas, tempo_medio = conexao.execute(
+            "SELECT COUNT(*), TOTAL(foi_utilizada), AVG(tempo_processamento_ms) FROM triagens WHERE data_triagem >= ?",
+            (desde,)
+        ).fetchone()
+        modulos = [
+            {'modulo': linha['modulo_identificado'], 'total': linha['total']}
+            for linha in conexao.execute(
+                "SELECT modulo_identificado, COUNT(*) AS total FROM triagens "
+                "WHERE data_triagem >= ? AND TRIM(COALESCE(modulo_identificado, '')) <> '' "
+                "GROUP BY modulo_identificado ORDER BY total DESC LIMIT 5",
+                (desde,)
+            )
+        ]
+        triagens_utilizadas = int(triagens_utilizadas)
+        taxa_utilizacao = (triagens_utilizadas / total_triagens * 100) if total_triagens > 0 else 0
+
+        return {
+            'total_triagens': total_triagens,
+            'triagens_utilizadas': triagens_utilizadas,
+            'taxa_utilizacao': round(taxa_utilizacao, 1),
+            'modulos_mais_triados': modulos,
+            'tempo_medio_ms': round(tempo_medio or 0, 2),
+            'periodo_dias': dias
+        }
+
+    def get_serie_diaria(self, dias: int, categoria: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Série diária de um único GROUP BY do período (dia, tipo, prioridade, categoria) no índice de data"""
+        hoje, desde = periodo_serie_diaria(dias)
+        filtro_categoria, parametros = "", [data_iso(desde)]
+        if categoria:
+            filtro_categoria = "AND categoria = ?"
+            parametros.append(categoria)
+        linhas = self._conexao().execute(
+            "SELECT substr(data_triagem, 1, 10), tipo_problema, prioridade, categoria, "
+            "COUNT(*), SUM(total_solucoes > 0), TOTAL(tempo_processamento_ms) "
+            f"FROM triagens WHERE data_triagem >= ? {filtro_categoria} "
+            "GROUP BY 1, 2, 3, 4",
+            parametros
+        )
+        return serie_diaria(linhas, dias, hoje)
+
+    # ==================== VERSÕES DA BASE DE CONHECIMENTO ====================
+
+    def get_configs_base(self, versao: str) -> Optional[Dict]:
+        linha = self._conexao().execute("SELECT configs FROM bases_conhecimento WHERE versao = ?", (versao,)).fetchone()
+        return desempacotar_configs(linha['configs']) if linha else None
+
+    def registrar_configs_base(self, versao: str, configs: Dict):
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO bases_conhecimento (versao, configs, created_at) VALUES (?, ?, ?)",
+                (versao, empacotar_configs(configs), data_iso(datetime.now(timezone.utc)))
+            )
+
+    # ==================== SINCRONIZAÇÃO ====================
+
+    def get_marca_sincronizacao(self, chave: str) -> Optional[datetime]:
+        """Última data (updated_at) importada do Firestore para `chave`"""
+        linha = self._conexao().execute("SELECT valor FROM sincronizacao WHERE chave = ?", (chave,)).fetchone()
+        return datetime.fromisoformat(linha['valor']) if linha and linha['valor'] else None
+
+    def registrar_marca_sincronizacao(self, chave: str, valor: datetime):
+        conexao = self._conexao()
+        with self._lock_escrita, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO sincronizacao (chave, valor) VALUES (?, ?)", (chave, data_iso(valor))
+            )
+
+
+class ReplicaSQLite(RepositorioTriagens):
+    """
+    SQLite como réplica de leitura na frente do Firestore
+
+    Escritas vão primeiro ao Firestore (fonte da verdade) e são repetidas no
+    SQLite com o mesmo ID; leituras e agregações são respondidas pelo SQLite,
+    sem ida à rede. Triagens gravadas por outras instâncias chegam pela
+    sincronização incremental (triagens e fingerprints com updated_at
+    posterior à última marca de cada coleção), feita na inicialização e depois a cada `intervalo_sincronizacao`
+    segundos numa thread em segundo plano (iniciar_sincronizacao), nunca
+    na thread de uma leitura.
+    """
+    nome = "replica"
+
+    def __init__(self, primario: RepositorioTriagens, replica: SQLiteDatabase, intervalo_sincronizacao: float = 60):
+        # primario precisa de exportar_triagens e exportar_fingerprints (FirebaseDatabase)
+        self.primario = primario
+        self.replica = replica
+        self.intervalo_sincronizacao = intervalo_sincronizacao
+        self._lock_sincronizacao = threading.Lock()
+        self._parar = threading.Event()
+        self._thread_sincronizacao: Optional[threading.Thread] = None
+
+    def is_configured(self) -> bool:
+        return self.primario.is_configured()
+
+    def sincronizar(self, tamanho_lote: int = 500, completa: bool = False) -> int:
+        """
+        Importa as triagens alteradas no Firestore desde a última marca e os fingerprints
+
+        Args:
+            tamanho_lote: Triagens por transação no SQLite
+            completa: Ignora a marca e reimporta todas as triagens
+
+        Returns:
+            Quantidade de triagens importadas
+        """
+        with self._lock_sincronizacao:
+            return self._sincronizar(tamanho_lote, completa)
+
+    def _desde(self, chave: str, completa: bool) -> Optional[datetime]:
+        """
+        Início da leitura incremental: a marca menos JANELA_SOBREPOSICAO_SINCRONIZACAO.
+        updated_at vem do relógio de cada instância, então uma escrita com data um
+        pouco anterior à marca pode ficar visível depois dela; reimportar o fim da
+        janela é inofensivo (INSERT OR REPLACE com o mesmo ID)
+        """
+        marca = None if completa else self.replica.get_marca_sincronizacao(chave)
+        return marca - JANELA_SOBREPOSICAO_SINCRONIZACAO if marca else None
+
+    def _sincronizar(self, tamanho_lote: int, completa: bool) -> int:
+        inicio = time.perf_counter()
+        total, lote, marca = 0, [], None
+        for documento in self.primario.exportar_triagens(self._desde('triagens', completa)):
+            lote.append(documento)
+            atualizado = documento.get('updated_at') or documento.get('data_triagem')
+            if atualizado and (marca is None or atualizado > marca):
+                marca = atualizado
+            if len(lote) >= tamanho_lote:
+                total += self.replica.importar(lote)
+                lote = []
+        if lote:
+            total += self.replica.importar(lote)
+        self._avancar_marca('triagens', marca)
+
+        marca = None
+        for fingerprint in self.primario.exportar_fingerprints(self._desde('fingerprints', completa)):
+            self.replica.registrar_fingerprint(
+                fingerprint['hash'], fingerprint['chave'], fingerprint['analise_ia'], fingerprint['triagem_id']
+            )
+            atualizado = fingerprint.get('updated_at')
+            if atualizado and (marca is None or atualizado > marca):
+                marca = atualizado
+        self._avancar_marca('fingerprints', marca)
+
+        print(f"✅ Réplica SQLite sincronizada: {total} triagens em {time.perf_counter() - inicio:.1f}s "
+              f"({len(self.replica)} no total)")
+        return total
+
+    def _avancar_marca(self, chave: str, marca: Optional[datetime]):
+        # Com a janela de sobreposição a leitura pode só rever documentos já importados
+        anterior = self.replica.get_marca_sincronizacao(chave)
+        if marca is not None and (anterior is None or marca > anterior):
+            self.replica.registrar_marca_sincronizacao(chave, marca)
+
+    def iniciar_sincronizacao(self):
+        """Inicia a thread que sincroniza a réplica a cada intervalo_sincronizacao segundos"""
+        if self._thread_sincronizacao is not None or self.intervalo_sincronizacao == float("inf"):
+            return
+        self._parar.clear()
+        self._thread_sincronizacao = threading.Thread(
+            target=self._sincronizar_periodicamente, name="sincronizacao-replica", daemon=True
+        )
+        self._thread_sincronizacao.start()
+
+    def parar_sincronizacao(self, timeout: Optional[float] = None):
+        """Para a thread de sincronização (a sincronização em andamento termina antes)"""
+        self._parar.set()
+        if self._thread_sincronizacao is not None:
+            self._thread_sincronizacao.join(timeout)
+            self._thread_sincronizacao = None
+
+    def _sincronizar_periodicamente(self):
+        while not self._parar.wait(self.intervalo_sincronizacao):
+            try:
+                self.sincronizar()
+            except Exception as e:
+                print(f"⚠️  Erro ao sincronizar a réplica SQLite: {e}")
+
+    def _espelhar(self, operacao: str, *args, **kwargs):
+        """Repete a escrita no SQLite; falha na réplica não desfaz a escrita no Firestore"""
+        try:
+            getattr(self.replica, operacao)(*args, **kwargs)
+        except sqlite3.Error as e:
+            print(f"⚠️  Erro ao espelhar {operacao} na réplica SQLite: {e}")
+
+    # ==================== ESCRITAS ====================
+
+    def registrar_triagem(
+        self,
+        ticket_numero: str,
+        chamado_texto: str,
+        modulo: Optional[str],
+        resultado_triagem: Dict[str, Any],
+        analise_id_original: Optional[str] = None,
+        usuario: Optional[str] = None,
+        base_conhecimento: Optional[Dict[str, Any]] = None
+    ) -> str:
+        triagem_id = self.primario.registrar_triagem(
+            ticket_numero, chamado_texto, modulo, resultado_triagem, analise_id_original, usuario, base_conhecimento
+        )
+        self._espelhar(
+            'registrar_triagem', ticket_numero, chamado_texto, modulo, resultado_triagem,
+            analise_id_original, usuario, base_conhecimento, triagem_id=triagem_id
+        )
+        return triagem_id
+
+    def marcar_triagem_como_utilizada(self, triagem_id: str):
+        self.primario.marcar_triagem_como_utilizada(triagem_id)
+        self._espelhar('marcar_triagem_como_utilizada', triagem_id)
+
+    def registrar_fingerprint(
+        self,
+        hash_fingerprint: str,
+        chave: str,
+        analise_ia: Dict[str, Any],
+        triagem_id: Optional[str] = None
+    ):
+        self.primario.registrar_fingerprint(hash_fingerprint, chave, analise_ia, triagem_id)
+        self._espelhar('registrar_fingerprint', hash_fingerprint, chave, analise_ia, triagem_id)
+
+    def registrar_feedback_triagem(
+        self,
+        triagem_id: str,
+        foi_util: bool,
+        nota: Optional[int] = None,
+        comentario: Optional[str] = None,
+        solucao_utilizada: Optional[str] = None
+    ) -> str:
+        feedback_id = self.primario.registrar_feedback_triagem(triagem_id, foi_util, nota, comentario, solucao_utilizada)
+        self._espelhar(
+            'registrar_feedback_triagem', triagem_id, foi_util, nota, comentario, solucao_utilizada, feedback_id=feedback_id
+        )
+        return feedback_id
+
+    # ==================== LEITURAS ====================
+
+    def get_triagem_por_id(self, triagem_id: str) -> Optional[Dict]:
+        # Triagem ainda não sincronizada (gravada por outra instância): busca no Firestore
+        return self.replica.get_triagem_por_id(triagem_id) or self.primario.get_triagem_por_id(triagem_id)
+
+    def get_triagens_por_ticket(
+        self,
+        ticket_numero: str,
+        campos_extras: Iterable[str] = (),
+        limite: Optional[int] = None
+    ) -> List[Dict]:
+        return self.replica.get_triagens_por_ticket(ticket_numero, campos_extras, limite)
+
+    def get_historico_paginado(
+        self,
+        por_pagina: int = 20,
+        modulo: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return self.replica.get_historico_paginado(por_pagina, modulo, cursor)
+
+    def get_triagens_historico(self, limite: Optional[int] = None) -> List[Dict]:
+        return self.replica.get_triagens_historico(limite)
+
+    def get_triagens_recentes(self, limite: int = 10, campos_extras: Iterable[str] = ()) -> List[Dict]:
+        return self.replica.get_triagens_recentes(limite, campos_extras)
+
+    def get_triagens_por_ids(self, triagem_ids: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, Dict]:
+        return self.replica.get_triagens_por_ids(triagem_ids, campos_extras)
+
+    def get_triagens_por_tickets(self, tickets: Iterable[str], campos_extras: Iterable[str] = ()) -> Dict[str, List[Dict]]:
+        return self.replica.get_triagens_por_tickets(tickets, campos_extras)
+
+    def get_fingerprints(self) -> List[Dict]:
+        return self.replica.get_fingerprints()
+
+    def contar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        **filtros: Any
+    ) -> int:
+        return self.replica.contar_triagens(desde, ate, **filtros)
+
+    def agregar_triagens(
+        self,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        campo: str = 'tempo_processamento_ms',
+        **filtros: Any
+    ) -> Dict[str, Any]:
+        return self.replica.agregar_triagens(desde, ate, campo, **filtros)
+
+    def get_estatisticas_triagem(self, dias: int = 7) -> Dict[str, Any]:
+        return self.replica.get_estatisticas_triagem(dias)
+
+    def get_serie_diaria(self, dias: int, categoria: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.replica.get_serie_diaria(dias, categoria)
+
+    # ==================== VERSÕES DA BASE DE CONHECIMENTO ====================
+
+    def get_configs_base(self, versao: str) -> Optional[Dict]:
+        return self.primario.get_configs_base(versao)
+
+    def registrar_configs_base(self, versao: str, configs: Dict):
+        self.primario.registrar_configs_base(versao, configs)
+        self._espelhar('registrar_configs_base', versao, configs)
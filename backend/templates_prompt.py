@@ -0,0 +1,98 @@
+"""
+Templates de prompt por módulo e por tipo de padrão detectado
+Os textos ficam em `prompts_templates` na base de conhecimento (ao lado de
+`solucoes_templates`) e são compilados uma única vez para cada combinação
+módulo + tipo. O template escolhido abre o sufixo dinâmico do prompt, logo
+após o prefixo estático, e as métricas de tamanho e latência são acumuladas
+por template para comparação.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from compactacao_chamado import estimar_tokens
+from normalizacao_texto import normalizar
+
+TEMPLATE_PADRAO = "padrao"
+
+
+@dataclass
+class TemplatePrompt:
+    id: str
+    texto: str
+    tokens: int
+
+
+class CacheTemplatesPrompt:
+    def __init__(self, base: Dict[str, Any]):
+        config = base.get("prompts_templates", {})
+        self._padrao: str = config.get("padrao", "")
+        self._por_tipo: Dict[str, str] = dict(config.get("por_tipo", {}))
+        # chave normalizada -> (nome original, texto)
+        self._por_modulo: Dict[str, Tuple[str, str]] = {
+            normalizar(modulo): (modulo, texto) for modulo, texto in config.get("por_modulo", {}).items()
+        }
+
+        self._compilados: Dict[Tuple[str, str], TemplatePrompt] = {}
+        for modulo in ["", *self._por_modulo]:
+            for tipo in ["", *self._por_tipo]:
+                self._compilados[(modulo, tipo)] = self._compilar(modulo, tipo)
+
+    def __len__(self) -> int:
+        return len(self._compilados)
+
+    def _compilar(self, modulo: str, tipo: str) -> TemplatePrompt:
+        partes, ids = [], []
+        if modulo:
+            nome, texto = self._por_modulo[modulo]
+            partes.append(texto)
+            ids.append(f"modulo:{nome}")
+        if tipo:
+            partes.append(self._por_tipo[tipo])
+            ids.append(f"tipo:{tipo}")
+        if not partes:
+            partes.append(self._padrao)
+            ids.append(TEMPLATE_PADRAO)
+
+        texto = "=== FOCO DA TRIAGEM ===\n" + "\n\n".join(p.strip() for p in partes if p.strip()) + "\n"
+        return TemplatePrompt(id="+".join(ids), texto=texto, tokens=estimar_tokens(texto))
+
+    def selecionar(self, modulo: Optional[str], padroes: List[Dict[str, Any]]) -> TemplatePrompt:
+        """
+        Template do módulo combinado com o tipo do padrão mais relevante
+
+        Os padrões chegam ordenados por relevância; o primeiro com template
+        de tipo define o foco.
+        """
+        chave_modulo = normalizar(modulo or "")
+        if chave_modulo not in self._por_modulo:
+            chave_modulo = ""
+        tipo = next((p["tipo"] for p in padroes if p.get("tipo") in self._por_tipo), "")
+        return self._compilados[(chave_modulo, tipo)]
+
+
+class MetricasTemplates:
+    """Tamanho do prompt e latência da IA acumulados por template"""
+
+    def __init__(self):
+        self._metricas: Dict[str, Dict[str, float]] = {}
+
+    def registrar(self, template_id: str, tokens_prompt: int, latencia_ms: float):
+        metrica = self._metricas.setdefault(
+            template_id, {"chamadas": 0, "tokens": 0, "latencia_ms": 0.0, "latencia_max_ms": 0.0}
+        )
+        metrica["chamadas"] += 1
+        metrica["tokens"] += tokens_prompt
+        metrica["latencia_ms"] += latencia_ms
+        metrica["latencia_max_ms"] = max(metrica["latencia_max_ms"], latencia_ms)
+
+    def resumo(self) -> Dict[str, Dict[str, float]]:
+        return {
+            template_id: {
+                "chamadas": metrica["chamadas"],
+                "tokens_medios_prompt": round(metrica["tokens"] / metrica["chamadas"], 1),
+                "latencia_media_ms": round(metrica["latencia_ms"] / metrica["chamadas"], 1),
+                "latencia_max_ms": round(metrica["latencia_max_ms"], 1)
+            }
+            for template_id, metrica in sorted(self._metricas.items())
+        }
@@ -0,0 +1,29 @@
+"""
+Configuração dos testes do backend
+Os módulos do backend são planos (sem pacote): o diretório backend/ entra no
+sys.path para que os testes importem como o serviço importa.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def criar_servico(tmp_path, monkeypatch):
+    """Cria TriagemService com SQLite, índices locais e IA mock em tmp_path"""
+    monkeypatch.setenv("TRIAGEM_ARMAZENAMENTO", "sqlite")
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "triagem.db"))
+    monkeypatch.setenv("TRIAGEM_BACKEND_IA", "mock")
+    monkeypatch.setenv("TRIAGEM_MODELO_CLASSIFICADOR", str(tmp_path / "modelo_classificador.npz"))
+    monkeypatch.setenv("TRIAGEM_DIRETORIO_SIMILARIDADE", str(tmp_path / "indice_similaridade"))
+    monkeypatch.setenv("TRIAGEM_BANCO_BUSCA", str(tmp_path / "busca_triagens.db"))
+    monkeypatch.setenv("TRIAGEM_ARQUIVO_DUPLICATAS", str(tmp_path / "duplicatas_minhash.jsonl"))
+
+    def criar():
+        from triagem_service import TriagemService
+        return TriagemService()
+    return criar
@@ -0,0 +1,82 @@
+import copy
+
+from armazenamento_triagens import compactar_documento, configs_padroes, decodificar_documento
+from sqlite_db import SQLiteDatabase, desempacotar
+
+
+def base(versao, prioridade="alta"):
+    return {
+        "versao": versao,
+        "padroes_banco": {
+            "deadlock": {"palavras_chave": ["deadlock"], "categoria": "Concorrência", "prioridade": prioridade}
+        },
+        "padroes_sistema": {
+            "timeout": {"palavras_chave": ["timeout"], "categoria": "Desempenho", "prioridade": "media"}
+        }
+    }
+
+
+def padroes_detectados(base_conhecimento):
+    return [
+        {"tipo": "banco", "padrao_id": "deadlock", "palavra_chave": "deadlock", "confianca": 0.9,
+         "config": copy.deepcopy(base_conhecimento["padroes_banco"]["deadlock"])},
+        # Config próprio (diferente do da base) fica inteiro no documento
+        {"tipo": "sistema", "padrao_id": "timeout", "palavra_chave": "timeout", "confianca": 0.6,
+         "config": {"categoria": "Rede", "prioridade": "baixa"}}
+    ]
+
+
+def test_documento_compacto_volta_completo():
+    base_v1 = base("1.0")
+    documento = {
+        "chamado_texto": "Transaction was deadlocked on lock resources " * 20,
+        "padroes_encontrados": padroes_detectados(base_v1),
+        "analise_ia": {"diagnostico": "deadlock na geração de boletos " * 20, "tipo_problema": "banco"}
+    }
+    configs = configs_padroes(base_v1)
+
+    compacto = compactar_documento(documento, configs, "1.0")
+    assert isinstance(compacto["chamado_texto"], bytes)
+    assert "config" not in compacto["padroes_encontrados"][0]
+    assert compacto["padroes_encontrados"][1]["config"] == {"categoria": "Rede", "prioridade": "baixa"}
+
+    lido = decodificar_documento(compacto, {"1.0": configs}.get)
+    assert lido["padroes_encontrados"] == documento["padroes_encontrados"]
+    assert lido["chamado_texto"] == documento["chamado_texto"]
+    assert lido["analise_ia"] == documento["analise_ia"]
+
+
+def test_configs_vem_da_versao_gravada_no_documento(tmp_path):
+    banco = SQLiteDatabase(str(tmp_path / "triagem.db"))
+    base_v1 = base("1.0", prioridade="alta")
+    triagem_id = banco.registrar_triagem(
+        "T1", "deadlock", "FINANCEIRO", {"padroes_encontrados": padroes_detectados(base_v1)},
+        base_conhecimento=base_v1
+    )
+
+    # Nova versão da base com outro config para o mesmo padrão
+    base_v2 = base("2.0", prioridade="critica")
+    banco.registrar_triagem(
+        "T2", "deadlock", "FINANCEIRO", {"padroes_encontrados": padroes_detectados(base_v2)},
+        base_conhecimento=base_v2
+    )
+
+    padroes = SQLiteDatabase(str(tmp_path / "triagem.db")).get_triagem_por_id(triagem_id)["padroes_encontrados"]
+    assert padroes == padroes_detectados(base_v1)
+    extras = banco.get_triagens_por_ticket("T1", campos_extras=["padroes_encontrados"])
+    assert extras[0]["padroes_encontrados"][0]["config"]["prioridade"] == "alta"
+
+
+def test_base_alterada_sem_mudar_versao_grava_config_inteiro(tmp_path):
+    banco = SQLiteDatabase(str(tmp_path / "triagem.db"))
+    assert banco.configs_referencia(base("1.0", prioridade="alta")) == configs_padroes(base("1.0"))
+
+    alterada = base("1.0", prioridade="critica")
+    assert SQLiteDatabase(str(tmp_path / "triagem.db")).configs_referencia(alterada) == {}
+
+    triagem_id = banco.registrar_triagem(
+        "T1", "deadlock", None, {"padroes_encontrados": padroes_detectados(alterada)}, base_conhecimento=alterada
+    )
+    linha = banco._conexao().execute("SELECT padroes_encontrados FROM triagens WHERE id = ?", (triagem_id,)).fetchone()
+    assert desempacotar(linha[0])[0]["config"]["prioridade"] == "critica"
+    assert banco.get_triagem_por_id(triagem_id)["padroes_encontrados"] == padroes_detectados(alterada)
@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from backends_ia import (
+    ANALISE_MOCK,
+    BackendHTTP,
+    BackendIA,
+    BackendMock,
+    ErroBackendIA,
+    GravadorRespostas,
+    criar_backend_ia,
+)
+from prompt_triagem import hash_prompt
+from servidor_ia_local import EstadoServidor, ManipuladorIA, criar_latencia
+
+LOTE = "Analise os chamados\n--- CHAMADO ticket_id=a1 ---\nboleto\n--- CHAMADO ticket_id=b2 ---\nnota\n"
+
+
+def argumentos(**valores):
+    padrao = {
+        "gravacoes": None, "latencia": "fixa:0", "taxa_erro": 0.0, "status_erro": 503,
+        "taxa_malformada": 0.0, "tokens_por_segundo": 0.0, "semente": 42
+    }
+    return argparse.Namespace(**{**padrao, **valores})
+
+
+@pytest.fixture
+def servidor_local():
+    """Sobe o servidor_ia_local numa porta livre; devolve a função que cria o estado e a URL"""
+    servidores = []
+
+    def subir(**valores):
+        estado = EstadoServidor(argumentos(**valores))
+        manipulador = type("Manipulador", (ManipuladorIA,), {"estado": estado})
+        servidor = ThreadingHTTPServer(("127.0.0.1", 0), manipulador)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        servidores.append(servidor)
+        return estado, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    yield subir
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_backend_ia_e_abstrato():
+    with pytest.raises(TypeError):
+        BackendIA("prefixo")
+
+    class SemGerar(BackendIA):
+        nome = "incompleto"
+
+    with pytest.raises(TypeError):
+        SemGerar("prefixo")
+
+
+def test_backend_escolhido_pelo_ambiente(monkeypatch, tmp_path):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("TRIAGEM_BACKEND_IA", raising=False)
+    monkeypatch.setenv("TRIAGEM_GRAVAR_RESPOSTAS", str(tmp_path / "respostas.jsonl"))
+    # Sem chave do Gemini o padrão é o mock, que nunca é gravado
+    assert isinstance(criar_backend_ia("prefixo"), BackendMock)
+
+    monkeypatch.setenv("TRIAGEM_BACKEND_IA", "http")
+    monkeypatch.setenv("TRIAGEM_BACKEND_URL", "http://ia.local:9000/")
+    backend = criar_backend_ia("prefixo")
+    assert isinstance(backend, GravadorRespostas)
+    assert isinstance(backend.backend, BackendHTTP)
+    assert backend.backend.url == "http://ia.local:9000"
+    assert backend.nome == "http"
+
+    monkeypatch.setenv("TRIAGEM_BACKEND_IA", "gemini")
+    monkeypatch.delenv("TRIAGEM_GRAVAR_RESPOSTAS")
+    assert isinstance(criar_backend_ia("prefixo"), BackendMock)
+
+
+def test_mock_responde_lote_na_ordem_dos_ids():
+    backend = BackendMock("prefixo")
+    assert json.loads(backend.gerar("um chamado")) == ANALISE_MOCK
+    assert [a["ticket_id"] for a in json.loads(backend.gerar(LOTE))] == ["a1", "b2"]
+    assert backend.montar_conteudo("sufixo") == ["prefixo", "sufixo"]
+
+
+def test_backend_http_com_o_servidor_local(servidor_local):
+    estado, url = servidor_local()
+    backend = BackendHTTP("prefixo estático", url)
+
+    assert json.loads(backend.gerar("um chamado")) == ANALISE_MOCK
+    assert "".join(backend.gerar_stream("um chamado")) == backend.gerar("um chamado")
+    respostas = asyncio.run(backend.gerar_lote(["um chamado", LOTE]))
+    assert [a["ticket_id"] for a in json.loads(respostas[1])] == ["a1", "b2"]
+
+    assert estado.estatisticas["requisicoes"] == 5
+    assert estado.prefixos == {hash_prompt("prefixo estático")}
+
+
+def test_erros_do_servidor_viram_erro_do_backend(servidor_local):
+    _, url = servidor_local(taxa_erro=1.0, status_erro=429)
+    backend = BackendHTTP("prefixo", url)
+
+    with pytest.raises(ErroBackendIA, match="HTTP 429"):
+        backend.gerar("um chamado")
+    with pytest.raises(ErroBackendIA, match="HTTP 429"):
+        list(backend.gerar_stream("um chamado"))
+    with pytest.raises(ErroBackendIA):
+        BackendHTTP("prefixo", "http://127.0.0.1:9", timeout=1).gerar("um chamado")
+
+
+def test_respostas_gravadas_sao_reproduzidas(servidor_local, tmp_path):
+    caminho = tmp_path / "respostas.jsonl"
+    _, url = servidor_local()
+    gravador = GravadorRespostas(BackendHTTP("prefixo", url), str(caminho))
+    gravador.gerar("chamado 1")
+    list(gravador.gerar_stream(LOTE))
+    assert len(caminho.read_text(encoding="utf-8").splitlines()) == 2
+
+    analise = {**ANALISE_MOCK, "diagnostico": "gravado"}
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"chave": "outra", "texto": json.dumps(analise)}) + "\n")
+
+    estado, url = servidor_local(gravacoes=str(caminho))
+    backend = BackendHTTP("prefixo", url)
+    assert json.loads(backend.gerar("chamado 1")) == ANALISE_MOCK
+    assert estado.estatisticas["gravadas"] == 1
+    # Lote não gravado é montado com as análises gravadas
+    lote = json.loads(backend.gerar(LOTE.replace("b2", "c3")))
+    assert [a["ticket_id"] for a in lote] == ["a1", "c3"]
+    assert {a["diagnostico"] for a in lote} <= {"gravado", ANALISE_MOCK["diagnostico"]}
+
+
+def test_falhas_simuladas_sao_deterministicas(servidor_local):
+    conteudos = [f"chamado {i}" for i in range(30)]
+    resultados = []
+    for _ in range(2):
+        estado, url = servidor_local(taxa_erro=0.3, taxa_malformada=0.3)
+        backend = BackendHTTP("prefixo", url)
+        rodada = []
+        for conteudo in conteudos:
+            try:
+                rodada.append(backend.gerar(conteudo))
+            except ErroBackendIA:
+                rodada.append(None)
+        resultados.append(rodada)
+
+    assert resultados[0] == resultados[1]
+    assert 0 < estado.estatisticas["erros"] < len(conteudos)
+    assert estado.estatisticas["malformadas"] > 0
+
+
+def test_distribuicoes_de_latencia():
+    assert criar_latencia("fixa:250")(None) == 0.25
+    uniforme = criar_latencia("uniforme:100,200")
+    assert all(0.1 <= uniforme(random.Random(i)) <= 0.2 for i in range(20))
+    with pytest.raises(ValueError):
+        criar_latencia("normal:100")
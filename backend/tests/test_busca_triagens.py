@@ -0,0 +1,101 @@
+from busca_triagens import BuscaTriagens, montar_consulta_fts
+
+
+def triagem(triagem_id, chamado_texto, diagnostico="", modulo="FINANCEIRO"):
+    return {
+        "triagem_id": triagem_id,
+        "ticket_numero": triagem_id.upper(),
+        "modulo": modulo,
+        "chamado_texto": chamado_texto,
+        "analise_ia": {"diagnostico": diagnostico, "solucao_sugerida": "verificar"},
+        "data_triagem": "2024-05-01T10:00:00+00:00"
+    }
+
+
+def test_consulta_fts_escapa_operadores():
+    assert montar_consulta_fts('boleto OR "x" título*') == '"boleto" "or" "x" "titulo"'
+    assert montar_consulta_fts("!!") is None
+
+
+def test_termo_raro_pesa_mais_que_recencia(tmp_path):
+    busca = BuscaTriagens(str(tmp_path / "busca.db"))
+    busca.indexar([triagem("antiga", "erro deadlock ao gerar boleto")])
+    # Muitas triagens recentes só com o termo comum
+    busca.indexar([triagem(f"r{i}", f"erro ao gerar boleto numero {i}") for i in range(300)])
+
+    resultados = busca.buscar("erro deadlock")
+    assert [r["triagem_id"] for r in resultados] == ["antiga"]
+
+    resultados = busca.buscar("boleto deadlock erro", limite=5)
+    assert resultados[0]["triagem_id"] == "antiga"
+    assert resultados[0]["trecho_chamado"] == "[erro] [deadlock] ao gerar [boleto]"
+
+
+def test_ordena_por_relevancia_em_todas_as_ocorrencias(tmp_path):
+    busca = BuscaTriagens(str(tmp_path / "busca.db"))
+    busca.indexar([triagem("relevante", "boleto", diagnostico="boleto duplicado no boleto do aluno")])
+    busca.indexar([triagem(f"r{i}", f"o boleto do aluno {i} atrasou") for i in range(30)])
+    busca.indexar([triagem(f"f{i}", f"frequência da turma {i} não aparece") for i in range(300)])
+
+    resultados = busca.buscar("boleto", limite=3)
+    assert resultados[0]["triagem_id"] == "relevante"
+    assert resultados[0]["pontuacao"] > resultados[1]["pontuacao"] > 0
+    # Empate de relevância: a mais recente primeiro; offset pagina na mesma ordem
+    assert [r["triagem_id"] for r in resultados[1:]] == ["r29", "r28"]
+    assert [r["triagem_id"] for r in busca.buscar("boleto", limite=2, offset=2)] == ["r28", "r27"]
+
+
+def test_filtro_de_modulo_e_reindexacao(tmp_path):
+    busca = BuscaTriagens(str(tmp_path / "busca.db"))
+    busca.indexar([triagem("a", "nota não aparece", modulo="PEDAGÓGICO"), triagem("b", "nota fiscal não aparece")])
+    assert [r["triagem_id"] for r in busca.buscar("nota", modulo="pedagogico")] == ["a"]
+
+    busca.indexar([triagem("a", "frequência não aparece", modulo="PEDAGÓGICO")])
+    assert len(busca) == 2
+    assert [r["triagem_id"] for r in busca.buscar("nota")] == ["b"]
+
+
+def test_ranking_limitado_as_ocorrencias_mais_recentes(tmp_path, monkeypatch):
+    monkeypatch.setattr("busca_triagens.JANELA_RANKING", 10)
+    busca = BuscaTriagens(str(tmp_path / "busca.db"))
+    busca.indexar([triagem("antiga", "boleto", diagnostico="boleto duplicado no boleto do aluno")])
+    busca.indexar([triagem(f"r{i}", f"o boleto do aluno {i} atrasou", modulo="CADASTROS" if i % 2 else "FINANCEIRO")
+                   for i in range(30)])
+
+    # A mais relevante ficou fora das 10 ocorrências mais recentes
+    assert [r["triagem_id"] for r in busca.buscar("boleto", limite=3)] == ["r29", "r28", "r27"]
+    assert [r["triagem_id"] for r in busca.buscar("boleto", modulo="FINANCEIRO", limite=3)] == ["r28", "r26", "r24"]
+    # A janela cresce com a paginação: pedindo todas, a mais relevante volta ao topo
+    assert busca.buscar("boleto", limite=31)[0]["triagem_id"] == "antiga"
+    assert [r["triagem_id"] for r in busca.buscar("boleto", limite=5, offset=28)] == ["r2", "r1", "r0"]
+
+
+def test_tabela_das_recentes(tmp_path, monkeypatch):
+    monkeypatch.setattr("busca_triagens.TAMANHO_RECENTES", 20)
+    monkeypatch.setattr("busca_triagens.JANELA_RANKING", 5)
+    busca = BuscaTriagens(str(tmp_path / "busca.db"))
+    busca.indexar([triagem("antiga", "deadlock ao gerar boleto")])
+    busca.indexar([triagem(f"r{i}", f"boleto do aluno {i}", modulo="CADASTROS" if i % 2 else "FINANCEIRO")
+                   for i in range(40)])
+    contar = "SELECT COUNT(*) FROM triagens_fts_recentes"
+    assert busca._conexao().execute(contar).fetchone()[0] == 20
+
+    # Termo frequente: ranqueado entre as recentes, com o filtro de módulo
+    assert [r["triagem_id"] for r in busca.buscar("boleto", limite=2)] == ["r39", "r38"]
+    resultados = busca.buscar("boleto aluno", modulo="financeiro", limite=3)
+    assert [r["triagem_id"] for r in resultados] == ["r38", "r36", "r34"]
+    assert resultados[0]["trecho_chamado"] == "[boleto] do [aluno] 38"
+    # Termo raro fora das recentes vem da tabela completa
+    assert [r["triagem_id"] for r in busca.buscar("deadlock")] == ["antiga"]
+
+    # Reindexar uma triagem antiga não a leva para as recentes
+    busca.indexar([triagem("antiga", "deadlock ao gerar boleto de novo")])
+    assert busca._conexao().execute(contar).fetchone()[0] == 20
+    assert busca.buscar("deadlock novo")[0]["triagem_id"] == "antiga"
+
+    # Banco criado antes da tabela das recentes
+    busca._conexao().execute("DROP TABLE triagens_fts_recentes")
+    busca._conexao().commit()
+    reaberto = BuscaTriagens(str(tmp_path / "busca.db"))
+    assert reaberto._conexao().execute(contar).fetchone()[0] == 20
+    assert [r["triagem_id"] for r in reaberto.buscar("boleto", modulo="CADASTROS", limite=2)] == ["r39", "r37"]
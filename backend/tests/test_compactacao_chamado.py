@@ -0,0 +1,85 @@
+from compactacao_chamado import (
+    FRAMES_FRAMEWORK_MANTIDOS,
+    MARCADOR_FRAMES_OMITIDOS,
+    compactar_chamado,
+    estimar_tokens,
+)
+
+
+def test_linhas_repetidas_com_partes_variaveis_viram_uma_com_contagem():
+    log = "\n".join(
+        f"2024-05-0{i % 9 + 1} 10:00:{i:02d} ERROR Timeout ao conectar id={i}" for i in range(40)
+    )
+    compactado = compactar_chamado("Tela de boletos travando\n" + log)
+
+    linhas = compactado.texto.splitlines()
+    assert linhas[0] == "Tela de boletos travando"
+    assert linhas[1].startswith("2024-05-01 10:00:00 ERROR Timeout ao conectar id=0")
+    assert linhas[1].endswith("[x40]")
+    assert compactado.linhas_duplicadas == 39
+    assert compactado.reducao_percentual > 80
+
+
+def test_frames_do_framework_sao_limitados_por_bloco():
+    frames = [f"   at System.Web.Camada{i}.Metodo{chr(65 + i)}()" for i in range(8)]
+    texto = "\n".join([
+        "System.NullReferenceException: Object reference not set",
+        "   at Sponte.Financeiro.FrmBoleto.BtnGerar_Click(Object sender)",
+        *frames,
+    ])
+    compactado = compactar_chamado(texto)
+
+    linhas = compactado.texto.splitlines()
+    assert "BtnGerar_Click" in linhas[1]
+    assert linhas[2:2 + FRAMES_FRAMEWORK_MANTIDOS] == frames[:FRAMES_FRAMEWORK_MANTIDOS]
+    assert linhas[2 + FRAMES_FRAMEWORK_MANTIDOS] == MARCADOR_FRAMES_OMITIDOS.format(len(frames) - FRAMES_FRAMEWORK_MANTIDOS)
+    assert len(linhas) == 3 + FRAMES_FRAMEWORK_MANTIDOS
+    assert compactado.frames_omitidos == len(frames) - FRAMES_FRAMEWORK_MANTIDOS
+
+
+def test_numeros_de_erro_nao_sao_mascarados():
+    log = "\n".join([
+        "Msg 547, Level 16: The INSERT statement conflicted with the FOREIGN KEY constraint",
+        "Msg 2627, Level 14: Violation of PRIMARY KEY constraint",
+        "Error Number: 1205 em 2024-05-01T10:00:00Z sessão 3f2504e0-4f89-11d3-9a0c-0305e82c3301",
+        "Error Number: 547 em 2024-05-01T10:00:05Z sessão 0c8a2b1e-4f89-11d3-9a0c-0305e82c3301",
+        "Error Number: 1205 em 2024-05-01T10:00:09Z sessão 7d1c3a9f-4f89-11d3-9a0c-0305e82c3301",
+        "Falha no pedido 123456789 ponteiro 0x7ffe01",
+        "Falha no pedido 987654321 ponteiro 0x7ffe99",
+    ] * 5)
+    linhas = compactar_chamado(log).texto.splitlines()
+
+    assert len(linhas) == 5
+    assert linhas[0].startswith("Msg 547,") and linhas[1].startswith("Msg 2627,")
+    assert linhas[2].startswith("Error Number: 1205") and linhas[2].endswith("[x10]")
+    assert linhas[3].startswith("Error Number: 547") and linhas[3].endswith("[x5]")
+    assert linhas[4].endswith("[x10]")
+
+
+def test_trunca_o_meio_dentro_do_orcamento():
+    texto = "\n".join(f"linha distinta numero {chr(65 + i % 26)}{chr(65 + i // 26)} com texto" for i in range(300))
+    compactado = compactar_chamado(texto, orcamento_tokens=200)
+
+    assert compactado.tokens_compactados <= 200 + estimar_tokens("[... 999 linhas omitidas ...]")
+    assert compactado.texto.startswith("linha distinta numero AA")
+    assert compactado.texto.endswith(texto.splitlines()[-1])
+    assert "linhas omitidas ...]" in compactado.texto
+    assert compactado.linhas_truncadas > 0
+
+
+def test_chamado_curto_fica_igual():
+    texto = "Não consigo emitir o boleto do aluno"
+    compactado = compactar_chamado(texto)
+    assert compactado.texto == texto
+    assert compactado.reducao_percentual == 0.0
+
+
+def test_linha_unica_maior_que_o_orcamento_e_cortada_por_dentro():
+    texto = "Erro ao importar: " + " ".join(f"campo{i}=valor" for i in range(500)) + " fim do payload"
+    compactado = compactar_chamado(texto, orcamento_tokens=100)
+
+    assert compactado.tokens_compactados <= 100 + estimar_tokens("[... trecho omitido ...]")
+    assert compactado.texto.startswith("Erro ao importar: campo0=valor")
+    assert compactado.texto.endswith("fim do payload")
+    assert "[... trecho omitido ...]" in compactado.texto
+    assert compactado.linhas_truncadas == 1
@@ -0,0 +1,52 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from repositorio_triagens import codificar_cursor, decodificar_cursor
+from sqlite_db import SQLiteDatabase
+
+
+def test_cursor_ida_e_volta():
+    data = datetime(2024, 5, 1, 10, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = codificar_cursor(data, "abc/123+x")
+
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == (data, "abc/123+x")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "não é base64",
+    base64.urlsafe_b64encode(b"nao e json").decode("ascii"),
+    base64.urlsafe_b64encode(b'{"id": "x"}').decode("ascii"),
+    base64.urlsafe_b64encode(b'{"d": "ontem", "id": "x"}').decode("ascii"),
+])
+def test_cursor_invalido_gera_value_error(cursor):
+    with pytest.raises(ValueError):
+        decodificar_cursor(cursor)
+
+
+def test_paginacao_percorre_todas_as_triagens_sem_repetir(tmp_path):
+    banco = SQLiteDatabase(str(tmp_path / "triagem.db"))
+    inicio = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    # Pares com a mesma data: o ID desempata no cursor
+    banco.importar([
+        {"id": f"t{i:02d}", "modulo_identificado": "FINANCEIRO" if i % 2 else "ACADEMICO",
+         "data_triagem": inicio + timedelta(minutes=i // 2)}
+        for i in range(25)
+    ])
+
+    ids, cursor = [], None
+    while True:
+        pagina = banco.get_historico_paginado(por_pagina=4, cursor=cursor)
+        ids += [triagem["id"] for triagem in pagina["triagens"]]
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+
+    assert ids == [f"t{i:02d}" for i in reversed(range(25))]
+
+    pagina = banco.get_historico_paginado(por_pagina=20, modulo="FINANCEIRO")
+    assert [t["id"] for t in pagina["triagens"]] == [f"t{i:02d}" for i in reversed(range(1, 25, 2))]
+    assert pagina["proximo_cursor"] is None
@@ -0,0 +1,74 @@
+import os
+
+from duplicatas_minhash import IndiceDuplicatas, assinatura_minhash
+from features_chamado import extrair_features
+
+CHAMADO = (
+    "Escola {escola}: ao emitir o boleto do aluno matrícula {matricula} o sistema mostra "
+    "erro de violação de chave estrangeira na tabela de parcelas e não gera o título"
+)
+ANALISE = {"tipo_problema": "banco", "solucao_sugerida": "Recriar parcelas"}
+
+
+def features(escola="Alfa", matricula=1234, texto=CHAMADO):
+    return extrair_features(texto.format(escola=escola, matricula=matricula), "FINANCEIRO")
+
+
+def test_chamado_que_so_muda_nomes_e_ids_e_duplicata():
+    indice = IndiceDuplicatas()
+    indice.adicionar(features(), "t1", "100", ANALISE)
+
+    duplicata = indice.buscar(features("Beta", 98765))
+    assert duplicata is not None
+    assert (duplicata.triagem_id, duplicata.ticket_numero, duplicata.analise_ia) == ("t1", "100", ANALISE)
+    assert duplicata.jaccard >= indice.limiar
+
+
+def test_chamado_diferente_nao_e_duplicata():
+    indice = IndiceDuplicatas()
+    indice.adicionar(features(), "t1", "100", ANALISE)
+    assert indice.buscar(extrair_features("Relatório de frequência da turma demora para abrir")) is None
+    assert assinatura_minhash(extrair_features("")) is None
+
+
+def test_empate_fica_com_a_triagem_mais_recente():
+    indice = IndiceDuplicatas()
+    indice.adicionar(features(), "antiga", "100", ANALISE)
+    indice.adicionar(features(), "recente", "200", ANALISE)
+    assert indice.buscar(features("Gama", 5)).triagem_id == "recente"
+
+
+def test_indice_gravado_e_recarregado(tmp_path):
+    caminho = str(tmp_path / "duplicatas.jsonl")
+    IndiceDuplicatas(caminho).adicionar(features(), "t1", "100", ANALISE)
+
+    recarregado = IndiceDuplicatas(caminho)
+    assert recarregado.carregar()
+    assert len(recarregado) == 1
+    assert recarregado.buscar(features("Beta", 1)).triagem_id == "t1"
+
+
+def test_reconstrucao_sem_triagens_grava_o_arquivo(tmp_path):
+    caminho = str(tmp_path / "duplicatas.jsonl")
+    assert not IndiceDuplicatas(caminho).carregar()
+
+    assert IndiceDuplicatas(caminho).reconstruir([]) == 0
+    assert os.path.exists(caminho)
+    assert not os.path.exists(caminho + ".tmp")
+    assert IndiceDuplicatas(caminho).carregar()
+
+
+def test_servico_nao_rele_o_historico_a_cada_inicio(criar_servico, monkeypatch):
+    from sqlite_db import SQLiteDatabase
+
+    leituras = []
+    historico = SQLiteDatabase.get_triagens_historico
+
+    def contar(self, *args, **kwargs):
+        leituras.append(1)
+        return historico(self, *args, **kwargs)
+    monkeypatch.setattr(SQLiteDatabase, "get_triagens_historico", contar)
+
+    criar_servico()
+    criar_servico()
+    assert len(leituras) == 1
@@ -0,0 +1,27 @@
+from firebase_db import FirebaseDatabase
+
+
+class ClienteSemLeituras:
+    """Cliente do Firestore que falha em qualquer leitura de documentos"""
+
+    def collection(self, nome):
+        raise AssertionError(f"leitura da coleção {nome} em vez de agregação")
+
+
+def test_ranking_de_modulos_usa_contagem_por_modulo(monkeypatch):
+    banco = FirebaseDatabase(db=ClienteSemLeituras(), modulos=["CADASTROS", "FINANCEIRO", "RELATÓRIOS"])
+    totais = {"CADASTROS": 3, "FINANCEIRO": 7, "RELATÓRIOS": 0}
+
+    def contar_triagens(desde=None, ate=None, modulo=None, foi_utilizada=None):
+        return totais[modulo] if modulo else 4
+
+    monkeypatch.setattr(banco, "contar_triagens", contar_triagens)
+    monkeypatch.setattr(banco, "agregar_triagens", lambda desde=None: {"total": 10, "soma": 1500, "media": 150})
+
+    estatisticas = banco.get_estatisticas_triagem(dias=7)
+
+    assert estatisticas["modulos_mais_triados"] == [
+        {"modulo": "FINANCEIRO", "total": 7},
+        {"modulo": "CADASTROS", "total": 3}
+    ]
+    assert estatisticas["taxa_utilizacao"] == 40.0
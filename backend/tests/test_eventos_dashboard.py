@@ -0,0 +1,100 @@
+import asyncio
+import json
+import threading
+
+import eventos_dashboard
+from eventos_dashboard import BarramentoEventos, barramento_dashboard, formatar_evento, transmitir_eventos
+
+
+def test_evento_publicado_de_outra_thread_chega_a_todos():
+    barramento = BarramentoEventos()
+
+    async def cenario():
+        filas = [barramento.assinar(), barramento.assinar()]
+        escritor = threading.Thread(target=lambda: [barramento.publicar("feedback", {"n": n}) for n in (1, 2)])
+        escritor.start()
+        escritor.join()
+        eventos = [[await asyncio.wait_for(fila.get(), timeout=5) for _ in range(2)] for fila in filas]
+        barramento.cancelar(filas[0])
+        return eventos
+
+    eventos = asyncio.run(cenario())
+    assert eventos[0] == eventos[1]
+    assert [(e["id"], e["dados"]["n"]) for e in eventos[0]] == [(1, 1), (2, 2)]
+    assert len(barramento) == 1
+
+    texto = formatar_evento({"id": 7, "tipo": "feedback", "dados": {"nota": 5, "comentário": "ótimo"}})
+    assert texto == 'id: 7\nevent: feedback\ndata: {"nota": 5, "comentário": "ótimo"}\n\n'
+
+
+def test_dashboard_lento_e_desconectado(monkeypatch):
+    monkeypatch.setattr(eventos_dashboard, "EVENTOS_POR_CLIENTE", 3)
+    barramento = BarramentoEventos()
+
+    async def cenario():
+        lento, rapido = barramento.assinar(), barramento.assinar()
+        recebidos = []
+        for n in range(5):
+            barramento.publicar("nova_triagem", {"n": n})
+            await asyncio.sleep(0)
+            recebidos.append(rapido.get_nowait()["dados"]["n"])
+        return lento, recebidos
+
+    lento, recebidos = asyncio.run(cenario())
+    assert recebidos == [0, 1, 2, 3, 4]
+    # A fila cheia é esvaziada e recebe só o fim do fluxo
+    assert len(barramento) == 1
+    assert lento.qsize() == 1 and lento.get_nowait() is None
+
+
+def test_fluxo_sse_com_ping_e_fim(monkeypatch):
+    monkeypatch.setattr(eventos_dashboard, "INTERVALO_PING", 0.01)
+    barramento = BarramentoEventos()
+
+    async def cenario():
+        fluxo = transmitir_eventos(barramento)
+        partes = [await fluxo.__anext__()]
+        partes.append(await fluxo.__anext__())
+        barramento.publicar("feedback", {"triagem_id": "t1"})
+        partes.append(await fluxo.__anext__())
+        # Fim do fluxo (dashboard lento desconectado)
+        [fila] = barramento._assinantes
+        fila.put_nowait(None)
+        partes += [parte async for parte in fluxo]
+        return partes
+
+    partes = asyncio.run(cenario())
+    assert partes == [
+        f"retry: {eventos_dashboard.RECONEXAO_MS}\n\n",
+        ": ping\n\n",
+        'id: 1\nevent: feedback\ndata: {"triagem_id": "t1"}\n\n',
+    ]
+    assert len(barramento) == 0
+
+
+def test_triagem_salva_atualiza_estatisticas_em_cache(criar_servico):
+    servico = criar_servico()
+    assert servico.estatisticas_diarias(7)[0]["total_triagens"] == 0
+    resultado = asyncio.run(servico.analisar_chamado("Erro ao gerar boleto: timeout expired", "FINANCEIRO"))
+    resultado = {**resultado, "tempo_processamento_ms": 120, "modo_mock": False, "analise_ia": {
+        "tipo_problema": "banco", "prioridade": "alta", "categoria_detalhada": "Boletos", "solucao_sugerida": "Reprocessar"
+    }}
+
+    async def cenario():
+        fila = barramento_dashboard.assinar()
+        try:
+            triagem_id = await asyncio.to_thread(servico.salvar_triagem_firebase, "1", "boleto", "FINANCEIRO", resultado)
+            await asyncio.to_thread(servico.registrar_feedback, triagem_id, True, 5)
+            eventos = [await asyncio.wait_for(fila.get(), timeout=5) for _ in range(2)]
+        finally:
+            barramento_dashboard.cancelar(fila)
+        return triagem_id, eventos
+
+    triagem_id, [nova, feedback] = asyncio.run(cenario())
+    assert nova["tipo"] == "nova_triagem" and nova["dados"]["triagem"]["id"] == triagem_id
+    assert feedback["tipo"] == "feedback" and feedback["dados"] == {"triagem_id": triagem_id, "foi_util": True, "nota": 5}
+
+    # A série em cache recebeu o delta e continua igual à do banco
+    em_cache = servico.estatisticas_diarias(7)
+    assert em_cache[0]["total_triagens"] == 1
+    assert json.dumps(em_cache, sort_keys=True) == json.dumps(criar_servico().estatisticas_diarias(7), sort_keys=True)
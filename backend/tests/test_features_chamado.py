@@ -0,0 +1,43 @@
+import pytest
+
+from features_chamado import extrair_features
+from fingerprints_erros import gerar_fingerprints
+
+
+@pytest.mark.parametrize("texto", [
+    "Cliente informou Number: 12345 do pedido",
+    "Ticket Number: 4521 reaberto",
+    "Msg 547 enviada ao responsável",
+    "Order number: 88 não gerou boleto",
+    "Error 1205 na tela",
+])
+def test_numeros_fora_das_mensagens_do_sql_server_nao_sao_erros_sql(texto):
+    features = extrair_features(texto)
+    assert features.erros_sql == []
+    assert not any(f.chave.startswith("sql|") for f in gerar_fingerprints(features))
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("Msg 547, Level 16, State 0, Line 1\nThe INSERT statement conflicted", [547]),
+    ("Microsoft.Data.SqlClient.SqlException (0x80131904): Timeout expired.\n"
+     "ClientConnectionId:abc Error Number:-2,State:0,Class:11", [-2]),
+    ("Error Number: 1205", [1205]),
+    ("System.Data.SqlClient.SqlException: deadlock, SqlException.Number = 1205", [1205]),
+])
+def test_formatos_do_sql_server(texto, esperado):
+    assert extrair_features(texto).erros_sql == esperado
+
+
+def test_entidades_do_stack_trace():
+    texto = (
+        "System.NullReferenceException: Object reference not set\n"
+        "   at Sponte.Cadastros.FrmAluno.BtnSalvar_Click(Object sender, EventArgs e)\n"
+        "   at System.Web.UI.Page.ProcessRequest()\n"
+        "INSERT INTO dbo.Alunos (Nome) VALUES ('x')"
+    )
+    features = extrair_features(texto, "CADASTROS")
+    assert features.excecoes == ["System.NullReferenceException"]
+    assert features.frames == ["Sponte.Cadastros.FrmAluno.BtnSalvar_Click", "System.Web.UI.Page.ProcessRequest"]
+    assert features.handlers == ["BtnSalvar_Click"]
+    assert features.tabelas == ["Alunos"]
+    assert features.modulo == "cadastros"
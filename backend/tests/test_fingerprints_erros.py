@@ -0,0 +1,106 @@
+import asyncio
+
+from features_chamado import extrair_features
+from fingerprints_erros import (
+    CONFIANCA_BASE_CONHECIMENTO,
+    TIPO_EXCECAO,
+    TIPO_EXCECAO_FRAMES,
+    TIPO_SQL,
+    TIPO_SQL_CONTEXTO,
+    IndiceFingerprints,
+    gerar_fingerprints,
+)
+
+STACK_TRACE = """System.Data.SqlClient.SqlException (0x80131904): The INSERT statement conflicted with the FOREIGN KEY constraint
+   at System.Data.SqlClient.SqlConnection.OnError(SqlException exception)
+   at Escola.Dados.TurmaRepositorio.Salvar`1[T](Turma turma) in C:\\src\\TurmaRepositorio.vb:line {linha}
+   at Escola.Web.Turmas.<btnSalvar_Click>b__0()
+   at Escola.Web.Turmas.btnSalvar_Click(Object sender, EventArgs e)
+   at Escola.Web.Pagina.Processar(Object sender)"""
+
+ERRO_SQL = "Msg 547, Level 16, State 0\nThe INSERT statement conflicted with the FOREIGN KEY constraint, table \"dbo.Turmas\""
+
+
+def fingerprints(texto, modulo=None):
+    return gerar_fingerprints(extrair_features(texto, modulo))
+
+
+def test_fingerprint_do_stack_trace_ignora_framework_e_ruido():
+    [especifico, generico] = fingerprints(STACK_TRACE.format(linha=42))
+    assert especifico.tipo == TIPO_EXCECAO_FRAMES
+    # Frames do framework, genéricos e lambdas geradas pelo compilador não entram na chave
+    assert especifico.chave == "exc|sqlexception|escola.dados.turmarepositorio.salvar|escola.web.turmas|escola.web.turmas.btnsalvar_click"
+    assert (generico.tipo, generico.chave) == (TIPO_EXCECAO, "exc|sqlexception")
+
+    # Mesma falha em outra linha do fonte gera o mesmo hash
+    assert [f.hash for f in fingerprints(STACK_TRACE.format(linha=57))] == [especifico.hash, generico.hash]
+
+    # Stack trace só com frames do framework usa esses frames
+    [so_framework, _] = fingerprints(
+        "System.TimeoutException: expirou\n   at System.Net.Http.HttpClient.Send(Request r)"
+    )
+    assert so_framework.chave == "exc|timeoutexception|system.net.http.httpclient.send"
+
+
+def test_fingerprints_do_erro_sql_com_contexto():
+    assert [(f.tipo, f.chave) for f in fingerprints(ERRO_SQL)] == [
+        (TIPO_SQL_CONTEXTO, "sql|547|turmas"),
+        (TIPO_SQL, "sql|547"),
+    ]
+    assert [f.chave for f in fingerprints("Msg 1205, Level 13, State 51")] == ["sql|1205"]
+    assert fingerprints("Erro ao salvar o aluno 547") == []
+
+
+def test_busca_pelo_fingerprint_mais_especifico():
+    indice = IndiceFingerprints()
+    indice.carregar_base_conhecimento([
+        ("banco", "chave_estrangeira", {"erros_sql": [547]}),
+        ("banco", "erro_sql", {"excecoes": ["System.Data.SqlClient.SqlException"]}),
+    ])
+    assert len(indice) == 2
+
+    conhecido = indice.buscar(fingerprints(ERRO_SQL))
+    assert (conhecido.origem, conhecido.padrao_id) == ("base_conhecimento", "chave_estrangeira")
+    assert conhecido.confianca == CONFIANCA_BASE_CONHECIMENTO
+    assert indice.buscar(fingerprints(STACK_TRACE.format(linha=1))).padrao_id == "erro_sql"
+    assert indice.buscar(fingerprints("Msg 1205, Level 13, State 51")) is None
+
+    # Triagem anterior do mesmo stack trace é mais específica que a base de conhecimento
+    analise = {"tipo_problema": "banco", "solucao_sugerida": "Cadastrar a turma antes"}
+    aprendido = indice.registrar_triagem(fingerprints(STACK_TRACE.format(linha=1)), analise, "t1")
+    assert aprendido.tipo == TIPO_EXCECAO_FRAMES
+    conhecido = indice.buscar(fingerprints(STACK_TRACE.format(linha=99)))
+    assert (conhecido.origem, conhecido.triagem_id, conhecido.analise_ia) == ("triagem", "t1", analise)
+
+
+def test_somente_fingerprints_especificos_sao_aprendidos():
+    indice = IndiceFingerprints()
+    analise = {"tipo_problema": "banco"}
+    assert indice.registrar_triagem(fingerprints("Msg 1205, Level 13, State 51"), analise, "t1") is None
+    assert indice.registrar_triagem(fingerprints("NullReferenceException ao abrir a tela"), analise, "t2") is None
+    assert len(indice) == 0
+
+    aprendido = indice.registrar_triagem(fingerprints(ERRO_SQL), analise, "t3")
+    assert aprendido.chave == "sql|547|turmas"
+    # Sem a tabela, o mesmo erro SQL é genérico demais para reaproveitar a análise
+    assert indice.buscar(fingerprints("Msg 547, Level 16, State 0")) is None
+
+
+def test_fingerprint_aprendido_vale_depois_de_reiniciar(criar_servico, monkeypatch):
+    monkeypatch.setenv("TRIAGEM_REUTILIZAR_DUPLICATAS", "false")
+    servico = criar_servico()
+    analise = {"tipo_problema": "banco", "prioridade": "alta", "solucao_sugerida": "Cadastrar a turma antes"}
+    resultado = asyncio.run(servico.analisar_chamado(STACK_TRACE.format(linha=42), "CADASTROS"))
+    triagem_id = servico.salvar_triagem_firebase(
+        "1", STACK_TRACE.format(linha=42), "CADASTROS", {**resultado, "analise_ia": analise, "modo_mock": False}
+    )
+
+    # O índice é recarregado do repositório; por padrão a IA continua sendo consultada
+    chamado = "Ao salvar a turma:\n" + STACK_TRACE.format(linha=57)
+    resultado = asyncio.run(criar_servico().analisar_chamado(chamado, "CADASTROS"))
+    assert resultado["problema_conhecido"]["triagem_id"] == triagem_id
+    assert resultado["analise_ia"].get("origem") is None
+
+    monkeypatch.setenv("TRIAGEM_PULAR_IA_FINGERPRINT", "true")
+    resultado = asyncio.run(criar_servico().analisar_chamado(chamado, "CADASTROS"))
+    assert resultado["analise_ia"] == {**analise, "origem": "triagem_anterior"}
@@ -0,0 +1,39 @@
+from indice_aproximado import IndiceTrigramas, distancia_limitada
+
+
+def test_distancia_limitada_para_cedo():
+    assert distancia_limitada("deadlock", "dedlock", 2) == 1
+    assert distancia_limitada("timeout", "timout", 1) == 1
+    assert distancia_limitada("constraint", "x", 2) == 3
+
+
+def test_busca_tolera_erros_de_digitacao():
+    indice = IndiceTrigramas()
+    for token in ("constraint", "timeout", "deadlock"):
+        indice.adicionar(token)
+
+    assert set(indice.buscar("constrant")) == {"constraint"}
+    assert set(indice.buscar("timout")) == {"timeout"}
+    assert indice.buscar("deadlock") == {"deadlock": 1.0}
+    assert indice.buscar("relatorio") == {}
+
+
+def test_tokens_curtos_exigem_match_exato():
+    indice = IndiceTrigramas()
+    indice.adicionar("key")
+    assert len(indice) == 0
+    assert indice.buscar("kei") == {}
+
+
+def test_matcher_encontra_palavra_chave_com_erro_de_digitacao():
+    from features_chamado import extrair_features
+    from matcher_padroes import MatcherPadroes
+
+    base = {"padroes_banco": {"deadlock": {"palavras_chave": ["deadlock victim"]}}}
+    texto = "Transaction was chosen as the dedlock victim"
+    padroes = MatcherPadroes(base).analisar(extrair_features(texto))
+
+    assert [p["padrao_id"] for p in padroes] == ["deadlock"]
+    assert padroes[0]["aproximado"] is True
+    assert padroes[0]["trecho"] == "dedlock victim"
+    assert MatcherPadroes(base, busca_aproximada=False).analisar(extrair_features(texto)) == []
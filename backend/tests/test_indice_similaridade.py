@@ -0,0 +1,116 @@
+import json
+import sys
+
+import reconstruir_indice_similaridade
+from features_chamado import extrair_features
+from indice_similaridade import IndiceSimilaridade
+
+
+def analise(solucao="Reprocessar o boleto"):
+    return {"tipo_problema": "banco", "prioridade": "alta", "categoria_detalhada": "Boletos", "solucao_sugerida": solucao}
+
+
+def indexar(indice, triagem_id, texto, modulo="FINANCEIRO", solucao="Reprocessar o boleto"):
+    return indice.adicionar_triagem(triagem_id, extrair_features(texto, modulo), triagem_id.upper(), modulo, analise(solucao))
+
+
+def reconstruir(tmp_path, monkeypatch, diretorio, triagens):
+    arquivo = tmp_path / "triagens.jsonl"
+    arquivo.write_text("".join(json.dumps(t, ensure_ascii=False) + "\n" for t in triagens), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["reconstruir", "--arquivo", str(arquivo), "--diretorio", str(diretorio)])
+    assert reconstruir_indice_similaridade.main() == 0
+
+
+def test_busca_por_similaridade_e_modulo(tmp_path):
+    indice = IndiceSimilaridade(str(tmp_path / "indice"))
+    assert indice.buscar(extrair_features("boleto", None)) == []
+
+    indexar(indice, "t1", "Erro ao gerar boleto bancário do aluno")
+    indexar(indice, "t2", "Erro: frequência da turma não aparece no diário", modulo="PEDAGÓGICO")
+    assert not indice.adicionar_triagem("t3", extrair_features("x", None), "T3", None, {"tipo_problema": "outro"})
+
+    [primeiro, segundo] = indice.buscar(extrair_features("Erro ao gerar o boleto do aluno", None), k=2)
+    assert primeiro["triagem_id"] == "t1"
+    assert primeiro["similaridade"] > segundo["similaridade"]
+    assert "modulo_normalizado" not in primeiro
+
+    resultados = indice.buscar(extrair_features("Erro ao gerar o boleto", None), modulo="pedagógico")
+    assert [r["triagem_id"] for r in resultados] == ["t2"]
+    assert indice.buscar(extrair_features("boleto", None), modulo="RH") == []
+
+
+def test_crescimento_alem_da_folga_e_reabertura(tmp_path):
+    indice = IndiceSimilaridade(str(tmp_path / "indice"))
+    for i in range(1100):
+        indexar(indice, f"t{i}", f"chamado {i} sobre boleto número {i}", modulo="FINANCEIRO" if i % 2 else "CADASTROS")
+    # A matriz em memória acompanha as inserções feitas depois da primeira consulta
+    indice.buscar(extrair_features("boleto", None))
+    indexar(indice, "ultimo", "Transaction was deadlocked on lock resources", modulo="CADASTROS")
+
+    assert len(indice) == 1101
+    assert indice.buscar(extrair_features("deadlocked on lock resources", None), k=1)[0]["triagem_id"] == "ultimo"
+
+    reaberto = IndiceSimilaridade(str(tmp_path / "indice"))
+    assert len(reaberto) == 1101
+    resultados = reaberto.buscar(extrair_features("chamado 7 sobre boleto número 7", None), k=1, modulo="FINANCEIRO")
+    assert resultados[0]["triagem_id"] == "t7"
+
+
+def test_gravacao_interrompida_e_descartada(tmp_path):
+    indice = IndiceSimilaridade(str(tmp_path / "indice"))
+    indexar(indice, "t1", "Erro ao gerar boleto")
+    indexar(indice, "t2", "Timeout na emissão da nota fiscal")
+    # Vetor gravado sem a linha de metadados correspondente
+    with open(indice._caminho_vetores, "ab") as f:
+        f.write(b"\0" * 100)
+
+    reaberto = IndiceSimilaridade(str(tmp_path / "indice"))
+    assert len(reaberto) == 2
+    assert reaberto.buscar(extrair_features("nota fiscal timeout", None), k=1)[0]["triagem_id"] == "t2"
+
+
+def test_indice_aberto_recarrega_depois_da_reconstrucao(tmp_path, monkeypatch):
+    diretorio = tmp_path / "indice"
+    servico = IndiceSimilaridade(str(diretorio))
+    for i in range(5):
+        indexar(servico, f"antiga{i}", f"Erro antigo número {i} ao gerar boleto")
+    servico.buscar(extrair_features("boleto", None))
+
+    reconstruir(tmp_path, monkeypatch, diretorio, [
+        {"id": "nova", "ticket_numero": "N1", "chamado_texto": "Frequência da turma não aparece",
+         "modulo_identificado": "PEDAGÓGICO", "analise_ia": analise("Recalcular a frequência")},
+        {"id": "sem_solucao", "chamado_texto": "Dúvida sobre relatório", "analise_ia": {"tipo_problema": "outro"}},
+    ])
+
+    [resultado] = servico.buscar(extrair_features("frequência da turma", None), k=3)
+    assert resultado["triagem_id"] == "nova"
+    assert resultado["solucao"] == "Recalcular a frequência"
+
+    # Inserções depois da troca vão para a geração nova, coerentes com os offsets
+    indexar(servico, "depois", "Erro ao gerar boleto bancário")
+    assert len(servico) == 2
+    assert servico.buscar(extrair_features("gerar boleto", None), k=1)[0]["triagem_id"] == "depois"
+    assert len(IndiceSimilaridade(str(diretorio))) == 2
+
+    # Segunda reconstrução apaga as gerações mais antigas que a anterior
+    reconstruir(tmp_path, monkeypatch, diretorio, [
+        {"id": "n2", "chamado_texto": "Erro no cadastro", "analise_ia": analise("Revisar o cadastro")}
+    ])
+    reconstruir(tmp_path, monkeypatch, diretorio, [
+        {"id": "n3", "chamado_texto": "Erro no cadastro", "analise_ia": analise("Revisar o cadastro")}
+    ])
+    assert len([p for p in diretorio.iterdir() if p.is_dir()]) == 2
+    assert [r["triagem_id"] for r in servico.buscar(extrair_features("cadastro", None))] == ["n3"]
+
+
+def test_reconstrucao_sem_triagens_com_solucao_gera_indice_vazio(tmp_path, monkeypatch):
+    diretorio = tmp_path / "indice"
+    servico = IndiceSimilaridade(str(diretorio))
+    indexar(servico, "antiga", "Erro ao gerar boleto")
+
+    reconstruir(tmp_path, monkeypatch, diretorio, [
+        {"id": "sem_solucao", "chamado_texto": "Dúvida sobre relatório", "analise_ia": {"tipo_problema": "outro"}}
+    ])
+
+    assert servico.buscar(extrair_features("boleto", None)) == []
+    assert len(servico) == 0
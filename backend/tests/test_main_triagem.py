@@ -0,0 +1,45 @@
+import importlib
+import os
+import subprocess
+import sys
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_aplicacao_importa_com_as_dependencias_fixadas(tmp_path):
+    # Processo separado: o import cria o TriagemService global, que abre os bancos e
+    # índices locais em TRIAGEM_DIRETORIO_DADOS (por padrão o próprio backend/)
+    ambiente = {
+        **os.environ,
+        "PYTHONPATH": DIRETORIO_BACKEND,
+        "TRIAGEM_DIRETORIO_DADOS": str(tmp_path),
+        "TRIAGEM_ARMAZENAMENTO": "sqlite",
+        "DATABASE_PATH": str(tmp_path / "triagem.db"),
+        "TRIAGEM_BACKEND_IA": "mock",
+    }
+    codigo = (
+        "import main_triagem\n"
+        "print(sorted(r.path for r in main_triagem.app.routes))\n"
+    )
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=tmp_path, env=ambiente, capture_output=True, text=True, timeout=120
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    assert (tmp_path / "busca_triagens.db").exists()
+    rotas = resultado.stdout.strip().splitlines()[-1]
+    for rota in ("/api/triagem/analisar", "/api/triagem/historico", "/api/triagem/eventos"):
+        assert rota in rotas
+
+
+def test_diretorio_de_dados_e_criado(tmp_path):
+    diretorio = tmp_path / "dados" / "triagem"
+    ambiente = {**os.environ, "PYTHONPATH": DIRETORIO_BACKEND, "TRIAGEM_DIRETORIO_DADOS": str(diretorio)}
+    codigo = "from config import caminho_dados\nopen(caminho_dados('modelo_classificador.npz'), 'wb').close()\n"
+    resultado = subprocess.run([sys.executable, "-c", codigo], env=ambiente, capture_output=True, text=True, timeout=60)
+    assert resultado.returncode == 0, resultado.stderr
+    assert (diretorio / "modelo_classificador.npz").exists()
+
+
+def test_scripts_de_manutencao_importam():
+    for modulo in ("migrar_armazenamento_triagens", "sincronizar_sqlite", "sincronizar_busca_triagens"):
+        importlib.import_module(modulo)
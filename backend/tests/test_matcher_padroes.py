@@ -0,0 +1,124 @@
+import pytest
+
+from features_chamado import extrair_features
+from matcher_padroes import MatcherPadroes
+from pontuacao_padroes import CONFIANCA_MAXIMA, PontuacaoPadroes
+from regras_padroes import compilar_regra
+
+BASE = {
+    "padroes_banco": {
+        "chave_estrangeira": {"palavras_chave": ["foreign key", "erro"]},
+        "timeout": {"palavras_chave": ["timeout expired", "erro"]},
+    },
+    "padroes_sistema": {
+        "permissao": {"palavras_chave": ["acesso negado", "erro"]},
+    },
+}
+
+
+def analisar(texto, base=BASE, modulo=None):
+    return MatcherPadroes(base).analisar(extrair_features(texto, modulo))
+
+
+def test_palavra_chave_rara_pesa_mais_que_generica():
+    pontuacao = PontuacaoPadroes({
+        "erro": [(0, 0), (1, 0), (2, 0)],
+        "foreign key": [(0, 1)],
+    }, 3)
+    assert pontuacao.contribuicao("foreign key", 1, 20) > pontuacao.contribuicao("erro", 1, 20)
+
+
+def test_ocorrencias_somam_com_saturacao():
+    pontuacao = PontuacaoPadroes({"deadlock": [(0, 0)]}, 10)
+    uma, duas, dez = (pontuacao.contribuicao("deadlock", n, 150) for n in (1, 2, 10))
+    assert uma < duas < dez
+    assert dez < 3 * uma
+    assert PontuacaoPadroes.confianca(1000) == CONFIANCA_MAXIMA
+
+
+def test_padrao_com_evidencia_especifica_vem_primeiro():
+    padroes = analisar("Erro ao salvar: FOREIGN KEY constraint falhou")
+    assert padroes[0]["padrao_id"] == "chave_estrangeira"
+    assert padroes[0]["palavra_chave"] == "foreign key"
+    assert padroes[0]["confianca"] > padroes[-1]["confianca"]
+    # Posição aponta para o texto original, com a caixa original
+    posicao = padroes[0]["posicao"]
+    assert "Erro ao salvar: FOREIGN KEY constraint falhou"[posicao["inicio"]:posicao["fim"]] == "FOREIGN KEY"
+
+
+def test_regra_dispara_sem_palavra_chave():
+    base = {"padroes_sistema": {"salvar": {"regra": {
+        "todas": ["erro"],
+        "proximidade": [{"termos": ["nao", "salvar"], "distancia": 3}],
+        "peso": 3.0
+    }}}}
+    assert [p["padrao_id"] for p in analisar("Erro: o botão não deixa salvar o aluno", base)] == ["salvar"]
+    # Termos longe demais um do outro
+    assert analisar("Erro: não consigo abrir a tela para depois salvar", base) == []
+    # Gatilho ausente
+    assert analisar("o botão não deixa salvar", base) == []
+
+
+def test_regra_com_regex_sobre_o_texto_original():
+    base = {"padroes_banco": {"deadlock": {"regra": {"regex": [r"\bmsg\s*1205\b"]}}}}
+    padroes = analisar("Msg 1205, Level 13, State 51", base)
+    assert padroes[0]["padrao_id"] == "deadlock"
+    assert padroes[0]["posicao"] == {"inicio": 0, "fim": 8}
+
+
+def test_restricoes_vetam_padrao_encontrado_por_palavra_chave():
+    base = {"padroes_banco": {"timeout": {
+        "palavras_chave": ["timeout"],
+        "regra": {"nenhuma": ["ambiente de teste"], "modulos": ["FINANCEIRO"]}
+    }}}
+    assert analisar("timeout ao gerar boleto", base, "FINANCEIRO")
+    assert analisar("timeout ao gerar boleto no ambiente de teste", base, "FINANCEIRO") == []
+    assert analisar("timeout ao gerar boleto", base, "PEDAGÓGICO") == []
+
+
+def test_regra_mal_formada():
+    with pytest.raises(ValueError):
+        compilar_regra({"proximidade": [{"termos": ["um"]}]})
+    assert compilar_regra({"todas": ["erro"]}).restricoes is None
+
+
+BASE_MODULOS = {
+    "padroes_banco": {
+        "timeout": {"palavras_chave": ["timeout expired", "erro"]},
+        "boleto": {"palavras_chave": ["boleto", "erro"], "modulos": ["Financeiro"]},
+        "diario": {"palavras_chave": ["diario de classe", "erro"], "modulos": ["PEDAGÓGICO"]},
+    },
+}
+
+
+def test_indice_escolhido_pelo_modulo():
+    matcher = MatcherPadroes(BASE_MODULOS)
+    assert set(matcher.indices_modulo) == {"financeiro", "pedagogico"}
+
+    assert matcher.indice_para_modulo(None) is matcher.indice_global
+    assert matcher.indice_para_modulo("") is matcher.indice_global
+    assert matcher.indice_para_modulo("  pedagógico ") is matcher.indices_modulo["pedagogico"]
+    # Módulo sem padrões próprios varre só os padrões genéricos
+    assert matcher.indice_para_modulo("RH") is matcher.indice_generico
+
+    # Cada índice tem os padrões do módulo mais os genéricos
+    assert set(matcher.indices_modulo["financeiro"].ocorrencias) == {"timeout expired", "erro", "boleto"}
+    assert set(matcher.indice_generico.ocorrencias) == {"timeout expired", "erro"}
+    assert "diario de classe" in matcher.indice_global.ocorrencias
+
+
+def test_padrao_do_modulo_vem_antes_e_pontuacao_e_global():
+    texto = "Erro: timeout expired ao gerar boleto e ao abrir o diário de classe"
+    padroes = analisar(texto, BASE_MODULOS, "FINANCEIRO")
+    assert [p["padrao_id"] for p in padroes] == ["boleto", "timeout"]
+    assert padroes[0]["especifico_modulo"] and not padroes[1]["especifico_modulo"]
+
+    assert [p["padrao_id"] for p in analisar(texto, BASE_MODULOS, "RH")] == ["timeout"]
+    assert {p["padrao_id"] for p in analisar(texto, BASE_MODULOS)} == {"boleto", "timeout", "diario"}
+
+    # Os pesos vêm da base inteira: o mesmo padrão pontua igual em qualquer índice
+    scores = {
+        modulo: next(p["score"] for p in analisar(texto, BASE_MODULOS, modulo) if p["padrao_id"] == "timeout")
+        for modulo in (None, "FINANCEIRO", "PEDAGÓGICO", "RH")
+    }
+    assert len(set(scores.values())) == 1
@@ -0,0 +1,32 @@
+from normalizacao_texto import normalizar, normalizar_texto
+
+
+def test_dobra_acentos_caixa_e_pontuacao():
+    assert normalizar("Não foi possível SALVAR, o  cadastro!") == "nao foi possivel salvar o cadastro"
+
+
+def test_offsets_apontam_para_o_texto_original():
+    original = "Erro: VIOLAÇÃO de chave"
+    normalizado = normalizar_texto(original)
+    assert normalizado.texto == "erro violacao de chave"
+    assert len(normalizado.offsets) == len(normalizado.texto)
+
+    inicio = normalizado.texto.index("violacao")
+    assert normalizado.trecho_original(inicio, inicio + len("violacao")) == "VIOLAÇÃO"
+    assert normalizado.posicao_original(inicio, inicio + len("violacao")) == (6, 14)
+
+
+def test_offsets_com_caracteres_decompostos():
+    # "ç" decomposto (c + cedilha combinante) e ligatura que expande na dobra
+    original = "serviço ﬁnanceiro"
+    normalizado = normalizar_texto(original)
+    assert normalizado.texto == "servico financeiro"
+    inicio = normalizado.texto.index("financeiro")
+    assert normalizado.trecho_original(inicio, len(normalizado.texto)) == "ﬁnanceiro"
+    assert normalizado.trecho_original(0, len("servico")) == "serviço"
+
+
+def test_texto_vazio():
+    normalizado = normalizar_texto(None)
+    assert normalizado.texto == ""
+    assert normalizado.posicao_original(0, 0) == (0, 0)
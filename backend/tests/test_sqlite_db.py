@@ -0,0 +1,191 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from repositorio_triagens import RepositorioTriagens
+from sqlite_db import ReplicaSQLite, SQLiteDatabase
+
+
+def resultado(tipo_problema="banco", prioridade="alta", categoria="Concorrência", tempo=100, solucoes=1):
+    return {
+        "analise_ia": {"tipo_problema": tipo_problema, "prioridade": prioridade, "categoria_detalhada": categoria},
+        "solucoes_sugeridas": [{"titulo": f"solução {i}"} for i in range(solucoes)],
+        "resumo": {"total_padroes_detectados": 2, "prioridade_geral": prioridade},
+        "tempo_processamento_ms": tempo
+    }
+
+
+class PrimarioEmMemoria:
+    """Primário da réplica (no lugar do Firestore) que conta as exportações"""
+
+    def __init__(self):
+        self.documentos = []
+        self.fingerprints = []
+        self.exportacoes = 0
+        self.fingerprints_exportados = []
+
+    def is_configured(self):
+        return True
+
+    def exportar_triagens(self, desde=None):
+        self.exportacoes += 1
+        return [d for d in list(self.documentos) if desde is None or d["updated_at"] > desde]
+
+    def get_fingerprints(self):
+        raise AssertionError("a réplica lê os fingerprints de forma incremental")
+
+    def exportar_fingerprints(self, desde=None):
+        exportados = [f for f in self.fingerprints if desde is None or f["updated_at"] > desde]
+        self.fingerprints_exportados.append([f["hash"] for f in exportados])
+        return exportados
+
+    def get_triagem_por_id(self, triagem_id):
+        return None
+
+    def adicionar(self, triagem_id, ticket_numero, atraso=timedelta()):
+        # atraso: relógio da instância que gravou atrás do das outras
+        agora = datetime.now(timezone.utc) - atraso
+        self.documentos.append({
+            "id": triagem_id, "ticket_numero": ticket_numero, "modulo_identificado": "FINANCEIRO",
+            "chamado_texto": "boleto duplicado", "data_triagem": agora, "updated_at": agora
+        })
+
+    def adicionar_fingerprint(self, hash_fingerprint, idade=timedelta()):
+        self.fingerprints.append({
+            "hash": hash_fingerprint, "chave": f"chave {hash_fingerprint}", "analise_ia": {"tipo_problema": "banco"},
+            "triagem_id": None, "updated_at": datetime.now(timezone.utc) - idade
+        })
+
+
+def test_repositorio_e_abstrato():
+    with pytest.raises(TypeError):
+        RepositorioTriagens()
+
+
+def test_registra_e_le_triagens(tmp_path):
+    banco = SQLiteDatabase(str(tmp_path / "triagem.db"))
+    texto = "Erro ao gerar boleto: deadlock " * 30
+    triagem_id = banco.registrar_triagem("T1", texto, "FINANCEIRO", resultado(solucoes=2), usuario="ana")
+    outro_id = banco.registrar_triagem("T2", "timeout", "ACADEMICO", resultado(tipo_problema="sistema"))
+
+    triagem = banco.get_triagem_por_id(triagem_id)
+    assert triagem["chamado_texto"] == texto
+    assert triagem["usuario_nome"] == "ana"
+    assert triagem["total_solucoes"] == 2
+    assert triagem["foi_utilizada"] is False
+    assert banco.get_triagem_por_id("inexistente") is None
+
+    banco.marcar_triagem_como_utilizada(triagem_id)
+    [resumo] = banco.get_triagens_por_ticket("T1")
+    assert resumo["foi_utilizada"] is True
+    assert "chamado_texto" not in resumo
+    assert banco.get_triagens_por_ticket("T1", campos_extras=["chamado_texto"])[0]["chamado_texto"] == texto
+    with pytest.raises(ValueError):
+        banco.get_triagens_por_ticket("T1", campos_extras=["usuario_nome"])
+
+    assert set(banco.get_triagens_por_ids([triagem_id, outro_id, "inexistente"])) == {triagem_id, outro_id}
+    assert sorted(banco.get_triagens_por_tickets(["T1", "T2", "T3"])) == ["T1", "T2"]
+    assert [t["id"] for t in banco.get_triagens_recentes(limite=1)] == [outro_id]
+
+
+def test_fingerprints_e_feedbacks(tmp_path):
+    banco = SQLiteDatabase(str(tmp_path / "triagem.db"))
+    banco.registrar_fingerprint("h1", "deadlock|boleto", {"diagnostico": "antigo"}, "t1")
+    banco.registrar_fingerprint("h1", "deadlock|boleto", {"diagnostico": "novo"}, "t2")
+
+    assert banco.get_fingerprints() == [
+        {"hash": "h1", "chave": "deadlock|boleto", "analise_ia": {"diagnostico": "novo"}, "triagem_id": "t2"}
+    ]
+    assert banco.registrar_feedback_triagem("t1", True, nota=5, feedback_id="f1") == "f1"
+
+
+def test_agregacoes(tmp_path):
+    banco = SQLiteDatabase(str(tmp_path / "triagem.db"))
+    agora = datetime.now(timezone.utc)
+    banco.importar([
+        {"id": "a", "modulo_identificado": "FINANCEIRO", "analise_ia": {"tipo_problema": "banco", "categoria_detalhada": "Boletos"},
+         "solucoes_sugeridas": [{}], "tempo_processamento_ms": 100, "foi_utilizada": True, "data_triagem": agora},
+        {"id": "b", "modulo_identificado": "FINANCEIRO", "analise_ia": {"tipo_problema": "sistema"},
+         "tempo_processamento_ms": 300, "data_triagem": agora - timedelta(days=1)},
+        {"id": "c", "modulo_identificado": "ACADEMICO", "analise_ia": {"tipo_problema": "banco"},
+         "tempo_processamento_ms": 200, "data_triagem": agora - timedelta(days=30)},
+    ])
+
+    semana = agora - timedelta(days=7)
+    assert banco.contar_triagens() == 3
+    assert banco.contar_triagens(desde=semana, modulo="FINANCEIRO") == 2
+    assert banco.contar_triagens(tipo_problema="banco", foi_utilizada=True) == 1
+    assert banco.agregar_triagens(desde=semana) == {"total": 2, "soma": 400.0, "media": 200.0}
+    with pytest.raises(ValueError):
+        banco.contar_triagens(usuario="ana")
+
+    estatisticas = banco.get_estatisticas_triagem(dias=7)
+    assert estatisticas["total_triagens"] == 2
+    assert estatisticas["taxa_utilizacao"] == 50.0
+    assert estatisticas["modulos_mais_triados"] == [{"modulo": "FINANCEIRO", "total": 2}]
+
+    serie = banco.get_serie_diaria(3)
+    assert [dia["total_triagens"] for dia in serie] == [1, 1, 0]
+    assert serie[0]["categorias_mais_comuns"] == [{"categoria": "Boletos", "count": 1}]
+    assert [dia["total_triagens"] for dia in banco.get_serie_diaria(3, categoria="Boletos")] == [1, 0, 0]
+
+
+def test_leituras_da_replica_nao_sincronizam(tmp_path):
+    primario = PrimarioEmMemoria()
+    primario.adicionar("t1", "T1")
+    replica = ReplicaSQLite(primario, SQLiteDatabase(str(tmp_path / "triagem.db")), intervalo_sincronizacao=0)
+    replica.sincronizar()
+
+    primario.adicionar("t2", "T2")
+    for _ in range(3):
+        assert [t["id"] for t in replica.get_triagens_recentes()] == ["t1"]
+    assert replica.contar_triagens() == 1
+    assert primario.exportacoes == 1
+
+
+def test_replica_sincroniza_em_segundo_plano(tmp_path):
+    primario = PrimarioEmMemoria()
+    replica = ReplicaSQLite(primario, SQLiteDatabase(str(tmp_path / "triagem.db")), intervalo_sincronizacao=0.02)
+    replica.iniciar_sincronizacao()
+    try:
+        primario.adicionar("t1", "T1")
+        limite = time.monotonic() + 5
+        while not replica.get_triagens_por_ticket("T1") and time.monotonic() < limite:
+            time.sleep(0.01)
+        assert [t["id"] for t in replica.get_triagens_por_ticket("T1")] == ["t1"]
+    finally:
+        replica.parar_sincronizacao(timeout=5)
+    assert replica._thread_sincronizacao is None
+
+
+def test_replica_sincroniza_fingerprints_de_forma_incremental(tmp_path):
+    primario = PrimarioEmMemoria()
+    primario.adicionar_fingerprint("h1", idade=timedelta(hours=1))
+    replica = ReplicaSQLite(primario, SQLiteDatabase(str(tmp_path / "triagem.db")), intervalo_sincronizacao=0)
+    replica.sincronizar()
+
+    primario.adicionar_fingerprint("h2")
+    replica.sincronizar()
+    replica.sincronizar()
+
+    # Cada leitura parte da marca da anterior (menos a janela de sobreposição)
+    assert primario.fingerprints_exportados == [["h1"], ["h1", "h2"], ["h2"]]
+    assert sorted(f["hash"] for f in replica.get_fingerprints()) == ["h1", "h2"]
+    assert replica.sincronizar(completa=True) == 0
+    assert primario.fingerprints_exportados[-1] == ["h1", "h2"]
+
+
+def test_replica_importa_triagem_gravada_com_relogio_atrasado(tmp_path):
+    primario = PrimarioEmMemoria()
+    primario.adicionar("t1", "T1")
+    replica = ReplicaSQLite(primario, SQLiteDatabase(str(tmp_path / "triagem.db")), intervalo_sincronizacao=0)
+    replica.sincronizar()
+    marca = replica.replica.get_marca_sincronizacao("triagens")
+
+    # Fica visível depois da sincronização, com updated_at anterior à marca
+    primario.adicionar("t2", "T2", atraso=timedelta(seconds=30))
+    replica.sincronizar()
+
+    assert [t["id"] for t in replica.get_triagens_por_ticket("T2")] == ["t2"]
+    assert replica.replica.get_marca_sincronizacao("triagens") == marca
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from templates_prompt import TEMPLATE_PADRAO, CacheTemplatesPrompt, MetricasTemplates
+
+BASE = {
+    "prompts_templates": {
+        "padrao": "Erros comuns em geral",
+        "por_tipo": {"banco": "Foco no SQL Server", "sistema": "Foco em permissões"},
+        "por_modulo": {"FINANCEIRO": "Módulo de boletos", "PEDAGÓGICO": "Módulo de notas"},
+    }
+}
+
+
+def test_template_escolhido_pelo_modulo_e_pelo_padrao():
+    cache = CacheTemplatesPrompt(BASE)
+    # (sem módulo + 2 módulos) x (sem tipo + 2 tipos), compilados uma única vez
+    assert len(cache) == 9
+
+    padrao = cache.selecionar(None, [])
+    assert padrao.id == TEMPLATE_PADRAO
+    assert padrao.texto == "=== FOCO DA TRIAGEM ===\nErros comuns em geral\n"
+    assert padrao.tokens > 0
+
+    # Módulo normalizado; módulo sem template cai no genérico
+    assert cache.selecionar("pedagogico", []).id == "modulo:PEDAGÓGICO"
+    assert cache.selecionar("RH", []) is padrao
+
+    # O primeiro padrão (mais relevante) com template de tipo define o foco
+    padroes = [{"tipo": "codigo_vb"}, {"tipo": "banco"}, {"tipo": "sistema"}]
+    template = cache.selecionar("Financeiro", padroes)
+    assert template.id == "modulo:FINANCEIRO+tipo:banco"
+    assert template.texto == "=== FOCO DA TRIAGEM ===\nMódulo de boletos\n\nFoco no SQL Server\n"
+    assert cache.selecionar("Financeiro", padroes) is template
+    assert cache.selecionar(None, padroes[2:]).id == "tipo:sistema"
+
+
+def test_base_sem_templates():
+    cache = CacheTemplatesPrompt({})
+    assert len(cache) == 1
+    assert cache.selecionar("FINANCEIRO", [{"tipo": "banco"}]).id == TEMPLATE_PADRAO
+
+
+def test_metricas_acumuladas_por_template():
+    metricas = MetricasTemplates()
+    assert metricas.resumo() == {}
+    metricas.registrar("tipo:banco", 1000, 200.0)
+    metricas.registrar("tipo:banco", 1200, 400.0)
+    metricas.registrar(TEMPLATE_PADRAO, 900, 100.04)
+
+    resumo = metricas.resumo()
+    assert list(resumo) == [TEMPLATE_PADRAO, "tipo:banco"]
+    assert resumo["tipo:banco"] == {
+        "chamadas": 2, "tokens_medios_prompt": 1100.0, "latencia_media_ms": 300.0, "latencia_max_ms": 400.0
+    }
+    assert resumo[TEMPLATE_PADRAO]["latencia_media_ms"] == pytest.approx(100.0)
+
+
+def test_template_abre_o_sufixo_enviado_a_ia(criar_servico, monkeypatch):
+    servico = criar_servico()
+    sufixos = []
+    gerar_async = servico.backend_ia.gerar_async
+
+    async def gerar_registrando(sufixo, **kwargs):
+        sufixos.append(sufixo)
+        return await gerar_async(sufixo, **kwargs)
+    monkeypatch.setattr(servico.backend_ia, "gerar_async", gerar_registrando)
+
+    chamado = "Erro ao gerar boleto: Msg 1205, Level 13, State 51. Transaction was deadlocked"
+    resultado = asyncio.run(servico.analisar_chamado(chamado, "FINANCEIRO"))
+
+    [sufixo] = sufixos
+    [template_id] = servico.metricas_templates.resumo()
+    template = servico.templates_prompt.selecionar("FINANCEIRO", resultado["padroes_encontrados"])
+    assert template_id == template.id
+    assert template.id.startswith("modulo:FINANCEIRO+tipo:")
+    assert sufixo.startswith(template.texto)
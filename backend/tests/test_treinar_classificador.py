@@ -0,0 +1,21 @@
+from treinar_classificador import montar_exemplos
+
+
+def triagem(analise, **extras):
+    return {"chamado_texto": "Erro ao gerar boleto", "modulo_identificado": "FINANCEIRO", "analise_ia": analise, **extras}
+
+
+def test_somente_analises_reais_da_ia_viram_exemplos():
+    rotulo = {"tipo_problema": "banco", "prioridade": "alta"}
+    triagens = [triagem(rotulo)] + [
+        triagem({**rotulo, "origem": origem})
+        for origem in ("base_conhecimento", "classificador", "triagem_reutilizada", "triagem_anterior")
+    ] + [
+        triagem(rotulo, modo_mock=True),
+        triagem({**rotulo, "erro": "timeout"}),
+        triagem({"tipo_problema": "inexistente"}),
+        triagem({}),
+    ]
+
+    exemplos = montar_exemplos(triagens)
+    assert [analise for _, analise in exemplos] == [rotulo]
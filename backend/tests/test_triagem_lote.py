@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from backends_ia import BackendIA
+from prompt_triagem import ids_do_lote
+
+CHAMADOS = [
+    {"id": f"c{i}", "chamado_texto": f"Relatório {nome} demora muito para abrir", "modulo": "RELATÓRIOS"}
+    for i, nome in enumerate(["de frequência", "financeiro anual", "de notas bimestrais", "de matrículas"])
+]
+
+
+class BackendRoteirizado(BackendIA):
+    """Responde cada lote por uma função; registra os ids enviados em cada requisição"""
+    nome = "roteirizado"
+
+    def __init__(self, responder):
+        super().__init__("")
+        self.responder = responder
+        self.requisicoes = []
+
+    def gerar(self, conteudo, esquema=None):
+        ids = ids_do_lote(conteudo)
+        self.requisicoes.append(ids)
+        return self.responder(ids)
+
+
+def analise(ticket_id=None):
+    resultado = {"tipo_problema": "performance", "diagnostico": "lento", "solucao_sugerida": "índice", "prioridade": "media"}
+    return {"ticket_id": ticket_id, **resultado} if ticket_id else resultado
+
+
+def analisar_lote(servico, backend):
+    servico.backend_ia = backend
+    servico.tamanho_lote_ia = 4
+    return asyncio.run(servico.analisar_chamados_lote(CHAMADOS))
+
+
+def test_lote_malformado_e_dividido_ao_meio(criar_servico):
+    def responder(ids):
+        if len(ids) == 4:
+            return "desculpe, não consegui"
+        return "```json\n" + json.dumps([analise(i) for i in ids]) + "\n```"
+
+    backend = BackendRoteirizado(responder)
+    resultados = analisar_lote(criar_servico(), backend)
+
+    assert backend.requisicoes == [["c0", "c1", "c2", "c3"], ["c0", "c1"], ["c2", "c3"]]
+    assert [r["id"] for r in resultados] == ["c0", "c1", "c2", "c3"]
+    assert all(r["analise_ia"]["tipo_problema"] == "performance" for r in resultados)
+
+
+def test_chamados_ausentes_sao_reenviados(criar_servico):
+    def responder(ids):
+        if not ids:
+            # Lote de um chamado usa o caminho individual
+            return json.dumps(analise())
+        return json.dumps([analise(i) for i in ids if i != "c2"])
+
+    backend = BackendRoteirizado(responder)
+    servico = criar_servico()
+    resultados = analisar_lote(servico, backend)
+
+    assert backend.requisicoes == [["c0", "c1", "c2", "c3"], []]
+    assert servico.requisicoes_ia == 2
+    assert all("erro" not in r["analise_ia"] for r in resultados)
+
+
+def test_respostas_com_ids_desconhecidos_sao_ignoradas(criar_servico):
+    servico = criar_servico()
+    analises = servico._parse_resposta_lote(json.dumps([analise("c9"), analise("c1"), "lixo"]), ["c0", "c1"])
+    assert list(analises) == ["c1"]
+    assert "ticket_id" not in analises["c1"]
+    assert servico._parse_resposta_lote('{"ticket_id": "c0"}', ["c0"]) is None
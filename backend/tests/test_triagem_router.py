@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from eventos_dashboard import barramento_dashboard
+
+
+def test_triagem_por_ticket_grava_e_publica_o_tempo(criar_servico, monkeypatch):
+    # O router cria o serviço na importação: o ambiente do criar_servico já vale aqui
+    import triagem_router
+    from integracao_service import integracao_service
+
+    servico = criar_servico()
+    monkeypatch.setattr(triagem_router, "triagem_service", servico)
+
+    async def buscar_chamado_por_ticket(ticket_numero):
+        return {
+            "chamado_gerado": "Erro ao gerar boleto: Transaction was deadlocked on lock resources",
+            "modulo_identificado": "FINANCEIRO",
+            "analise_id": "a1"
+        }
+    monkeypatch.setattr(integracao_service, "buscar_chamado_por_ticket", buscar_chamado_por_ticket)
+
+    preparar = servico._preparar_chamado
+
+    def preparar_lento(chamado_texto, modulo):
+        time.sleep(0.05)
+        return preparar(chamado_texto, modulo)
+    monkeypatch.setattr(servico, "_preparar_chamado", preparar_lento)
+
+    async def cenario():
+        fila = barramento_dashboard.assinar()
+        try:
+            resposta = await triagem_router.triagem_por_ticket("12345")
+            evento = await asyncio.wait_for(fila.get(), timeout=5)
+        finally:
+            barramento_dashboard.cancelar(fila)
+        return resposta, evento
+
+    resposta, evento = asyncio.run(cenario())
+
+    assert resposta["tempo_processamento_ms"] >= 50
+    assert evento["tipo"] == "nova_triagem"
+    assert evento["dados"]["delta"]["tempo_processamento_ms"] == resposta["tempo_processamento_ms"]
+    triagem = servico.repositorio.get_triagem_por_id(resposta["triagem_id"])
+    assert triagem["tempo_processamento_ms"] == resposta["tempo_processamento_ms"]
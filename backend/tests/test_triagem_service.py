@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+
+def test_etapas_locais_nao_bloqueiam_o_event_loop(criar_servico, monkeypatch):
+    servico = criar_servico()
+    preparar = servico._preparar_chamado
+
+    def preparar_lento(chamado_texto, modulo):
+        time.sleep(0.3)
+        return preparar(chamado_texto, modulo)
+    monkeypatch.setattr(servico, "_preparar_chamado", preparar_lento)
+
+    async def cenario():
+        batidas = 0
+
+        async def batimento():
+            nonlocal batidas
+            while True:
+                await asyncio.sleep(0.01)
+                batidas += 1
+
+        tarefa = asyncio.create_task(batimento())
+        resultado = await servico.analisar_chamado("Erro ao salvar cadastro do aluno", "CADASTROS")
+        tarefa.cancel()
+        return resultado, batidas
+
+    resultado, batidas = asyncio.run(cenario())
+    assert resultado["analise_ia"]
+    assert batidas >= 10
+
+
+def test_salvar_reaproveita_as_features_da_analise(criar_servico, monkeypatch):
+    import triagem_service
+
+    servico = criar_servico()
+    texto = "Erro ao gerar boleto: Transaction was deadlocked on lock resources"
+    resultado = asyncio.run(servico.analisar_chamado(texto, "FINANCEIRO"))
+    analise_ia = {"tipo_problema": "banco", "prioridade": "alta", "solucao_sugerida": "Reprocessar o boleto"}
+    resultado = {**resultado, "analise_ia": analise_ia, "modo_mock": False}
+
+    chamadas = []
+    extrair = triagem_service.extrair_features
+
+    def extrair_contando(*args):
+        chamadas.append(args)
+        return extrair(*args)
+    monkeypatch.setattr(triagem_service, "extrair_features", extrair_contando)
+
+    triagem_id = servico.salvar_triagem_firebase("123", texto, "FINANCEIRO", resultado)
+
+    assert chamadas == []
+    assert servico.indice_duplicatas.buscar(resultado["_features"]).triagem_id == triagem_id
+    assert servico.buscar_similares("deadlocked on lock resources", "FINANCEIRO")[0]["triagem_id"] == triagem_id
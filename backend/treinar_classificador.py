@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Treina o classificador local de tipo_problema e prioridade
+Lê as triagens reais do repositório configurado, Firestore ou SQLite (ou de
+um JSONL exportado com chamado_texto, modulo_identificado e analise_ia),
+separa uma parte para validação, mostra a acurácia e a cobertura no limiar de
+confiança e grava o artefato .npz.
+
+Uso:
+    python treinar_classificador.py [--arquivo triagens.jsonl] [--saida modelo_classificador.npz]
+        [--dimensao 65536] [--epocas 15] [--limiar 0.9] [--validacao 0.2]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from config import caminho_dados
+from classificador_triagem import CAMPOS_CLASSIFICADOS, ROTULOS_VALIDOS, ClassificadorTriagem
+from features_chamado import extrair_features
+from repositorio_triagens import criar_repositorio
+from vetorizacao_hash import DIMENSAO_PADRAO
+
+
+def carregar_triagens(arquivo: str = None):
+    if arquivo:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return [json.loads(linha) for linha in f if linha.strip()]
+    repositorio = criar_repositorio()
+    if not repositorio.is_configured():
+        print("❌ Armazenamento não configurado - use --arquivo com um export JSONL")
+        return []
+    return repositorio.get_triagens_historico()
+
+
+def montar_exemplos(triagens):
+    exemplos = []
+    for triagem in triagens:
+        # Só análises reais da IA servem de rótulo (mesma regra do aprendizado de fingerprints):
+        # base de conhecimento, classificador e reaproveitamentos têm origem, o mock tem modo_mock
+        analise = triagem.get('analise_ia') or {}
+        if "erro" in analise or analise.get("origem") or triagem.get('modo_mock'):
+            continue
+        if not any(analise.get(campo) in ROTULOS_VALIDOS[campo] for campo in CAMPOS_CLASSIFICADOS):
+            continue
+        features = extrair_features(triagem['chamado_texto'], triagem.get('modulo_identificado'))
+        exemplos.append((features, analise))
+    return exemplos
+
+
+def avaliar(classificador: ClassificadorTriagem, exemplos, limiar: float):
+    inicio = time.perf_counter()
+    previsoes = [classificador.prever(features) for features, _ in exemplos]
+    tempo_ms = (time.perf_counter() - inicio) * 1000 / max(len(exemplos), 1)
+
+    for campo in classificador.cabecas:
+        pares = [
+            (previsao[campo], analise[campo]) for previsao, (_, analise) in zip(previsoes, exemplos)
+            if analise.get(campo) in ROTULOS_VALIDOS[campo]
+        ]
+        if not pares:
+            continue
+        acertos = sum(p["valor"] == r for p, r in pares)
+        confiantes = [(p, r) for p, r in pares if p["confianca"] >= limiar]
+        acertos_confiantes = sum(p["valor"] == r for p, r in confiantes)
+        print(f"   {campo}: acurácia {acertos / len(pares):.1%} | "
+              f"cobertura no limiar {limiar}: {len(confiantes) / len(pares):.1%} "
+              f"(acurácia {acertos_confiantes / max(len(confiantes), 1):.1%})")
+    print(f"   Inferência: {tempo_ms:.3f} ms/chamado")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Treina o classificador local de triagem")
+    parser.add_argument("--arquivo", default=None, help="JSONL com chamado_texto, modulo_identificado e analise_ia")
+    parser.add_argument(
+        "--saida",
+        default=os.getenv("TRIAGEM_MODELO_CLASSIFICADOR") or caminho_dados("modelo_classificador.npz"),
+    )
+    parser.add_argument("--dimensao", type=int, default=DIMENSAO_PADRAO)
+    parser.add_argument("--epocas", type=int, default=15)
+    parser.add_argument("--limiar", type=float, default=0.9)
+    parser.add_argument("--validacao", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.dimensao & (args.dimensao - 1):
+        print("❌ --dimensao deve ser potência de 2")
+        return 1
+
+    exemplos = montar_exemplos(carregar_triagens(args.arquivo))
+    if len(exemplos) < 10:
+        print(f"❌ Apenas {len(exemplos)} triagens rotuladas - insuficiente para treinar")
+        return 1
+
+    random.Random(42).shuffle(exemplos)
+    corte = int(len(exemplos) * (1 - args.validacao))
+    treino, validacao = exemplos[:corte], exemplos[corte:]
+
+    print(f"📊 {len(treino)} triagens de treino, {len(validacao)} de validação")
+    inicio = time.perf_counter()
+    classificador = ClassificadorTriagem.treinar(treino, args.dimensao, args.epocas)
+    print(f"   Treino em {time.perf_counter() - inicio:.1f}s")
+    if validacao:
+        avaliar(classificador, validacao, args.limiar)
+
+    # O artefato final usa todas as triagens
+    classificador = ClassificadorTriagem.treinar(exemplos, args.dimensao, args.epocas)
+    classificador.salvar(args.saida)
+    print(f"✅ Classificador gravado em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
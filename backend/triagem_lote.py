@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Triagem offline de um backlog de chamados
+Lê um arquivo JSONL ({"id", "chamado_texto", "modulo"} por linha), agrupa as
+chamadas à IA em lotes e grava um resultado JSONL por chamado.
+
+Uso:
+    python triagem_lote.py chamados.jsonl resultados.jsonl [--tamanho-lote 8] [--rpm 15]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from triagem_service import TriagemService, solucao_para_dict
+
+# Chamados enviados ao serviço por vez (cada bloco gera um ou mais lotes de IA)
+CHAMADOS_POR_BLOCO = 200
+
+
+def ler_chamados(caminho: str):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+async def executar(servico: TriagemService, chamados, saida, rpm: int):
+    intervalo = 60.0 / rpm if rpm else 0.0
+    for inicio in range(0, len(chamados), CHAMADOS_POR_BLOCO):
+        bloco = chamados[inicio:inicio + CHAMADOS_POR_BLOCO]
+        requisicoes_antes = servico.requisicoes_ia
+        inicio_bloco = time.perf_counter()
+
+        for resultado in await servico.analisar_chamados_lote(bloco):
+            saida.write(json.dumps({
+                "id": resultado["id"],
+                "padroes": [p["padrao_id"] for p in resultado["padroes_encontrados"]],
+                "analise_ia": resultado["analise_ia"],
+                "solucoes_sugeridas": [solucao_para_dict(s) for s in resultado["solucoes_sugeridas"]],
+                "problema_conhecido": resultado["problema_conhecido"]
+            }, ensure_ascii=False) + "\n")
+
+        # Respeita a cota de requisições por minuto
+        espera = (servico.requisicoes_ia - requisicoes_antes) * intervalo - (time.perf_counter() - inicio_bloco)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Triagem offline de chamados em lote")
+    parser.add_argument("entrada", help="Arquivo JSONL com id, chamado_texto e modulo")
+    parser.add_argument("saida", help="Arquivo JSONL de resultados")
+    parser.add_argument("--tamanho-lote", type=int, default=None, help="Chamados por requisição à IA")
+    parser.add_argument("--rpm", type=int, default=0, help="Cota de requisições por minuto (0 = sem limite)")
+    args = parser.parse_args()
+
+    chamados = ler_chamados(args.entrada)
+    ids = [str(c["id"]) for c in chamados]
+    if len(set(ids)) != len(ids):
+        print("❌ Ids de chamado repetidos no arquivo de entrada")
+        return 1
+
+    servico = TriagemService()
+    if args.tamanho_lote:
+        servico.tamanho_lote_ia = max(1, args.tamanho_lote)
+
+    inicio = time.perf_counter()
+    with open(args.saida, 'w', encoding='utf-8') as saida:
+        asyncio.run(executar(servico, chamados, saida, args.rpm))
+    duracao = time.perf_counter() - inicio
+
+    print(f"📊 {len(chamados)} chamados em {duracao:.1f}s ({len(chamados) / max(duracao, 1e-9):.1f} chamados/s)")
+    print(f"   Requisições à IA: {servico.requisicoes_ia} (lote de até {servico.tamanho_lote_ia})")
+    if servico.requisicoes_ia and args.rpm:
+        por_requisicao = len(chamados) / servico.requisicoes_ia
+        print(f"   Vazão máxima na cota de {args.rpm} rpm: {por_requisicao * args.rpm:.0f} chamados/min")
+    print(f"✅ Resultados gravados em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
+import asyncio
 import time
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from schemas_triagem import (
     TriagemRequest,
     TriagemResponse,
+    TriagemLoteRequest,
+    TicketsLoteRequest,
+    TriagensLoteRequest,
     FeedbackTriagemRequest,
     FeedbackTriagemResponse,
     EstatisticasTriagemResponse,
@@ -22,13 +27,31 @@ from schemas_triagem import (
     TriagemHistorico
 )
 from triagem_service import TriagemService, solucao_para_dict
+from prompt_triagem import VERSAO_PREFIXO
 from integracao_service import integracao_service
+from eventos_dashboard import barramento_dashboard, transmitir_eventos
 
 router = APIRouter(prefix="/api/triagem", tags=["Triagem"])
 
 # Inicializa serviços
 triagem_service = TriagemService()
 
+def padroes_para_dict(padroes: List[dict]) -> List[dict]:
+    """Campos dos padrões detectados expostos na resposta"""
+    return [
+        {
+            "tipo": p["tipo"],
+            "padrao_id": p["padrao_id"],
+            "palavra_chave": p["palavra_chave"],
+            "confianca": p["confianca"],
+            "posicao": p.get("posicao"),
+            "aproximado": p.get("aproximado", False),
+            "ocorrencias": p.get("ocorrencias", 1),
+            "especifico_modulo": p.get("especifico_modulo", False)
+        }
+        for p in padroes
+    ]
+
 # ============================================
 # ENDPOINTS DE TRIAGEM
 # ============================================
@@ -57,15 +80,7 @@ async def analisar_triagem(request: TriagemRequest):
         solucoes_dict = [solucao_para_dict(sol) for sol in resultado["solucoes_sugeridas"]]
         
         # Converte padrões para dict
-        padroes_dict = [
-            {
-                "tipo": p["tipo"],
-                "padrao_id": p["padrao_id"],
-                "palavra_chave": p["palavra_chave"],
-                "confianca": p["confianca"]
-            }
-            for p in resultado["padroes_encontrados"]
-        ]
+        padroes_dict = padroes_para_dict(resultado["padroes_encontrados"])
         
         # Converte análise IA para dict
         analise_ia_dict = resultado["analise_ia"]
@@ -83,6 +98,12 @@ async def analisar_triagem(request: TriagemRequest):
             solucoes_sugeridas=solucoes_dict,
             resumo=resumo_dict,
             modo_mock=resultado["modo_mock"],
+            features=resultado.get("features"),
+            problema_conhecido=resultado.get("problema_conhecido"),
+            classificacao=resultado.get("classificacao"),
+            compactacao=resultado.get("compactacao"),
+            triagens_similares=resultado.get("triagens_similares"),
+            duplicata=resultado.get("duplicata"),
             tempo_processamento_ms=tempo_ms,
             mensagem="Triagem realizada com sucesso"
         )
@@ -91,14 +112,172 @@ async def analisar_triagem(request: TriagemRequest):
         print(f"❌ Erro na triagem: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro na triagem: {str(e)}")
 
+@router.post("/analisar-lote")
+async def analisar_triagem_lote(request: TriagemLoteRequest):
+    """
+    Analisa vários chamados, agrupando as chamadas à IA em lotes
+    """
+    ids = [chamado.id for chamado in request.chamados]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Ids de chamado repetidos no lote")
+    
+    try:
+        inicio = time.time()
+        requisicoes_antes = triagem_service.requisicoes_ia
+        
+        print(f"🔍 Iniciando triagem em lote de {len(ids)} chamados")
+        
+        resultados = await triagem_service.analisar_chamados_lote(
+            [chamado.dict() for chamado in request.chamados]
+        )
+        
+        tempo_ms = int((time.time() - inicio) * 1000)
+        requisicoes_ia = triagem_service.requisicoes_ia - requisicoes_antes
+        
+        print(f"✅ Lote concluído em {tempo_ms}ms - {requisicoes_ia} requisições à IA")
+        
+        return {
+            "sucesso": True,
+            "total": len(resultados),
+            "requisicoes_ia": requisicoes_ia,
+            "tempo_processamento_ms": tempo_ms,
+            "resultados": [
+                {
+                    "id": resultado["id"],
+                    "padroes_encontrados": padroes_para_dict(resultado["padroes_encontrados"]),
+                    "analise_ia": resultado["analise_ia"],
+                    "solucoes_sugeridas": [solucao_para_dict(sol) for sol in resultado["solucoes_sugeridas"]],
+                    "resumo": resultado["resumo"],
+                    "modo_mock": resultado["modo_mock"],
+                    "features": resultado.get("features"),
+                    "problema_conhecido": resultado.get("problema_conhecido"),
+                    "classificacao": resultado.get("classificacao"),
+                    "compactacao": resultado.get("compactacao"),
+                    "triagens_similares": resultado.get("triagens_similares"),
+                    "duplicata": resultado.get("duplicata")
+                }
+                for resultado in resultados
+            ],
+            "mensagem": f"Triagem em lote realizada para {len(resultados)} chamados"
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro na triagem em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na triagem em lote: {str(e)}")
+
+@router.post("/similares")
+async def buscar_triagens_similares(
+    request: TriagemRequest,
+    k: int = Query(5, ge=1, le=50, description="Quantidade de triagens retornadas"),
+    mesmo_modulo: bool = Query(False, description="Considerar apenas triagens do mesmo módulo")
+):
+    """
+    Busca triagens anteriores parecidas com o chamado (sem chamar a IA)
+    """
+    try:
+        inicio = time.time()
+        similares = triagem_service.buscar_similares(
+            request.chamado_texto, request.modulo, k=k, mesmo_modulo=mesmo_modulo
+        )
+        tempo_ms = int((time.time() - inicio) * 1000)
+        
+        return {
+            "sucesso": True,
+            "total": len(similares),
+            "total_indexadas": len(triagem_service.indice_similaridade),
+            "similares": similares,
+            "tempo_processamento_ms": tempo_ms
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro na busca de similares: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na busca de similares: {str(e)}")
+
+@router.get("/buscar")
+async def buscar_triagens(
+    q: str = Query(..., min_length=2, description="Termos buscados no chamado, diagnóstico e soluções"),
+    modulo: Optional[str] = Query(None, description="Filtrar por módulo"),
+    limite: int = Query(20, ge=1, le=100, description="Quantidade de triagens retornadas"),
+    offset: int = Query(0, ge=0, le=1000, description="Deslocamento para paginação")
+):
+    """
+    Busca textual no histórico de triagens. Todas as triagens com todos os
+    termos são ordenadas por relevância (BM25 do SQLite FTS5: termos raros pesam
+    mais, diagnóstico > soluções > texto do chamado); empates vêm da mais recente
+    """
+    try:
+        inicio = time.time()
+        triagens = triagem_service.busca_triagens.buscar(q, modulo=modulo, limite=limite, offset=offset)
+        tempo_ms = round((time.time() - inicio) * 1000, 2)
+        
+        return {
+            "sucesso": True,
+            "q": q,
+            "total": len(triagens),
+            "triagens": triagens,
+            "tempo_processamento_ms": tempo_ms
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro na busca de triagens: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na busca de triagens: {str(e)}")
+
+@router.post("/triagens/lote")
+async def consultar_triagens_lote(request: TriagensLoteRequest):
+    """
+    Consulta várias triagens por ID (leituras em lote do Firestore)
+    """
+    try:
+        inicio = time.time()
+        triagens = triagem_service.repositorio.get_triagens_por_ids(request.triagem_ids)
+        tempo_ms = round((time.time() - inicio) * 1000, 2)
+        
+        return {
+            "sucesso": True,
+            "total": len(triagens),
+            "triagens": triagens,
+            "nao_encontradas": [triagem_id for triagem_id in request.triagem_ids if triagem_id not in triagens],
+            "tempo_processamento_ms": tempo_ms
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro na consulta de triagens em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na consulta de triagens em lote: {str(e)}")
+
+@router.post("/triagens/por-tickets")
+async def consultar_triagens_por_tickets(request: TicketsLoteRequest):
+    """
+    Triagens de vários tickets, da mais recente para a mais antiga em cada ticket
+    """
+    try:
+        inicio = time.time()
+        triagens = triagem_service.repositorio.get_triagens_por_tickets(request.tickets)
+        tempo_ms = round((time.time() - inicio) * 1000, 2)
+        
+        return {
+            "sucesso": True,
+            "total_tickets": len(triagens),
+            "triagens": triagens,
+            "tempo_processamento_ms": tempo_ms
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro na consulta de triagens por tickets: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na consulta de triagens por tickets: {str(e)}")
+
 @router.post("/feedback", response_model=FeedbackTriagemResponse)
 async def registrar_feedback_triagem(request: FeedbackTriagemRequest):
     """
     Registra feedback sobre uma triagem realizada
     """
     try:
-        # TODO: Implementar salvamento do feedback no banco
-        feedback_id = 1  # Placeholder
+        feedback_id = triagem_service.registrar_feedback(
+            triagem_id=request.triagem_id,
+            foi_util=request.solucao_util,
+            nota=request.nota,
+            comentario=request.comentario,
+            solucao_utilizada=request.solucao_usada
+        )
         
         print(f"📝 Feedback registrado para triagem {request.triagem_id}: {'👍' if request.solucao_util else '👎'}")
         
@@ -116,55 +295,51 @@ async def registrar_feedback_triagem(request: FeedbackTriagemRequest):
 # ENDPOINTS DE ESTATÍSTICAS
 # ============================================
 
+@router.get("/eventos")
+async def eventos_dashboard():
+    """
+    Fluxo Server-Sent Events para os dashboards: nova_triagem (item do
+    histórico e delta dos contadores do dia) e feedback. Os eventos vêm do
+    caminho de escrita, então os dashboards conectados não consultam o banco
+    """
+    return StreamingResponse(
+        transmitir_eventos(barramento_dashboard),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/estatisticas", response_model=EstatisticasTriagemResponse)
 async def obter_estatisticas_triagem(
-    dias: int = Query(7, description="Número de dias para consultar"),
+    dias: int = Query(7, ge=1, le=90, description="Número de dias para consultar"),
     categoria: Optional[str] = Query(None, description="Filtrar por categoria específica")
 ):
     """
     Obtém estatísticas de triagem do período
     """
     try:
-        # TODO: Implementar consulta real no banco
-        # Por enquanto, retorna dados mockados
-        
-        estatisticas_mock = []
-        for i in range(dias):
-            data = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            estatistica = EstatisticaTriagem(
-                data=data,
-                total_triagens=10 + i,
-                triagens_com_solucao=8 + i,
-                tipos_problema={
-                    "codigo": 5 + i,
-                    "banco": 3 + i,
-                    "configuracao": 2 + i
-                },
-                categorias_mais_comuns=[
-                    {"categoria": "Validação/Dados", "count": 4 + i},
-                    {"categoria": "Integridade Referencial", "count": 3 + i},
-                    {"categoria": "Performance", "count": 2 + i}
-                ],
-                prioridades={
-                    "alta": 3 + i,
-                    "media": 4 + i,
-                    "baixa": 3 + i
-                },
-                tempo_medio_processamento=1500.0 + (i * 100)
-            )
-            estatisticas_mock.append(estatistica)
+        dias_estatisticas = triagem_service.estatisticas_diarias(dias, categoria=categoria)
+        estatisticas = [EstatisticaTriagem(**dia) for dia in dias_estatisticas]
+        
+        categorias: Dict[str, int] = {}
+        for dia in estatisticas:
+            for item in dia.categorias_mais_comuns:
+                categorias[item["categoria"]] = categorias.get(item["categoria"], 0) + item["count"]
         
+        total_periodo = sum(s.total_triagens for s in estatisticas)
         resumo_geral = {
-            "total_triagens_periodo": sum(s.total_triagens for s in estatisticas_mock),
-            "media_triagens_dia": sum(s.total_triagens for s in estatisticas_mock) / dias,
-            "taxa_sucesso": sum(s.triagens_com_solucao for s in estatisticas_mock) / sum(s.total_triagens for s in estatisticas_mock),
-            "categoria_mais_comum": "Validação/Dados"
+            "total_triagens_periodo": total_periodo,
+            "media_triagens_dia": total_periodo / dias,
+            "taxa_sucesso": sum(s.triagens_com_solucao for s in estatisticas) / total_periodo if total_periodo else 0,
+            "tempo_medio_ms": round(
+                sum(s.tempo_medio_processamento * s.total_triagens for s in estatisticas) / total_periodo, 2
+            ) if total_periodo else 0,
+            "categoria_mais_comum": categoria or (max(categorias, key=categorias.get) if categorias else None)
         }
         
         return EstatisticasTriagemResponse(
             sucesso=True,
             periodo=f"Últimos {dias} dias",
-            estatisticas=estatisticas_mock,
+            estatisticas=estatisticas,
             resumo_geral=resumo_geral
         )
         
@@ -174,38 +349,27 @@ async def obter_estatisticas_triagem(
 
 @router.get("/historico", response_model=HistoricoTriagemResponse)
 async def obter_historico_triagem(
-    pagina: int = Query(1, description="Página (começa em 1)"),
-    por_pagina: int = Query(20, description="Registros por página"),
+    cursor: Optional[str] = Query(None, description="proximo_cursor da página anterior (vazio para a primeira)"),
+    por_pagina: int = Query(20, ge=1, le=100, description="Registros por página"),
     modulo: Optional[str] = Query(None, description="Filtrar por módulo")
 ):
     """
-    Obtém histórico de triagens realizadas
+    Obtém histórico de triagens realizadas, das mais recentes para as mais antigas
     """
     try:
-        # TODO: Implementar consulta real no banco
-        # Por enquanto, retorna dados mockados
-        
-        historico_mock = []
-        for i in range(min(por_pagina, 20)):  # Limita a 20 registros mockados
-            triagem = TriagemHistorico(
-                id=1000 + i,
-                data_triagem=datetime.now() - timedelta(hours=i * 2),
-                modulo="CADASTROS" if i % 3 == 0 else "FINANCEIRO" if i % 3 == 1 else "PEDAGÓGICO",
-                total_padroes=2 + (i % 4),
-                prioridade_geral="alta" if i % 4 == 0 else "media",
-                solucoes_geradas=1 + (i % 3),
-                teve_feedback=i % 5 == 0
-            )
-            historico_mock.append(triagem)
+        pagina = triagem_service.repositorio.get_historico_paginado(por_pagina, modulo=modulo, cursor=cursor)
+        triagens = [TriagemHistorico(**triagem) for triagem in pagina['triagens']]
         
         return HistoricoTriagemResponse(
             sucesso=True,
-            triagens=historico_mock,
-            total=len(historico_mock),
-            pagina=pagina,
-            por_pagina=por_pagina
+            triagens=triagens,
+            total=len(triagens),
+            por_pagina=por_pagina,
+            proximo_cursor=pagina['proximo_cursor']
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"❌ Erro ao obter histórico: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao obter histórico: {str(e)}")
@@ -284,6 +448,9 @@ async def health_check():
         "servico": "triagem",
         "versao": "1.0.0",
         "modo_mock": triagem_service.mock_mode,
+        "backend_ia": triagem_service.backend_ia.nome,
+        "triagens_indexadas": len(triagem_service.indice_similaridade),
+        "triagens_duplicatas": len(triagem_service.indice_duplicatas),
         "gemini_configured": gemini_configured,
         "timestamp": datetime.now().isoformat()
     }
@@ -326,7 +493,8 @@ async def listar_padroes_disponiveis():
                 "id": padrao_id,
                 "categoria": config["categoria"],
                 "prioridade": config["prioridade"],
-                "palavras_chave": config["palavras_chave"]
+                "palavras_chave": config["palavras_chave"],
+                "modulos": config.get("modulos", [])
             })
         
         # Padrões ASP.NET
@@ -336,7 +504,8 @@ async def listar_padroes_disponiveis():
                 "id": padrao_id,
                 "categoria": config["categoria"],
                 "prioridade": config["prioridade"],
-                "palavras_chave": config["palavras_chave"]
+                "palavras_chave": config["palavras_chave"],
+                "modulos": config.get("modulos", [])
             })
         
         # Padrões de banco
@@ -346,7 +515,8 @@ async def listar_padroes_disponiveis():
                 "id": padrao_id,
                 "categoria": config["categoria"],
                 "prioridade": config["prioridade"],
-                "palavras_chave": config["palavras_chave"]
+                "palavras_chave": config["palavras_chave"],
+                "modulos": config.get("modulos", [])
             })
         
         # Padrões de sistema
@@ -356,7 +526,8 @@ async def listar_padroes_disponiveis():
                 "id": padrao_id,
                 "categoria": config["categoria"],
                 "prioridade": config["prioridade"],
-                "palavras_chave": config["palavras_chave"]
+                "palavras_chave": config["palavras_chave"],
+                "modulos": config.get("modulos", [])
             })
         
         return {
@@ -369,6 +540,18 @@ async def listar_padroes_disponiveis():
         print(f"❌ Erro ao listar padrões: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao listar padrões: {str(e)}")
 
+@router.get("/metricas-prompts")
+async def metricas_prompts():
+    """
+    Tamanho médio do prompt e latência da IA por template (módulo/tipo)
+    """
+    return {
+        "sucesso": True,
+        "versao_prefixo": VERSAO_PREFIXO,
+        "total_templates": len(triagem_service.templates_prompt),
+        "templates": triagem_service.metricas_templates.resumo()
+    }
+
 # ============================================
 # ENDPOINTS DE INTEGRAÇÃO COM SISTEMA EXISTENTE
 # ============================================
@@ -406,7 +589,9 @@ async def triagem_por_ticket(ticket_numero: str):
         
         # 3. Executa a triagem
         print(f"🤖 Executando triagem...")
+        inicio = time.time()
         resultado = await triagem_service.analisar_chamado(chamado_texto, modulo)
+        tempo_ms = int((time.time() - inicio) * 1000)
         
         # 4. Adiciona informações de integração ao resultado
         resultado['integracao'] = {
@@ -422,28 +607,39 @@ async def triagem_por_ticket(ticket_numero: str):
         solucoes_dict = [solucao_para_dict(sol) for sol in resultado["solucoes_sugeridas"]]
         
         # 6. Converte padrões para dict
-        padroes_dict = [
-            {
-                "tipo": p["tipo"],
-                "padrao_id": p["padrao_id"],
-                "palavra_chave": p["palavra_chave"],
-                "confianca": p["confianca"]
-            }
-            for p in resultado["padroes_encontrados"]
-        ]
-        
-        print(f"✅ Triagem concluída para ticket {ticket_numero}")
+        padroes_dict = padroes_para_dict(resultado["padroes_encontrados"])
+        
+        # 7. Salva a triagem (aprende fingerprints e alimenta o índice de similaridade)
+        triagem_id = await asyncio.to_thread(
+            triagem_service.salvar_triagem_firebase,
+            ticket_numero=ticket_numero,
+            chamado_texto=chamado_texto,
+            modulo=modulo,
+            resultado={**resultado, "tempo_processamento_ms": tempo_ms, "solucoes_sugeridas": solucoes_dict},
+            analise_id_original=analise_id,
+            usuario=dados_chamado.get('usuario_nome')
+        )
+        
+        print(f"✅ Triagem concluída para ticket {ticket_numero} em {tempo_ms}ms")
         
         return {
             "sucesso": True,
             "ticket_numero": ticket_numero,
+            "triagem_id": triagem_id,
             "analise_id_original": analise_id,
             "padroes_encontrados": padroes_dict,
             "analise_ia": resultado["analise_ia"],
             "solucoes_sugeridas": solucoes_dict,
             "resumo": resultado["resumo"],
             "modo_mock": resultado["modo_mock"],
+            "features": resultado.get("features"),
+            "problema_conhecido": resultado.get("problema_conhecido"),
+            "classificacao": resultado.get("classificacao"),
+            "compactacao": resultado.get("compactacao"),
+            "triagens_similares": resultado.get("triagens_similares"),
+            "duplicata": resultado.get("duplicata"),
             "integracao": resultado["integracao"],
+            "tempo_processamento_ms": tempo_ms,
             "mensagem": f"Triagem realizada com sucesso para ticket {ticket_numero}"
         }
         
@@ -482,6 +678,28 @@ async def buscar_chamado_sistema_principal(ticket_numero: str):
         print(f"❌ Erro ao buscar chamado: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar chamado: {str(e)}")
 
+@router.post("/sistema-principal/chamados-lote")
+async def buscar_chamados_lote_sistema_principal(request: TicketsLoteRequest):
+    """
+    Busca os chamados de vários tickets no sistema principal
+    """
+    try:
+        inicio = time.time()
+        chamados = await integracao_service.buscar_chamados_por_tickets(request.tickets)
+        tempo_ms = round((time.time() - inicio) * 1000, 2)
+        
+        return {
+            "sucesso": True,
+            "total": len(chamados),
+            "chamados": chamados,
+            "nao_encontrados": [ticket for ticket in dict.fromkeys(request.tickets) if ticket not in chamados],
+            "tempo_processamento_ms": tempo_ms
+        }
+        
+    except Exception as e:
+        print(f"❌ Erro ao buscar chamados em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar chamados em lote: {str(e)}")
+
 @router.get("/sistema-principal/status")
 async def verificar_status_sistema_principal():
     """
@@ -502,12 +720,15 @@ async def verificar_status_sistema_principal():
         raise HTTPException(status_code=500, detail=f"Erro ao verificar status: {str(e)}")
 
 @router.get("/sistema-principal/analises-recentes")
-async def obter_analises_recentes_sistema_principal(limite: int = Query(10, description="Número de análises a retornar")):
+async def obter_analises_recentes_sistema_principal(
+    limite: int = Query(10, description="Número de análises a retornar"),
+    incluir_chamado: bool = Query(False, description="Incluir o texto completo do chamado gerado")
+):
     """
     Obtém análises recentes do sistema principal
     """
     try:
-        analises = await integracao_service.obter_analises_recentes(limite)
+        analises = await integracao_service.obter_analises_recentes(limite, incluir_chamado=incluir_chamado)
         
         return {
             "sucesso": True,
@@ -1,10 +1,25 @@
+import asyncio
 import json
-import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
-import google.generativeai as genai
 import os
-from firebase_db import FirebaseDatabase
+import time
+import threading
+from datetime import datetime, timezone
+from config import caminho_dados
+from repositorio_triagens import CATEGORIAS_POR_DIA, criar_repositorio
+from features_chamado import FeaturesChamado, extrair_features
+from matcher_padroes import MatcherPadroes
+from fingerprints_erros import Fingerprint, IndiceFingerprints, ProblemaConhecido, gerar_fingerprints
+from compactacao_chamado import ORCAMENTO_TOKENS_PADRAO, ChamadoCompactado, compactar_chamado, estimar_tokens
+from prompt_triagem import ESQUEMA_RESPOSTA_LOTE, PREFIXO_ESTATICO, montar_sufixo, montar_sufixo_lote
+from backends_ia import criar_backend_ia
+from classificador_triagem import ClassificadorTriagem
+from indice_similaridade import IndiceSimilaridade
+from duplicatas_minhash import IndiceDuplicatas, TriagemDuplicada
+from busca_triagens import BuscaTriagens
+from templates_prompt import CacheTemplatesPrompt, MetricasTemplates
+from eventos_dashboard import barramento_dashboard
 
 @dataclass
 class SolucaoTriagem:
@@ -17,32 +32,107 @@ class SolucaoTriagem:
     scripts_sugeridos: Optional[List[str]] = None
     confianca: float = 0.0  # 0.0 a 1.0
 
+@dataclass
+class ChamadoPreparado:
+    """Etapas locais da triagem (features, padrões, fingerprints) de um chamado"""
+    modulo: Optional[str]
+    features: FeaturesChamado
+    padroes: List[Dict[str, Any]]
+    fingerprints: List[Fingerprint]
+    conhecido: Optional[ProblemaConhecido] = None
+    classificacao: Optional[Dict[str, Dict[str, Any]]] = None
+    compactado: Optional[ChamadoCompactado] = None
+    similares: Optional[List[Dict[str, Any]]] = None
+    duplicata: Optional[TriagemDuplicada] = None
+
 class TriagemService:
     def __init__(self):
         self.base_conhecimento = self._carregar_base_conhecimento()
+        # Palavras-chave normalizadas e compiladas uma única vez
+        busca_aproximada = os.getenv("TRIAGEM_BUSCA_APROXIMADA", "true").lower() != "false"
+        self.matcher_padroes = MatcherPadroes(self.base_conhecimento, busca_aproximada=busca_aproximada)
         
-        # Inicializa Firebase
-        self.firebase_db = FirebaseDatabase()
+        # Templates de prompt por módulo/tipo compilados uma única vez
+        self.templates_prompt = CacheTemplatesPrompt(self.base_conhecimento)
+        self.metricas_templates = MetricasTemplates()
+        self.tokens_prefixo = estimar_tokens(PREFIXO_ESTATICO)
         
-        # Mesma lógica do sistema principal
-        api_key = os.getenv("GEMINI_API_KEY", "")
+        # Orçamento (tokens estimados) do texto do chamado enviado no prompt
+        self.orcamento_tokens_chamado = int(os.getenv("TRIAGEM_ORCAMENTO_TOKENS_CHAMADO", ORCAMENTO_TOKENS_PADRAO))
         
-        if api_key and api_key != "sua_chave_aqui":
-            genai.configure(api_key=api_key)
-            # Usando Gemini 2.5 Flash - rápido e estável (mesmo do sistema principal)
-            self.model = genai.GenerativeModel('models/gemini-2.5-flash')
-            self.mock_mode = False
-            print("✅ Gemini API configurada - modo IA ativo")
-        else:
-            self.mock_mode = True
+        # Modo em lote: chamados por requisição à IA e total de requisições feitas
+        self.tamanho_lote_ia = max(1, int(os.getenv("TRIAGEM_TAMANHO_LOTE_IA", "8")))
+        self.requisicoes_ia = 0
+        
+        # Armazenamento das triagens (Firestore, SQLite local ou réplica SQLite do Firestore)
+        self.repositorio = criar_repositorio()
+        
+        # Série diária das estatísticas em cache por (dias, categoria)
+        self.ttl_cache_estatisticas = float(os.getenv("TRIAGEM_CACHE_ESTATISTICAS", "30"))
+        self._cache_estatisticas: Dict[Tuple[int, Optional[str]], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._lock_cache_estatisticas = threading.Lock()
+        
+        # Backend de IA (Gemini, servidor HTTP ou mock) com o prefixo estático como system instruction
+        self.backend_ia = criar_backend_ia(PREFIXO_ESTATICO)
+        self.mock_mode = self.backend_ia.mock
+        
+        if self.mock_mode:
             print("⚠️  Gemini API não configurada - usando modo MOCK para triagem")
             print("💡 Configure GEMINI_API_KEY no arquivo .env para usar a IA real")
+        else:
+            print(f"✅ Backend de IA '{self.backend_ia.nome}' configurado - modo IA ativo")
+        
+        # Classificador local (tipo_problema/prioridade) treinado com treinar_classificador.py
+        caminho_classificador = os.getenv("TRIAGEM_MODELO_CLASSIFICADOR") or caminho_dados("modelo_classificador.npz")
+        self.classificador = (
+            ClassificadorTriagem.carregar(caminho_classificador) if os.path.exists(caminho_classificador) else None
+        )
+        self.limiar_classificador = float(os.getenv("TRIAGEM_LIMIAR_CLASSIFICADOR", "0.9"))
+        self.pular_ia_classificador = os.getenv("TRIAGEM_PULAR_IA_CLASSIFICADOR", "false").lower() == "true"
+        if self.classificador:
+            print(f"✅ Classificador local carregado ({self.classificador.amostras} triagens de treino)")
         
-        # Status do Firebase
-        if self.firebase_db.is_configured():
-            print("✅ Firebase configurado - triagens serão salvas")
+        # Triagens anteriores similares (vetores locais em disco, acrescidos a cada triagem salva)
+        self.indice_similaridade = IndiceSimilaridade(
+            os.getenv("TRIAGEM_DIRETORIO_SIMILARIDADE") or caminho_dados("indice_similaridade")
+        )
+        self.similaridade_minima = float(os.getenv("TRIAGEM_SIMILARIDADE_MINIMA", "0.6"))
+        self.similares_por_chamado = int(os.getenv("TRIAGEM_SIMILARES_POR_CHAMADO", "3"))
+        if len(self.indice_similaridade):
+            print(f"✅ Índice de similaridade carregado ({len(self.indice_similaridade)} triagens)")
+        
+        # Busca textual no histórico (SQLite FTS5), alimentada a cada triagem salva
+        self.busca_triagens = BuscaTriagens(os.getenv("TRIAGEM_BANCO_BUSCA") or caminho_dados("busca_triagens.db"))
+        
+        # Status do armazenamento
+        if self.repositorio.is_configured():
+            print(f"✅ Armazenamento '{self.repositorio.nome}' configurado - triagens serão salvas")
+            # Cópia dos configs da versão da base, que resolve os padrões gravados por referência
+            self.repositorio.configs_referencia(self.base_conhecimento)
         else:
-            print("⚠️  Firebase não configurado - triagens não serão salvas")
+            print("⚠️  Armazenamento não configurado - triagens não serão salvas")
+        
+        # Índice de problemas conhecidos (base de conhecimento + triagens anteriores)
+        self.pular_ia_problema_conhecido = os.getenv("TRIAGEM_PULAR_IA_FINGERPRINT", "false").lower() == "true"
+        self.indice_fingerprints = IndiceFingerprints()
+        self.indice_fingerprints.carregar_base_conhecimento(
+            [(p.tipo, p.padrao_id, p.config) for p in self.matcher_padroes.padroes]
+        )
+        for fingerprint in self.repositorio.get_fingerprints():
+            self.indice_fingerprints.adicionar_triagem(
+                fingerprint['hash'], fingerprint['chave'], fingerprint['analise_ia'], fingerprint['triagem_id']
+            )
+        
+        # Chamados quase duplicados (MinHash/LSH): reaproveita a análise de uma triagem anterior
+        self.reutilizar_duplicatas = os.getenv("TRIAGEM_REUTILIZAR_DUPLICATAS", "true").lower() != "false"
+        self.indice_duplicatas = IndiceDuplicatas(
+            os.getenv("TRIAGEM_ARQUIVO_DUPLICATAS") or caminho_dados("duplicatas_minhash.jsonl"),
+            float(os.getenv("TRIAGEM_LIMIAR_DUPLICATA", "0.7"))
+        )
+        if not self.indice_duplicatas.carregar() and self.repositorio.is_configured():
+            self._reconstruir_indice_duplicatas()
+        if len(self.indice_duplicatas):
+            print(f"✅ Índice de duplicatas com {len(self.indice_duplicatas)} triagens")
     
     def _carregar_base_conhecimento(self) -> Dict[str, Any]:
         """Carrega a base de conhecimento de padrões"""
@@ -56,6 +146,17 @@ class TriagemService:
             print(f"❌ Erro ao carregar base de conhecimento: {e}")
             return {}
     
+    def _reconstruir_indice_duplicatas(self):
+        """Recria o arquivo local do índice de duplicatas a partir do histórico de triagens"""
+        self.indice_duplicatas.reconstruir(
+            (
+                extrair_features(triagem['chamado_texto'], triagem.get('modulo_identificado')),
+                triagem['id'], triagem.get('ticket_numero'), triagem['analise_ia']
+            )
+            for triagem in self.repositorio.get_triagens_historico()
+            if "erro" not in triagem['analise_ia'] and not triagem['analise_ia'].get("origem")
+        )
+    
     def salvar_triagem_firebase(
         self, 
         ticket_numero: str, 
@@ -65,18 +166,157 @@ class TriagemService:
         analise_id_original: Optional[str] = None,
         usuario: Optional[str] = None
     ) -> str:
-        """Salva a triagem no Firebase"""
-        if not self.firebase_db.is_configured():
+        """Salva a triagem no repositório configurado"""
+        if not self.repositorio.is_configured():
             return "mock_triagem_id"
         
-        return self.firebase_db.registrar_triagem(
+        triagem_id = self.repositorio.registrar_triagem(
             ticket_numero=ticket_numero,
             chamado_texto=chamado_texto,
             modulo=modulo,
             resultado_triagem=resultado,
             analise_id_original=analise_id_original,
-            usuario=usuario
+            usuario=usuario,
+            base_conhecimento=self.base_conhecimento
         )
+        
+        features = resultado.get('_features')
+        if features is None:
+            features = extrair_features(chamado_texto, modulo)
+        
+        # Aprende o fingerprint apenas de análises reais da IA
+        analise_ia = resultado.get('analise_ia') or {}
+        if analise_ia and "erro" not in analise_ia and not analise_ia.get("origem") and not resultado.get('modo_mock'):
+            fingerprints = [Fingerprint(f['tipo'], f['chave']) for f in resultado.get('fingerprints', [])]
+            aprendido = self.indice_fingerprints.registrar_triagem(fingerprints, analise_ia, triagem_id)
+            if aprendido:
+                self.repositorio.registrar_fingerprint(aprendido.hash, aprendido.chave, analise_ia, triagem_id)
+            self.indice_duplicatas.adicionar(features, triagem_id, ticket_numero, analise_ia)
+        
+        # Acrescenta aos índices locais de similaridade e de busca textual (fora do modo mock)
+        if not resultado.get('modo_mock'):
+            data_triagem = datetime.now(timezone.utc).isoformat()
+            self.indice_similaridade.adicionar_triagem(
+                triagem_id, features, ticket_numero, modulo, analise_ia, data_triagem
+            )
+            self.busca_triagens.indexar([{
+                "triagem_id": triagem_id,
+                "ticket_numero": ticket_numero,
+                "modulo": modulo,
+                "chamado_texto": chamado_texto,
+                "analise_ia": analise_ia,
+                "solucoes_sugeridas": resultado.get('solucoes_sugeridas'),
+                "data_triagem": data_triagem
+            }])
+        
+        self._publicar_nova_triagem(triagem_id, modulo, resultado)
+        return triagem_id
+    
+    def _publicar_nova_triagem(self, triagem_id: str, modulo: Optional[str], resultado: Dict[str, Any]):
+        """Evento nova_triagem para os dashboards: item do histórico e delta dos contadores do dia"""
+        agora = datetime.now(timezone.utc)
+        analise_ia = resultado.get('analise_ia') or {}
+        resumo = resultado.get('resumo') or {}
+        total_solucoes = len(resultado.get('solucoes_sugeridas') or [])
+        delta = {
+            "data": agora.strftime("%Y-%m-%d"),
+            "triagens_com_solucao": int(total_solucoes > 0),
+            "tempo_processamento_ms": resultado.get('tempo_processamento_ms') or 0,
+            "tipo_problema": analise_ia.get('tipo_problema'),
+            "prioridade": analise_ia.get('prioridade'),
+            "categoria": analise_ia.get('categoria_detalhada')
+        }
+        self._aplicar_delta_estatisticas(delta)
+        barramento_dashboard.publicar("nova_triagem", {
+            "triagem": {
+                "id": triagem_id,
+                "data_triagem": agora.isoformat(),
+                "modulo": modulo,
+                "total_padroes": resumo.get('total_padroes_detectados', 0),
+                "prioridade_geral": resumo.get('prioridade_geral', 'baixa'),
+                "solucoes_geradas": total_solucoes,
+                "teve_feedback": False
+            },
+            "delta": delta
+        })
+    
+    def _aplicar_delta_estatisticas(self, delta: Dict[str, Any]):
+        """Soma uma triagem nova às séries diárias em cache, para que continuem iguais ao banco"""
+        with self._lock_cache_estatisticas:
+            for (_, categoria), (_, estatisticas) in self._cache_estatisticas.items():
+                if categoria and categoria != delta["categoria"]:
+                    continue
+                dia = next((d for d in estatisticas if d["data"] == delta["data"]), None)
+                if dia is None:
+                    continue
+                total = dia["total_triagens"] + 1
+                dia["tempo_medio_processamento"] = round(
+                    (dia["tempo_medio_processamento"] * dia["total_triagens"] + delta["tempo_processamento_ms"]) / total, 2
+                )
+                dia["total_triagens"] = total
+                dia["triagens_com_solucao"] += delta["triagens_com_solucao"]
+                for chave, valor in (("tipos_problema", delta["tipo_problema"]), ("prioridades", delta["prioridade"])):
+                    if valor:
+                        dia[chave][valor] = dia[chave].get(valor, 0) + 1
+                if delta["categoria"]:
+                    categorias = {c["categoria"]: c["count"] for c in dia["categorias_mais_comuns"]}
+                    categorias[delta["categoria"]] = categorias.get(delta["categoria"], 0) + 1
+                    dia["categorias_mais_comuns"] = [
+                        {"categoria": c, "count": n}
+                        for c, n in sorted(categorias.items(), key=lambda x: (-x[1], x[0]))[:CATEGORIAS_POR_DIA]
+                    ]
+    
+    def registrar_feedback(
+        self,
+        triagem_id: str,
+        foi_util: bool,
+        nota: Optional[int] = None,
+        comentario: Optional[str] = None,
+        solucao_utilizada: Optional[str] = None
+    ) -> str:
+        """Salva o feedback, marca a triagem como utilizada quando a solução serviu e avisa os dashboards"""
+        if not self.repositorio.is_configured():
+            return "mock_feedback_id"
+        
+        feedback_id = self.repositorio.registrar_feedback_triagem(triagem_id, foi_util, nota, comentario, solucao_utilizada)
+        if foi_util:
+            self.repositorio.marcar_triagem_como_utilizada(triagem_id)
+        barramento_dashboard.publicar("feedback", {"triagem_id": triagem_id, "foi_util": foi_util, "nota": nota})
+        return feedback_id
+    
+    def buscar_similares(
+        self,
+        chamado_texto: str,
+        modulo: Optional[str] = None,
+        k: int = 5,
+        mesmo_modulo: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Triagens anteriores mais parecidas com o chamado (similaridade de cosseno)"""
+        features = extrair_features(chamado_texto, modulo)
+        return self.indice_similaridade.buscar(features, k, modulo if mesmo_modulo else None)
+    
+    def estatisticas_diarias(self, dias: int, categoria: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Série diária (UTC, do dia atual para trás) de uma única consulta do
+        período no repositório, guardada por TRIAGEM_CACHE_ESTATISTICAS segundos
+        por (dias, categoria) para que as atualizações do dashboard não
+        repitam a leitura
+        
+        Args:
+            dias: Quantidade de dias
+            categoria: Filtrar pela categoria detalhada da análise
+        """
+        chave = (dias, categoria)
+        agora = time.monotonic()
+        with self._lock_cache_estatisticas:
+            em_cache = self._cache_estatisticas.get(chave)
+        if em_cache and em_cache[0] > agora:
+            return em_cache[1]
+        
+        estatisticas = self.repositorio.get_serie_diaria(dias, categoria)
+        with self._lock_cache_estatisticas:
+            self._cache_estatisticas[chave] = (agora + self.ttl_cache_estatisticas, estatisticas)
+        return estatisticas
     
     async def analisar_chamado(self, chamado_texto: str, modulo: str = None) -> Dict[str, Any]:
         """
@@ -89,191 +329,327 @@ class TriagemService:
         Returns:
             Dicionário com análise de triagem e soluções sugeridas
         """
-        # 1. Análise por padrões (regras)
-        padroes_encontrados = self._analisar_padroes(chamado_texto)
+        # 1 a 3. Features, padrões, problema conhecido e buscas locais, fora do event loop
+        preparado, analise_ia = await asyncio.to_thread(self._preparar_e_analisar_local, chamado_texto, modulo)
         
-        # 2. Análise por IA (se disponível)
-        if not self.mock_mode:
-            analise_ia = await self._analisar_com_ia(chamado_texto, modulo, padroes_encontrados)
-        else:
-            analise_ia = self._gerar_analise_mock(chamado_texto, modulo)
+        # 4. Análise por IA (se o problema ainda não é conhecido nem classificado com confiança)
+        if analise_ia is None:
+            analise_ia = await self._analisar_com_ia(
+                preparado.features, preparado.compactado, modulo, preparado.padroes
+            )
+        
+        # 5. Combinar resultados
+        return self._montar_resultado(preparado, analise_ia)
+    
+    async def analisar_chamados_lote(self, chamados: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analisa vários chamados agrupando os que precisam de IA em requisições
+        com até `tamanho_lote_ia` chamados cada
+        
+        Args:
+            chamados: Lista de {"id", "chamado_texto", "modulo"} com ids únicos
+            
+        Returns:
+            Resultados na mesma ordem da entrada, cada um com o campo "id"
+        """
+        locais = await asyncio.to_thread(lambda: [
+            (str(c["id"]), *self._preparar_e_analisar_local(c["chamado_texto"], c.get("modulo")))
+            for c in chamados
+        ])
+        
+        preparados = [(chamado_id, preparado) for chamado_id, preparado, _ in locais]
+        analises: Dict[str, Dict[str, Any]] = {}
+        pendentes = []
+        for chamado_id, preparado, analise_ia in locais:
+            if analise_ia is not None:
+                analises[chamado_id] = analise_ia
+            else:
+                pendentes.append((chamado_id, preparado))
+        
+        for inicio in range(0, len(pendentes), self.tamanho_lote_ia):
+            analises.update(await self._analisar_lote_com_ia(pendentes[inicio:inicio + self.tamanho_lote_ia]))
+        
+        return [
+            {"id": chamado_id, **self._montar_resultado(preparado, analises[chamado_id])}
+            for chamado_id, preparado in preparados
+        ]
+    
+    def _preparar_chamado(self, chamado_texto: str, modulo: Optional[str]) -> ChamadoPreparado:
+        # 1. Extração de features - o texto é normalizado e tokenizado uma única vez
+        features = extrair_features(chamado_texto, modulo)
+        
+        # 2. Análise por padrões (regras)
+        padroes_encontrados = self._analisar_padroes(features)
+        
+        # 3. Problema conhecido por fingerprint (exceção + stack trace / erro SQL)
+        fingerprints = gerar_fingerprints(features)
+        conhecido = self.indice_fingerprints.buscar(fingerprints)
+        if conhecido:
+            self._aplicar_problema_conhecido(padroes_encontrados, conhecido)
+        
+        return ChamadoPreparado(
+            modulo=modulo,
+            features=features,
+            padroes=padroes_encontrados,
+            fingerprints=fingerprints,
+            conhecido=conhecido,
+            classificacao=self.classificador.prever(features) if self.classificador else None,
+            similares=self.indice_similaridade.buscar(
+                features, self.similares_por_chamado, similaridade_minima=self.similaridade_minima
+            ),
+            duplicata=self.indice_duplicatas.buscar(features)
+        )
+    
+    def _preparar_e_analisar_local(
+        self, chamado_texto: str, modulo: Optional[str]
+    ) -> Tuple[ChamadoPreparado, Optional[Dict[str, Any]]]:
+        """
+        Etapas locais e CPU-bound da triagem (features, padrões, busca de
+        similares e duplicatas, classificador e compactação); chamada via
+        asyncio.to_thread para não bloquear o event loop
+        
+        Returns:
+            (chamado preparado, análise local ou None se a IA for necessária)
+        """
+        preparado = self._preparar_chamado(chamado_texto, modulo)
+        analise_ia = self._analise_sem_ia(preparado)
+        if analise_ia is None:
+            self._compactar(preparado)
+        return preparado, analise_ia
+    
+    def _analise_sem_ia(self, preparado: ChamadoPreparado) -> Optional[Dict[str, Any]]:
+        """Análise local (duplicata, problema conhecido ou classificação confiante), ou None se a IA for necessária"""
+        if preparado.duplicata and self.reutilizar_duplicatas:
+            print(f"♻️  Chamado quase duplicado da triagem {preparado.duplicata.triagem_id} (Jaccard {preparado.duplicata.jaccard})")
+            return {**preparado.duplicata.analise_ia, "origem": "triagem_reutilizada"}
+        
+        if preparado.conhecido and self.pular_ia_problema_conhecido:
+            return self._analise_problema_conhecido(preparado.conhecido)
         
-        # 3. Combinar resultados
-        resultado = {
+        classificacao = preparado.classificacao
+        if self.pular_ia_classificador and classificacao and len(classificacao) == 2:
+            confianca = min(c["confianca"] for c in classificacao.values())
+            if confianca >= self.limiar_classificador:
+                return self._analise_classificador(classificacao, confianca)
+        return None
+    
+    def _compactar(self, preparado: ChamadoPreparado):
+        """Logs colados são deduplicados e truncados antes de ir para o prompt"""
+        compactado = compactar_chamado(preparado.features.original, self.orcamento_tokens_chamado)
+        print(f"🗜️  Chamado compactado: {compactado.tokens_originais} -> {compactado.tokens_compactados} tokens (-{compactado.reducao_percentual}%)")
+        preparado.compactado = compactado
+    
+    def _montar_resultado(self, preparado: ChamadoPreparado, analise_ia: Dict[str, Any]) -> Dict[str, Any]:
+        conhecido = preparado.conhecido
+        duplicata = preparado.duplicata
+        return {
             "sucesso": True,
-            "padroes_encontrados": padroes_encontrados,
+            "padroes_encontrados": preparado.padroes,
             "analise_ia": analise_ia,
-            "solucoes_sugeridas": self._gerar_solucoes_consolidadas(padroes_encontrados, analise_ia),
-            "resumo": self._gerar_resumo_triagem(padroes_encontrados, analise_ia),
-            "modo_mock": self.mock_mode
+            "solucoes_sugeridas": self._gerar_solucoes_consolidadas(preparado.padroes, analise_ia, preparado.similares),
+            "resumo": self._gerar_resumo_triagem(preparado.padroes, analise_ia),
+            "modo_mock": self.mock_mode,
+            "features": preparado.features.resumo(),
+            # Objeto completo, reaproveitado por salvar_triagem_firebase (não é serializado)
+            "_features": preparado.features,
+            "fingerprints": [{"tipo": f.tipo, "chave": f.chave, "hash": f.hash} for f in preparado.fingerprints],
+            "problema_conhecido": {
+                "origem": conhecido.origem,
+                "chave": conhecido.chave,
+                "confianca": conhecido.confianca,
+                "padrao_id": conhecido.padrao_id,
+                "triagem_id": conhecido.triagem_id
+            } if conhecido else None,
+            "classificacao": preparado.classificacao,
+            "compactacao": preparado.compactado.relatorio() if preparado.compactado else None,
+            "triagens_similares": preparado.similares or [],
+            "duplicata": {
+                "triagem_id": duplicata.triagem_id,
+                "ticket_numero": duplicata.ticket_numero,
+                "jaccard": duplicata.jaccard,
+                "reutilizada": analise_ia.get("origem") == "triagem_reutilizada"
+            } if duplicata else None
         }
+    
+    def _analisar_padroes(self, features: FeaturesChamado) -> List[Dict[str, Any]]:
+        """Analisa o chamado (já normalizado e tokenizado) buscando padrões conhecidos"""
+        return self.matcher_padroes.analisar(features)
+    
+    def _aplicar_problema_conhecido(self, padroes: List[Dict[str, Any]], conhecido: ProblemaConhecido):
+        """Garante que o padrão do problema conhecido esteja entre os encontrados, com a confiança do fingerprint"""
+        if conhecido.padrao_id is None:
+            return
         
-        return resultado
+        for padrao in padroes:
+            if padrao["padrao_id"] == conhecido.padrao_id and padrao["tipo"] == conhecido.tipo_padrao:
+                padrao["confianca"] = max(padrao["confianca"], conhecido.confianca)
+                padrao["fingerprint"] = conhecido.chave
+                break
+        else:
+            compilado = self.matcher_padroes.padrao_por_id(conhecido.tipo_padrao, conhecido.padrao_id)
+            if compilado is None:
+                return
+            padroes.append({
+                "tipo": compilado.tipo,
+                "padrao_id": compilado.padrao_id,
+                "palavra_chave": f"fingerprint: {conhecido.chave}",
+                "config": compilado.config,
+                "confianca": conhecido.confianca,
+                "score": 0.0,
+                "ocorrencias": 1,
+                "palavras_chave_encontradas": [],
+                "posicao": None,
+                "especifico_modulo": bool(compilado.modulos),
+                "fingerprint": conhecido.chave
+            })
+        
+        padroes.sort(key=lambda p: (p.get("especifico_modulo", False), p["confianca"]), reverse=True)
+    
+    def _analise_problema_conhecido(self, conhecido: ProblemaConhecido) -> Dict[str, Any]:
+        """Monta a análise sem chamar a IA, a partir de uma triagem anterior ou do padrão da base"""
+        if conhecido.analise_ia:
+            return {**conhecido.analise_ia, "origem": "triagem_anterior"}
+        
+        compilado = self.matcher_padroes.padrao_por_id(conhecido.tipo_padrao, conhecido.padrao_id)
+        if compilado is None:
+            return {"erro": f"Padrão {conhecido.padrao_id} não encontrado na base de conhecimento"}
+        
+        config = compilado.config
+        tipo_problema = {"banco": "banco", "sistema": "configuracao"}.get(compilado.tipo, "codigo")
+        scripts = config.get("scripts_sugeridos") or []
+        return {
+            "tipo_problema": "performance" if config.get("solucao_tipo") == "performance" else tipo_problema,
+            "categoria_detalhada": config.get("categoria"),
+            "diagnostico": f"Problema conhecido identificado pelo fingerprint {conhecido.chave}",
+            "solucao_sugerida": config.get("solucao"),
+            "codigo_exemplo": config.get("codigo_sugerido"),
+            "script_sql": config.get("script_sql_sugerido") or (scripts[0] if scripts else None),
+            "prioridade": config.get("prioridade"),
+            "observacoes": "Análise montada a partir da base de conhecimento; a IA não foi consultada.",
+            "origem": "base_conhecimento"
+        }
     
-    def _analisar_padroes(self, texto: str) -> List[Dict[str, Any]]:
-        """Analisa o texto buscando padrões conhecidos"""
-        padroes_encontrados = []
-        texto_lower = texto.lower()
-        
-        # Analisar padrões de código VB.NET
-        for padrao_id, config in self.base_conhecimento.get("padroes_codigo", {}).get("vb_net", {}).items():
-            for palavra_chave in config["palavras_chave"]:
-                if palavra_chave.lower() in texto_lower:
-                    padroes_encontrados.append({
-                        "tipo": "codigo_vb",
-                        "padrao_id": padrao_id,
-                        "palavra_chave": palavra_chave,
-                        "config": config,
-                        "confianca": 0.8  # Alta confiança para match exato
-                    })
-                    break
-        
-        # Analisar padrões ASP.NET
-        for padrao_id, config in self.base_conhecimento.get("padroes_codigo", {}).get("asp_net", {}).items():
-            for palavra_chave in config["palavras_chave"]:
-                if palavra_chave.lower() in texto_lower:
-                    padroes_encontrados.append({
-                        "tipo": "codigo_asp",
-                        "padrao_id": padrao_id,
-                        "palavra_chave": palavra_chave,
-                        "config": config,
-                        "confianca": 0.8
-                    })
-                    break
-        
-        # Analisar padrões de banco
-        for padrao_id, config in self.base_conhecimento.get("padroes_banco", {}).items():
-            for palavra_chave in config["palavras_chave"]:
-                if palavra_chave.lower() in texto_lower:
-                    padroes_encontrados.append({
-                        "tipo": "banco",
-                        "padrao_id": padrao_id,
-                        "palavra_chave": palavra_chave,
-                        "config": config,
-                        "confianca": 0.8
-                    })
-                    break
-        
-        # Analisar padrões de sistema
-        for padrao_id, config in self.base_conhecimento.get("padroes_sistema", {}).items():
-            for palavra_chave in config["palavras_chave"]:
-                if palavra_chave.lower() in texto_lower:
-                    padroes_encontrados.append({
-                        "tipo": "sistema",
-                        "padrao_id": padrao_id,
-                        "palavra_chave": palavra_chave,
-                        "config": config,
-                        "confianca": 0.8
-                    })
-                    break
-        
-        return padroes_encontrados
+    def _analise_classificador(self, classificacao: Dict[str, Dict[str, Any]], confianca: float) -> Dict[str, Any]:
+        """Análise mínima a partir do classificador local, sem chamar a IA"""
+        tipo_problema = classificacao["tipo_problema"]["valor"]
+        return {
+            "tipo_problema": tipo_problema,
+            "categoria_detalhada": f"Classificação automática: {tipo_problema}",
+            "diagnostico": f"Chamado classificado pelo modelo local com confiança {confianca:.0%}",
+            "prioridade": classificacao["prioridade"]["valor"],
+            "observacoes": "Classificação do modelo local treinado com triagens anteriores; a IA não foi consultada.",
+            "origem": "classificador"
+        }
     
-    async def _analisar_com_ia(self, texto: str, modulo: str, padroes: List[Dict]) -> Dict[str, Any]:
+    async def _analisar_com_ia(
+        self, features: FeaturesChamado, compactado: ChamadoCompactado, modulo: str, padroes: List[Dict]
+    ) -> Dict[str, Any]:
         """Analisa o chamado usando IA para sugestões mais avançadas"""
         
-        prompt = self._montar_prompt_triagem(texto, modulo, padroes)
+        template = self.templates_prompt.selecionar(modulo, padroes)
+        sufixo = montar_sufixo(features, compactado, modulo, padroes, template)
         
         try:
-            response = self.model.generate_content(prompt)
-            return self._parse_resposta_ia_triagem(response.text)
+            inicio = time.perf_counter()
+            self.requisicoes_ia += 1
+            resposta = await self.backend_ia.gerar_async(sufixo)
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            self.metricas_templates.registrar(template.id, self.tokens_prefixo + estimar_tokens(sufixo), latencia_ms)
+            return self._parse_resposta_ia_triagem(resposta)
         except Exception as e:
             print(f"❌ Erro ao chamar IA para triagem: {e}")
             return {"erro": str(e)}
     
-    def _montar_prompt_triagem(self, texto: str, modulo: str, padroes: List[Dict]) -> str:
-        """Monta o prompt especializado para triagem"""
+    async def _analisar_lote_com_ia(self, itens: List[Tuple[str, ChamadoPreparado]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Analisa vários chamados em uma única requisição
         
-        padroes_str = ""
-        for padrao in padroes:
-            padroes_str += f"- {padrao['tipo']}: {padrao['palavra_chave']}\n"
+        Resposta malformada divide o lote ao meio e tenta de novo; chamados
+        ausentes da resposta são reenviados em um lote menor. Um lote de um
+        chamado usa o caminho individual.
         
-        prompt = f"""
-Você é um especialista em suporte técnico do sistema SPONTE (VB.NET + ASP.NET + SQL Server).
-
-=== CHAMADO PARA TRIAGEM ===
-
-MÓDULO: {modulo or 'Não identificado'}
-
-TEXTO DO CHAMADO:
-{texto}
-
-=== PADRÕES DETECTADOS ===
-{padroes_str or 'Nenhum padrão específico detectado'}
-
-=== SUA TAREFA ===
-
-Analise este chamado e forneça uma triagem técnica detalhada. Retorne APENAS um JSON válido:
-
-{{
-  "tipo_problema": "codigo|banco|configuracao|performance|outro",
-  "categoria_detalhada": "descrição específica da categoria",
-  "diagnostico": "análise técnica do problema",
-  "solucao_sugerida": "passos para resolução",
-  "codigo_exemplo": "código VB.NET de exemplo (se aplicável)",
-  "script_sql": "script SQL de exemplo (se aplicável)",
-  "prioridade": "alta|media|baixa",
-  "tempo_estimado": "tempo estimado para resolução",
-  "recursos_necessarios": ["lista", "de", "recursos"],
-  "observacoes": "observações adicionais importantes"
-}}
-
-=== CONTEXTO TÉCNICO ===
-
-Sistema SPONTE:
-- Backend: VB.NET com ASP.NET Web Forms
-- Frontend: HTML, CSS, Bootstrap, AJAX
-- Banco: SQL Server
-- Arquitetura: Code-behind com eventos (BtnSalvar_Click, BtnExcluir_Click)
-- Servidor: AWS
-
-Erros comuns:
-- Constraint violations em operações CRUD
-- Timeouts em consultas pesadas
-- Problemas de ViewState/PostBack
-- Erros de permissão/perfil
-- Configurações de banco incorretas
-
-IMPORTANTE: Retorne APENAS o JSON, sem texto adicional.
-"""
-        return prompt
+        Args:
+            itens: lista de (id do chamado, ChamadoPreparado já compactado)
+        """
+        if len(itens) == 1:
+            chamado_id, preparado = itens[0]
+            return {chamado_id: await self._analisar_com_ia(
+                preparado.features, preparado.compactado, preparado.modulo, preparado.padroes
+            )}
+        
+        sufixos = []
+        for chamado_id, preparado in itens:
+            template = self.templates_prompt.selecionar(preparado.modulo, preparado.padroes)
+            sufixos.append((chamado_id, montar_sufixo(
+                preparado.features, preparado.compactado, preparado.modulo, preparado.padroes, template
+            )))
+        sufixo = montar_sufixo_lote(sufixos)
+        
+        analises = None
+        try:
+            inicio = time.perf_counter()
+            self.requisicoes_ia += 1
+            resposta = await self.backend_ia.gerar_async(sufixo, esquema=ESQUEMA_RESPOSTA_LOTE)
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            self.metricas_templates.registrar(f"lote:{len(itens)}", self.tokens_prefixo + estimar_tokens(sufixo), latencia_ms)
+            analises = self._parse_resposta_lote(resposta, [chamado_id for chamado_id, _ in itens])
+        except Exception as e:
+            print(f"❌ Erro ao chamar IA para lote de {len(itens)} chamados: {e}")
+        
+        if not analises:
+            meio = len(itens) // 2
+            print(f"⚠️  Resposta do lote inválida - dividindo em {meio} + {len(itens) - meio}")
+            analises = await self._analisar_lote_com_ia(itens[:meio])
+            analises.update(await self._analisar_lote_com_ia(itens[meio:]))
+            return analises
+        
+        faltando = [item for item in itens if item[0] not in analises]
+        if faltando:
+            print(f"⚠️  {len(faltando)} chamados ausentes na resposta do lote - reenviando")
+            analises.update(await self._analisar_lote_com_ia(faltando))
+        return analises
+    
+    def _parse_resposta_lote(self, resposta: str, ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Mapeia o array da resposta por ticket_id; None se a resposta for inválida"""
+        try:
+            dados = json.loads(self._limpar_resposta_json(resposta))
+        except Exception as e:
+            print(f"❌ Erro ao fazer parse da resposta do lote: {e}")
+            return None
+        if not isinstance(dados, list):
+            return None
+        
+        esperados = set(ids)
+        analises = {}
+        for item in dados:
+            if isinstance(item, dict) and str(item.get("ticket_id")) in esperados:
+                analise = dict(item)
+                analises[str(analise.pop("ticket_id"))] = analise
+        return analises
+    
+    def _limpar_resposta_json(self, resposta: str) -> str:
+        """Remove cercas de markdown em volta do JSON"""
+        resposta_limpa = resposta.strip()
+        if resposta_limpa.startswith('```json'):
+            resposta_limpa = resposta_limpa[7:]
+        if resposta_limpa.startswith('```'):
+            resposta_limpa = resposta_limpa[3:]
+        if resposta_limpa.endswith('```'):
+            resposta_limpa = resposta_limpa[:-3]
+        return resposta_limpa.strip()
     
     def _parse_resposta_ia_triagem(self, resposta: str) -> Dict[str, Any]:
         """Parse da resposta da IA para triagem"""
         try:
-            # Limpa markdown se houver
-            resposta_limpa = resposta.strip()
-            if resposta_limpa.startswith('```json'):
-                resposta_limpa = resposta_limpa[7:]
-            if resposta_limpa.startswith('```'):
-                resposta_limpa = resposta_limpa[3:]
-            if resposta_limpa.endswith('```'):
-                resposta_limpa = resposta_limpa[:-3]
-            
-            resposta_limpa = resposta_limpa.strip()
-            
-            return json.loads(resposta_limpa)
+            return json.loads(self._limpar_resposta_json(resposta))
             
         except Exception as e:
             print(f"❌ Erro ao fazer parse da resposta IA: {e}")
             return {"erro": "Erro ao processar análise da IA"}
     
-    def _gerar_analise_mock(self, texto: str, modulo: str) -> Dict[str, Any]:
-        """Gera análise mockada para demonstração"""
-        return {
-            "tipo_problema": "codigo",
-            "categoria_detalhada": "Erro de validação em operação CRUD",
-            "diagnostico": "Problema detectado em operação de banco de dados com possível violação de constraint",
-            "solucao_sugerida": "Verificar validações de dados e constraints do banco antes de executar operação",
-            "codigo_exemplo": "Try\n    ' Validação de dados\n    If String.IsNullOrEmpty(campo) Then Throw New ArgumentException(\"Campo obrigatório\")\n    ' Operação de banco\nCatch ex As Exception\n    Throw New Exception($\"Erro na operação: {ex.Message}\")\nEnd Try",
-            "script_sql": "SELECT * FROM tabela WHERE campo = 'valor'",
-            "prioridade": "alta",
-            "tempo_estimado": "1-2 horas",
-            "recursos_necessarios": ["Desenvolvedor VB.NET", "Acesso ao banco de dados"],
-            "observacoes": "Esta é uma análise mockada. Configure a API do Gemini para análises mais precisas."
-        }
-    
-    def _gerar_solucoes_consolidadas(self, padroes: List[Dict], analise_ia: Dict) -> List[SolucaoTriagem]:
+    def _gerar_solucoes_consolidadas(
+        self, padroes: List[Dict], analise_ia: Dict, similares: Optional[List[Dict]] = None
+    ) -> List[SolucaoTriagem]:
         """Consolida soluções dos padrões e análise da IA"""
         solucoes = []
         
@@ -292,8 +668,9 @@ IMPORTANTE: Retorne APENAS o JSON, sem texto adicional.
             )
             solucoes.append(solucao)
         
-        # Adicionar solução da IA (se disponível e válida)
-        if analise_ia and "erro" not in analise_ia:
+        # Adicionar solução da IA (se disponível e válida; a da base de conhecimento já veio dos padrões
+        # e o classificador local não sugere solução)
+        if analise_ia and "erro" not in analise_ia and analise_ia.get("origem") not in ("base_conhecimento", "classificador"):
             solucao_ia = SolucaoTriagem(
                 tipo=analise_ia.get("tipo_problema", "outro"),
                 categoria=analise_ia.get("categoria_detalhada", "Análise IA"),
@@ -305,6 +682,22 @@ IMPORTANTE: Retorne APENAS o JSON, sem texto adicional.
             )
             solucoes.append(solucao_ia)
         
+        # Soluções de triagens anteriores similares (confiança proporcional à similaridade)
+        ja_sugeridas = {s.solucao for s in solucoes}
+        for similar in similares or []:
+            if similar["solucao"] in ja_sugeridas:
+                continue
+            ja_sugeridas.add(similar["solucao"])
+            solucoes.append(SolucaoTriagem(
+                tipo=similar.get("tipo_problema", "outro"),
+                categoria=f"Triagem similar (ticket {similar.get('ticket_numero') or similar['triagem_id']})",
+                prioridade=similar.get("prioridade", "media"),
+                solucao=similar["solucao"],
+                confianca=round(similar["similaridade"] * 0.8, 3)
+            ))
+        
+        # Mais confiáveis primeiro (confiança dos padrões vem da pontuação ponderada)
+        solucoes.sort(key=lambda s: s.confianca, reverse=True)
         return solucoes
     
     def _gerar_resumo_triagem(self, padroes: List[Dict], analise_ia: Dict) -> Dict[str, Any]:
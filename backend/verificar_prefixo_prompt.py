@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Verificação local do prefixo estático do prompt de triagem
+Substitui o backend de IA por um backend local que registra cada requisição
+no formato enviado a provedores sem system instruction e confere
+que o prefixo enviado é idêntico byte a byte entre chamados e módulos
+diferentes, que não contém dados do chamado e que corresponde ao HASH_PREFIXO
+da versão atual.
+
+Uso:
+    python verificar_prefixo_prompt.py
+"""
+
+import asyncio
+import sys
+
+from backends_ia import BackendIA
+from benchmark_matcher import gerar_chamados
+from prompt_triagem import HASH_PREFIXO, PREFIXO_ESTATICO, VERSAO_PREFIXO, hash_prefixo
+from triagem_service import TriagemService
+
+MODULOS = [None, "ACADEMICO", "FINANCEIRO", "SECRETARIA"]
+
+
+class BackendLocal(BackendIA):
+    """Stand-in do backend de IA que apenas registra o conteúdo enviado"""
+
+    nome = "local"
+
+    def __init__(self, instrucao_sistema: str):
+        super().__init__(instrucao_sistema)
+        self.requisicoes = []
+
+    def gerar(self, conteudo, esquema=None) -> str:
+        self.requisicoes.append(self.montar_conteudo(conteudo))
+        return '{"tipo_problema": "outro"}'
+
+
+async def coletar_prefixos(servico: TriagemService, chamados) -> list:
+    servico.backend_ia = BackendLocal(PREFIXO_ESTATICO)
+    servico.pular_ia_problema_conhecido = False
+    for i, chamado in enumerate(chamados):
+        await servico.analisar_chamado(chamado, MODULOS[i % len(MODULOS)])
+    return [conteudo[0].encode("utf-8") for conteudo in servico.backend_ia.requisicoes]
+
+
+def main() -> int:
+    servico = TriagemService()
+    chamados = gerar_chamados(50)
+    prefixos = asyncio.run(coletar_prefixos(servico, chamados))
+
+    erros = []
+    if hash_prefixo() != HASH_PREFIXO:
+        erros.append(f"prefixo alterado sem nova versão (hash {hash_prefixo()} != {HASH_PREFIXO})")
+    if len(prefixos) != len(chamados):
+        erros.append(f"{len(prefixos)} requisições para {len(chamados)} chamados")
+    if any(p != PREFIXO_ESTATICO.encode("utf-8") for p in prefixos):
+        erros.append("prefixo enviado difere entre requisições")
+    if any(modulo and modulo in PREFIXO_ESTATICO for modulo in MODULOS):
+        erros.append("prefixo contém dados dinâmicos (módulo)")
+
+    print(f"📊 Prompt {VERSAO_PREFIXO}: {len(prefixos)} requisições, prefixo de {len(PREFIXO_ESTATICO.encode('utf-8'))} bytes")
+    if erros:
+        for erro in erros:
+            print(f"❌ {erro}")
+        return 1
+    print(f"✅ Prefixo estável byte a byte (hash {HASH_PREFIXO})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Vetorização local de chamados por hashing de n-gramas (sem rede, sem vocabulário)
+Unigramas e bigramas dos tokens normalizados, mais módulo, erros SQL e
+exceções, são mapeados por CRC32 para um espaço de dimensão fixa. Os pesos
+são log(1 + contagem) com norma L2 unitária, de modo que o produto interno
+entre dois vetores é a similaridade de cosseno.
+"""
+
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from features_chamado import FeaturesChamado
+
+DIMENSAO_PADRAO = 2 ** 16  # potência de 2: o índice é o hash mascarado
+
+
+def termos_hash(features: FeaturesChamado) -> List[str]:
+    tokens = features.tokens
+    termos = list(tokens)
+    termos += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if features.modulo:
+        termos.append(f"modulo={features.modulo}")
+    termos += [f"sql={numero}" for numero in features.erros_sql]
+    termos += [f"exc={excecao.rsplit('.', 1)[-1].lower()}" for excecao in features.excecoes]
+    return termos
+
+
+def vetorizar(features: FeaturesChamado, dimensao: int = DIMENSAO_PADRAO) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vetor esparso do chamado
+
+    Returns:
+        (índices int32 únicos, valores float32 com norma L2 = 1)
+    """
+    mascara = dimensao - 1
+    contagem: Dict[int, int] = {}
+    for termo in termos_hash(features):
+        indice = zlib.crc32(termo.encode("utf-8")) & mascara
+        contagem[indice] = contagem.get(indice, 0) + 1
+
+    indices = np.fromiter(contagem.keys(), dtype=np.int32, count=len(contagem))
+    valores = np.log1p(np.fromiter(contagem.values(), dtype=np.float32, count=len(contagem)))
+    norma = float(np.sqrt(np.dot(valores, valores)))
+    if norma:
+        valores /= norma
+    return indices, valores
+
+
+def vetorizar_denso(features: FeaturesChamado, dimensao: int = DIMENSAO_PADRAO) -> np.ndarray:
+    vetor = np.zeros(dimensao, dtype=np.float32)
+    indices, valores = vetorizar(features, dimensao)
+    vetor[indices] = valores
+    return vetor
@@ -6,16 +6,68 @@ import {
   Target, 
   AlertTriangle,
   CheckCircle,
-  RefreshCw
+  RefreshCw,
+  Radio
 } from 'lucide-react'
 import { triagemAPI, utils } from '../services/api'
 
+const TRIAGENS_HISTORICO = 10
+
+// Soma uma triagem nova (delta do evento nova_triagem) às estatísticas carregadas
+const aplicarDelta = (estatisticas, delta, periodo) => {
+  if (!estatisticas?.estatisticas?.some((dia) => dia.data === delta.data)) {
+    return estatisticas
+  }
+
+  const somar = (contagens, chave) => (
+    chave ? { ...contagens, [chave]: (contagens?.[chave] || 0) + 1 } : contagens
+  )
+
+  const dias = estatisticas.estatisticas.map((dia) => {
+    if (dia.data !== delta.data) return dia
+    const total = dia.total_triagens + 1
+    const categorias = somar(
+      Object.fromEntries((dia.categorias_mais_comuns || []).map((c) => [c.categoria, c.count])),
+      delta.categoria
+    )
+    return {
+      ...dia,
+      total_triagens: total,
+      triagens_com_solucao: dia.triagens_com_solucao + delta.triagens_com_solucao,
+      tempo_medio_processamento:
+        (dia.tempo_medio_processamento * dia.total_triagens + delta.tempo_processamento_ms) / total,
+      tipos_problema: somar(dia.tipos_problema, delta.tipo_problema),
+      prioridades: somar(dia.prioridades, delta.prioridade),
+      categorias_mais_comuns: Object.entries(categorias)
+        .sort(([a, x], [b, y]) => y - x || a.localeCompare(b))
+        .slice(0, 5)
+        .map(([categoria, count]) => ({ categoria, count }))
+    }
+  })
+
+  const resumo = estatisticas.resumo_geral || {}
+  const totalAnterior = resumo.total_triagens_periodo || 0
+  const total = totalAnterior + 1
+  return {
+    ...estatisticas,
+    estatisticas: dias,
+    resumo_geral: {
+      ...resumo,
+      total_triagens_periodo: total,
+      media_triagens_dia: total / periodo,
+      taxa_sucesso: ((resumo.taxa_sucesso || 0) * totalAnterior + delta.triagens_com_solucao) / total,
+      tempo_medio_ms: ((resumo.tempo_medio_ms || 0) * totalAnterior + delta.tempo_processamento_ms) / total
+    }
+  }
+}
+
 const DashboardPage = () => {
   const [estatisticas, setEstatisticas] = useState(null)
   const [historico, setHistorico] = useState(null)
   const [loading, setLoading] = useState(true)
   const [erro, setErro] = useState('')
   const [periodo, setPeriodo] = useState(7)
+  const [aoVivo, setAoVivo] = useState(false)
 
   const carregarDados = async () => {
     setLoading(true)
@@ -26,7 +78,7 @@ const DashboardPage = () => {
       
       const [statsResponse, historicoResponse] = await Promise.all([
         triagemAPI.obterEstatisticas(periodo),
-        triagemAPI.obterHistorico(1, 10)
+        triagemAPI.obterHistorico(null, TRIAGENS_HISTORICO)
       ])
       
       setEstatisticas(statsResponse)
@@ -57,6 +109,43 @@ const DashboardPage = () => {
     carregarDados()
   }, [periodo])
 
+  // Atualizações por push: o servidor envia cada triagem e feedback novo, sem novas consultas
+  useEffect(() => {
+    let conectadoAntes = false
+
+    const fechar = triagemAPI.assinarEventos({
+      onConectado: () => {
+        setAoVivo(true)
+        // Após uma reconexão, eventos podem ter sido perdidos: recarrega o estado
+        if (conectadoAntes) carregarDados()
+        conectadoAntes = true
+      },
+      onErro: () => setAoVivo(false),
+      onNovaTriagem: ({ triagem, delta }) => {
+        setEstatisticas((atual) => aplicarDelta(atual, delta, periodo))
+        setHistorico((atual) => {
+          if (!atual) return atual
+          const triagens = [triagem, ...atual.triagens].slice(0, TRIAGENS_HISTORICO)
+          return { ...atual, triagens, total: triagens.length }
+        })
+      },
+      onFeedback: ({ triagem_id, foi_util }) => {
+        if (!foi_util) return
+        setHistorico((atual) => atual && {
+          ...atual,
+          triagens: atual.triagens.map((triagem) => (
+            triagem.id === triagem_id ? { ...triagem, teve_feedback: true } : triagem
+          ))
+        })
+      }
+    })
+
+    return () => {
+      fechar()
+      setAoVivo(false)
+    }
+  }, [periodo])
+
   const formatarData = (data) => {
     return new Date(data).toLocaleDateString('pt-BR', {
       day: '2-digit',
@@ -106,7 +195,15 @@ const DashboardPage = () => {
           </p>
         </div>
         
-        <div className="flex gap-2">
+        <div className="flex gap-2 items-center">
+          <span
+            className={`result-badge ${aoVivo ? 'badge-success' : 'badge-info'}`}
+            title={aoVivo ? 'Recebendo atualizações em tempo real' : 'Reconectando às atualizações em tempo real'}
+          >
+            <Radio size={14} />
+            {aoVivo ? 'Ao vivo' : 'Offline'}
+          </span>
+          
           <select
             className="form-select"
             value={periodo}
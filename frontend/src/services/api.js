@@ -67,10 +67,10 @@ export const triagemAPI = {
     return response.data
   },
 
-  // Obter histórico
-  async obterHistorico(pagina = 1, porPagina = 20, modulo = null) {
+  // Obter histórico (cursor = proximo_cursor da página anterior)
+  async obterHistorico(cursor = null, porPagina = 20, modulo = null) {
     const params = new URLSearchParams()
-    params.append('pagina', pagina)
+    if (cursor) params.append('cursor', cursor)
     params.append('por_pagina', porPagina)
     if (modulo) params.append('modulo', modulo)
     
@@ -122,6 +122,41 @@ export const triagemAPI = {
   async obterAnalisesRecentesSistemaPrincipal(limite = 10) {
     const response = await api.get(`/api/triagem/sistema-principal/analises-recentes?limite=${limite}`)
     return response.data
+  },
+
+  // Buscar chamados de vários tickets de uma vez
+  async buscarChamadosLote(tickets) {
+    const response = await api.post('/api/triagem/sistema-principal/chamados-lote', { tickets })
+    return response.data
+  },
+
+  // Consultar várias triagens por ID
+  async obterTriagensLote(triagemIds) {
+    const response = await api.post('/api/triagem/triagens/lote', { triagem_ids: triagemIds })
+    return response.data
+  },
+
+  // Triagens de vários tickets
+  async obterTriagensPorTickets(tickets) {
+    const response = await api.post('/api/triagem/triagens/por-tickets', { tickets })
+    return response.data
+  },
+
+  // Eventos em tempo real do dashboard (Server-Sent Events); retorna a função que fecha a conexão
+  assinarEventos({ onNovaTriagem, onFeedback, onConectado, onErro } = {}) {
+    const fonte = new EventSource(`${API_BASE_URL}/api/triagem/eventos`)
+    const ler = (callback) => (evento) => callback?.(JSON.parse(evento.data))
+
+    fonte.addEventListener('nova_triagem', ler(onNovaTriagem))
+    fonte.addEventListener('feedback', ler(onFeedback))
+    fonte.onopen = () => {
+      console.log('📡 Eventos do dashboard conectados')
+      onConectado?.()
+    }
+    // O EventSource reconecta sozinho após erros
+    fonte.onerror = (error) => onErro?.(error)
+
+    return () => fonte.close()
   }
 }
 